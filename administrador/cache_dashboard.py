@@ -0,0 +1,97 @@
+# administrador/cache_dashboard.py
+"""
+Cache dos resultados do dashboard do administrador.
+
+Vários administradores deixam o dashboard aberto e o atualizam; sem cache,
+cada atualização refaz todas as agregações. O resultado de cada bloco
+(administrador.dashboard), por dia, período e filtro de profissionais, fica
+no cache "dashboard" (ver TV_CACHE_BACKEND) junto com a marca d'água dos
+eventos: o maior id de Paciente, Chamada, ChamadaProfissional e Atendimento
+no momento do cálculo.
+
+Um resultado em cache é servido enquanto a marca não mudar, ou seja, enquanto
+nenhum evento novo for gravado. Alterações que não criam linhas (ex.: paciente
+marcado como atendido) e os logins do bloco "equipe ativa" não mexem na marca;
+por isso o resultado também expira: em DASHBOARD_CACHE_HOJE segundos na visão
+"Hoje" e em DASHBOARD_CACHE_PERIODO nos períodos maiores, que mostram o
+horário do cálculo ("dados de").
+
+Acertos e falhas são contados no próprio cache (``estatisticas``).
+"""
+
+import datetime
+from typing import Any, Callable, Dict, Tuple
+
+from django.core.cache import caches
+from django.db.models import Max
+from django.utils import timezone
+
+from core.models import Atendimento, Chamada, ChamadaProfissional, Paciente
+
+MODELOS_EVENTOS = (Paciente, Chamada, ChamadaProfissional, Atendimento)
+
+CHAVE_ACERTOS = "dashboard:acertos"
+CHAVE_FALHAS = "dashboard:falhas"
+
+
+def _cache():
+    return caches["dashboard"]
+
+
+def marca_eventos() -> Tuple:
+    """Maior id de cada tabela de eventos (uma busca no índice da PK cada)."""
+    return tuple(
+        modelo.objects.aggregate(maximo=Max("id"))["maximo"]
+        for modelo in MODELOS_EVENTOS
+    )
+
+
+def _contar(chave: str) -> None:
+    cache = _cache()
+    cache.add(chave, 0, timeout=None)
+    try:
+        cache.incr(chave)
+    except ValueError:
+        # Contadores zerados entre o add e o incr
+        pass
+
+
+def obter(
+    chave: str, calcular: Callable[[], Dict[str, Any]], tempo: int
+) -> Tuple[Dict[str, Any], datetime.datetime, bool]:
+    """
+    Resultado em cache para a chave, recalculado se a marca d'água dos eventos
+    mudou ou se passou ``tempo`` segundos. Retorna (dados, calculado em, se
+    veio do cache).
+    """
+    cache = _cache()
+    # Lida antes do cálculo: um evento gravado durante ele invalida o resultado
+    marca = marca_eventos()
+    entrada = cache.get(chave)
+    if entrada is not None and entrada["marca"] == marca:
+        _contar(CHAVE_ACERTOS)
+        return entrada["dados"], entrada["calculado_em"], True
+
+    _contar(CHAVE_FALHAS)
+    dados = calcular()
+    calculado_em = timezone.now()
+    cache.set(
+        chave, {"marca": marca, "calculado_em": calculado_em, "dados": dados}, tempo
+    )
+    return dados, calculado_em, False
+
+
+def estatisticas() -> Dict[str, Any]:
+    valores = _cache().get_many([CHAVE_ACERTOS, CHAVE_FALHAS])
+    acertos = valores.get(CHAVE_ACERTOS, 0)
+    falhas = valores.get(CHAVE_FALHAS, 0)
+    total = acertos + falhas
+    return {
+        "acertos": acertos,
+        "falhas": falhas,
+        "taxa_acerto": round(acertos / total * 100, 1) if total else 0.0,
+    }
+
+
+def zerar_estatisticas() -> None:
+    _cache().delete_many([CHAVE_ACERTOS, CHAVE_FALHAS])
@@ -0,0 +1,365 @@
+# administrador/dashboard.py
+"""
+Blocos do dashboard do administrador.
+
+Cada bloco é calculado por uma função independente, que recebe o período
+(``Periodo``) e retorna um dicionário serializável em JSON. A página do
+dashboard é enviada sem dados e busca os blocos em paralelo pela view
+``dashboard_bloco``; cada bloco tem a sua entrada em cache
+(administrador.cache_dashboard), então um bloco lento não atrasa os outros
+nem é recalculado por causa deles.
+"""
+
+import datetime
+from typing import Any, Callable, Dict
+
+import numpy as np
+
+from django.db.models import Count, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from core import analytics
+from core.arquivo import fonte
+from core.entregas import taxas_por_canal
+from core.models import (
+    Atendimento,
+    Chamada,
+    CustomUser,
+    JornadaPaciente,
+    Paciente,
+    RegistroDeAcesso,
+    ResumoGuicheHora,
+    ResumoPacientesHora,
+    ResumoProfissionalHora,
+)
+
+FILTROS_PROFISSIONAIS = ("profissional_saude", "guiche", "recepcionista")
+
+
+class Periodo:
+    """Dias do período do dashboard, de ``inicio_dia`` até hoje."""
+
+    ROTULOS = {
+        1: "Hoje",
+        7: "Últimos 7 dias",
+        14: "Últimos 14 dias",
+        30: "Últimos 30 dias",
+    }
+
+    def __init__(self, dias: int, hoje: datetime.date):
+        self.dias = dias
+        self.hoje = hoje
+        # dias úteis inteiros (inclusive)
+        self.inicio_dia = hoje - datetime.timedelta(days=dias - 1)
+        self.inicio = timezone.make_aware(
+            datetime.datetime.combine(self.inicio_dia, datetime.time.min),
+            timezone.get_default_timezone(),
+        )
+
+    @classmethod
+    def da_requisicao(cls, request) -> "Periodo":
+        """Período do parâmetro ``period`` (padrão 30 dias)."""
+        try:
+            dias = int(request.GET.get("period", "30"))
+            if dias < 1:
+                dias = 30
+        except ValueError:
+            dias = 30
+        return cls(dias, timezone.localdate())
+
+    @property
+    def rotulo(self) -> str:
+        return self.ROTULOS.get(self.dias, f"Últimos {self.dias} dias")
+
+    # Blocos de contagem lidos dos resumos por hora (core.resumos); o dia de
+    # atendimento é o dia local da geração da senha, então as horas a partir
+    # de ``inicio`` são exatamente os dias do período.
+
+    def resumo_pacientes(self):
+        return ResumoPacientesHora.objects.filter(hora__gte=self.inicio)
+
+    def resumo_guiches(self):
+        return ResumoGuicheHora.objects.filter(hora__gte=self.inicio)
+
+    def resumo_profissionais(self):
+        return ResumoProfissionalHora.objects.filter(hora__gte=self.inicio)
+
+
+def filtro_profissionais(request) -> str:
+    """Filtro do bloco por profissional (padrão: profissionais de saúde)."""
+    filtro = request.GET.get("prof_filter", "profissional_saude")
+    return filtro if filtro in FILTROS_PROFISSIONAIS else "profissional_saude"
+
+
+def _percentual(parte: int, total: int) -> float:
+    return round((parte / total) * 100, 1) if total > 0 else 0
+
+
+def _minutos(jornadas, fim: str, inicio: str) -> np.ndarray:
+    """Minutos entre duas etapas das jornadas (diferença calculada pelo banco)."""
+    minutos = (
+        jornadas.filter(**{f"{inicio}__isnull": False})
+        .annotate(minutos=analytics.Minutos(fim, inicio))
+        .values_list("minutos", flat=True)
+        .order_by()
+    )
+    return analytics.vetor(minutos)
+
+
+def _usuarios_ativos(periodo: Periodo, funcao: str) -> int:
+    return (
+        fonte(RegistroDeAcesso, periodo.inicio)
+        .objects.filter(
+            data_hora__gte=periodo.inicio,
+            tipo_de_acesso="login",
+            usuario__funcao=funcao,
+        )
+        .values("usuario_id")
+        .distinct()
+        .count()
+    )
+
+
+def visao_geral(periodo: Periodo, prof_filter: str) -> Dict[str, Any]:
+    """Pacientes, atendidos e aguardando no período, e equipe ativa."""
+    totais = periodo.resumo_pacientes().aggregate(
+        pacientes=Sum("pacientes"), atendidos=Sum("atendidos")
+    )
+    total_pacientes = totais["pacientes"] or 0
+    total_atendidos = totais["atendidos"] or 0
+    return {
+        "total_pacientes": total_pacientes,
+        "total_atendidos": total_atendidos,
+        "total_aguardando": total_pacientes - total_atendidos,
+        "taxa_atendimento": _percentual(total_atendidos, total_pacientes),
+        "profissionais_ativos": _usuarios_ativos(periodo, "profissional_saude"),
+        "guichistas_ativos": _usuarios_ativos(periodo, "guiche"),
+    }
+
+
+def tempos(periodo: Periodo, prof_filter: str) -> Dict[str, Any]:
+    """
+    Tempos de espera, de atendimento no guichê e de consulta: médias e
+    distribuições (percentis e histograma, core.analytics).
+    """
+    inicio_hoje = timezone.make_aware(
+        datetime.datetime.combine(periodo.hoje, datetime.time.min),
+        timezone.get_default_timezone(),
+    )
+    # Uma linha por visita (core.jornadas): cada tempo é a diferença entre
+    # duas etapas da mesma linha
+    chamados = JornadaPaciente.objects.filter(
+        primeira_chamada_guiche__gte=periodo.inicio
+    )
+    esperas = chamados.annotate(
+        espera=analytics.Minutos("primeira_chamada_guiche", "gerada"),
+        desde_hoje=analytics.Minutos("primeira_chamada_guiche", Value(inicio_hoje)),
+    ).values_list("espera", "desde_hoje")
+    espera, desde_hoje = analytics.vetor(esperas).reshape(-1, 2).T
+    # primeira chamada a partir da meia-noite de hoje
+    hoje = desde_hoje >= 0
+
+    # primeira chamada -> confirmado no guiche / com o profissional
+    distribuicoes = {
+        "espera": analytics.distribuicao(espera),
+        "espera_hoje": analytics.distribuicao(espera[hoje]),
+        "guiche": analytics.distribuicao(
+            _minutos(
+                JornadaPaciente.objects.filter(confirmado_guiche__gte=periodo.inicio),
+                "confirmado_guiche",
+                "primeira_chamada_guiche",
+            )
+        ),
+        "consulta": analytics.distribuicao(
+            _minutos(
+                JornadaPaciente.objects.filter(
+                    confirmado_profissional__gte=periodo.inicio
+                ),
+                "confirmado_profissional",
+                "primeira_chamada_profissional",
+            )
+        ),
+    }
+    return {
+        "tempo_medio_espera": distribuicoes["espera"]["media"],
+        "tempo_medio_espera_hoje": distribuicoes["espera_hoje"]["media"],
+        "tempo_medio_guiche": distribuicoes["guiche"]["media"],
+        "tempo_medio_consulta": distribuicoes["consulta"]["media"],
+        "distribuicoes": distribuicoes,
+    }
+
+
+def volume_tipo(periodo: Periodo, prof_filter: str) -> Dict[str, Any]:
+    """Pacientes por tipo de senha."""
+    volume_por_tipo = (
+        periodo.resumo_pacientes()
+        .values("tipo_senha")
+        .annotate(total=Sum("pacientes"))
+        .filter(total__gt=0)
+        .order_by("-total")
+    )
+    tipo_display = dict(Paciente.SENHA_CHOICES)
+    return {
+        "labels": [
+            tipo_display.get(i["tipo_senha"], i["tipo_senha"] or "Sem tipo")
+            for i in volume_por_tipo
+        ],
+        "data": [i["total"] for i in volume_por_tipo],
+    }
+
+
+def profissionais(periodo: Periodo, prof_filter: str) -> Dict[str, Any]:
+    """Atendimentos por funcionário, filtrável pelo tipo de funcionário."""
+    if prof_filter == "recepcionista":
+        por_prof = (
+            Atendimento.objects.filter(
+                data_hora__gte=periodo.inicio, funcionario__funcao="recepcionista"
+            )
+            .values("funcionario__first_name", "funcionario__last_name")
+            .annotate(total=Count("id"))
+            .order_by("-total")
+        )
+        return {
+            "labels": [
+                f"{i['funcionario__first_name'] or ''} "
+                f"{i['funcionario__last_name'] or ''}".strip()
+                for i in por_prof
+            ],
+            "data": [i["total"] for i in por_prof],
+        }
+
+    # Confirmações somadas dos resumos numa única consulta agrupada sobre os
+    # usuários: o filtro fica na agregação (e não no WHERE), então quem não
+    # tem confirmações no período aparece com zero.
+    if prof_filter == "guiche":
+        # Guichistas, pelos guichês que operam (como em listar_funcionarios)
+        resumos = "guiches__resumos"
+    else:
+        # padrão: profissionais de saúde (resumos de ChamadaProfissional)
+        resumos = "resumos"
+    confirmados = Q(
+        **{f"{resumos}__acao": "confirmado", f"{resumos}__hora__gte": periodo.inicio}
+    )
+    usuarios = (
+        CustomUser.objects.filter(funcao=prof_filter)
+        .annotate(total=Coalesce(Sum(f"{resumos}__total", filter=confirmados), 0))
+        # ordenar por contagem decrescente (inclui zeros)
+        .order_by("-total", "id")
+        .values_list("first_name", "last_name", "username", "total")
+    )
+    labels, data = [], []
+    for first_name, last_name, username, total in usuarios:
+        labels.append(f"{first_name} {last_name}".strip() or username)
+        data.append(total)
+    return {"labels": labels, "data": data}
+
+
+def tendencia(periodo: Periodo, prof_filter: str) -> Dict[str, Any]:
+    """Pacientes e atendidos por hora (Hoje) ou por dia."""
+    if periodo.dias == 1:
+        por_hora = (
+            periodo.resumo_pacientes()
+            .values("hora")
+            .annotate(total=Sum("pacientes"), atendidos=Sum("atendidos"))
+            .order_by("hora")
+        )
+        hora_map = {timezone.localtime(i["hora"]).strftime("%Hh"): i for i in por_hora}
+        labels = [f"{h:02d}h" for h in range(6, 22)]
+        vazio = {"total": 0, "atendidos": 0}
+        return {
+            "labels": labels,
+            "total": [hora_map.get(h, vazio)["total"] for h in labels],
+            "atendidos": [hora_map.get(h, vazio)["atendidos"] for h in labels],
+        }
+
+    por_dia = (
+        periodo.resumo_pacientes()
+        .annotate(dia_atendimento=TruncDate("hora"))
+        .values("dia_atendimento")
+        .annotate(total=Sum("pacientes"), atendidos=Sum("atendidos"))
+        .filter(total__gt=0)
+        .order_by("dia_atendimento")
+    )
+    return {
+        "labels": [i["dia_atendimento"].strftime("%d/%m") for i in por_dia],
+        "total": [i["total"] for i in por_dia],
+        "atendidos": [i["atendidos"] for i in por_dia],
+    }
+
+
+def pico_hora(periodo: Periodo, prof_filter: str) -> Dict[str, Any]:
+    """Pacientes por hora do dia, somados ao longo do período."""
+    por_hora: Dict[str, int] = {}
+    for hora, total in (
+        periodo.resumo_pacientes().values_list("hora").annotate(Sum("pacientes"))
+    ):
+        h = timezone.localtime(hora).strftime("%Hh")
+        por_hora[h] = por_hora.get(h, 0) + total
+    labels = [f"{h:02d}h" for h in range(6, 21)]
+    return {"labels": labels, "data": [por_hora.get(h, 0) for h in labels]}
+
+
+def qualidade(periodo: Periodo, prof_filter: str) -> Dict[str, Any]:
+    """Taxas de reanúncio, desistência, encaminhamento e entrega."""
+    chamadas_por_acao = dict(
+        periodo.resumo_guiches()
+        .values_list("acao")
+        .annotate(total=Sum("total"))
+        .order_by()
+    )
+    chamadas_prof_por_acao = dict(
+        periodo.resumo_profissionais()
+        .values_list("acao")
+        .annotate(total=Sum("total"))
+        .order_by()
+    )
+    total_chamadas = sum(chamadas_por_acao.values())
+    total_desistencias = chamadas_por_acao.get("desistencia", 0)
+    total_encaminhamentos = chamadas_prof_por_acao.get("encaminha", 0)
+    base_enc = chamadas_prof_por_acao.get("confirmado", 0) + total_encaminhamentos
+    return {
+        "taxa_reanuncio": _percentual(
+            chamadas_por_acao.get("reanuncio", 0), total_chamadas
+        ),
+        "total_desistencias": total_desistencias,
+        "taxa_desistencia": _percentual(total_desistencias, total_chamadas),
+        "taxa_encaminhamento": _percentual(total_encaminhamentos, base_enc),
+        "entregas_por_canal": taxas_por_canal(periodo.inicio),
+    }
+
+
+def reanuncios(periodo: Periodo, prof_filter: str) -> Dict[str, Any]:
+    """Os cinco pacientes com mais reanúncios no período."""
+    top_reanuncios = (
+        fonte(Chamada, periodo.inicio)
+        .objects.filter(acao="reanuncio", data_hora__gte=periodo.inicio)
+        .values("paciente__nome_completo", "paciente__senha", "paciente__tipo_senha")
+        .annotate(total=Count("id"))
+        .order_by("-total")[:5]
+    )
+    return {
+        "pacientes": [
+            {
+                "nome": i["paciente__nome_completo"],
+                "senha": i["paciente__senha"],
+                "tipo_senha": i["paciente__tipo_senha"],
+                "total": i["total"],
+            }
+            for i in top_reanuncios
+        ]
+    }
+
+
+BLOCOS: Dict[str, Callable[[Periodo, str], Dict[str, Any]]] = {
+    "visao-geral": visao_geral,
+    "tempos": tempos,
+    "volume-tipo": volume_tipo,
+    "profissionais": profissionais,
+    "tendencia": tendencia,
+    "pico-hora": pico_hora,
+    "qualidade": qualidade,
+    "reanuncios": reanuncios,
+}
+# Blocos que dependem do filtro de profissionais (parte da chave do cache)
+BLOCOS_COM_FILTRO = ("profissionais",)
@@ -38,4 +38,20 @@ urlpatterns = [
         name="registrar_atividade",
     ),
     path("dashboard/", views.dashboard, name="dashboard"),
+    path(
+        "dashboard/blocos/<slug:bloco>/",
+        views.dashboard_bloco,
+        name="dashboard_bloco",
+    ),
+    path("exportar/<slug:tabela>/", views.exportar, name="exportar"),
+    path(
+        "status-notificacoes/",
+        views.status_notificacoes,
+        name="status_notificacoes",
+    ),
+    path(
+        "status-cache-dashboard/",
+        views.status_cache_dashboard,
+        name="status_cache_dashboard",
+    ),
 ]
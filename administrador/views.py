@@ -1,31 +1,30 @@
 # administrador/views.py
+import datetime
+
+from django.conf import settings
 from django.contrib import messages
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.utils import timezone
-from django.contrib.sessions.models import Session
 from django.contrib.auth import get_user_model
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.cache import never_cache
 
+from . import cache_dashboard
+from .dashboard import BLOCOS, BLOCOS_COM_FILTRO, Periodo, filtro_profissionais
+from core import exportacao, presenca
 from core.decorators import admin_required
+from core.disjuntor import estado_disjuntores
 from core.forms import CadastrarFuncionarioForm, EditarFuncionarioForm
 from core.models import (
     CustomUser,
-    Paciente,
-    Chamada,
-    ChamadaProfissional,
-    RegistroDeAcesso,
-    Atendimento,
+    Notificacao,
 )  # Importe o modelo CustomUser
 from django.contrib.auth.forms import SetPasswordForm
 
-from django.db.models import Count, Q
-from django.db.models.functions import TruncDate, TruncHour
-from datetime import timedelta, datetime
-import json
-from typing import Dict
+from django.db.models import Count
 
 
 @admin_required
@@ -52,10 +51,8 @@ def cadastrar_funcionario(request):
 def registrar_atividade(request):
     """View para registrar atividade do usuário em tempo real"""
     if request.method == "POST":
-        # Registrar atividade no banco de dados
-        RegistroDeAcesso.objects.create(
-            usuario=request.user, tipo_de_acesso="atividade", data_hora=timezone.now()
-        )
+        # Último sinal no cache de presença (core.presenca)
+        presenca.registrar(request.user.pk, sessao=request.session)
         return JsonResponse({"status": "ok"})
     return JsonResponse({"status": "error"}, status=400)
 
@@ -74,52 +71,23 @@ def listar_funcionarios(request):
     # Calcular estatísticas
     total_funcionarios = funcionarios.count()
     funcionarios_ativos = funcionarios.filter(is_active=True).count()
+    funcoes_distintas = funcionarios.values("funcao").distinct().count()
 
     # Calcular status dos funcionários com três categorias
     usuarios_online_ativos_ids = []  # Verde: online e ativo (últimos 2 min)
     usuarios_online_inativos_ids = []  # Amarelo: online mas inativo (2-5 min)
     usuarios_offline_ids = []  # Vermelho: offline (mais de 5 min)
 
-    agora = timezone.now()
-    cinco_minutos_atras = agora - timezone.timedelta(minutes=5)
-    dois_minutos_atras = agora - timezone.timedelta(minutes=2)
-
-    # Obter sessões ativas (não expiradas)
-    sessoes_ativas = Session.objects.filter(expire_date__gt=agora)
-    usuarios_com_sessao_ativa = set()
-
-    for sessao in sessoes_ativas:
-        try:
-            dados_sessao = sessao.get_decoded()
-            user_id = dados_sessao.get("_auth_user_id")
-            if user_id:
-                usuarios_com_sessao_ativa.add(int(user_id))
-        except:
-            continue
-
-    # Usuários com atividade recente (nos últimos 5 minutos)
-    usuarios_com_atividade_recente = set(
-        RegistroDeAcesso.objects.filter(data_hora__gte=cinco_minutos_atras)
-        .values_list("usuario_id", flat=True)
-        .distinct()
-    )
-
-    # Usuários realmente online: apenas aqueles com atividade nos últimos 10 minutos
-    # (removendo a dependência de sessões ativas que podem durar semanas)
-    usuarios_online_potenciais = usuarios_com_atividade_recente
+    # Situação de todos os funcionários numa consulta (core.presenca): online
+    # só quem tem sessão aberta e atividade recente
+    funcionarios = presenca.anotar_situacao(funcionarios)
 
     # Para cada funcionário, determinar seu status
     for usuario in funcionarios:
-        if usuario.id in usuarios_online_potenciais:
-            # Verificar se teve atividade muito recente (nos últimos 2 minutos)
-            atividade_muito_recente = RegistroDeAcesso.objects.filter(
-                usuario=usuario, data_hora__gte=dois_minutos_atras
-            ).exists()
-
-            if atividade_muito_recente:
-                usuarios_online_ativos_ids.append(usuario.id)
-            else:
-                usuarios_online_inativos_ids.append(usuario.id)
+        if usuario.situacao == "ativo":
+            usuarios_online_ativos_ids.append(usuario.id)
+        elif usuario.situacao == "inativo":
+            usuarios_online_inativos_ids.append(usuario.id)
         else:
             usuarios_offline_ids.append(usuario.id)
 
@@ -133,8 +101,6 @@ def listar_funcionarios(request):
     # Manter compatibilidade - total online = ativos + inativos
     funcionarios_online = funcionarios_online_ativos + funcionarios_online_inativos
 
-    funcoes_distintas = funcionarios.values("funcao").distinct().count()
-
     # Obter todas as funções disponíveis para o filtro
     funcoes_disponiveis = CustomUser.FUNCAO_CHOICES
 
@@ -230,321 +196,98 @@ def editar_dados_funcionario(request, pk):
 
 @admin_required
 def dashboard(request):
-    hoje = timezone.now().date()
-    # Period selector: default 30 days. Accept values: '1' (hoje), '7', '14', '30'
-    period_raw = request.GET.get("period", "30")
-    try:
-        period_days = int(period_raw)
-        if period_days < 1:
-            period_days = 30
-    except Exception:
-        period_days = 30
-
-    # start datetime (inclusive) for aggregations
-    if period_days == 1:
-        # for 1 day use start of today
-        start_dt = timezone.make_aware(
-            datetime.combine(hoje, datetime.min.time()), timezone.get_current_timezone()
-        )
-    else:
-        start_dt = timezone.now() - timedelta(days=period_days - 1)
-
-    # expose the selected period to templates
-    selected_period_label = {
-        1: "Hoje",
-        7: "Últimos 7 dias",
-        14: "Últimos 14 dias",
-        30: "Últimos 30 dias",
-    }.get(period_days, f"Últimos {period_days} dias")
-
-    # ── BLOCO 1: VISÃO GERAL (período selecionado) ──────────────────────────
-    pacientes_period = Paciente.objects.filter(horario_geracao_senha__gte=start_dt)
-    total_pacientes_period = pacientes_period.count()
-    total_atendidos_period = pacientes_period.filter(atendido=True).count()
-    total_aguardando = pacientes_period.filter(atendido=False).count()
-    taxa_atendimento_period = (
-        round((total_atendidos_period / total_pacientes_period) * 100, 1)
-        if total_pacientes_period > 0
-        else 0
-    )
-
-    # ── BLOCO 2: TEMPO MÉDIO DE ESPERA ───────────────────────────────────────
-    # horario_geracao_senha -> primeira chamada no guiche
-    chamadas_recentes = (
-        Chamada.objects.filter(acao="chamada", data_hora__gte=start_dt)
-        .select_related("paciente")
-        .order_by("paciente_id", "data_hora")
-    )
-    visto = set()
-    tempos_espera = []
-    tempos_espera_hoje = []
-    for c in chamadas_recentes:
-        if c.paciente_id in visto:
-            continue
-        visto.add(c.paciente_id)
-        if c.paciente.horario_geracao_senha:
-            minutos = (
-                c.data_hora - c.paciente.horario_geracao_senha
-            ).total_seconds() / 60
-            if 0 < minutos < 480:
-                tempos_espera.append(minutos)
-                if c.data_hora.date() == hoje:
-                    tempos_espera_hoje.append(minutos)
-
-    tempo_medio_espera = (
-        round(sum(tempos_espera) / len(tempos_espera), 1) if tempos_espera else 0
-    )
-    tempo_medio_espera_hoje = (
-        round(sum(tempos_espera_hoje) / len(tempos_espera_hoje), 1)
-        if tempos_espera_hoje
-        else 0
-    )
+    """Página do dashboard; os blocos são buscados por dashboard_bloco."""
+    periodo = Periodo.da_requisicao(request)
+    context = {
+        "data_hoje": periodo.hoje,
+        "inicio_periodo": periodo.inicio_dia,
+        "selected_period_label": periodo.rotulo,
+        "selected_period": periodo.dias,
+        "prof_filter": filtro_profissionais(request),
+        "blocos": list(BLOCOS),
+    }
+    return render(request, "administrador/dashboard.html", context)
 
-    # ── BLOCO 3: TEMPO MÉDIO DE ATENDIMENTO NO GUICHE ────────────────────────
-    # chamada -> confirmado no guiche
-    tempos_guiche = []
-    for conf in Chamada.objects.filter(
-        acao="confirmado", data_hora__gte=start_dt
-    ).select_related("paciente"):
-        chamada_ini = (
-            Chamada.objects.filter(
-                paciente=conf.paciente, acao="chamada", data_hora__lt=conf.data_hora
-            )
-            .order_by("data_hora")
-            .first()
-        )
-        if chamada_ini:
-            minutos = (conf.data_hora - chamada_ini.data_hora).total_seconds() / 60
-            if 0 < minutos < 240:
-                tempos_guiche.append(minutos)
 
-    tempo_medio_guiche = (
-        round(sum(tempos_guiche) / len(tempos_guiche), 1) if tempos_guiche else 0
+@never_cache
+@admin_required
+def dashboard_bloco(request, bloco):
+    """Um bloco do dashboard em JSON, calculado ou lido do cache."""
+    calcular = BLOCOS.get(bloco)
+    if calcular is None:
+        return JsonResponse({"erro": f"Bloco desconhecido: {bloco}"}, status=404)
+
+    periodo = Periodo.da_requisicao(request)
+    prof_filter = filtro_profissionais(request) if bloco in BLOCOS_COM_FILTRO else ""
+    dados, calculado_em, do_cache = cache_dashboard.obter(
+        f"dashboard:{bloco}:{periodo.hoje.isoformat()}:{periodo.dias}:{prof_filter}",
+        lambda: calcular(periodo, prof_filter),
+        (
+            settings.DASHBOARD_CACHE_HOJE
+            if periodo.dias == 1
+            else settings.DASHBOARD_CACHE_PERIODO
+        ),
+    )
+    return JsonResponse(
+        {
+            "bloco": bloco,
+            "dados": dados,
+            "calculado_em": calculado_em.isoformat(),
+            "do_cache": do_cache,
+        }
     )
 
-    # ── BLOCO 4: TEMPO MÉDIO DE CONSULTA COM PROFISSIONAL ────────────────────
-    tempos_consulta = []
-    for conf in ChamadaProfissional.objects.filter(
-        acao="confirmado", data_hora__gte=start_dt
-    ).select_related("paciente"):
-        chamada_ini = (
-            ChamadaProfissional.objects.filter(
-                paciente=conf.paciente, acao="chamada", data_hora__lt=conf.data_hora
-            )
-            .order_by("data_hora")
-            .first()
-        )
-        if chamada_ini:
-            minutos = (conf.data_hora - chamada_ini.data_hora).total_seconds() / 60
-            if 0 < minutos < 480:
-                tempos_consulta.append(minutos)
 
-    tempo_medio_consulta = (
-        round(sum(tempos_consulta) / len(tempos_consulta), 1) if tempos_consulta else 0
-    )
+@never_cache
+@admin_required
+def status_notificacoes(request):
+    """Estado dos disjuntores do Twilio e tamanho da caixa de saída, em JSON."""
+    fila = {status: 0 for status, _ in Notificacao.STATUS}
+    fila.update(Notificacao.objects.values_list("status").annotate(total=Count("id")))
+    return JsonResponse({"disjuntores": estado_disjuntores(), "fila": fila})
 
-    # ── BLOCO 5: VOLUME POR TIPO DE SERVICO ──────────────────────────────────
-    volume_por_tipo = (
-        Paciente.objects.filter(horario_geracao_senha__gte=start_dt)
-        .values("tipo_senha")
-        .annotate(total=Count("id"))
-        .order_by("-total")
-    )
-    tipo_display = dict(Paciente.SENHA_CHOICES)
-    tipo_labels = [
-        tipo_display.get(i["tipo_senha"], i["tipo_senha"] or "Sem tipo")
-        for i in volume_por_tipo
-    ]
-    tipo_data = [i["total"] for i in volume_por_tipo]
-
-    # ── BLOCO 6: ATENDIMENTOS POR PROFISSIONAL (filtrável por tipo de funcionário)
-    prof_filter = request.GET.get("prof_filter", "profissional_saude")
-
-    if prof_filter == "guiche":
-        # Agrupar por usuário (guichista) e mostrar nomes como em listar_funcionarios
-        guichistas = CustomUser.objects.filter(funcao="guiche")
-        guiche_counts = []
-        for u in guichistas:
-            cnt = Chamada.objects.filter(
-                acao="confirmado", data_hora__gte=start_dt, guiche__funcionario=u
-            ).count()
-            guiche_counts.append(
-                (f"{u.first_name} {u.last_name}".strip() or u.username, cnt)
-            )
-        # ordenar por contagem decrescente e separar labels/data (inclui zeros)
-        guiche_counts.sort(key=lambda x: x[1], reverse=True)
-        prof_labels = [i[0] for i in guiche_counts]
-        prof_data = [i[1] for i in guiche_counts]
-    elif prof_filter == "recepcionista":
-        por_prof = (
-            Atendimento.objects.filter(
-                data_hora__gte=start_dt, funcionario__funcao="recepcionista"
-            )
-            .values("funcionario__first_name", "funcionario__last_name")
-            .annotate(total=Count("id"))
-            .order_by("-total")
-        )
-        prof_labels = [
-            f"{i.get('funcionario__first_name','') or ''} {i.get('funcionario__last_name','') or ''}".strip()
-            for i in por_prof
-        ]
-        prof_data = [i["total"] for i in por_prof]
-    else:
-        # padrão: profissionais de saúde (usa ChamadaProfissional)
-        # Incluir todos os profissionais de saúde (mesmo com zero) e contar confirmações
-        profs = CustomUser.objects.filter(funcao="profissional_saude")
-        prof_counts = []
-        for p in profs:
-            cnt = ChamadaProfissional.objects.filter(
-                acao="confirmado", data_hora__gte=start_dt, profissional_saude=p
-            ).count()
-            prof_counts.append(
-                (f"{p.first_name} {p.last_name}".strip() or p.username, cnt)
-            )
-        prof_counts.sort(key=lambda x: x[1], reverse=True)
-        prof_labels = [i[0] for i in prof_counts]
-        prof_data = [i[1] for i in prof_counts]
-
-    # ── BLOCO 7: TENDÊNCIA (período selecionado)
-    if period_days == 1:
-        # For 'Hoje' show hourly trend
-        por_hora_t = (
-            Paciente.objects.filter(horario_geracao_senha__gte=start_dt)
-            .annotate(hora=TruncHour("horario_geracao_senha"))
-            .values("hora")
-            .annotate(total=Count("id"), atendidos=Count("id", filter=Q(atendido=True)))
-            .order_by("hora")
-        )
-        # build labels for hours (6..21) but include any hour present in data
-        hora_map = {
-            timezone.localtime(i["hora"]).strftime("%Hh"): i for i in por_hora_t
-        }
-        tendencia_labels = []
-        tendencia_total = []
-        tendencia_atendidos = []
-        for h in range(6, 22):
-            lab = f"{h:02d}h"
-            item = hora_map.get(lab)
-            if item:
-                tendencia_total.append(item["total"])
-                tendencia_atendidos.append(item["atendidos"])
-            else:
-                tendencia_total.append(0)
-                tendencia_atendidos.append(0)
-            tendencia_labels.append(lab)
-    else:
-        tendencia = (
-            Paciente.objects.filter(horario_geracao_senha__gte=start_dt)
-            .annotate(dia=TruncDate("horario_geracao_senha"))
-            .values("dia")
-            .annotate(total=Count("id"), atendidos=Count("id", filter=Q(atendido=True)))
-            .order_by("dia")
-        )
-        tendencia_labels = [i["dia"].strftime("%d/%m") for i in tendencia]
-        tendencia_total = [i["total"] for i in tendencia]
-        tendencia_atendidos = [i["atendidos"] for i in tendencia]
-
-    # ── BLOCO 8: PICO DE DEMANDA POR HORA ────────────────────────────────────
-    por_hora_qs = (
-        Paciente.objects.filter(horario_geracao_senha__gte=start_dt)
-        .annotate(hora=TruncHour("horario_geracao_senha"))
-        .values("hora")
-        .annotate(total=Count("id"))
-    )
-    hora_data_raw: Dict[str, int] = {}
-    for item in por_hora_qs:
-        h = timezone.localtime(item["hora"]).strftime("%Hh")
-        hora_data_raw[h] = hora_data_raw.get(h, 0) + item["total"]
-
-    hora_labels = [f"{h:02d}h" for h in range(6, 21)]
-    hora_data = [hora_data_raw.get(k, 0) for k in hora_labels]
-
-    # ── BLOCO 9: INDICADORES DE QUALIDADE ────────────────────────────────────
-    total_chamadas = Chamada.objects.filter(data_hora__gte=start_dt).count()
-    total_reanuncios = Chamada.objects.filter(
-        acao="reanuncio", data_hora__gte=start_dt
-    ).count()
-    taxa_reanuncio = (
-        round((total_reanuncios / total_chamadas) * 100, 1) if total_chamadas > 0 else 0
-    )
 
-    # Desistências
-    total_desistencias = Chamada.objects.filter(
-        acao="desistencia", data_hora__gte=start_dt
-    ).count()
-    taxa_desistencia = (
-        round((total_desistencias / total_chamadas) * 100, 1)
-        if total_chamadas > 0
-        else 0
-    )
+@never_cache
+@admin_required
+def status_cache_dashboard(request):
+    """Acertos e falhas do cache do dashboard, em JSON."""
+    return JsonResponse(cache_dashboard.estatisticas())
 
-    total_encaminhamentos = ChamadaProfissional.objects.filter(
-        acao="encaminha", data_hora__gte=start_dt
-    ).count()
-    total_conf_prof = ChamadaProfissional.objects.filter(
-        acao="confirmado", data_hora__gte=start_dt
-    ).count()
-    base_enc = total_conf_prof + total_encaminhamentos
-    taxa_encaminhamento = (
-        round((total_encaminhamentos / base_enc) * 100, 1) if base_enc > 0 else 0
-    )
 
-    # ── BLOCO 10: EQUIPE ATIVA HOJE ──────────────────────────────────────────
-    profissionais_ativos = (
-        RegistroDeAcesso.objects.filter(
-            data_hora__gte=start_dt,
-            tipo_de_acesso="login",
-            usuario__funcao="profissional_saude",
+@never_cache
+@admin_required
+def exportar(request, tabela):
+    """
+    Exporta a tabela em CSV, em streaming (core.exportacao). Parâmetros:
+    ``inicio`` e ``fim`` (AAAA-MM-DD, inclusive; padrão: últimos 30 dias) e
+    ``gzip=1`` para baixar o arquivo comprimido.
+    """
+    if tabela not in exportacao.TABELAS:
+        return JsonResponse({"erro": f"Tabela desconhecida: {tabela}"}, status=404)
+    try:
+        fim = (
+            datetime.date.fromisoformat(request.GET["fim"])
+            if request.GET.get("fim")
+            else timezone.localdate()
         )
-        .values("usuario_id")
-        .distinct()
-        .count()
-    )
-    guichistas_ativos = (
-        RegistroDeAcesso.objects.filter(
-            data_hora__gte=start_dt, tipo_de_acesso="login", usuario__funcao="guiche"
+        inicio = (
+            datetime.date.fromisoformat(request.GET["inicio"])
+            if request.GET.get("inicio")
+            else fim - datetime.timedelta(days=29)
         )
-        .values("usuario_id")
-        .distinct()
-        .count()
+    except ValueError:
+        return JsonResponse({"erro": "Datas no formato AAAA-MM-DD"}, status=400)
+    if inicio > fim:
+        return JsonResponse({"erro": "O início deve ser antes do fim"}, status=400)
+
+    gzip = request.GET.get("gzip") == "1"
+    response = StreamingHttpResponse(
+        exportacao.exportar(tabela, inicio, fim, gzip=gzip),
+        content_type="application/gzip" if gzip else "text/csv; charset=utf-8",
     )
-
-    # ── BLOCO 11: TOP 5 REANUNCIOS HOJE ──────────────────────────────────────
-    top_reanuncios = (
-        Chamada.objects.filter(acao="reanuncio", data_hora__gte=start_dt)
-        .values("paciente__nome_completo", "paciente__senha", "paciente__tipo_senha")
-        .annotate(total=Count("id"))
-        .order_by("-total")[:5]
+    response["Content-Disposition"] = (
+        f'attachment; filename="{exportacao.nome_arquivo(tabela, inicio, fim, gzip)}"'
     )
-
-    context = {
-        "total_pacientes_hoje": total_pacientes_period,
-        "total_atendidos_hoje": total_atendidos_period,
-        "total_aguardando": total_aguardando,
-        "taxa_atendimento_hoje": taxa_atendimento_period,
-        "profissionais_ativos": profissionais_ativos,
-        "guichistas_ativos": guichistas_ativos,
-        "tempo_medio_espera": tempo_medio_espera,
-        "tempo_medio_espera_hoje": tempo_medio_espera_hoje,
-        "tempo_medio_guiche": tempo_medio_guiche,
-        "tempo_medio_consulta": tempo_medio_consulta,
-        "taxa_reanuncio": taxa_reanuncio,
-        "total_desistencias": total_desistencias,
-        "taxa_desistencia": taxa_desistencia,
-        "taxa_encaminhamento": taxa_encaminhamento,
-        "tipo_labels": json.dumps(tipo_labels, ensure_ascii=False),
-        "tipo_data": json.dumps(tipo_data),
-        "prof_labels": json.dumps(prof_labels, ensure_ascii=False),
-        "prof_data": json.dumps(prof_data),
-        "tendencia_labels": json.dumps(tendencia_labels),
-        "tendencia_total": json.dumps(tendencia_total),
-        "tendencia_atendidos": json.dumps(tendencia_atendidos),
-        "hora_labels": json.dumps(hora_labels),
-        "hora_data": json.dumps(hora_data),
-        "top_reanuncios": top_reanuncios,
-        "data_hoje": hoje,
-        "selected_period_label": selected_period_label,
-        "selected_period": period_days,
-    }
-
-    return render(request, "administrador/dashboard.html", context)
+    # Sem buffer no proxy: o arquivo começa a descer enquanto é gerado
+    response["X-Accel-Buffering"] = "no"
+    return response
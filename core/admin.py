@@ -3,7 +3,15 @@ from django.contrib import admin
 from django.utils import timezone
 from django.utils.html import format_html
 
-from .models import Atendimento, CustomUser, Guiche, Paciente, RegistroDeAcesso
+from .models import (
+    Atendimento,
+    CustomUser,
+    Guiche,
+    Notificacao,
+    Paciente,
+    RegistroDeAcesso,
+    StatusEntrega,
+)
 
 
 class RegistroDeAcessoAdmin(admin.ModelAdmin):
@@ -22,8 +30,21 @@ class RegistroDeAcessoAdmin(admin.ModelAdmin):
     data_hora_local.short_description = "Data e Hora (São Paulo)"  # type: ignore
 
 
+class NotificacaoAdmin(admin.ModelAdmin):
+    list_display = ("numero_destino", "canal", "status", "tentativas", "criada_em")
+    list_filter = ("status", "canal")
+
+
+class StatusEntregaAdmin(admin.ModelAdmin):
+    list_display = ("sid", "canal", "status", "codigo_erro", "atualizada_em")
+    list_filter = ("status", "canal")
+    search_fields = ("sid",)
+
+
 admin.site.register(CustomUser)
 admin.site.register(Paciente)
 admin.site.register(Atendimento)
 admin.site.register(RegistroDeAcesso, RegistroDeAcessoAdmin)
 admin.site.register(Guiche)
+admin.site.register(Notificacao, NotificacaoAdmin)
+admin.site.register(StatusEntrega, StatusEntregaAdmin)
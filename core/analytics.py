@@ -0,0 +1,129 @@
+# core/analytics.py
+"""
+Distribuições de tempos (espera, guichê, consulta) com NumPy.
+
+As consultas devolvem as durações já em minutos, calculadas pelo banco com
+``Minutos`` (diferença entre dois instantes), e ``vetor`` transforma a lista
+de valores do ``values_list`` num vetor NumPy sem laço em Python por linha.
+Daí em diante tudo é vetorizado: remoção de outliers, percentis e histograma.
+Um ano de dados (dezenas de milhares de durações) é resumido em poucos
+milissegundos; o custo fica na leitura das linhas do banco.
+
+Outliers: durações não positivas ou nulas são inválidas (relógios fora de
+ordem, eventos sem par) e sempre descartadas. Acima, em vez de limites fixos
+em minutos, usa-se a cerca de Tukey "muito afastada" (Q3 + 3 × IQR) sobre o
+logaritmo das durações: tempos de espera são assimétricos, com cauda longa
+à direita, e na escala log a cerca acompanha a escala de cada tempo (a
+consulta dura mais que o guichê) sem cortar as esperas longas legítimas,
+mas descarta, por exemplo, o paciente chamado só no dia seguinte. Com menos
+de APARAR_MINIMO valores os quartis não são confiáveis e nada mais é cortado.
+"""
+
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+from django.db.models import FloatField, Func
+
+PERCENTIS = (50, 90, 95, 99)
+
+# Cerca superior, em log: Q3 + FATOR_IQR × (Q3 - Q1)
+FATOR_IQR = 3.0
+APARAR_MINIMO = 10
+
+# Larguras "redondas" das faixas do histograma, em minutos
+LARGURAS = (1, 2, 5, 10, 15, 20, 30, 60, 120, 240)
+FAIXAS = 12
+
+
+class Minutos(Func):
+    """
+    Minutos de ``inicio`` até ``fim`` (dois instantes), como número.
+    Evita que cada linha volte do banco como timedelta.
+    """
+
+    arity = 2
+    output_field = FloatField()
+
+    def __init__(self, fim, inicio, **extra):
+        super().__init__(fim, inicio, **extra)
+
+    def as_sql(self, compiler, connection, **extra):
+        # PostgreSQL (produção): intervalo em segundos
+        return super().as_sql(
+            compiler,
+            connection,
+            template=(
+                "CAST(EXTRACT(EPOCH FROM (%(expressions)s)) AS double precision)"
+                " / 60"
+            ),
+            arg_joiner=" - ",
+            **extra,
+        )
+
+    def as_sqlite(self, compiler, connection, **extra):
+        # Função registrada pelo backend do Django (diferença em microssegundos)
+        return super().as_sql(
+            compiler,
+            connection,
+            template="django_timestamp_diff(%(expressions)s) / 60000000.0",
+            arg_joiner=", ",
+            **extra,
+        )
+
+
+def vetor(valores: Iterable[Optional[float]]) -> np.ndarray:
+    """Valores de uma coluna do values_list; None vira NaN."""
+    return np.array(list(valores), dtype=float)
+
+
+def aparar(valores: np.ndarray) -> Tuple[np.ndarray, int]:
+    """Remove inválidos e outliers. Retorna (valores mantidos, removidos)."""
+    valores = np.asarray(valores, dtype=float)
+    validos = valores[valores > 0]  # NaN também é descartado
+    if validos.size >= APARAR_MINIMO:
+        logs = np.log(validos)
+        q1, q3 = np.percentile(logs, (25, 75))
+        validos = validos[logs <= q3 + FATOR_IQR * (q3 - q1)]
+    return validos, int(valores.size - validos.size)
+
+
+def _largura(maximo: float) -> int:
+    for largura in LARGURAS:
+        if largura * FAIXAS >= maximo:
+            return largura
+    return LARGURAS[-1]
+
+
+def histograma(valores: np.ndarray) -> Dict[str, list]:
+    """
+    Contagens em até FAIXAS faixas de largura redonda a partir de zero.
+    ``limites`` tem uma posição a mais que ``contagens``.
+    """
+    if valores.size == 0:
+        return {"limites": [], "contagens": []}
+    largura = _largura(float(valores.max()))
+    faixas = max(int(np.ceil(valores.max() / largura)), 1)
+    limites = np.arange(faixas + 1) * largura
+    contagens, _ = np.histogram(valores, bins=limites)
+    return {"limites": limites.tolist(), "contagens": contagens.tolist()}
+
+
+def distribuicao(valores: np.ndarray) -> Dict[str, Any]:
+    """Média, percentis e histograma dos valores, já sem os outliers."""
+    mantidos, aparados = aparar(valores)
+    if mantidos.size == 0:
+        percentis = {f"p{p}": 0 for p in PERCENTIS}
+        media = 0
+    else:
+        percentis = {
+            f"p{p}": round(float(v), 1)
+            for p, v in zip(PERCENTIS, np.percentile(mantidos, PERCENTIS))
+        }
+        media = round(float(mantidos.mean()), 1)
+    return {
+        "n": int(mantidos.size),
+        "aparados": aparados,
+        "media": media,
+        **percentis,
+        "histograma": histograma(mantidos),
+    }
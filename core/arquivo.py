@@ -0,0 +1,149 @@
+# core/arquivo.py
+"""
+Arquivo de meses fechados de Chamada, ChamadaProfissional e RegistroDeAcesso.
+
+Essas tabelas só crescem, e TVs, painéis e dashboard as filtram e ordenam
+por ``data_hora``. ``arquivar`` move as linhas dos meses anteriores aos
+ARQUIVO_MESES_ATIVOS mais recentes para tabelas de arquivo com as mesmas
+colunas e os mesmos ids (ChamadaArquivo, ...), deixando nas tabelas quentes
+só os dados recentes.
+
+A cópia é feita em lotes de ARQUIVO_LOTE linhas, em ordem de id, cada um numa
+transação (INSERT ... SELECT seguido do DELETE das linhas copiadas): o
+comando ``arquivar_historico`` pode ser interrompido e executado de novo, e
+continua de onde parou. O DELETE é feito em SQL, sem sinais: mover uma linha
+para o arquivo não é excluí-la, e os resumos do dashboard (core.resumos) e
+os caches das TVs continuam valendo.
+
+Leituras que podem alcançar meses arquivados usam ``fonte``: a tabela quente
+se o período começa depois da última linha arquivada, senão a visão do banco
+que junta as duas tabelas (ChamadaHistorico, ...; UNION ALL, com os filtros
+levados a cada tabela pelo planejador). É o que fazem o dashboard, a
+exportação em CSV e a reconstrução dos resumos. No PostgreSQL o mesmo
+resultado poderia vir de partições nativas por mês, mas converter as tabelas
+existentes exigiria recriá-las; as tabelas de arquivo funcionam também no
+SQLite dos testes.
+"""
+
+import datetime
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from core.models import (
+    Chamada,
+    ChamadaArquivo,
+    ChamadaHistorico,
+    ChamadaProfissional,
+    ChamadaProfissionalArquivo,
+    ChamadaProfissionalHistorico,
+    RegistroDeAcesso,
+    RegistroDeAcessoArquivo,
+    RegistroDeAcessoHistorico,
+)
+
+# Tabela quente -> (arquivo, visão das duas)
+ARQUIVOS = {
+    Chamada: (ChamadaArquivo, ChamadaHistorico),
+    ChamadaProfissional: (ChamadaProfissionalArquivo, ChamadaProfissionalHistorico),
+    RegistroDeAcesso: (RegistroDeAcessoArquivo, RegistroDeAcessoHistorico),
+}
+
+
+def corte(meses_ativos: Optional[int] = None) -> datetime.datetime:
+    """
+    Início (hora local) do mais antigo dos meses mantidos nas tabelas
+    quentes; o que vem antes pode ser arquivado.
+    """
+    if meses_ativos is None:
+        meses_ativos = settings.ARQUIVO_MESES_ATIVOS
+    hoje = timezone.localdate()
+    mes = hoje.year * 12 + hoje.month - 1 - (max(meses_ativos, 1) - 1)
+    return timezone.make_aware(
+        datetime.datetime(mes // 12, mes % 12 + 1, 1),
+        timezone.get_default_timezone(),
+    )
+
+
+def arquivar_lote(modelo, ate: datetime.datetime, lote: int) -> int:
+    """
+    Move para o arquivo as ``lote`` linhas de menor id anteriores a ``ate``,
+    numa transação. Retorna quantas foram movidas (0: nada mais a mover).
+    """
+    arquivo = ARQUIVOS[modelo][0]
+    anteriores = modelo.objects.filter(data_hora__lt=ate)
+    with transaction.atomic():
+        # Id da última linha do lote (com menos de ``lote`` linhas, da última)
+        fatia = list(
+            anteriores.order_by("id").values_list("id", flat=True)[lote - 1 : lote]
+        )
+        if fatia:
+            ultimo = fatia[0]
+        else:
+            ultimo = anteriores.aggregate(ultimo=Max("id"))["ultimo"]
+            if ultimo is None:
+                return 0
+
+        ate = connection.ops.adapt_datetimefield_value(ate)
+        nome = connection.ops.quote_name
+        quente = nome(modelo._meta.db_table)
+        destino = nome(arquivo._meta.db_table)
+        colunas = ", ".join(
+            nome(campo.column) for campo in modelo._meta.concrete_fields
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {destino} ({colunas}) SELECT {colunas} FROM {quente}"
+                " WHERE id <= %s AND data_hora < %s",
+                [ultimo, ate],
+            )
+            # Só o que foi copiado (sem sinais: os resumos não mudam)
+            cursor.execute(
+                f"DELETE FROM {quente} WHERE id <= %s AND data_hora < %s"
+                f" AND id IN (SELECT id FROM {destino} WHERE id <= %s)",
+                [ultimo, ate, ultimo],
+            )
+            return cursor.rowcount
+
+
+def arquivar(
+    ate: Optional[datetime.datetime] = None,
+    lote: Optional[int] = None,
+    modelos: Optional[Iterable] = None,
+    progresso=None,
+) -> Dict[str, int]:
+    """
+    Arquiva, lote a lote, as linhas anteriores a ``ate`` (padrão: ``corte()``).
+    ``progresso(modelo, movidas)`` é chamado a cada lote. Retorna o total
+    movido por tabela.
+    """
+    ate = ate or corte()
+    lote = lote or settings.ARQUIVO_LOTE
+    totais = {}
+    for modelo in modelos or ARQUIVOS:
+        totais[modelo.__name__] = 0
+        while movidas := arquivar_lote(modelo, ate, lote):
+            totais[modelo.__name__] += movidas
+            if progresso:
+                progresso(modelo, movidas)
+    return totais
+
+
+def arquivado_ate(modelo) -> Optional[datetime.datetime]:
+    """Horário da linha arquivada mais recente (None se o arquivo está vazio)."""
+    return ARQUIVOS[modelo][0].objects.aggregate(ultima=Max("data_hora"))["ultima"]
+
+
+def fonte(modelo, inicio: Optional[datetime.datetime]):
+    """
+    Modelo a consultar para linhas a partir de ``inicio`` (None: todo o
+    histórico): a própria tabela, se o período não alcança o arquivo, ou a
+    visão que junta a tabela e o arquivo.
+    """
+    limite = arquivado_ate(modelo)
+    if limite is None or (inicio is not None and inicio > limite):
+        return modelo
+    return ARQUIVOS[modelo][1]
@@ -0,0 +1,220 @@
+# core/despacho.py
+"""
+Despacho das notificações da caixa de saída para o Twilio (core.utils).
+
+Fica entre core.notificacoes e core.utils e cuida de:
+
+- limite de taxa: cada canal (SMS, WhatsApp) tem um balde de fichas e cada
+  envio espera por uma ficha do seu canal, espalhando as rajadas de
+  chamadas/reanúncios abaixo do limite do provedor. Quando o SMS falha e o
+  fallback usa o WhatsApp, a ficha do WhatsApp é debitada depois do envio
+  (o saldo pode ficar negativo, atrasando os envios seguintes);
+- repetição: erros transitórios (ver core.utils.erro_transitorio) voltam
+  para a fila com backoff exponencial com jitter ("full jitter"), até
+  NOTIFICACOES_MAX_TENTATIVAS;
+- dedupe: a mesma mensagem para o mesmo número dentro de
+  NOTIFICACOES_JANELA_DEDUPE (ex.: reanúncios repetidos) é ignorada;
+- métricas de vazão, profundidade da fila, repetições e descartes.
+
+Fichas e métricas são por processo; com vários workers
+processar_notificacoes, divida as taxas entre eles.
+"""
+
+import datetime
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, Set, Tuple
+
+from django.conf import settings
+from django.utils import timezone
+
+from core import utils
+from core.models import Notificacao
+
+logger = logging.getLogger(__name__)
+
+# Função de core.utils e canal do balde usados por canal de Notificacao
+ENVIOS = {"sms_ou_whatsapp": "enviar_sms_ou_whatsapp", "whatsapp": "enviar_whatsapp"}
+BALDES = {"sms_ou_whatsapp": "sms", "whatsapp": "whatsapp"}
+
+
+class BaldeDeFichas:
+    """
+    Balde de fichas com reserva: ``retirar`` debita a ficha na hora e dorme
+    pelo tempo até o saldo voltar a zero, sem segurar a trava durante a
+    espera. Taxa <= 0 desliga o limite.
+    """
+
+    def __init__(
+        self,
+        taxa: float,
+        capacidade: float,
+        relogio: Callable[[], float] = time.monotonic,
+        dormir: Callable[[float], None] = time.sleep,
+    ):
+        self.taxa = taxa
+        self.capacidade = capacidade
+        self._relogio = relogio
+        self._dormir = dormir
+        self._fichas = float(capacidade)
+        self._atualizado = relogio()
+        self._trava = threading.Lock()
+
+    def _debitar(self, quantidade: float) -> float:
+        with self._trava:
+            agora = self._relogio()
+            self._fichas = min(
+                self.capacidade,
+                self._fichas + (agora - self._atualizado) * self.taxa,
+            )
+            self._atualizado = agora
+            self._fichas -= quantidade
+            return max(0.0, -self._fichas / self.taxa)
+
+    def retirar(self, quantidade: float = 1.0) -> float:
+        """Reserva fichas, esperando se preciso. Retorna a espera (segundos)."""
+        if self.taxa <= 0:
+            return 0.0
+        espera = self._debitar(quantidade)
+        if espera:
+            self._dormir(espera)
+        return espera
+
+    def debitar(self, quantidade: float = 1.0) -> None:
+        """Debita fichas de um envio já feito, sem esperar."""
+        if self.taxa > 0:
+            self._debitar(quantidade)
+
+
+class Metricas:
+    """Contadores do despacho no processo, desde o início ou o último zerar."""
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self.zerar()
+
+    def zerar(self) -> None:
+        with self._trava:
+            self._inicio = time.monotonic()
+            self._contadores: Counter = Counter()
+            self._espera = 0.0
+
+    def contar(self, nome: str, quantidade: int = 1) -> None:
+        with self._trava:
+            self._contadores[nome] += quantidade
+
+    def esperou(self, segundos: float) -> None:
+        with self._trava:
+            self._espera += segundos
+
+    def resumo(self) -> Dict[str, Any]:
+        with self._trava:
+            decorrido = max(time.monotonic() - self._inicio, 1e-9)
+            contadores = dict(self._contadores)
+            espera = self._espera
+        enviadas = contadores.get("enviadas", 0)
+        return {
+            "enviadas": enviadas,
+            "falhas": contadores.get("falhas", 0),
+            "repeticoes": contadores.get("repeticoes", 0),
+            "ignoradas": contadores.get("ignoradas", 0),
+            "vazao_por_minuto": round(enviadas / decorrido * 60, 1),
+            "espera_fichas_s": round(espera, 3),
+            "fila": Notificacao.objects.filter(status="pendente").count(),
+            "em_envio": Notificacao.objects.filter(status="enviando").count(),
+        }
+
+
+class Despachante:
+    def __init__(self):
+        self._trava = threading.Lock()
+        self._baldes: Dict[str, BaldeDeFichas] = {}
+        self.metricas = Metricas()
+
+    def balde(self, canal: str) -> BaldeDeFichas:
+        with self._trava:
+            if canal not in self._baldes:
+                nome = canal.upper()
+                self._baldes[canal] = BaldeDeFichas(
+                    getattr(settings, f"NOTIFICACOES_TAXA_{nome}"),
+                    getattr(settings, f"NOTIFICACOES_RAJADA_{nome}"),
+                )
+            return self._baldes[canal]
+
+    def reiniciar(self) -> None:
+        """Descarta baldes e métricas (ex.: após mudar as configurações)."""
+        with self._trava:
+            self._baldes = {}
+        self.metricas.zerar()
+
+    def enviar(self, notificacao: Notificacao) -> Dict[str, Any]:
+        """Envia respeitando o balde do canal. Roda nas threads do pool."""
+        self.metricas.esperou(self.balde(BALDES[notificacao.canal]).retirar())
+        envio = getattr(utils, ENVIOS[notificacao.canal])
+        try:
+            resultado = envio(notificacao.numero_destino, notificacao.mensagem)
+        except Exception as e:
+            logger.exception(f"Erro ao enviar a notificação {notificacao.id}")
+            return {"status": "error", "error": str(e)}
+        if resultado.get("fallback_used"):
+            self.balde("whatsapp").debitar()
+        return resultado
+
+    @staticmethod
+    def atraso(tentativas: int) -> datetime.timedelta:
+        """Espera antes da próxima tentativa: uniforme em [0, base * 2^(n-1)]."""
+        teto = min(
+            settings.NOTIFICACOES_BACKOFF_MAX,
+            settings.NOTIFICACOES_BACKOFF_BASE * 2 ** max(tentativas - 1, 0),
+        )
+        return datetime.timedelta(seconds=random.uniform(0, teto))
+
+    @staticmethod
+    def deve_repetir(notificacao: Notificacao, resultado: Dict[str, Any]) -> bool:
+        return (
+            bool(resultado.get("transitorio"))
+            and notificacao.tentativas < settings.NOTIFICACOES_MAX_TENTATIVAS
+        )
+
+    @staticmethod
+    def duplicadas(lote: Iterable[Notificacao]) -> Set[int]:
+        """
+        Ids do lote que repetem, para o mesmo número dentro da janela de
+        dedupe, uma mensagem já enviada ou uma cópia de id menor ainda em
+        envio (neste lote ou no de outro worker). Assim, de cópias reservadas
+        por workers diferentes ao mesmo tempo, só a de menor id é enviada.
+        """
+        janela = settings.NOTIFICACOES_JANELA_DEDUPE
+        lote = sorted(lote, key=lambda n: n.id)
+        if janela <= 0 or not lote:
+            return set()
+
+        limite = timezone.now() - datetime.timedelta(seconds=janela)
+        # Menor id de cada mensagem; as já enviadas vêm antes de todas
+        primeiras: Dict[Tuple[str, str], int] = {}
+        for numero, mensagem, status, id_ in (
+            Notificacao.objects.filter(
+                numero_destino__in={n.numero_destino for n in lote},
+                status__in=["enviada", "enviando"],
+                atualizada_em__gte=limite,
+            )
+            .exclude(id__in=[n.id for n in lote])
+            .values_list("numero_destino", "mensagem", "status", "id")
+        ):
+            id_ = 0 if status == "enviada" else id_
+            chave = (numero, mensagem)
+            primeiras[chave] = min(primeiras.get(chave, id_), id_)
+        repetidas = set()
+        for notificacao in lote:
+            chave = (notificacao.numero_destino, notificacao.mensagem)
+            if primeiras.get(chave, notificacao.id) < notificacao.id:
+                repetidas.add(notificacao.id)
+            else:
+                primeiras[chave] = notificacao.id
+        return repetidas
+
+
+despachante = Despachante()
@@ -0,0 +1,151 @@
+# core/disjuntor.py
+"""
+Disjuntor (circuit breaker) por canal do Twilio (SMS, WhatsApp).
+
+Com o Twilio lento ou fora do ar, cada envio esperava o timeout do SMS e
+depois o do fallback WhatsApp. O disjuntor de cada canal passa por três
+estados:
+
+- fechado: os envios passam; falhas transitórias seguidas (ver
+  core.utils.erro_transitorio) e respostas mais lentas que DISJUNTOR_LATENCIA
+  são contadas, e um envio normal zera a contagem;
+- aberto: após DISJUNTOR_FALHAS falhas seguidas, o canal é pulado na hora
+  (CanalIndisponivel) durante DISJUNTOR_ESPERA segundos;
+- meio-aberto: passada a espera, uma requisição de sonda por vez testa o
+  canal. Sucesso fecha o disjuntor; falha o abre por mais uma espera.
+
+O estado fica no cache "notificacoes" (ver TV_CACHE_BACKEND), compartilhado
+entre os workers do gunicorn, os do processar_notificacoes e a view de status
+do administrador. DISJUNTOR_FALHAS = 0 desliga o disjuntor.
+"""
+
+import datetime
+import time
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+CANAIS = ("sms", "whatsapp")
+
+
+class CanalIndisponivel(Exception):
+    """Envio recusado porque o disjuntor do canal está aberto."""
+
+    def __init__(self, canal: str):
+        self.canal = canal
+        super().__init__(f"Canal {canal} suspenso pelo disjuntor")
+
+
+def _data(instante: Optional[float]) -> Optional[str]:
+    if instante is None:
+        return None
+    return datetime.datetime.fromtimestamp(
+        instante, tz=datetime.timezone.utc
+    ).isoformat()
+
+
+class Disjuntor:
+    def __init__(self, canal: str):
+        self.canal = canal
+        self._chave_falhas = f"disjuntor:{canal}:falhas"
+        self._chave_aberto = f"disjuntor:{canal}:aberto"
+        self._chave_sonda = f"disjuntor:{canal}:sonda"
+
+    @property
+    def _cache(self):
+        return caches["notificacoes"]
+
+    @staticmethod
+    def _ligado() -> bool:
+        return settings.DISJUNTOR_FALHAS > 0
+
+    def permitir(self) -> bool:
+        """Indica se o envio pode seguir (fechado, ou sonda do meio-aberto)."""
+        if not self._ligado():
+            return True
+        aberto = self._cache.get(self._chave_aberto)
+        if aberto is None:
+            return True
+        if time.time() < aberto["ate"]:
+            return False
+        # Meio-aberto: só quem conseguir a trava da sonda passa. A trava
+        # expira sozinha se o processo morrer no meio da sonda.
+        duracao_sonda = (
+            settings.TWILIO_TIMEOUT_CONEXAO + settings.TWILIO_TIMEOUT_LEITURA + 1
+        )
+        return self._cache.add(self._chave_sonda, True, timeout=duracao_sonda)
+
+    def registrar_sucesso(self) -> None:
+        if not self._ligado():
+            return
+        # Uma leitura no caso comum (disjuntor fechado e sem falhas)
+        if self._cache.get_many([self._chave_falhas, self._chave_aberto]):
+            self._cache.delete_many(
+                [self._chave_falhas, self._chave_aberto, self._chave_sonda]
+            )
+
+    def registrar_falha(self, motivo: str) -> None:
+        if not self._ligado():
+            return
+        aberto = self._cache.get(self._chave_aberto)
+        if aberto is not None:
+            # Falha da sonda do meio-aberto reabre; falhas de envios iniciados
+            # antes da abertura não prolongam a espera
+            if time.time() >= aberto["ate"]:
+                self._abrir(motivo, aberto["desde"])
+            return
+        self._cache.add(self._chave_falhas, 0, timeout=None)
+        try:
+            falhas = self._cache.incr(self._chave_falhas)
+        except ValueError:
+            # Chave removida por um sucesso concorrente
+            return
+        if falhas >= settings.DISJUNTOR_FALHAS:
+            self._abrir(motivo, time.time())
+
+    def _abrir(self, motivo: str, desde: float) -> None:
+        self._cache.set(
+            self._chave_aberto,
+            {
+                "desde": desde,
+                "ate": time.time() + settings.DISJUNTOR_ESPERA,
+                "motivo": motivo,
+            },
+            timeout=None,
+        )
+        self._cache.delete(self._chave_sonda)
+
+    def fechar(self) -> None:
+        """Volta ao estado inicial (fechado, sem falhas)."""
+        self._cache.delete_many(
+            [self._chave_falhas, self._chave_aberto, self._chave_sonda]
+        )
+
+    def estado(self) -> Dict[str, Any]:
+        valores = self._cache.get_many([self._chave_falhas, self._chave_aberto])
+        aberto = valores.get(self._chave_aberto)
+        agora = time.time()
+        if aberto is None:
+            nome = "fechado"
+        elif agora < aberto["ate"]:
+            nome = "aberto"
+        else:
+            nome = "meio_aberto"
+        return {
+            "canal": self.canal,
+            "estado": nome,
+            "falhas_consecutivas": valores.get(self._chave_falhas, 0),
+            "aberto_desde": _data(aberto and aberto["desde"]),
+            "sonda_em_segundos": (
+                round(max(aberto["ate"] - agora, 0.0), 1) if aberto else None
+            ),
+            "motivo": aberto and aberto["motivo"],
+        }
+
+
+disjuntores = {canal: Disjuntor(canal) for canal in CANAIS}
+
+
+def estado_disjuntores() -> Dict[str, Dict[str, Any]]:
+    return {canal: disjuntor.estado() for canal, disjuntor in disjuntores.items()}
@@ -0,0 +1,226 @@
+# core/entregas.py
+"""
+Status de entrega das mensagens, recebidos do Twilio pelo status callback.
+
+O Twilio chama a URL de TWILIO_STATUS_CALLBACK_URL a cada mudança de status
+de uma mensagem (queued, sent, delivered, ...), fora de ordem e às vezes
+repetido, e em rajadas quando muitas mensagens saem juntas. A view não grava
+nada: entrega a atualização ao ``agrupador`` e responde na hora.
+
+O agrupador junta as atualizações do processo por SID (fica só a mais
+avançada) e as grava em lotes (``aplicar_lote``) a cada
+STATUS_ENTREGA_INTERVALO segundos, numa thread própria, ou antes se o lote
+chegar a STATUS_ENTREGA_LOTE. A gravação é idempotente: um status só
+substitui o gravado se for mais avançado (ORDEM), então repetições e
+callbacks atrasados não fazem o status voltar. Com intervalo 0 a gravação é
+imediata. Atualizações ainda no agrupador se perdem se o processo morrer;
+o status do envio continua registrado na Notificacao.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from core.models import StatusEntrega
+
+logger = logging.getLogger(__name__)
+
+# Ordem dos status de uma mensagem; só se avança
+ORDEM = {
+    "accepted": 0,
+    "scheduled": 0,
+    "queued": 0,
+    "sending": 1,
+    "sent": 2,
+    "canceled": 3,
+    "delivered": 3,
+    "undelivered": 3,
+    "failed": 3,
+    "read": 4,
+}
+ENTREGUES = ("delivered", "read")
+NAO_ENTREGUES = ("undelivered", "failed")
+
+
+class Atualizacao:
+    def __init__(
+        self, sid: str, canal: str, status: str, codigo_erro: Optional[int] = None
+    ):
+        self.sid = sid
+        self.canal = canal
+        self.status = status
+        self.codigo_erro = codigo_erro
+        self.recebida_em = timezone.now()
+
+    @classmethod
+    def do_callback(cls, dados) -> Optional["Atualizacao"]:
+        """Atualização a partir dos parâmetros do callback (None se inválido)."""
+        sid = dados.get("MessageSid") or dados.get("SmsSid")
+        status = dados.get("MessageStatus") or dados.get("SmsStatus")
+        if not sid or len(sid) > 34 or status not in ORDEM:
+            return None
+        para = dados.get("To", "")
+        codigo_erro = dados.get("ErrorCode")
+        return cls(
+            sid,
+            "whatsapp" if para.startswith("whatsapp:") else "sms",
+            status,
+            int(codigo_erro) if codigo_erro and codigo_erro.isdigit() else None,
+        )
+
+
+def _avancar(gravado: StatusEntrega, atualizacao: Atualizacao) -> bool:
+    """Aplica a atualização ao status gravado se for mais avançada."""
+    if ORDEM[atualizacao.status] <= ORDEM.get(gravado.status, -1):
+        return False
+    gravado.status = atualizacao.status
+    gravado.codigo_erro = atualizacao.codigo_erro
+    gravado.atualizada_em = atualizacao.recebida_em
+    return True
+
+
+def aplicar_lote(atualizacoes: Iterable[Atualizacao]) -> int:
+    """Grava as atualizações mais avançadas que as atuais. Retorna quantas."""
+    por_sid: Dict[str, Atualizacao] = {}
+    for atualizacao in atualizacoes:
+        atual = por_sid.get(atualizacao.sid)
+        if atual is None or ORDEM[atualizacao.status] > ORDEM[atual.status]:
+            por_sid[atualizacao.sid] = atualizacao
+    if not por_sid:
+        return 0
+
+    with transaction.atomic():
+        existentes = {
+            s.sid: s
+            for s in StatusEntrega.objects.select_for_update().filter(
+                sid__in=list(por_sid)
+            )
+        }
+        novos: List[StatusEntrega] = []
+        alterados: List[StatusEntrega] = []
+        for sid, atualizacao in por_sid.items():
+            existente = existentes.get(sid)
+            if existente is None:
+                novos.append(
+                    StatusEntrega(
+                        sid=sid,
+                        canal=atualizacao.canal,
+                        status=atualizacao.status,
+                        codigo_erro=atualizacao.codigo_erro,
+                        criada_em=atualizacao.recebida_em,
+                        atualizada_em=atualizacao.recebida_em,
+                    )
+                )
+            elif _avancar(existente, atualizacao):
+                alterados.append(existente)
+        inseridos = 0
+        if novos:
+            StatusEntrega.objects.bulk_create(novos, ignore_conflicts=True)
+            # Outro processo pode ter criado o SID entre a leitura e o INSERT:
+            # o conflito é ignorado, então a linha gravada é relida (com
+            # trava) e a atualização aplicada como nas existentes.
+            for gravado in StatusEntrega.objects.select_for_update().filter(
+                sid__in=[novo.sid for novo in novos]
+            ):
+                atualizacao = por_sid[gravado.sid]
+                if (
+                    gravado.status == atualizacao.status
+                    and gravado.atualizada_em == atualizacao.recebida_em
+                ):
+                    inseridos += 1
+                elif _avancar(gravado, atualizacao):
+                    alterados.append(gravado)
+        StatusEntrega.objects.bulk_update(
+            alterados, ["status", "codigo_erro", "atualizada_em"]
+        )
+    return inseridos + len(alterados)
+
+
+class Agrupador:
+    """Junta as atualizações do processo e as grava em lotes."""
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self._pendentes: Dict[str, Atualizacao] = {}
+        # (pid, thread): a thread não sobrevive ao fork dos workers
+        self._thread: Optional[tuple] = None
+
+    def adicionar(self, atualizacao: Atualizacao) -> None:
+        with self._trava:
+            atual = self._pendentes.get(atualizacao.sid)
+            if atual is None or ORDEM[atualizacao.status] > ORDEM[atual.status]:
+                self._pendentes[atualizacao.sid] = atualizacao
+            cheio = len(self._pendentes) >= settings.STATUS_ENTREGA_LOTE
+        if settings.STATUS_ENTREGA_INTERVALO <= 0 or cheio:
+            self.aplicar()
+        else:
+            self._iniciar()
+
+    def aplicar(self) -> int:
+        """Grava e esvazia as atualizações pendentes."""
+        with self._trava:
+            pendentes, self._pendentes = self._pendentes, {}
+        if not pendentes:
+            return 0
+        try:
+            return aplicar_lote(pendentes.values())
+        except Exception:
+            logger.exception("Erro ao gravar status de entrega; devolvendo ao lote")
+            with self._trava:
+                for sid, atualizacao in pendentes.items():
+                    self._pendentes.setdefault(sid, atualizacao)
+            return 0
+
+    def _iniciar(self) -> None:
+        thread = self._thread
+        if thread is not None and thread[0] == os.getpid() and thread[1].is_alive():
+            return
+        with self._trava:
+            thread = self._thread
+            if thread is None or thread[0] != os.getpid() or not thread[1].is_alive():
+                nova = threading.Thread(target=self._executar, daemon=True)
+                self._thread = (os.getpid(), nova)
+                nova.start()
+
+    def _executar(self) -> None:
+        while True:
+            time.sleep(settings.STATUS_ENTREGA_INTERVALO)
+            close_old_connections()
+            self.aplicar()
+            # Conexão própria da thread: não fica aberta entre os lotes
+            connection.close()
+
+
+agrupador = Agrupador()
+
+
+def taxas_por_canal(inicio) -> Dict[str, Dict[str, float]]:
+    """Mensagens, entregues, não entregues e taxa de entrega por canal."""
+    contagens = (
+        StatusEntrega.objects.filter(criada_em__gte=inicio)
+        .values_list("canal", "status")
+        .annotate(total=Count("sid"))
+    )
+    taxas = {
+        canal: {"total": 0, "entregues": 0, "nao_entregues": 0, "taxa_entrega": 0.0}
+        for canal, _ in StatusEntrega.CANAIS
+    }
+    for canal, status, total in contagens:
+        taxa = taxas[canal]
+        taxa["total"] += total
+        if status in ENTREGUES:
+            taxa["entregues"] += total
+        elif status in NAO_ENTREGUES:
+            taxa["nao_entregues"] += total
+    for taxa in taxas.values():
+        finalizadas = taxa["entregues"] + taxa["nao_entregues"]
+        if finalizadas:
+            taxa["taxa_entrega"] = round(taxa["entregues"] / finalizadas * 100, 1)
+    return taxas
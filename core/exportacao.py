@@ -0,0 +1,166 @@
+# core/exportacao.py
+"""
+Exportação em CSV do histórico de chamadas e do fluxo de pacientes.
+
+Usada pela view ``administrador:exportar`` (StreamingHttpResponse) e pelo
+comando ``exportar_csv``. As linhas são lidas com ``values_list`` (só as
+colunas exportadas, sem instanciar modelos) e ``.iterator()`` em blocos de
+LINHAS_POR_BLOCO: no PostgreSQL, por um cursor no servidor. O CSV é gerado
+aos pedaços de ~TAMANHO_PEDACO bytes, opcionalmente comprimidos em gzip
+conforme são gerados; exportar um ano ocupa memória constante e o primeiro
+pedaço sai assim que o banco devolve as primeiras linhas.
+
+As linhas saem em ordem de id (a ordem de gravação), que o banco percorre
+pelo índice da chave primária sem ordenar o período inteiro antes. Horários
+saem no fuso local (ISO 8601 com offset). Os dados pessoais dos pacientes
+(nome, telefone, cartão do SUS) não são exportados. Períodos que alcançam
+meses arquivados são lidos também do arquivo (core.arquivo).
+"""
+
+import csv
+import datetime
+import io
+import zlib
+from typing import Iterable, Iterator, Tuple
+
+from django.utils import timezone
+
+from core.arquivo import ARQUIVOS, fonte
+from core.models import Chamada, ChamadaProfissional, Paciente
+
+LINHAS_POR_BLOCO = 2000
+TAMANHO_PEDACO = 64 * 1024
+
+# Tabela exportada -> modelo, campo do período e colunas (cabeçalho, campo)
+TABELAS = {
+    "chamadas": {
+        "modelo": Chamada,
+        "campo_data": "data_hora",
+        "colunas": (
+            ("id", "id"),
+            ("data_hora", "data_hora"),
+            ("acao", "acao"),
+            ("paciente_id", "paciente_id"),
+            ("senha", "paciente__senha"),
+            ("tipo_senha", "paciente__tipo_senha"),
+            ("guiche", "guiche__numero"),
+        ),
+    },
+    "chamadas-profissionais": {
+        "modelo": ChamadaProfissional,
+        "campo_data": "data_hora",
+        "colunas": (
+            ("id", "id"),
+            ("data_hora", "data_hora"),
+            ("acao", "acao"),
+            ("paciente_id", "paciente_id"),
+            ("senha", "paciente__senha"),
+            ("tipo_senha", "paciente__tipo_senha"),
+            ("profissional_id", "profissional_saude_id"),
+            ("profissional", "profissional_saude__username"),
+        ),
+    },
+    "pacientes": {
+        "modelo": Paciente,
+        "campo_data": "horario_geracao_senha",
+        "colunas": (
+            ("id", "id"),
+            ("horario_geracao_senha", "horario_geracao_senha"),
+            ("senha", "senha"),
+            ("tipo_senha", "tipo_senha"),
+            ("dia_atendimento", "dia_atendimento"),
+            ("periodo", "periodo"),
+            ("horario_agendamento", "horario_agendamento"),
+            ("profissional_id", "profissional_saude_id"),
+            ("atendido", "atendido"),
+        ),
+    },
+}
+
+
+def intervalo(
+    inicio: datetime.date, fim: datetime.date
+) -> Tuple[datetime.datetime, datetime.datetime]:
+    """Instantes [início do dia ``inicio``, fim do dia ``fim``) no fuso local."""
+    fuso = timezone.get_default_timezone()
+    de, ate = (
+        timezone.make_aware(datetime.datetime.combine(dia, datetime.time.min), fuso)
+        for dia in (inicio, fim + datetime.timedelta(days=1))
+    )
+    return de, ate
+
+
+def _valor(valor):
+    if isinstance(valor, datetime.datetime):
+        return timezone.localtime(valor).isoformat()
+    return valor
+
+
+def linhas(tabela: str, inicio: datetime.date, fim: datetime.date) -> Iterator[tuple]:
+    """Linhas da tabela com o campo do período entre os dias (inclusive)."""
+    exportacao = TABELAS[tabela]
+    de, ate = intervalo(inicio, fim)
+    campo = exportacao["campo_data"]
+    modelo = exportacao["modelo"]
+    if modelo in ARQUIVOS:
+        # Meses arquivados lidos junto com a tabela (core.arquivo)
+        modelo = fonte(modelo, de)
+    consulta = (
+        modelo.objects.filter(**{f"{campo}__gte": de, f"{campo}__lt": ate})
+        .order_by("id")
+        .values_list(*(coluna for _, coluna in exportacao["colunas"]))
+    )
+    for linha in consulta.iterator(chunk_size=LINHAS_POR_BLOCO):
+        yield tuple(_valor(valor) for valor in linha)
+
+
+def gerar_csv(
+    tabela: str, inicio: datetime.date, fim: datetime.date
+) -> Iterator[bytes]:
+    """CSV em UTF-8 (com BOM, para o Excel reconhecer os acentos), aos pedaços."""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    buffer.write("\ufeff")
+    escritor.writerow(cabecalho for cabecalho, _ in TABELAS[tabela]["colunas"])
+    # Cabeçalho já no primeiro pedaço, antes da consulta
+    yield buffer.getvalue().encode()
+    buffer.seek(0)
+    buffer.truncate()
+    for linha in linhas(tabela, inicio, fim):
+        escritor.writerow(linha)
+        if buffer.tell() >= TAMANHO_PEDACO:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def comprimir(pedacos: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Comprime os pedaços em gzip conforme chegam. O primeiro (o cabeçalho)
+    sai na hora; os seguintes, quando o compressor tiver o que entregar.
+    """
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    primeiro = True
+    for pedaco in pedacos:
+        comprimido = compressor.compress(pedaco)
+        if primeiro:
+            comprimido += compressor.flush(zlib.Z_SYNC_FLUSH)
+            primeiro = False
+        if comprimido:
+            yield comprimido
+    yield compressor.flush()
+
+
+def exportar(
+    tabela: str, inicio: datetime.date, fim: datetime.date, gzip: bool = False
+) -> Iterator[bytes]:
+    pedacos = gerar_csv(tabela, inicio, fim)
+    return comprimir(pedacos) if gzip else pedacos
+
+
+def nome_arquivo(
+    tabela: str, inicio: datetime.date, fim: datetime.date, gzip: bool = False
+) -> str:
+    nome = f"{tabela}_{inicio.isoformat()}_{fim.isoformat()}.csv"
+    return f"{nome}.gz" if gzip else nome
@@ -0,0 +1,189 @@
+# core/jornadas.py
+"""
+Jornada de cada visita do paciente (JornadaPaciente).
+
+Tempos como "da senha à primeira chamada no guichê", "atendimento no
+guichê" e "consulta" eram calculados emparelhando linhas de Chamada e
+ChamadaProfissional a cada acesso. A jornada guarda, numa linha por visita,
+o primeiro horário de cada etapa:
+
+- gerada: geração da senha;
+- primeira_chamada_guiche, confirmado_guiche, desistencia_guiche;
+- primeira_chamada_profissional, confirmado_profissional;
+- encaminhamentos: quantas vezes o paciente foi encaminhado.
+
+Uma visita é um par (paciente, horário da geração da senha): o recadastro
+gera nova senha no mesmo Paciente e abre outra jornada. As linhas são
+atualizadas de forma incremental pelos sinais de core.signals, na mesma
+transação da ação, e cada etapa só é gravada na primeira vez (UPDATE ...
+WHERE campo IS NULL). Os tempos do dashboard passam a ser diferenças entre
+colunas da mesma linha.
+
+Como nos resumos (core.resumos), escritas que não passam por save()
+(QuerySet.update, SQL direto) não atualizam as jornadas: o comando
+``reconstruir_jornadas`` recalcula a visita atual de cada paciente a partir
+dos eventos. Excluir uma chamada também recalcula a jornada do paciente,
+após o commit.
+"""
+
+import datetime
+from typing import Iterable, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Count, F, Min, Q
+
+from core.arquivo import fonte
+from core.models import Chamada, ChamadaProfissional, JornadaPaciente, Paciente
+
+# (geração da senha, tipo de senha) da visita atual de um paciente
+ChaveJornada = Tuple[datetime.datetime, str]
+
+CAMPOS_PACIENTE = ("horario_geracao_senha", "tipo_senha")
+
+# Ação -> etapa da jornada gravada na primeira ocorrência
+ETAPAS_GUICHE = {
+    "chamada": "primeira_chamada_guiche",
+    "confirmado": "confirmado_guiche",
+    "desistencia": "desistencia_guiche",
+}
+ETAPAS_PROFISSIONAL = {
+    "chamada": "primeira_chamada_profissional",
+    "confirmado": "confirmado_profissional",
+}
+
+
+def chave_jornada(paciente: Paciente) -> Optional[ChaveJornada]:
+    if paciente.horario_geracao_senha is None:
+        return None
+    return (paciente.horario_geracao_senha, paciente.tipo_senha or "")
+
+
+# ── Pacientes ───────────────────────────────────────────────────────────────
+
+
+def lembrar_paciente(paciente: Paciente) -> None:
+    """Guarda a visita de um paciente lido do banco (sinal post_init)."""
+    if paciente.pk is None or paciente.get_deferred_fields() & set(CAMPOS_PACIENTE):
+        paciente._jornada = None
+    else:
+        paciente._jornada = chave_jornada(paciente)
+
+
+def paciente_gravado(paciente: Paciente, created: bool) -> None:
+    """Abre a jornada de uma senha nova (cadastro ou recadastro)."""
+    atual = chave_jornada(paciente)
+    if atual is not None and (created or getattr(paciente, "_jornada", None) != atual):
+        gerada, tipo_senha = atual
+        JornadaPaciente.objects.update_or_create(
+            paciente_id=paciente.pk, gerada=gerada, defaults={"tipo_senha": tipo_senha}
+        )
+    paciente._jornada = atual
+
+
+# ── Chamadas ────────────────────────────────────────────────────────────────
+
+
+def _visita(paciente: Paciente):
+    return JornadaPaciente.objects.filter(
+        paciente_id=paciente.pk, gerada=paciente.horario_geracao_senha
+    )
+
+
+def _marcar(paciente: Paciente, etapa: Optional[str], instante) -> None:
+    if etapa is None or paciente.horario_geracao_senha is None:
+        return
+    _visita(paciente).filter(**{f"{etapa}__isnull": True}).update(**{etapa: instante})
+
+
+def chamada_gravada(chamada: Chamada) -> None:
+    _marcar(chamada.paciente, ETAPAS_GUICHE.get(chamada.acao), chamada.data_hora)
+
+
+def chamada_profissional_gravada(chamada: ChamadaProfissional) -> None:
+    paciente = chamada.paciente
+    if chamada.acao == "encaminha":
+        if paciente.horario_geracao_senha is not None:
+            _visita(paciente).update(encaminhamentos=F("encaminhamentos") + 1)
+        return
+    _marcar(paciente, ETAPAS_PROFISSIONAL.get(chamada.acao), chamada.data_hora)
+
+
+def chamada_excluida(chamada) -> None:
+    """Recalcula a jornada do paciente após o commit (sinal post_delete)."""
+    paciente_id = chamada.paciente_id
+    transaction.on_commit(lambda: reconstruir(pacientes=[paciente_id]))
+
+
+# ── Reconstrução ────────────────────────────────────────────────────────────
+
+
+def reconstruir(
+    inicio: Optional[datetime.datetime] = None,
+    fim: Optional[datetime.datetime] = None,
+    pacientes: Optional[Iterable[int]] = None,
+) -> int:
+    """
+    Recalcula a jornada da visita atual dos pacientes com senha gerada em
+    [inicio, fim) (ou dos ``pacientes`` informados), com uma agregação por
+    tabela de eventos. Visitas anteriores de um paciente recadastrado não
+    são alteradas. Retorna o número de jornadas gravadas.
+    """
+    visitas = Paciente.objects.exclude(horario_geracao_senha__isnull=True)
+    if inicio is not None:
+        visitas = visitas.filter(horario_geracao_senha__gte=inicio)
+    if fim is not None:
+        visitas = visitas.filter(horario_geracao_senha__lt=fim)
+    if pacientes is not None:
+        visitas = visitas.filter(pk__in=list(pacientes))
+
+    jornadas = {
+        paciente_id: JornadaPaciente(
+            paciente_id=paciente_id, gerada=gerada, tipo_senha=tipo_senha or ""
+        )
+        for paciente_id, gerada, tipo_senha in visitas.values_list(
+            "pk", "horario_geracao_senha", "tipo_senha"
+        )
+    }
+    if not jornadas:
+        return 0
+
+    def etapas(modelo, campos, **extras):
+        # Eventos a partir da senha atual (os anteriores são de outra visita)
+        return (
+            fonte(modelo, inicio)
+            .objects.filter(
+                paciente_id__in=visitas.values("pk"),
+                data_hora__gte=F("paciente__horario_geracao_senha"),
+            )
+            .values("paciente_id")
+            .annotate(
+                **{
+                    campo: Min("data_hora", filter=Q(acao=acao))
+                    for acao, campo in campos.items()
+                },
+                **extras,
+            )
+            .order_by()
+        )
+
+    linhas = list(etapas(Chamada, ETAPAS_GUICHE))
+    linhas += etapas(
+        ChamadaProfissional,
+        ETAPAS_PROFISSIONAL,
+        encaminhamentos=Count("id", filter=Q(acao="encaminha")),
+    )
+    for linha in linhas:
+        jornada = jornadas[linha.pop("paciente_id")]
+        for campo, valor in linha.items():
+            setattr(jornada, campo, valor)
+
+    campos = ["tipo_senha", "encaminhamentos", *ETAPAS_GUICHE.values()]
+    campos += ETAPAS_PROFISSIONAL.values()
+    JornadaPaciente.objects.bulk_create(
+        jornadas.values(),
+        update_conflicts=True,
+        unique_fields=["paciente", "gerada"],
+        update_fields=campos,
+        batch_size=1000,
+    )
+    return len(jornadas)
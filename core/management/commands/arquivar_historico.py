@@ -0,0 +1,43 @@
+# core/management/commands/arquivar_historico.py
+from django.core.management.base import BaseCommand
+
+from core.arquivo import arquivar, corte
+
+
+class Command(BaseCommand):
+    help = (
+        "Move os meses fechados de Chamada, ChamadaProfissional e "
+        "RegistroDeAcesso para as tabelas de arquivo, em lotes (pode ser "
+        "interrompido e executado de novo)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--meses-ativos",
+            type=int,
+            default=None,
+            help="Meses mantidos nas tabelas quentes, contando o atual "
+            "(padrão: ARQUIVO_MESES_ATIVOS).",
+        )
+        parser.add_argument(
+            "--lote",
+            type=int,
+            default=None,
+            help="Linhas movidas por transação (padrão: ARQUIVO_LOTE).",
+        )
+
+    def handle(self, *args, **options):
+        ate = corte(options["meses_ativos"])
+        self.stdout.write(f"Arquivando linhas anteriores a {ate:%d/%m/%Y}.")
+
+        def progresso(modelo, movidas):
+            self.stdout.write(f"  {modelo.__name__}: {movidas} linha(s) movida(s)")
+
+        totais = arquivar(ate, options["lote"], progresso=progresso)
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Arquivo concluído: "
+                + ", ".join(f"{nome} {total}" for nome, total in totais.items())
+                + "."
+            )
+        )
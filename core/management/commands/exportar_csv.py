@@ -0,0 +1,64 @@
+# core/management/commands/exportar_csv.py
+import argparse
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core import exportacao
+
+
+def _data(valor: str) -> datetime.date:
+    try:
+        return datetime.date.fromisoformat(valor)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"data inválida: {valor} (use AAAA-MM-DD)")
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporta em CSV as chamadas do guichê, as chamadas dos profissionais "
+        "ou os pacientes de um período, em streaming (memória constante)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("tabela", choices=sorted(exportacao.TABELAS))
+        parser.add_argument(
+            "--inicio", type=_data, help="Primeiro dia (padrão: 30 dias atrás)."
+        )
+        parser.add_argument("--fim", type=_data, help="Último dia (padrão: hoje).")
+        parser.add_argument(
+            "--gzip", action="store_true", help="Comprime a saída em gzip."
+        )
+        parser.add_argument(
+            "--saida",
+            help="Arquivo de saída (padrão: saída padrão).",
+        )
+
+    def handle(self, *args, **options):
+        fim = options["fim"] or timezone.localdate()
+        inicio = options["inicio"] or fim - datetime.timedelta(days=29)
+        if inicio > fim:
+            raise CommandError("O início deve ser antes do fim.")
+
+        pedacos = exportacao.exportar(
+            options["tabela"], inicio, fim, gzip=options["gzip"]
+        )
+        if options["saida"]:
+            with open(options["saida"], "wb") as arquivo:
+                for pedaco in pedacos:
+                    arquivo.write(pedaco)
+            self.stderr.write(self.style.SUCCESS(f"Exportado para {options['saida']}."))
+            return
+
+        saida = getattr(self.stdout, "buffer", None)
+        if saida is None:
+            # Saída de texto (ex.: call_command com StringIO)
+            if options["gzip"]:
+                raise CommandError("Use --saida para exportar com --gzip.")
+            for pedaco in pedacos:
+                self.stdout.write(pedaco.decode(), ending="")
+            return
+        for pedaco in pedacos:
+            saida.write(pedaco)
+        saida.flush()
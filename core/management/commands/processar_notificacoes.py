@@ -0,0 +1,65 @@
+# core/management/commands/processar_notificacoes.py
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.despacho import despachante
+from core.notificacoes import drenar
+
+
+class Command(BaseCommand):
+    help = "Envia as notificações pendentes da caixa de saída (SMS/WhatsApp)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.NOTIFICACOES_WORKERS,
+            help="Envios simultâneos.",
+        )
+        parser.add_argument(
+            "--lote",
+            type=int,
+            default=settings.NOTIFICACOES_LOTE,
+            help="Notificações reservadas por vez.",
+        )
+        parser.add_argument(
+            "--intervalo",
+            type=float,
+            default=1.0,
+            help="Espera (segundos) quando a caixa de saída está vazia.",
+        )
+        parser.add_argument(
+            "--metricas",
+            type=float,
+            default=60.0,
+            help="Intervalo (segundos) entre os registros de métricas do despacho.",
+        )
+        parser.add_argument(
+            "--uma-vez",
+            action="store_true",
+            help="Esvazia a caixa de saída uma vez e termina.",
+        )
+
+    def handle(self, *args, **options):
+        proximo_registro = time.monotonic() + options["metricas"]
+        while True:
+            # Processo de longa duração: descarta conexões vencidas ou quebradas
+            close_old_connections()
+            enviadas = drenar(options["lote"], options["workers"])
+            if enviadas:
+                self.stdout.write(f"{enviadas} notificação(ões) processada(s).")
+            if options["uma_vez"] or time.monotonic() >= proximo_registro:
+                metricas = despachante.metricas.resumo()
+                self.stdout.write(
+                    "Métricas: {enviadas} enviadas, {falhas} falhas, "
+                    "{repeticoes} repetições, {ignoradas} ignoradas, "
+                    "{vazao_por_minuto}/min, fila {fila}, "
+                    "espera por fichas {espera_fichas_s}s".format(**metricas)
+                )
+                proximo_registro = time.monotonic() + options["metricas"]
+            if options["uma_vez"]:
+                return
+            time.sleep(options["intervalo"])
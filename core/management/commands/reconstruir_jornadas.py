@@ -0,0 +1,34 @@
+# core/management/commands/reconstruir_jornadas.py
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.jornadas import reconstruir
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula a jornada da visita atual de cada paciente a partir de "
+        "Chamada e ChamadaProfissional (carga inicial ou correção)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dias",
+            type=int,
+            default=None,
+            help="Reconstrói só as senhas dos últimos N dias (padrão: todas).",
+        )
+
+    def handle(self, *args, **options):
+        inicio = None
+        if options["dias"] is not None:
+            hoje = timezone.localtime().replace(
+                hour=0, minute=0, second=0, microsecond=0
+            )
+            inicio = hoje - datetime.timedelta(days=options["dias"])
+        total = reconstruir(inicio)
+        self.stdout.write(
+            self.style.SUCCESS(f"Jornadas reconstruídas: {total} visita(s).")
+        )
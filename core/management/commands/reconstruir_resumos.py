@@ -0,0 +1,38 @@
+# core/management/commands/reconstruir_resumos.py
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.resumos import reconstruir
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula os resumos por hora do dashboard a partir de Paciente, "
+        "Chamada e ChamadaProfissional (carga inicial ou correção)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dias",
+            type=int,
+            default=None,
+            help="Reconstrói só os últimos N dias (padrão: todo o histórico).",
+        )
+
+    def handle(self, *args, **options):
+        inicio = None
+        if options["dias"] is not None:
+            hoje = timezone.localtime().replace(
+                hour=0, minute=0, second=0, microsecond=0
+            )
+            inicio = hoje - datetime.timedelta(days=options["dias"])
+        baldes = reconstruir(inicio)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Resumos reconstruídos: {baldes['pacientes']} baldes de pacientes, "
+                f"{baldes['guiches']} de guichês, "
+                f"{baldes['profissionais']} de profissionais."
+            )
+        )
@@ -0,0 +1,88 @@
+# core/management/commands/servidor_twilio_falso.py
+from django.core.management.base import BaseCommand
+
+from core.twilio_falso import ServidorTwilioFalso
+
+
+class Command(BaseCommand):
+    help = (
+        "Sobe um servidor local que imita a API de mensagens do Twilio "
+        "(use com NOTIFICACOES_BACKEND=http-fake)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--porta", type=int, default=8099)
+        parser.add_argument(
+            "--latencia",
+            type=float,
+            default=0.0,
+            help="Latência fixa de cada resposta (segundos).",
+        )
+        parser.add_argument(
+            "--variacao-latencia",
+            type=float,
+            default=0.0,
+            help="Latência extra sorteada entre 0 e este valor (segundos).",
+        )
+        parser.add_argument(
+            "--taxa-erros",
+            type=float,
+            default=0.0,
+            help="Fração das requisições respondidas com 503.",
+        )
+        parser.add_argument(
+            "--taxa-limite",
+            type=float,
+            default=0.0,
+            help="Fração das requisições respondidas com 429.",
+        )
+        parser.add_argument(
+            "--falhar-sms",
+            action="store_true",
+            help="Recusa os SMS (força o fallback para o WhatsApp).",
+        )
+        parser.add_argument(
+            "--atraso-callback",
+            type=float,
+            default=1.0,
+            help="Espera (segundos) antes dos callbacks de status.",
+        )
+        parser.add_argument(
+            "--taxa-nao-entregues",
+            type=float,
+            default=0.0,
+            help='Fração das mensagens com callback "undelivered".',
+        )
+        parser.add_argument(
+            "--repeticoes-callback",
+            type=int,
+            default=1,
+            help="Vezes que cada callback de status é enviado.",
+        )
+        parser.add_argument("--semente", type=int, default=None)
+
+    def handle(self, *args, **options):
+        servidor = ServidorTwilioFalso(
+            latencia=options["latencia"],
+            variacao_latencia=options["variacao_latencia"],
+            taxa_erros=options["taxa_erros"],
+            taxa_limite=options["taxa_limite"],
+            falhar_sms=options["falhar_sms"],
+            host=options["host"],
+            porta=options["porta"],
+            semente=options["semente"],
+            atraso_callback=options["atraso_callback"],
+            taxa_nao_entregues=options["taxa_nao_entregues"],
+            repeticoes_callback=options["repeticoes_callback"],
+        )
+        self.stdout.write(f"Servidor Twilio falso em {servidor.url}")
+        try:
+            servidor.servir()
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(
+            f"{len(servidor.mensagens)} mensagem(ns) aceita(s), "
+            f"{servidor.erros} erro(s) simulado(s), {servidor.callbacks} callback(s), "
+            f"{servidor.conexoes} conexão(ões)."
+        )
@@ -0,0 +1,82 @@
+# Generated by Django 5.2.13 on 2026-10-16 20:40
+
+import re
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def semear_contadores_do_dia(apps, schema_editor):
+    """Continua a numeração do dia corrente a partir das senhas já emitidas."""
+    Paciente = apps.get_model("core", "Paciente")
+    ContadorSenha = apps.get_model("core", "ContadorSenha")
+
+    hoje = timezone.localdate()
+    maiores: dict = {}
+    emitidas_hoje = Paciente.objects.filter(
+        horario_geracao_senha__date=hoje, tipo_senha__isnull=False
+    ).values_list("tipo_senha", "senha")
+    for tipo, senha in emitidas_hoje:
+        numero = re.search(r"(\d+)$", senha or "")
+        valor = int(numero.group(1)) if numero else 0
+        maiores[tipo] = max(maiores.get(tipo, 0), valor)
+
+    ContadorSenha.objects.bulk_create(
+        ContadorSenha(dia=hoje, tipo_senha=tipo, ultimo_numero=ultimo)
+        for tipo, ultimo in maiores.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0007_alter_customuser_sala"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ContadorSenha",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("dia", models.DateField(verbose_name="Dia")),
+                (
+                    "tipo_senha",
+                    models.CharField(max_length=2, verbose_name="Tipo de Senha"),
+                ),
+                (
+                    "ultimo_numero",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Último número emitido"
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="paciente",
+            name="dia_senha",
+            field=models.DateField(
+                blank=True, null=True, verbose_name="Dia de emissão da senha"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="paciente",
+            constraint=models.UniqueConstraint(
+                fields=("dia_senha", "senha"), name="senha_unica_por_dia"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="contadorsenha",
+            constraint=models.UniqueConstraint(
+                fields=("dia", "tipo_senha"), name="contador_unico_por_dia_e_tipo"
+            ),
+        ),
+        migrations.RunPython(semear_contadores_do_dia, migrations.RunPython.noop),
+    ]
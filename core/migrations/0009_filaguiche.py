@@ -0,0 +1,90 @@
+# Generated by Django 5.2.13 on 2026-10-16 20:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_contadorsenha"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FilaGuiche",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "chave",
+                    models.CharField(max_length=64, unique=True, verbose_name="Chave"),
+                ),
+                ("dia", models.DateField(db_index=True, verbose_name="Dia")),
+                (
+                    "periodo",
+                    models.CharField(
+                        default="all", max_length=10, verbose_name="Período"
+                    ),
+                ),
+                ("proporcoes", models.JSONField(verbose_name="Proporções")),
+                (
+                    "proximas_posicoes",
+                    models.JSONField(default=dict, verbose_name="Próximas posições"),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ItemFilaGuiche",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("senha", models.CharField(max_length=6, verbose_name="Senha")),
+                ("posicao", models.FloatField(verbose_name="Posição")),
+                (
+                    "fila",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="itens",
+                        to="core.filaguiche",
+                        verbose_name="Fila",
+                    ),
+                ),
+                (
+                    "paciente",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="core.paciente",
+                        verbose_name="Paciente",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["fila", "posicao"],
+                        name="core_itemfi_fila_id_0d1b85_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("fila", "paciente"), name="paciente_unico_por_fila"
+                    )
+                ],
+            },
+        ),
+    ]
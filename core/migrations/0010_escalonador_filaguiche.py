@@ -0,0 +1,45 @@
+# Generated by Django 5.2.13 on 2026-10-16 20:44
+
+from django.db import migrations, models
+
+
+def descartar_filas(apps, schema_editor):
+    # As posições antigas vinham do ciclo expandido; as filas são remontadas
+    # pelo escalonador na próxima renderização do painel.
+    apps.get_model("core", "FilaGuiche").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0009_filaguiche"),
+    ]
+
+    operations = [
+        migrations.RunPython(descartar_filas, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name="itemfilaguiche",
+            name="core_itemfi_fila_id_0d1b85_idx",
+        ),
+        migrations.RemoveField(
+            model_name="filaguiche",
+            name="proximas_posicoes",
+        ),
+        migrations.AddField(
+            model_name="filaguiche",
+            name="estado_escalonador",
+            field=models.JSONField(default=dict, verbose_name="Estado do escalonador"),
+        ),
+        migrations.AddField(
+            model_name="itemfilaguiche",
+            name="nivel",
+            field=models.PositiveSmallIntegerField(default=0, verbose_name="Nível"),
+        ),
+        migrations.AddIndex(
+            model_name="itemfilaguiche",
+            index=models.Index(
+                fields=["fila", "nivel", "posicao"],
+                name="core_itemfi_fila_id_fa0946_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.13 on 2026-10-16 20:49
+
+from django.db import migrations, models
+from django.utils import timezone
+
+# Cópia de Paciente.HORAS_PERIODO no momento desta migração
+HORAS_PERIODO = {"manha": (7, 11), "tarde": (12, 18)}
+LOTE = 2000
+
+
+def preencher_dia_e_periodo(apps, schema_editor):
+    """Deriva dia_atendimento e periodo dos pacientes existentes (America/Sao_Paulo)."""
+    Paciente = apps.get_model("core", "Paciente")
+    fuso = timezone.get_default_timezone()
+
+    pendentes = Paciente.objects.filter(horario_geracao_senha__isnull=False).only(
+        "id", "horario_geracao_senha", "horario_agendamento"
+    )
+    lote = []
+    for paciente in pendentes.iterator(chunk_size=LOTE):
+        geracao = paciente.horario_geracao_senha
+        paciente.dia_atendimento = timezone.localdate(geracao, fuso)
+        hora = timezone.localtime(paciente.horario_agendamento or geracao, fuso).hour
+        paciente.periodo = next(
+            (p for p, (inicio, fim) in HORAS_PERIODO.items() if inicio <= hora <= fim),
+            None,
+        )
+        lote.append(paciente)
+        if len(lote) >= LOTE:
+            Paciente.objects.bulk_update(lote, ["dia_atendimento", "periodo"])
+            lote = []
+    if lote:
+        Paciente.objects.bulk_update(lote, ["dia_atendimento", "periodo"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0010_escalonador_filaguiche"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="paciente",
+            name="dia_atendimento",
+            field=models.DateField(
+                blank=True, null=True, verbose_name="Dia de atendimento"
+            ),
+        ),
+        migrations.AddField(
+            model_name="paciente",
+            name="periodo",
+            field=models.CharField(
+                blank=True,
+                choices=[("manha", "Manhã"), ("tarde", "Tarde")],
+                max_length=5,
+                null=True,
+                verbose_name="Período",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="paciente",
+            index=models.Index(
+                fields=["dia_atendimento", "periodo"], name="paciente_dia_periodo_idx"
+            ),
+        ),
+        migrations.RunPython(preencher_dia_e_periodo, migrations.RunPython.noop),
+    ]
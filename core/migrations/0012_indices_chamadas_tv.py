@@ -0,0 +1,25 @@
+# Generated by Django 5.2.13 on 2026-10-16 20:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0011_dia_atendimento_periodo_paciente"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="chamada",
+            index=models.Index(
+                fields=["acao", "-data_hora"], name="chamada_acao_data_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="chamadaprofissional",
+            index=models.Index(
+                fields=["acao", "-data_hora"], name="chamada_prof_acao_data_idx"
+            ),
+        ),
+    ]
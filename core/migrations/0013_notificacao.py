@@ -0,0 +1,95 @@
+# Generated by Django 5.2.13 on 2026-10-16 21:30
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0012_indices_chamadas_tv"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Notificacao",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "canal",
+                    models.CharField(
+                        choices=[
+                            ("sms_ou_whatsapp", "SMS com WhatsApp como alternativa"),
+                            ("whatsapp", "WhatsApp"),
+                        ],
+                        max_length=20,
+                        verbose_name="Canal",
+                    ),
+                ),
+                (
+                    "numero_destino",
+                    models.CharField(max_length=20, verbose_name="Número de destino"),
+                ),
+                ("mensagem", models.TextField(verbose_name="Mensagem")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pendente", "Pendente"),
+                            ("enviando", "Enviando"),
+                            ("enviada", "Enviada"),
+                            ("erro", "Erro"),
+                        ],
+                        default="pendente",
+                        max_length=10,
+                        verbose_name="Status",
+                    ),
+                ),
+                (
+                    "tentativas",
+                    models.PositiveSmallIntegerField(
+                        default=0, verbose_name="Tentativas"
+                    ),
+                ),
+                (
+                    "resultado",
+                    models.JSONField(blank=True, null=True, verbose_name="Resultado"),
+                ),
+                (
+                    "criada_em",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Criada em"),
+                ),
+                (
+                    "atualizada_em",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        verbose_name="Atualizada em",
+                    ),
+                ),
+                (
+                    "paciente",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="core.paciente",
+                        verbose_name="Paciente",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["status", "id"], name="notificacao_status_idx")
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.13 on 2026-10-16 22:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0013_notificacao"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="notificacao",
+            name="notificacao_status_idx",
+        ),
+        migrations.AddField(
+            model_name="notificacao",
+            name="proxima_tentativa",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, verbose_name="Próxima tentativa"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="notificacao",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("pendente", "Pendente"),
+                    ("enviando", "Enviando"),
+                    ("enviada", "Enviada"),
+                    ("erro", "Erro"),
+                    ("ignorada", "Ignorada"),
+                ],
+                default="pendente",
+                max_length=10,
+                verbose_name="Status",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notificacao",
+            index=models.Index(
+                fields=["status", "proxima_tentativa"], name="notificacao_status_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notificacao",
+            index=models.Index(
+                fields=["numero_destino", "-atualizada_em"],
+                name="notificacao_destino_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.13 on 2026-10-16 23:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0014_notificacao_retentativas"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StatusEntrega",
+            fields=[
+                (
+                    "sid",
+                    models.CharField(
+                        max_length=34,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="SID",
+                    ),
+                ),
+                (
+                    "canal",
+                    models.CharField(
+                        choices=[("sms", "SMS"), ("whatsapp", "WhatsApp")],
+                        max_length=8,
+                        verbose_name="Canal",
+                    ),
+                ),
+                ("status", models.CharField(max_length=11, verbose_name="Status")),
+                (
+                    "codigo_erro",
+                    models.PositiveIntegerField(
+                        blank=True, null=True, verbose_name="Código de erro"
+                    ),
+                ),
+                (
+                    "criada_em",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name="Criada em"
+                    ),
+                ),
+                (
+                    "atualizada_em",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        verbose_name="Atualizada em",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["criada_em", "canal", "status"],
+                        name="status_entrega_periodo_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.13 on 2026-10-17 00:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0015_statusentrega"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="chamada",
+            index=models.Index(
+                fields=["paciente", "acao", "data_hora"],
+                name="chamada_paciente_acao_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="chamadaprofissional",
+            index=models.Index(
+                fields=["paciente", "acao", "data_hora"],
+                name="chamada_prof_paciente_idx",
+            ),
+        ),
+    ]
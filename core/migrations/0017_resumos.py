@@ -0,0 +1,148 @@
+# Generated by Django 5.2.13 on 2026-10-17 10:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0016_chamada_paciente_acao_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ResumoPacientesHora",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("hora", models.DateTimeField(verbose_name="Hora")),
+                (
+                    "tipo_senha",
+                    models.CharField(
+                        blank=True, max_length=2, verbose_name="Tipo de Senha"
+                    ),
+                ),
+                ("pacientes", models.IntegerField(default=0, verbose_name="Pacientes")),
+                ("atendidos", models.IntegerField(default=0, verbose_name="Atendidos")),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("hora", "tipo_senha"), name="resumo_pacientes_unico"
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="ResumoGuicheHora",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("hora", models.DateTimeField(verbose_name="Hora")),
+                (
+                    "tipo_senha",
+                    models.CharField(
+                        blank=True, max_length=2, verbose_name="Tipo de Senha"
+                    ),
+                ),
+                (
+                    "acao",
+                    models.CharField(
+                        choices=[
+                            ("chamada", "Chamada"),
+                            ("reanuncio", "Reanúncio"),
+                            ("confirmado", "Confirmado"),
+                            ("desistencia", "Desistência"),
+                        ],
+                        max_length=15,
+                    ),
+                ),
+                ("total", models.IntegerField(default=0, verbose_name="Total")),
+                (
+                    "guiche",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="resumos",
+                        to="core.guiche",
+                        verbose_name="Guichê",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("hora", "tipo_senha", "guiche", "acao"),
+                        name="resumo_guiche_unico",
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="ResumoProfissionalHora",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("hora", models.DateTimeField(verbose_name="Hora")),
+                (
+                    "tipo_senha",
+                    models.CharField(
+                        blank=True, max_length=2, verbose_name="Tipo de Senha"
+                    ),
+                ),
+                (
+                    "acao",
+                    models.CharField(
+                        choices=[
+                            ("chamada", "Chamada"),
+                            ("reanuncio", "Reanúncio"),
+                            ("confirmado", "Confirmado"),
+                            ("encaminha", "Encaminha"),
+                        ],
+                        max_length=15,
+                    ),
+                ),
+                ("total", models.IntegerField(default=0, verbose_name="Total")),
+                (
+                    "profissional_saude",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="resumos",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="ProfissionalDeSaude",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("hora", "tipo_senha", "profissional_saude", "acao"),
+                        name="resumo_profissional_unico",
+                    )
+                ],
+            },
+        ),
+    ]
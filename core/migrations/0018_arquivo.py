@@ -0,0 +1,244 @@
+# Generated by Django 5.2.13 on 2026-10-16 22:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Visões que juntam cada tabela quente ao seu arquivo (modelos *Historico)
+TABELAS = (
+    (
+        "core_chamada_historico",
+        ("core_chamada", "core_chamadaarquivo"),
+        "id, paciente_id, guiche_id, acao, data_hora",
+    ),
+    (
+        "core_chamadaprofissional_historico",
+        ("core_chamadaprofissional", "core_chamadaprofissionalarquivo"),
+        "id, paciente_id, profissional_saude_id, acao, data_hora",
+    ),
+    (
+        "core_registrodeacesso_historico",
+        ("core_registrodeacesso", "core_registrodeacessoarquivo"),
+        "id, usuario_id, data_hora, tipo_de_acesso, endereco_ip, user_agent,"
+        " view_name",
+    ),
+)
+VISOES = [
+    f"CREATE VIEW {visao} AS "
+    f"SELECT {colunas} FROM {quente} UNION ALL SELECT {colunas} FROM {arquivo}"
+    for visao, (quente, arquivo), colunas in TABELAS
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0017_resumos"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChamadaHistorico",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "acao",
+                    models.CharField(
+                        choices=[
+                            ("chamada", "Chamada"),
+                            ("reanuncio", "Reanúncio"),
+                            ("confirmado", "Confirmado"),
+                            ("desistencia", "Desistência"),
+                        ],
+                        max_length=15,
+                    ),
+                ),
+                ("data_hora", models.DateTimeField()),
+            ],
+            options={
+                "db_table": "core_chamada_historico",
+                "managed": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="ChamadaProfissionalHistorico",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "acao",
+                    models.CharField(
+                        choices=[
+                            ("chamada", "Chamada"),
+                            ("reanuncio", "Reanúncio"),
+                            ("confirmado", "Confirmado"),
+                            ("encaminha", "Encaminha"),
+                        ],
+                        max_length=15,
+                    ),
+                ),
+                ("data_hora", models.DateTimeField()),
+            ],
+            options={
+                "db_table": "core_chamadaprofissional_historico",
+                "managed": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="RegistroDeAcessoHistorico",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("data_hora", models.DateTimeField()),
+                ("tipo_de_acesso", models.CharField(max_length=10)),
+                ("endereco_ip", models.GenericIPAddressField(blank=True, null=True)),
+                ("user_agent", models.TextField(blank=True, null=True)),
+                ("view_name", models.CharField(blank=True, max_length=255, null=True)),
+            ],
+            options={
+                "db_table": "core_registrodeacesso_historico",
+                "managed": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="ChamadaArquivo",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                (
+                    "acao",
+                    models.CharField(
+                        choices=[
+                            ("chamada", "Chamada"),
+                            ("reanuncio", "Reanúncio"),
+                            ("confirmado", "Confirmado"),
+                            ("desistencia", "Desistência"),
+                        ],
+                        max_length=15,
+                    ),
+                ),
+                ("data_hora", models.DateTimeField(db_index=True)),
+                (
+                    "guiche",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="core.guiche",
+                        verbose_name="Guichê",
+                    ),
+                ),
+                (
+                    "paciente",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="core.paciente",
+                        verbose_name="Paciente",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ChamadaProfissionalArquivo",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                (
+                    "acao",
+                    models.CharField(
+                        choices=[
+                            ("chamada", "Chamada"),
+                            ("reanuncio", "Reanúncio"),
+                            ("confirmado", "Confirmado"),
+                            ("encaminha", "Encaminha"),
+                        ],
+                        max_length=15,
+                    ),
+                ),
+                ("data_hora", models.DateTimeField(db_index=True)),
+                (
+                    "paciente",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="core.paciente",
+                        verbose_name="Paciente",
+                    ),
+                ),
+                (
+                    "profissional_saude",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="ProfissionalDeSaude",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="RegistroDeAcessoArquivo",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                (
+                    "data_hora",
+                    models.DateTimeField(db_index=True, verbose_name="Data e Hora"),
+                ),
+                (
+                    "tipo_de_acesso",
+                    models.CharField(max_length=10, verbose_name="Tipo de Acesso"),
+                ),
+                (
+                    "endereco_ip",
+                    models.GenericIPAddressField(
+                        blank=True, null=True, verbose_name="Endereço IP"
+                    ),
+                ),
+                (
+                    "user_agent",
+                    models.TextField(blank=True, null=True, verbose_name="User Agent"),
+                ),
+                (
+                    "view_name",
+                    models.CharField(
+                        blank=True,
+                        max_length=255,
+                        null=True,
+                        verbose_name="Nome da View",
+                    ),
+                ),
+                (
+                    "usuario",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Usuário",
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunSQL(
+            sql=VISOES, reverse_sql=[f"DROP VIEW {visao}" for visao, _, _ in TABELAS]
+        ),
+    ]
@@ -0,0 +1,103 @@
+# Generated by Django 5.2.13 on 2026-10-16 22:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0018_arquivo"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="JornadaPaciente",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("gerada", models.DateTimeField(verbose_name="Geração da Senha")),
+                (
+                    "tipo_senha",
+                    models.CharField(
+                        blank=True, max_length=2, verbose_name="Tipo de Senha"
+                    ),
+                ),
+                (
+                    "primeira_chamada_guiche",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Primeira Chamada no Guichê"
+                    ),
+                ),
+                (
+                    "confirmado_guiche",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Confirmado no Guichê"
+                    ),
+                ),
+                (
+                    "desistencia_guiche",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Desistência no Guichê"
+                    ),
+                ),
+                (
+                    "primeira_chamada_profissional",
+                    models.DateTimeField(
+                        blank=True,
+                        null=True,
+                        verbose_name="Primeira Chamada do Profissional",
+                    ),
+                ),
+                (
+                    "confirmado_profissional",
+                    models.DateTimeField(
+                        blank=True,
+                        null=True,
+                        verbose_name="Confirmado pelo Profissional",
+                    ),
+                ),
+                (
+                    "encaminhamentos",
+                    models.IntegerField(default=0, verbose_name="Encaminhamentos"),
+                ),
+                (
+                    "paciente",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="jornadas",
+                        to="core.paciente",
+                        verbose_name="Paciente",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["primeira_chamada_guiche"],
+                        name="jornada_chamada_guiche_idx",
+                    ),
+                    models.Index(
+                        fields=["confirmado_guiche"],
+                        name="jornada_confirmado_guiche_idx",
+                    ),
+                    models.Index(
+                        fields=["confirmado_profissional"],
+                        name="jornada_confirmado_prof_idx",
+                    ),
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("paciente", "gerada"), name="jornada_visita_unica"
+                    )
+                ],
+            },
+        ),
+    ]
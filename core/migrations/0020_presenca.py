@@ -0,0 +1,41 @@
+# Generated by Django 5.2.13 on 2026-10-16 22:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def remover_sinais_de_atividade(apps, schema_editor):
+    """Os sinais de atividade não são mais gravados em RegistroDeAcesso."""
+    for modelo in ("RegistroDeAcesso", "RegistroDeAcessoArquivo"):
+        apps.get_model("core", modelo).objects.filter(
+            tipo_de_acesso="atividade"
+        ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0019_jornadapaciente"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Presenca",
+            fields=[
+                (
+                    "usuario",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="presenca",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Usuário",
+                    ),
+                ),
+                ("visto_em", models.DateTimeField(verbose_name="Visto em")),
+            ],
+        ),
+        migrations.RunPython(remover_sinais_de_atividade, migrations.RunPython.noop),
+    ]
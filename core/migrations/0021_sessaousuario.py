@@ -0,0 +1,47 @@
+# Generated by Django 5.2.13 on 2026-10-16 22:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0020_presenca"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SessaoUsuario",
+            fields=[
+                (
+                    "chave",
+                    models.CharField(
+                        max_length=40,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="Chave da Sessão",
+                    ),
+                ),
+                ("expira_em", models.DateTimeField(verbose_name="Expira em")),
+                (
+                    "usuario",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sessoes",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Usuário",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["usuario", "expira_em"],
+                        name="sessao_usuario_expira_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.13 on 2026-10-17 12:10
+
+from django.db import migrations
+
+
+def preencher_resumos(apps, schema_editor):
+    """
+    Carga inicial dos resumos por hora (0017_resumos) com o histórico já
+    gravado; sem ela o dashboard mostra zero até rodar
+    ``reconstruir_resumos``. Fica depois de 0018_arquivo porque a
+    reconstrução também lê as tabelas de arquivo.
+    """
+    from core.resumos import reconstruir
+
+    reconstruir()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0021_sessaousuario"),
+    ]
+
+    operations = [
+        migrations.RunPython(preencher_resumos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.13 on 2026-10-17 12:20
+
+from django.db import migrations
+
+
+def preencher_jornadas(apps, schema_editor):
+    """
+    Carga inicial das jornadas (0019_jornadapaciente) da visita atual de
+    cada paciente já cadastrado; sem ela os tempos do dashboard ficam vazios
+    para os pacientes anteriores à implantação.
+    """
+    from core.jornadas import reconstruir
+
+    reconstruir()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0022_preencher_resumos"),
+    ]
+
+    operations = [
+        migrations.RunPython(preencher_jornadas, migrations.RunPython.noop),
+    ]
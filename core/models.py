@@ -2,7 +2,7 @@ import datetime
 
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser, UserManager
-from django.db import models
+from django.db import connection, models
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import RegexValidator
@@ -64,6 +64,13 @@ class Paciente(models.Model):
         ("H", "Hansenologia Retorno"),
         ("U", "Ultrassom"),
     ]
+    PERIODO_CHOICES = [
+        ("manha", "Manhã"),
+        ("tarde", "Tarde"),
+    ]
+    # Faixas de horário (inclusivas, hora local) de cada período
+    HORAS_PERIODO = {"manha": (7, 11), "tarde": (12, 18)}
+
     nome_completo = models.CharField(
         max_length=255, verbose_name="Nome Completo", null=True, blank=True
     )
@@ -130,11 +137,150 @@ class Paciente(models.Model):
         max_length=255, blank=True, null=True, verbose_name="Observações"
     )
     atendido = models.BooleanField(default=False, verbose_name="Atendido")
+    # Preenchido apenas quando a senha é emitida pelo ContadorSenha; senhas
+    # informadas manualmente ficam fora da restrição de unicidade.
+    dia_senha = models.DateField(
+        null=True, blank=True, verbose_name="Dia de emissão da senha"
+    )
+    # Derivados no save (ver atualizar_dia_e_periodo) para que filas, senhas e
+    # dashboard filtrem por igualdade/intervalo indexado em vez de __date/__hour.
+    dia_atendimento = models.DateField(
+        null=True, blank=True, verbose_name="Dia de atendimento"
+    )
+    periodo = models.CharField(
+        max_length=5,
+        choices=PERIODO_CHOICES,
+        null=True,
+        blank=True,
+        verbose_name="Período",
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dia_senha", "senha"], name="senha_unica_por_dia"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["dia_atendimento", "periodo"], name="paciente_dia_periodo_idx"
+            )
+        ]
+
+    def atualizar_dia_e_periodo(self):
+        """
+        Deriva dia_atendimento e periodo no fuso do sistema (America/Sao_Paulo).
+
+        O dia é o da geração da senha; o período vem do agendamento ou, sem
+        ele, da geração da senha. Em um paciente novo horario_geracao_senha
+        ainda não foi preenchido (auto_now_add), então vale o instante atual.
+        """
+        fuso = timezone.get_default_timezone()
+        geracao = self.horario_geracao_senha or timezone.now()
+        self.dia_atendimento = timezone.localdate(geracao, fuso)
+        hora = timezone.localtime(self.horario_agendamento or geracao, fuso).hour
+        self.periodo = next(
+            (
+                periodo
+                for periodo, (inicio, fim) in self.HORAS_PERIODO.items()
+                if inicio <= hora <= fim
+            ),
+            None,
+        )
 
     def __str__(self):
         return f"{self.nome_completo} (Senha: {self.senha}, Agendamento: {self.horario_agendamento})"
 
 
+class ContadorSenha(models.Model):
+    """Último número de senha emitido por dia e tipo de senha."""
+
+    dia = models.DateField(verbose_name="Dia")
+    tipo_senha = models.CharField(max_length=2, verbose_name="Tipo de Senha")
+    ultimo_numero = models.PositiveIntegerField(
+        default=0, verbose_name="Último número emitido"
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dia", "tipo_senha"], name="contador_unico_por_dia_e_tipo"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.tipo_senha} em {self.dia}: {self.ultimo_numero}"
+
+    @classmethod
+    def proximo_numero(cls, dia: datetime.date, tipo_senha: str) -> int:
+        """
+        Incrementa o contador de (dia, tipo_senha) e retorna o novo valor.
+
+        Usa um único INSERT ... ON CONFLICT DO UPDATE ... RETURNING (PostgreSQL
+        e SQLite >= 3.35), então o incremento é atômico e custa uma ida ao
+        banco, independentemente de quantas senhas já foram emitidas no dia.
+        """
+        tabela = connection.ops.quote_name(cls._meta.db_table)
+        sql = (
+            f"INSERT INTO {tabela} (dia, tipo_senha, ultimo_numero) "
+            "VALUES (%s, %s, 1) "
+            "ON CONFLICT (dia, tipo_senha) DO UPDATE "
+            f"SET ultimo_numero = {tabela}.ultimo_numero + 1 "
+            "RETURNING ultimo_numero"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [connection.ops.adapt_datefield_value(dia), tipo_senha])
+            return cursor.fetchone()[0]
+
+
+class FilaGuiche(models.Model):
+    """
+    Fila pré-calculada de um perfil de filtros do painel do guichê.
+
+    Guichês com a mesma configuração (proporções por tipo + período) no mesmo
+    dia compartilham a mesma fila, que é mantida incrementalmente pelos
+    signals de Paciente em vez de ser remontada a cada renderização.
+    """
+
+    chave = models.CharField(max_length=64, unique=True, verbose_name="Chave")
+    dia = models.DateField(db_index=True, verbose_name="Dia")
+    periodo = models.CharField(max_length=10, default="all", verbose_name="Período")
+    proporcoes = models.JSONField(verbose_name="Proporções")
+    # Relógio virtual de cada tipo de senha (ver guiche.escalonador)
+    estado_escalonador = models.JSONField(
+        default=dict, verbose_name="Estado do escalonador"
+    )
+
+    def __str__(self):
+        return f"Fila {self.dia} {self.periodo} {self.proporcoes}"
+
+
+class ItemFilaGuiche(models.Model):
+    fila = models.ForeignKey(
+        FilaGuiche,
+        on_delete=models.CASCADE,
+        related_name="itens",
+        verbose_name="Fila",
+    )
+    paciente = models.ForeignKey(
+        Paciente, on_delete=models.CASCADE, verbose_name="Paciente"
+    )
+    senha = models.CharField(max_length=6, verbose_name="Senha")
+    nivel = models.PositiveSmallIntegerField(default=0, verbose_name="Nível")
+    posicao = models.FloatField(verbose_name="Posição")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["fila", "paciente"], name="paciente_unico_por_fila"
+            )
+        ]
+        indexes = [models.Index(fields=["fila", "nivel", "posicao"])]
+
+    def __str__(self):
+        return f"{self.senha} na posição {self.posicao}"
+
+
 class Atendimento(models.Model):
     paciente = models.ForeignKey(
         Paciente, on_delete=models.CASCADE, verbose_name="Paciente"
@@ -218,6 +364,15 @@ class Chamada(models.Model):
 
     class Meta:
         ordering = ["-data_hora"]
+        indexes = [
+            # Última chamada / últimas confirmações exibidas na TV1
+            models.Index(fields=["acao", "-data_hora"], name="chamada_acao_data_idx"),
+            # Primeira chamada do paciente antes de cada confirmação (dashboard)
+            models.Index(
+                fields=["paciente", "acao", "data_hora"],
+                name="chamada_paciente_acao_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.get_acao_display()} - {self.paciente.senha} no Guichê {self.guiche.numero}"
@@ -252,6 +407,411 @@ class ChamadaProfissional(models.Model):
 
     class Meta:
         ordering = ["-data_hora"]
+        indexes = [
+            # Última chamada / últimas confirmações exibidas na TV2
+            models.Index(
+                fields=["acao", "-data_hora"], name="chamada_prof_acao_data_idx"
+            ),
+            # Primeira chamada do paciente antes de cada confirmação (dashboard)
+            models.Index(
+                fields=["paciente", "acao", "data_hora"],
+                name="chamada_prof_paciente_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.get_acao_display()} - {self.paciente.senha} no ProfissionalDeSaude {self.profissional_saude.first_name}"
+
+
+class Notificacao(models.Model):
+    """
+    Mensagem ao paciente (SMS/WhatsApp) na caixa de saída.
+
+    Gravada na mesma transação da chamada que a origina e enviada fora da
+    requisição pelo comando processar_notificacoes (ver core.notificacoes).
+    """
+
+    CANAIS = (
+        ("sms_ou_whatsapp", "SMS com WhatsApp como alternativa"),
+        ("whatsapp", "WhatsApp"),
+    )
+    STATUS = (
+        ("pendente", "Pendente"),
+        ("enviando", "Enviando"),
+        ("enviada", "Enviada"),
+        ("erro", "Erro"),
+        # Repetição da mesma mensagem dentro da janela de dedupe
+        ("ignorada", "Ignorada"),
+    )
+
+    paciente = models.ForeignKey(
+        Paciente,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name="Paciente",
+    )
+    canal = models.CharField(max_length=20, choices=CANAIS, verbose_name="Canal")
+    numero_destino = models.CharField(max_length=20, verbose_name="Número de destino")
+    mensagem = models.TextField(verbose_name="Mensagem")
+    status = models.CharField(
+        max_length=10, choices=STATUS, default="pendente", verbose_name="Status"
+    )
+    tentativas = models.PositiveSmallIntegerField(default=0, verbose_name="Tentativas")
+    # Pendentes só são reservadas a partir deste instante (backoff entre tentativas)
+    proxima_tentativa = models.DateTimeField(
+        default=timezone.now, verbose_name="Próxima tentativa"
+    )
+    # Resposta de core.utils (SID, status do Twilio ou erro)
+    resultado = models.JSONField(null=True, blank=True, verbose_name="Resultado")
+    criada_em = models.DateTimeField(auto_now_add=True, verbose_name="Criada em")
+    atualizada_em = models.DateTimeField(
+        default=timezone.now, verbose_name="Atualizada em"
+    )
+
+    class Meta:
+        indexes = [
+            # Reserva das pendentes já liberadas para envio, pelo worker
+            models.Index(
+                fields=["status", "proxima_tentativa"], name="notificacao_status_idx"
+            ),
+            # Dedupe: mensagens recentes para o mesmo número
+            models.Index(
+                fields=["numero_destino", "-atualizada_em"],
+                name="notificacao_destino_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_canal_display()} para {self.numero_destino}: {self.status}"
+
+
+class StatusEntrega(models.Model):
+    """
+    Último status de entrega informado pelo Twilio (status callback) para
+    cada mensagem, pelo SID. Tabela enxuta: uma linha por mensagem, gravada
+    em lotes por core.entregas.
+    """
+
+    CANAIS = (
+        ("sms", "SMS"),
+        ("whatsapp", "WhatsApp"),
+    )
+
+    sid = models.CharField(max_length=34, primary_key=True, verbose_name="SID")
+    canal = models.CharField(max_length=8, choices=CANAIS, verbose_name="Canal")
+    status = models.CharField(max_length=11, verbose_name="Status")
+    codigo_erro = models.PositiveIntegerField(
+        null=True, blank=True, verbose_name="Código de erro"
+    )
+    criada_em = models.DateTimeField(default=timezone.now, verbose_name="Criada em")
+    atualizada_em = models.DateTimeField(
+        default=timezone.now, verbose_name="Atualizada em"
+    )
+
+    class Meta:
+        indexes = [
+            # Taxas de entrega por canal no período (dashboard)
+            models.Index(
+                fields=["criada_em", "canal", "status"],
+                name="status_entrega_periodo_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.sid} ({self.get_canal_display()}): {self.status}"
+
+
+class ResumoPacientesHora(models.Model):
+    """
+    Pacientes por hora de geração da senha e tipo de senha, mantido por
+    core.resumos a cada gravação de Paciente (dashboard).
+    """
+
+    hora = models.DateTimeField(verbose_name="Hora")
+    # "" para pacientes sem tipo de senha (NULL não conflita em UNIQUE)
+    tipo_senha = models.CharField(
+        max_length=2, blank=True, verbose_name="Tipo de Senha"
+    )
+    pacientes = models.IntegerField(default=0, verbose_name="Pacientes")
+    atendidos = models.IntegerField(default=0, verbose_name="Atendidos")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["hora", "tipo_senha"], name="resumo_pacientes_unico"
+            )
+        ]
+
+
+class ResumoGuicheHora(models.Model):
+    """Chamadas por hora, tipo de senha, guichê e ação (ver core.resumos)."""
+
+    hora = models.DateTimeField(verbose_name="Hora")
+    tipo_senha = models.CharField(
+        max_length=2, blank=True, verbose_name="Tipo de Senha"
+    )
+    guiche = models.ForeignKey(
+        Guiche,
+        on_delete=models.CASCADE,
+        related_name="resumos",
+        verbose_name="Guichê",
+    )
+    acao = models.CharField(max_length=15, choices=Chamada.ACOES)
+    total = models.IntegerField(default=0, verbose_name="Total")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["hora", "tipo_senha", "guiche", "acao"],
+                name="resumo_guiche_unico",
+            )
+        ]
+
+
+class ResumoProfissionalHora(models.Model):
+    """
+    Chamadas de profissionais por hora, tipo de senha, profissional e ação
+    (ver core.resumos).
+    """
+
+    hora = models.DateTimeField(verbose_name="Hora")
+    tipo_senha = models.CharField(
+        max_length=2, blank=True, verbose_name="Tipo de Senha"
+    )
+    profissional_saude = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name="resumos",
+        verbose_name="ProfissionalDeSaude",
+    )
+    acao = models.CharField(max_length=15, choices=ChamadaProfissional.ACOES)
+    total = models.IntegerField(default=0, verbose_name="Total")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["hora", "tipo_senha", "profissional_saude", "acao"],
+                name="resumo_profissional_unico",
+            )
+        ]
+
+
+class Presenca(models.Model):
+    """
+    Último sinal de atividade de cada usuário (core.presenca): uma linha por
+    usuário, atualizada com upsert, reserva do cache "presenca".
+    """
+
+    usuario = models.OneToOneField(
+        CustomUser,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="presenca",
+        verbose_name="Usuário",
+    )
+    visto_em = models.DateTimeField(verbose_name="Visto em")
+
+    def __str__(self):
+        return f"{self.usuario_id} visto em {self.visto_em}"
+
+
+class SessaoUsuario(models.Model):
+    """
+    Sessões abertas de cada usuário (core.presenca), gravadas no login,
+    renovadas com a presença e removidas no logout: a lista de funcionários
+    não precisa decodificar a tabela de sessões.
+    """
+
+    chave = models.CharField(
+        max_length=40, primary_key=True, verbose_name="Chave da Sessão"
+    )
+    usuario = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name="sessoes",
+        verbose_name="Usuário",
+    )
+    expira_em = models.DateTimeField(verbose_name="Expira em")
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["usuario", "expira_em"], name="sessao_usuario_expira_idx"
+            )
+        ]
+
+    def __str__(self):
+        return f"Sessão de {self.usuario_id} até {self.expira_em}"
+
+
+class JornadaPaciente(models.Model):
+    """
+    Uma visita do paciente (da geração da senha à consulta), com o primeiro
+    horário de cada etapa; mantida por core.jornadas a cada ação.
+    """
+
+    paciente = models.ForeignKey(
+        Paciente,
+        on_delete=models.CASCADE,
+        related_name="jornadas",
+        verbose_name="Paciente",
+    )
+    # Um recadastro gera nova senha no mesmo Paciente: outra visita
+    gerada = models.DateTimeField(verbose_name="Geração da Senha")
+    tipo_senha = models.CharField(
+        max_length=2, blank=True, verbose_name="Tipo de Senha"
+    )
+    primeira_chamada_guiche = models.DateTimeField(
+        null=True, blank=True, verbose_name="Primeira Chamada no Guichê"
+    )
+    confirmado_guiche = models.DateTimeField(
+        null=True, blank=True, verbose_name="Confirmado no Guichê"
+    )
+    desistencia_guiche = models.DateTimeField(
+        null=True, blank=True, verbose_name="Desistência no Guichê"
+    )
+    primeira_chamada_profissional = models.DateTimeField(
+        null=True, blank=True, verbose_name="Primeira Chamada do Profissional"
+    )
+    confirmado_profissional = models.DateTimeField(
+        null=True, blank=True, verbose_name="Confirmado pelo Profissional"
+    )
+    encaminhamentos = models.IntegerField(default=0, verbose_name="Encaminhamentos")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["paciente", "gerada"], name="jornada_visita_unica"
+            )
+        ]
+        indexes = [
+            # Períodos do dashboard: espera, guichê e consulta
+            models.Index(
+                fields=["primeira_chamada_guiche"], name="jornada_chamada_guiche_idx"
+            ),
+            models.Index(
+                fields=["confirmado_guiche"], name="jornada_confirmado_guiche_idx"
+            ),
+            models.Index(
+                fields=["confirmado_profissional"], name="jornada_confirmado_prof_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"Jornada de {self.paciente_id} ({self.gerada})"
+
+
+# ── Arquivo de meses fechados (core.arquivo) ────────────────────────────────
+# Cada tabela quente tem uma tabela de arquivo com as mesmas colunas (e os
+# mesmos ids) e uma visão do banco que junta as duas (UNION ALL), lida pelos
+# modelos *Historico, não gerenciados, em consultas que alcançam o arquivo.
+
+
+class ChamadaArquivo(models.Model):
+    """Chamadas de meses fechados, movidas de Chamada por core.arquivo."""
+
+    id = models.BigIntegerField(primary_key=True)
+    paciente = models.ForeignKey(
+        Paciente, on_delete=models.CASCADE, related_name="+", verbose_name="Paciente"
+    )
+    guiche = models.ForeignKey(
+        Guiche, on_delete=models.CASCADE, related_name="+", verbose_name="Guichê"
+    )
+    acao = models.CharField(max_length=15, choices=Chamada.ACOES)
+    data_hora = models.DateTimeField(db_index=True)
+
+
+class ChamadaProfissionalArquivo(models.Model):
+    """Chamadas de profissionais de meses fechados (ver ChamadaArquivo)."""
+
+    id = models.BigIntegerField(primary_key=True)
+    paciente = models.ForeignKey(
+        Paciente, on_delete=models.CASCADE, related_name="+", verbose_name="Paciente"
+    )
+    profissional_saude = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="ProfissionalDeSaude",
+    )
+    acao = models.CharField(max_length=15, choices=ChamadaProfissional.ACOES)
+    data_hora = models.DateTimeField(db_index=True)
+
+
+class RegistroDeAcessoArquivo(models.Model):
+    """Registros de acesso de meses fechados (ver ChamadaArquivo)."""
+
+    id = models.BigIntegerField(primary_key=True)
+    usuario = models.ForeignKey(
+        CustomUser, on_delete=models.CASCADE, related_name="+", verbose_name="Usuário"
+    )
+    data_hora = models.DateTimeField(db_index=True, verbose_name="Data e Hora")
+    tipo_de_acesso = models.CharField(max_length=10, verbose_name="Tipo de Acesso")
+    endereco_ip = models.GenericIPAddressField(
+        null=True, blank=True, verbose_name="Endereço IP"
+    )
+    user_agent = models.TextField(blank=True, null=True, verbose_name="User Agent")
+    view_name = models.CharField(
+        max_length=255, verbose_name="Nome da View", null=True, blank=True
+    )
+
+
+class ChamadaHistorico(models.Model):
+    """Chamada e ChamadaArquivo juntas (visão core_chamada_historico)."""
+
+    paciente = models.ForeignKey(
+        Paciente, on_delete=models.DO_NOTHING, related_name="+", db_constraint=False
+    )
+    guiche = models.ForeignKey(
+        Guiche, on_delete=models.DO_NOTHING, related_name="+", db_constraint=False
+    )
+    acao = models.CharField(max_length=15, choices=Chamada.ACOES)
+    data_hora = models.DateTimeField()
+
+    class Meta:
+        managed = False
+        db_table = "core_chamada_historico"
+
+
+class ChamadaProfissionalHistorico(models.Model):
+    """
+    ChamadaProfissional e ChamadaProfissionalArquivo juntas (visão
+    core_chamadaprofissional_historico).
+    """
+
+    paciente = models.ForeignKey(
+        Paciente, on_delete=models.DO_NOTHING, related_name="+", db_constraint=False
+    )
+    profissional_saude = models.ForeignKey(
+        CustomUser,
+        on_delete=models.DO_NOTHING,
+        related_name="+",
+        db_constraint=False,
+    )
+    acao = models.CharField(max_length=15, choices=ChamadaProfissional.ACOES)
+    data_hora = models.DateTimeField()
+
+    class Meta:
+        managed = False
+        db_table = "core_chamadaprofissional_historico"
+
+
+class RegistroDeAcessoHistorico(models.Model):
+    """
+    RegistroDeAcesso e RegistroDeAcessoArquivo juntos (visão
+    core_registrodeacesso_historico).
+    """
+
+    usuario = models.ForeignKey(
+        CustomUser, on_delete=models.DO_NOTHING, related_name="+", db_constraint=False
+    )
+    data_hora = models.DateTimeField()
+    tipo_de_acesso = models.CharField(max_length=10)
+    endereco_ip = models.GenericIPAddressField(null=True, blank=True)
+    user_agent = models.TextField(blank=True, null=True)
+    view_name = models.CharField(max_length=255, null=True, blank=True)
+
+    class Meta:
+        managed = False
+        db_table = "core_registrodeacesso_historico"
@@ -0,0 +1,159 @@
+# core/notificacoes.py
+"""
+Caixa de saída das notificações (SMS/WhatsApp) aos pacientes.
+
+As views de guichê e de profissional não chamam o Twilio: gravam uma
+Notificacao na mesma transação da Chamada/ChamadaProfissional e respondem na
+hora com a URL de status da notificação, que a interface consulta depois.
+
+O comando ``processar_notificacoes`` drena a caixa de saída: reserva um lote
+de notificações pendentes (SELECT ... FOR UPDATE SKIP LOCKED onde o banco
+suporta, de modo que vários workers podem rodar juntos), envia as mensagens
+em paralelo por um pool de threads e grava os resultados. As threads do pool
+só fazem as chamadas HTTP; as escritas no banco ficam na thread principal.
+Limite de taxa, repetições com backoff e dedupe ficam em core.despacho.
+
+Notificações presas em "enviando" (worker interrompido no meio do envio)
+voltam a "pendente" depois de TEMPO_ENVIO.
+"""
+
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.urls import reverse
+from django.utils import timezone
+
+from core.despacho import despachante
+from core.models import Notificacao, Paciente, StatusEntrega
+
+# Tempo máximo de um envio antes de a notificação ser liberada de novo
+TEMPO_ENVIO = datetime.timedelta(minutes=5)
+
+
+def enfileirar(
+    numero_destino: str,
+    mensagem: str,
+    canal: str = "sms_ou_whatsapp",
+    paciente: Optional[Paciente] = None,
+) -> Notificacao:
+    """Grava a notificação como pendente (use dentro da transação da chamada)."""
+    return Notificacao.objects.create(
+        paciente=paciente,
+        canal=canal,
+        numero_destino=numero_destino,
+        mensagem=mensagem,
+    )
+
+
+def descrever(notificacao: Notificacao) -> Dict[str, Any]:
+    """Estado da notificação no formato das respostas JSON."""
+    sid = (notificacao.resultado or {}).get("sid")
+    return {
+        "id": notificacao.id,
+        "status": notificacao.status,
+        "status_url": reverse("status_notificacao", args=[notificacao.id]),
+        "resultado": notificacao.resultado,
+        # Último status informado pelo status callback do Twilio
+        "entrega": (
+            StatusEntrega.objects.filter(sid=sid)
+            .values_list("status", flat=True)
+            .first()
+            if sid
+            else None
+        ),
+    }
+
+
+def liberar_presas() -> int:
+    """Devolve à fila as notificações em "enviando" há mais de TEMPO_ENVIO."""
+    limite = timezone.now() - TEMPO_ENVIO
+    return Notificacao.objects.filter(
+        status="enviando", atualizada_em__lt=limite
+    ).update(status="pendente", atualizada_em=timezone.now())
+
+
+def reservar(limite: int) -> List[Notificacao]:
+    """Marca até ``limite`` notificações pendentes como "enviando" e as retorna."""
+    with transaction.atomic():
+        ids = list(
+            Notificacao.objects.select_for_update(skip_locked=True)
+            .filter(status="pendente", proxima_tentativa__lte=timezone.now())
+            .order_by("proxima_tentativa", "id")
+            .values_list("id", flat=True)[:limite]
+        )
+        if not ids:
+            return []
+        Notificacao.objects.filter(id__in=ids).update(
+            status="enviando",
+            tentativas=F("tentativas") + 1,
+            atualizada_em=timezone.now(),
+        )
+        return list(Notificacao.objects.filter(id__in=ids).order_by("id"))
+
+
+def registrar(notificacao: Notificacao, resultado: Dict[str, Any]) -> None:
+    """Grava o resultado; erros transitórios voltam à fila com backoff."""
+    agora = timezone.now()
+    notificacao.resultado = resultado
+    if resultado.get("status") == "success":
+        notificacao.status = "enviada"
+        despachante.metricas.contar("enviadas")
+    elif despachante.deve_repetir(notificacao, resultado):
+        notificacao.status = "pendente"
+        notificacao.proxima_tentativa = agora + despachante.atraso(
+            notificacao.tentativas
+        )
+        despachante.metricas.contar("repeticoes")
+    else:
+        notificacao.status = "erro"
+        despachante.metricas.contar("falhas")
+    notificacao.atualizada_em = agora
+    notificacao.save(
+        update_fields=["resultado", "status", "proxima_tentativa", "atualizada_em"]
+    )
+
+
+def ignorar(notificacoes: List[Notificacao]) -> None:
+    """Marca como ignoradas as repetições descartadas pelo dedupe."""
+    if not notificacoes:
+        return
+    Notificacao.objects.filter(id__in=[n.id for n in notificacoes]).update(
+        status="ignorada",
+        resultado={"status": "ignored", "motivo": "mensagem repetida"},
+        atualizada_em=timezone.now(),
+    )
+    despachante.metricas.contar("ignoradas", len(notificacoes))
+
+
+def processar_lote(limite: Optional[int] = None, workers: Optional[int] = None) -> int:
+    """Reserva, envia em paralelo e registra um lote. Retorna o tamanho do lote."""
+    lote = reservar(limite or settings.NOTIFICACOES_LOTE)
+    if not lote:
+        return 0
+
+    repetidas = despachante.duplicadas(lote)
+    ignorar([n for n in lote if n.id in repetidas])
+    envios = [n for n in lote if n.id not in repetidas]
+    if envios:
+        with ThreadPoolExecutor(
+            max_workers=min(workers or settings.NOTIFICACOES_WORKERS, len(envios))
+        ) as pool:
+            resultados = pool.map(despachante.enviar, envios)
+            for notificacao, resultado in zip(envios, resultados):
+                registrar(notificacao, resultado)
+    return len(lote)
+
+
+def drenar(limite: Optional[int] = None, workers: Optional[int] = None) -> int:
+    """Processa lotes até esvaziar a caixa de saída. Retorna o total enviado."""
+    liberar_presas()
+    total = 0
+    while True:
+        processadas = processar_lote(limite, workers)
+        if not processadas:
+            return total
+        total += processadas
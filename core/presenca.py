@@ -0,0 +1,156 @@
+# core/presenca.py
+"""
+Presença dos usuários logados (online/ausente/offline na lista de
+funcionários).
+
+O static/js/atividade.js envia um sinal a cada 30 segundos (e a cada
+interação) para ``administrador:registrar_atividade``; cada sinal gravava
+uma linha em RegistroDeAcesso, milhares por usuário por dia. Agora só o
+horário do último sinal é guardado:
+
+- no cache "presenca" (ver TV_CACHE_BACKEND), a cada sinal;
+- em Presenca, uma linha por usuário, com um upsert (INSERT ... ON CONFLICT
+  DO UPDATE) no máximo a cada PRESENCA_GRAVACAO segundos por usuário.
+
+As sessões abertas de cada usuário ficam em SessaoUsuario (gravada no login,
+renovada junto com a presença e removida no logout), em vez de decodificar
+toda a tabela de sessões. ``vistos`` lê o último sinal do cache, com o banco
+de reserva; ``anotar_situacao`` faz o mesmo para todos os usuários, com as
+sessões abertas e a presença gravada numa consulta só e os sinais do cache
+num get_many. Sem o cache (reinício, outro host), a presença no banco atrasa
+até PRESENCA_GRAVACAO segundos, bem menos que os limites de ATIVO e ONLINE.
+RegistroDeAcesso fica só com os logins e logouts.
+"""
+
+import datetime
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+
+from core.models import Presenca, SessaoUsuario
+
+# Sem sinal há mais que isso: ausente / offline
+ATIVO = datetime.timedelta(minutes=2)
+ONLINE = datetime.timedelta(minutes=5)
+
+
+def _cache():
+    return caches["presenca"]
+
+
+def _chave(usuario_id: int) -> str:
+    return f"presenca:{usuario_id}"
+
+
+def _gravar_sessao(usuario_id: int, sessao) -> None:
+    if sessao is None or not sessao.session_key:
+        return
+    SessaoUsuario.objects.bulk_create(
+        [
+            SessaoUsuario(
+                chave=sessao.session_key,
+                usuario_id=usuario_id,
+                expira_em=sessao.get_expiry_date(),
+            )
+        ],
+        update_conflicts=True,
+        unique_fields=["chave"],
+        update_fields=["usuario", "expira_em"],
+    )
+
+
+def registrar(
+    usuario_id: int, agora: Optional[datetime.datetime] = None, sessao=None
+) -> None:
+    """
+    Registra um sinal de atividade do usuário e renova a sessão
+    (``request.session``) no índice.
+    """
+    agora = agora or timezone.now()
+    cache = _cache()
+    cache.set(_chave(usuario_id), agora, timeout=int(ONLINE.total_seconds()) * 2)
+    # Só o primeiro sinal do intervalo chega ao banco
+    if cache.add(
+        f"{_chave(usuario_id)}:gravada", True, timeout=settings.PRESENCA_GRAVACAO
+    ):
+        Presenca.objects.bulk_create(
+            [Presenca(usuario_id=usuario_id, visto_em=agora)],
+            update_conflicts=True,
+            unique_fields=["usuario"],
+            update_fields=["visto_em"],
+        )
+        _gravar_sessao(usuario_id, sessao)
+
+
+def entrar(usuario_id: int, sessao) -> None:
+    """Login: grava a sessão no índice e a presença."""
+    _gravar_sessao(usuario_id, sessao)
+    # Sessões do usuário que expiraram sem logout
+    SessaoUsuario.objects.filter(
+        usuario_id=usuario_id, expira_em__lte=timezone.now()
+    ).delete()
+    registrar(usuario_id)
+
+
+def encerrar(usuario_id: int, sessao=None) -> None:
+    """Logout: remove a presença do usuário e a sessão do índice."""
+    _cache().delete_many([_chave(usuario_id), f"{_chave(usuario_id)}:gravada"])
+    Presenca.objects.filter(usuario_id=usuario_id).delete()
+    if sessao is not None and sessao.session_key:
+        SessaoUsuario.objects.filter(chave=sessao.session_key).delete()
+
+
+def _vistos_no_cache(usuarios_ids: Iterable[int]) -> Dict[int, datetime.datetime]:
+    chaves = {_chave(usuario_id): usuario_id for usuario_id in usuarios_ids}
+    return {chaves[chave]: visto for chave, visto in _cache().get_many(chaves).items()}
+
+
+def vistos(usuarios_ids: Iterable[int]) -> Dict[int, datetime.datetime]:
+    """Último sinal de cada usuário (ausente: nunca visto ou após logout)."""
+    usuarios_ids = list(usuarios_ids)
+    vistos = _vistos_no_cache(usuarios_ids)
+    faltantes = [usuario_id for usuario_id in usuarios_ids if usuario_id not in vistos]
+    if faltantes:
+        vistos.update(
+            Presenca.objects.filter(usuario_id__in=faltantes).values_list(
+                "usuario_id", "visto_em"
+            )
+        )
+    return vistos
+
+
+def _situacao(
+    sessao_aberta: bool,
+    visto: Optional[datetime.datetime],
+    agora: datetime.datetime,
+) -> str:
+    if not sessao_aberta or visto is None or visto < agora - ONLINE:
+        return "offline"
+    return "ativo" if visto >= agora - ATIVO else "inativo"
+
+
+def anotar_situacao(usuarios, agora: Optional[datetime.datetime] = None) -> List:
+    """
+    Avalia ``usuarios`` e anota ``situacao`` em cada um: "ativo" (sessão
+    aberta e sinal nos últimos 2 min), "inativo" (até 5 min) ou "offline".
+    O sinal vem do cache e, na falta, de Presenca, como em ``vistos``.
+    """
+    agora = agora or timezone.now()
+    usuarios = list(
+        usuarios.annotate(
+            sessao_aberta=Exists(
+                SessaoUsuario.objects.filter(
+                    usuario=OuterRef("pk"), expira_em__gt=agora
+                )
+            ),
+            visto_em=F("presenca__visto_em"),
+        )
+    )
+    no_cache = _vistos_no_cache(usuario.pk for usuario in usuarios)
+    for usuario in usuarios:
+        visto = no_cache.get(usuario.pk, usuario.visto_em)
+        usuario.situacao = _situacao(usuario.sessao_aberta, visto, agora)
+    return usuarios
@@ -0,0 +1,291 @@
+# core/provedores.py
+"""
+Provedores (backends) de envio das mensagens de core.utils.
+
+settings.NOTIFICACOES_BACKEND escolhe o provedor:
+
+- twilio: API do Twilio, pelo gateway com conexões keep-alive (padrão);
+- http-fake: a mesma API no servidor falso local (core.twilio_falso, comando
+  ``servidor_twilio_falso``) em TWILIO_API_URL, sem credenciais reais. Serve
+  para testes de carga ponta a ponta sem acesso à rede;
+- console: só registra a mensagem no log;
+- file: acrescenta a mensagem, uma linha JSON por envio, em
+  NOTIFICACOES_ARQUIVO.
+
+Todos recebem os parâmetros da API de mensagens do Twilio (``from_``, ``to``,
+``body``, ``content_sid``, ``content_variables``; "whatsapp:" no ``to`` indica
+o canal) e retornam um objeto com os atributos de uma Message do Twilio
+usados em core.utils.
+"""
+
+import json
+import logging
+import os
+import threading
+import uuid
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from requests import Request
+from requests.adapters import HTTPAdapter
+from twilio.http.http_client import TwilioHttpClient
+from twilio.http.response import Response
+from twilio.rest import Client
+
+logger = logging.getLogger(__name__)
+
+URL_API_TWILIO = "https://api.twilio.com"
+# Endereço do servidor falso quando TWILIO_API_URL não está definido
+URL_TWILIO_FALSO = "http://127.0.0.1:8099"
+
+
+class _HttpClientGateway(TwilioHttpClient):
+    """
+    Cliente HTTP do gateway: uma sessão com pool de conexões keep-alive,
+    timeouts explícitos de conexão/leitura e, se configurado, redirecionamento
+    da API para settings.TWILIO_API_URL (ex.: servidor falso local).
+    """
+
+    def __init__(
+        self,
+        api_url: Optional[str],
+        timeout_conexao: float,
+        timeout_leitura: float,
+        tamanho_pool: int,
+    ):
+        super().__init__(pool_connections=True)
+        # O requests aceita (conexão, leitura); o construtor do Twilio só
+        # valida timeouts numéricos, por isso o par é atribuído depois.
+        self.timeout = (timeout_conexao, timeout_leitura)
+        self.api_url = api_url.rstrip("/") if api_url else None
+        adaptador = HTTPAdapter(pool_connections=2, pool_maxsize=tamanho_pool)
+        self.session.mount("https://", adaptador)
+        self.session.mount("http://", adaptador)
+
+    def request(
+        self,
+        method,
+        url,
+        params=None,
+        data=None,
+        headers=None,
+        auth=None,
+        timeout=None,
+        allow_redirects=False,
+    ):
+        # O TwilioHttpClient.request guarda a última resposta em atributos do
+        # cliente (_test_only_last_response) e a retorna de lá; com o cliente
+        # compartilhado pelas threads, um envio podia receber a resposta de
+        # outro (ou None). Aqui a resposta só existe nesta chamada.
+        if self.api_url and url.startswith(URL_API_TWILIO):
+            url = self.api_url + url[len(URL_API_TWILIO) :]
+        kwargs = {
+            "method": method.upper(),
+            "url": url,
+            "params": params,
+            "headers": headers,
+            "auth": auth,
+            "hooks": self.request_hooks,
+        }
+        if headers and headers.get("Content-Type") in (
+            "application/json",
+            "application/scim+json",
+        ):
+            kwargs["json"] = data
+        else:
+            kwargs["data"] = data
+        self.log_request(kwargs)
+        requisicao = self.session.prepare_request(Request(**kwargs))
+        ambiente = self.session.merge_environment_settings(
+            requisicao.url, self.proxy, None, None, None
+        )
+        resposta = self.session.send(
+            requisicao,
+            allow_redirects=allow_redirects,
+            timeout=timeout or self.timeout,
+            **ambiente,
+        )
+        self.log_response(resposta.status_code, resposta)
+        return Response(int(resposta.status_code), resposta.text, resposta.headers)
+
+
+class GatewayTwilio:
+    """
+    Cliente Twilio único e reutilizável por processo.
+
+    Criar um ``twilio.rest.Client`` por mensagem paga a montagem da sessão e
+    um novo handshake TCP/TLS a cada envio (dois no fallback SMS -> WhatsApp).
+    O gateway mantém um cliente com pool de conexões keep-alive, compartilhado
+    pelas threads do processo (ex.: o pool do processar_notificacoes). O
+    cliente é recriado quando as credenciais/configurações mudam ou após um
+    fork, já que conexões abertas não podem ser herdadas pelo processo filho.
+    """
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        # (configuração, cliente), trocado de uma vez para leitura sem trava
+        self._estado: Optional[Tuple[tuple, Client]] = None
+
+    def _configuracao(self) -> tuple:
+        return (
+            os.getpid(),
+            settings.TWILIO_ACCOUNT_SID,
+            settings.TWILIO_AUTH_TOKEN,
+            settings.TWILIO_API_URL,
+            settings.TWILIO_TIMEOUT_CONEXAO,
+            settings.TWILIO_TIMEOUT_LEITURA,
+            settings.TWILIO_POOL_CONEXOES,
+        )
+
+    def cliente(self) -> Client:
+        configuracao = self._configuracao()
+        estado = self._estado
+        if estado is not None and estado[0] == configuracao:
+            return estado[1]
+
+        with self._trava:
+            estado = self._estado
+            if estado is None or estado[0] != configuracao:
+                self._fechar(estado)
+                _, sid, token, api_url, conexao, leitura, pool = configuracao
+                cliente = Client(
+                    sid,
+                    token,
+                    http_client=_HttpClientGateway(api_url, conexao, leitura, pool),
+                )
+                # Instancia o domínio da API aqui, sob a trava, e não de forma
+                # preguiçosa e concorrente no primeiro envio de cada thread
+                cliente.messages
+                estado = self._estado = (configuracao, cliente)
+            return estado[1]
+
+    @staticmethod
+    def _fechar(estado) -> None:
+        # Só fecha as conexões do próprio processo
+        if estado is None or estado[0][0] != os.getpid():
+            return
+        sessao = getattr(estado[1].http_client, "session", None)
+        if sessao is not None:
+            sessao.close()
+
+    def fechar(self) -> None:
+        """Fecha as conexões; o próximo envio cria um novo cliente."""
+        with self._trava:
+            self._fechar(self._estado)
+            self._estado = None
+
+
+class GatewayTwilioFalso(GatewayTwilio):
+    """Gateway do servidor falso: credenciais fictícias se não houver reais."""
+
+    def _configuracao(self) -> tuple:
+        pid, sid, token, api_url, *resto = super()._configuracao()
+        return (
+            pid,
+            sid or "AC" + "0" * 32,
+            token or "token",
+            api_url or URL_TWILIO_FALSO,
+            *resto,
+        )
+
+
+gateway_twilio = GatewayTwilio()
+gateway_twilio_falso = GatewayTwilioFalso()
+
+
+class Mensagem:
+    """Mensagem "enviada" pelos provedores locais (console, file)."""
+
+    def __init__(self, to: str):
+        self.sid = f"SM{uuid.uuid4().hex}"
+        self.to = to
+        self.status = "sent"
+        self.date_created = timezone.now()
+        self.direction = "outbound-api"
+        self.price = None
+        self.error_message = None
+
+
+class Provedor:
+    def verificar(self, canal: str) -> Optional[str]:
+        """Erro de configuração que impede o envio pelo canal, se houver."""
+        return None
+
+    def criar(self, **parametros):
+        raise NotImplementedError
+
+
+class ProvedorTwilio(Provedor):
+    gateway = gateway_twilio
+
+    def verificar(self, canal: str) -> Optional[str]:
+        if (
+            not settings.TWILIO_ACCOUNT_SID
+            or not settings.TWILIO_AUTH_TOKEN
+            or (canal == "whatsapp" and not settings.TWILIO_WHATSAPP_NUMBER)
+        ):
+            return (
+                "Credenciais Twilio não configuradas. "
+                "Verifique as variáveis de ambiente."
+            )
+        return None
+
+    def criar(self, **parametros):
+        return self.gateway.cliente().messages.create(**parametros)
+
+
+class ProvedorHttpFalso(ProvedorTwilio):
+    gateway = gateway_twilio_falso
+
+    def verificar(self, canal: str) -> Optional[str]:
+        return None
+
+
+class ProvedorConsole(Provedor):
+    def criar(self, **parametros):
+        mensagem = Mensagem(parametros["to"])
+        logger.info(
+            f"[{mensagem.sid}] {parametros.get('from_')} -> {mensagem.to}: "
+            f"{parametros.get('body') or parametros.get('content_sid')}"
+        )
+        return mensagem
+
+
+class ProvedorArquivo(Provedor):
+    _trava = threading.Lock()
+
+    def criar(self, **parametros):
+        mensagem = Mensagem(parametros["to"])
+        linha = json.dumps(
+            {
+                "sid": mensagem.sid,
+                "data": mensagem.date_created.isoformat(),
+                **parametros,
+            },
+            ensure_ascii=False,
+        )
+        # Uma linha por envio, sem intercalar as threads do worker
+        with self._trava, open(settings.NOTIFICACOES_ARQUIVO, "a") as arquivo:
+            arquivo.write(linha + "\n")
+        return mensagem
+
+
+PROVEDORES: Dict[str, Provedor] = {
+    "twilio": ProvedorTwilio(),
+    "http-fake": ProvedorHttpFalso(),
+    "console": ProvedorConsole(),
+    "file": ProvedorArquivo(),
+}
+
+
+def provedor() -> Provedor:
+    """Provedor escolhido em settings.NOTIFICACOES_BACKEND."""
+    try:
+        return PROVEDORES[settings.NOTIFICACOES_BACKEND]
+    except KeyError:
+        raise ImproperlyConfigured(
+            f"NOTIFICACOES_BACKEND inválido: {settings.NOTIFICACOES_BACKEND!r} "
+            f"(use {', '.join(PROVEDORES)})."
+        )
@@ -0,0 +1,247 @@
+# core/resumos.py
+"""
+Resumos por hora do dashboard do administrador.
+
+Em vez de reagregar Paciente, Chamada e ChamadaProfissional a cada acesso,
+o dashboard lê três tabelas de resumo, com uma linha por balde:
+
+- ResumoPacientesHora: (hora da geração da senha, tipo de senha) ->
+  pacientes, atendidos;
+- ResumoGuicheHora: (hora, tipo de senha, guichê, ação) -> chamadas;
+- ResumoProfissionalHora: (hora, tipo de senha, profissional, ação) ->
+  chamadas.
+
+Os baldes são atualizados de forma incremental pelos sinais de core.signals,
+na mesma transação da gravação: cada evento soma (ou subtrai) 1 no seu balde
+com UPDATE ... SET n = n + 1, criando o balde se ainda não existir. Um
+paciente recadastrado (nova senha) sai do balde antigo e entra no novo; o
+atendimento move o paciente de "aguardando" para "atendidos" no seu balde.
+
+Escritas que não passam por save()/delete() (QuerySet.update, SQL direto,
+migrações de dados) não atualizam os resumos: use o comando
+``reconstruir_resumos`` para recalcular um período a partir dos eventos,
+inclusive os já arquivados (core.arquivo).
+"""
+
+import datetime
+from typing import Optional, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Value
+from django.db.models.functions import Coalesce, TruncHour
+
+from core.arquivo import fonte
+from core.models import (
+    Chamada,
+    ChamadaProfissional,
+    Paciente,
+    ResumoGuicheHora,
+    ResumoPacientesHora,
+    ResumoProfissionalHora,
+)
+
+# (hora, tipo de senha, atendido) de um paciente
+ChavePaciente = Tuple[datetime.datetime, str, bool]
+
+CAMPOS_PACIENTE = ("horario_geracao_senha", "tipo_senha", "atendido")
+
+
+def truncar_hora(instante: datetime.datetime) -> datetime.datetime:
+    """Início da hora do instante (os fusos do sistema têm offset inteiro)."""
+    return instante.replace(minute=0, second=0, microsecond=0)
+
+
+def somar(modelo, chaves: dict, **quantidades) -> None:
+    """Soma as quantidades no balde, criando-o se preciso."""
+    incrementos = {campo: F(campo) + n for campo, n in quantidades.items()}
+    if modelo.objects.filter(**chaves).update(**incrementos):
+        return
+    if any(n < 0 for n in quantidades.values()):
+        # Balde já removido (ex.: cascata ao excluir o guichê): nada a subtrair
+        return
+    try:
+        with transaction.atomic():
+            modelo.objects.create(**chaves, **quantidades)
+    except IntegrityError:
+        # Criado por outra transação entre o UPDATE e o INSERT
+        modelo.objects.filter(**chaves).update(**incrementos)
+
+
+# ── Pacientes ───────────────────────────────────────────────────────────────
+
+
+def chave_paciente(paciente: Paciente) -> Optional[ChavePaciente]:
+    if paciente.horario_geracao_senha is None:
+        return None
+    return (
+        truncar_hora(paciente.horario_geracao_senha),
+        paciente.tipo_senha or "",
+        bool(paciente.atendido),
+    )
+
+
+def lembrar_paciente(paciente: Paciente) -> None:
+    """Guarda a chave de um paciente lido do banco (sinal post_init)."""
+    if paciente.pk is None or paciente.get_deferred_fields() & set(CAMPOS_PACIENTE):
+        paciente._resumo = None
+    else:
+        paciente._resumo = chave_paciente(paciente)
+
+
+def carregar_anterior(paciente: Paciente) -> None:
+    """Lê do banco a chave de um paciente carregado parcialmente (pre_save)."""
+    if paciente.pk is None or getattr(paciente, "_resumo", None) is not None:
+        return
+    anterior = (
+        Paciente.objects.filter(pk=paciente.pk).values_list(*CAMPOS_PACIENTE).first()
+    )
+    if anterior is not None and anterior[0] is not None:
+        paciente._resumo = (truncar_hora(anterior[0]), anterior[1] or "", anterior[2])
+
+
+def _aplicar_paciente(chave: Optional[ChavePaciente], sinal: int) -> None:
+    if chave is None:
+        return
+    hora, tipo_senha, atendido = chave
+    somar(
+        ResumoPacientesHora,
+        {"hora": hora, "tipo_senha": tipo_senha},
+        pacientes=sinal,
+        atendidos=sinal if atendido else 0,
+    )
+
+
+def paciente_gravado(paciente: Paciente, created: bool) -> None:
+    anterior = None if created else getattr(paciente, "_resumo", None)
+    atual = chave_paciente(paciente)
+    if anterior != atual:
+        _aplicar_paciente(anterior, -1)
+        _aplicar_paciente(atual, 1)
+    paciente._resumo = atual
+
+
+def paciente_excluido(paciente: Paciente) -> None:
+    _aplicar_paciente(getattr(paciente, "_resumo", None), -1)
+
+
+# ── Chamadas ────────────────────────────────────────────────────────────────
+
+
+def chamada_gravada(chamada: Chamada, sinal: int = 1) -> None:
+    somar(
+        ResumoGuicheHora,
+        {
+            "hora": truncar_hora(chamada.data_hora),
+            "tipo_senha": chamada.paciente.tipo_senha or "",
+            "guiche_id": chamada.guiche_id,
+            "acao": chamada.acao,
+        },
+        total=sinal,
+    )
+
+
+def chamada_profissional_gravada(chamada: ChamadaProfissional, sinal: int = 1) -> None:
+    somar(
+        ResumoProfissionalHora,
+        {
+            "hora": truncar_hora(chamada.data_hora),
+            "tipo_senha": chamada.paciente.tipo_senha or "",
+            "profissional_saude_id": chamada.profissional_saude_id,
+            "acao": chamada.acao,
+        },
+        total=sinal,
+    )
+
+
+# ── Reconstrução ────────────────────────────────────────────────────────────
+
+
+def reconstruir(
+    inicio: Optional[datetime.datetime] = None,
+    fim: Optional[datetime.datetime] = None,
+) -> dict:
+    """
+    Recalcula os baldes de [inicio, fim) a partir dos eventos, com uma
+    agregação por tabela. Sem limites, reconstrói tudo. Retorna o número de
+    baldes gravados por tabela.
+    """
+    if inicio is not None:
+        inicio = truncar_hora(inicio)
+    if fim is not None and truncar_hora(fim) != fim:
+        fim = truncar_hora(fim) + datetime.timedelta(hours=1)
+
+    def periodo(campo):
+        filtro = Q()
+        if inicio is not None:
+            filtro &= Q(**{f"{campo}__gte": inicio})
+        if fim is not None:
+            filtro &= Q(**{f"{campo}__lt": fim})
+        return filtro
+
+    pacientes = [
+        ResumoPacientesHora(
+            hora=linha["hora_balde"],
+            tipo_senha=linha["tipo"],
+            pacientes=linha["pacientes"],
+            atendidos=linha["atendidos"],
+        )
+        for linha in Paciente.objects.filter(periodo("horario_geracao_senha"))
+        .exclude(horario_geracao_senha__isnull=True)
+        .annotate(
+            hora_balde=TruncHour("horario_geracao_senha"),
+            tipo=Coalesce("tipo_senha", Value("")),
+        )
+        .values("hora_balde", "tipo")
+        .annotate(pacientes=Count("id"), atendidos=Count("id", filter=Q(atendido=True)))
+        .order_by()
+    ]
+    guiches = [
+        ResumoGuicheHora(
+            hora=linha["hora_balde"],
+            tipo_senha=linha["tipo"],
+            guiche_id=linha["guiche_id"],
+            acao=linha["acao"],
+            total=linha["total"],
+        )
+        for linha in fonte(Chamada, inicio)
+        .objects.filter(periodo("data_hora"))
+        .annotate(
+            hora_balde=TruncHour("data_hora"),
+            tipo=Coalesce("paciente__tipo_senha", Value("")),
+        )
+        .values("hora_balde", "tipo", "guiche_id", "acao")
+        .annotate(total=Count("id"))
+        .order_by()
+    ]
+    profissionais = [
+        ResumoProfissionalHora(
+            hora=linha["hora_balde"],
+            tipo_senha=linha["tipo"],
+            profissional_saude_id=linha["profissional_saude_id"],
+            acao=linha["acao"],
+            total=linha["total"],
+        )
+        for linha in fonte(ChamadaProfissional, inicio)
+        .objects.filter(periodo("data_hora"))
+        .annotate(
+            hora_balde=TruncHour("data_hora"),
+            tipo=Coalesce("paciente__tipo_senha", Value("")),
+        )
+        .values("hora_balde", "tipo", "profissional_saude_id", "acao")
+        .annotate(total=Count("id"))
+        .order_by()
+    ]
+
+    with transaction.atomic():
+        for modelo, baldes in (
+            (ResumoPacientesHora, pacientes),
+            (ResumoGuicheHora, guiches),
+            (ResumoProfissionalHora, profissionais),
+        ):
+            modelo.objects.filter(periodo("hora")).delete()
+            modelo.objects.bulk_create(baldes, batch_size=1000)
+    return {
+        "pacientes": len(pacientes),
+        "guiches": len(guiches),
+        "profissionais": len(profissionais),
+    }
@@ -1,13 +1,15 @@
-import datetime
 import logging
 import random
 
-from django.contrib.auth.signals import user_logged_in
-from django.db.models.signals import pre_save
+from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
 
+from core import jornadas, presenca, resumos
 from core.models import RegistroDeAcesso
+from core.tv import notificar
 
 logger = logging.getLogger(__name__)
 
@@ -16,17 +18,116 @@ from .models import CustomUser
 
 @receiver(pre_save, sender="core.Paciente")
 def gerar_senha_paciente(sender, instance, **kwargs):
-    from .models import Paciente
+    from .models import ContadorSenha
 
     if not instance.senha and instance.tipo_senha:
-        hoje = datetime.date.today()
-        contador = (
-            Paciente.objects.filter(
-                horario_geracao_senha__date=hoje, tipo_senha=instance.tipo_senha
-            ).count()
-            + 1
-        )
+        hoje = timezone.localdate()
+        contador = ContadorSenha.proximo_numero(hoje, instance.tipo_senha)
         instance.senha = f"{instance.tipo_senha}{contador:03d}"
+        instance.dia_senha = hoje
+
+
+@receiver(pre_save, sender="core.Paciente")
+def derivar_dia_e_periodo(sender, instance, **kwargs):
+    instance.atualizar_dia_e_periodo()
+
+
+# Resumos do dashboard (ver core.resumos)
+
+
+@receiver(post_init, sender="core.Paciente")
+def lembrar_resumo_paciente(sender, instance, **kwargs):
+    resumos.lembrar_paciente(instance)
+
+
+@receiver(pre_save, sender="core.Paciente")
+def carregar_resumo_paciente(sender, instance, **kwargs):
+    resumos.carregar_anterior(instance)
+
+
+@receiver(post_save, sender="core.Paciente")
+def atualizar_resumo_paciente(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        resumos.paciente_gravado(instance, created)
+
+
+@receiver(post_delete, sender="core.Paciente")
+def remover_resumo_paciente(sender, instance, **kwargs):
+    resumos.paciente_excluido(instance)
+
+
+@receiver(post_save, sender="core.Chamada")
+def somar_resumo_chamada(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        resumos.chamada_gravada(instance)
+
+
+@receiver(post_delete, sender="core.Chamada")
+def subtrair_resumo_chamada(sender, instance, **kwargs):
+    resumos.chamada_gravada(instance, -1)
+
+
+@receiver(post_save, sender="core.ChamadaProfissional")
+def somar_resumo_chamada_profissional(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        resumos.chamada_profissional_gravada(instance)
+
+
+@receiver(post_delete, sender="core.ChamadaProfissional")
+def subtrair_resumo_chamada_profissional(sender, instance, **kwargs):
+    resumos.chamada_profissional_gravada(instance, -1)
+
+
+# Jornadas dos pacientes (ver core.jornadas)
+
+
+@receiver(post_init, sender="core.Paciente")
+def lembrar_jornada_paciente(sender, instance, **kwargs):
+    jornadas.lembrar_paciente(instance)
+
+
+@receiver(post_save, sender="core.Paciente")
+def abrir_jornada_paciente(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        jornadas.paciente_gravado(instance, created)
+
+
+@receiver(post_save, sender="core.Chamada")
+def atualizar_jornada_chamada(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        jornadas.chamada_gravada(instance)
+
+
+@receiver(post_save, sender="core.ChamadaProfissional")
+def atualizar_jornada_chamada_profissional(
+    sender, instance, created, raw=False, **kwargs
+):
+    if created and not raw:
+        jornadas.chamada_profissional_gravada(instance)
+
+
+@receiver(post_delete, sender="core.Chamada")
+@receiver(post_delete, sender="core.ChamadaProfissional")
+def recalcular_jornada(sender, instance, **kwargs):
+    jornadas.chamada_excluida(instance)
+
+
+def _invalidar_tv(tv):
+    # Invalida já, para que a própria transação enxergue a alteração, e de
+    # novo após o commit: um payload remontado por outra requisição antes do
+    # commit ainda teria os dados antigos.
+    notificar(tv)
+    transaction.on_commit(lambda: notificar(tv))
+
+
+@receiver([post_save, post_delete], sender="core.Chamada")
+def invalidar_tv1(sender, instance, **kwargs):
+    _invalidar_tv("tv1")
+
+
+@receiver([post_save, post_delete], sender="core.ChamadaProfissional")
+def invalidar_tv2(sender, instance, **kwargs):
+    _invalidar_tv("tv2")
 
 
 @receiver(user_logged_in)
@@ -50,3 +151,10 @@ def log_user_login(sender, request, user, **kwargs):
         ),
         data_hora=timezone.now(),
     )
+    presenca.entrar(user.pk, getattr(request, "session", None))
+
+
+@receiver(user_logged_out)
+def encerrar_presenca(sender, request, user, **kwargs):
+    if user is not None:
+        presenca.encerrar(user.pk, getattr(request, "session", None))
@@ -0,0 +1,160 @@
+# core/tv.py
+"""
+Payloads e atualização das TVs (TV1 - guichês, TV2 - profissionais).
+
+Cache dos payloads
+------------------
+O payload de cada TV ("chamada atual + histórico") fica no cache "tv" (ver
+settings.TV_CACHE_BACKEND: locmem, file ou shared), sob uma chave que inclui
+o marcador de versão da TV. Gravar uma Chamada (TV1) ou ChamadaProfissional
+(TV2) troca o marcador (core.signals), invalidando o payload anterior. Com o
+cache quente, páginas, APIs, snapshots e eventos das TVs não consultam o
+banco.
+
+Falhas simultâneas de cache são coalescidas: uma única requisição monta o
+payload da versão (trava por processo + ``cache.add`` entre processos) e as
+demais esperam por ele.
+
+Server-Sent Events
+------------------
+Cada TV mantém uma conexão aberta com o endpoint de eventos do seu painel e
+recebe o payload somente quando o marcador de versão muda. As conexões têm
+duração limitada (TV_SSE_DURACAO): o EventSource do navegador reconecta
+sozinho, o que devolve periodicamente a thread ao servidor. Se o navegador
+não suportar SSE ou a conexão cair de vez, os templates voltam ao polling
+condicional dos snapshots.
+"""
+
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import StreamingHttpResponse
+
+TVS = ("tv1", "tv2")
+
+# Intervalo entre verificações do marcador de versão (segundos)
+INTERVALO_VERIFICACAO = 0.5
+# Comentário enviado em conexões ociosas para mantê-las vivas em proxies
+INTERVALO_HEARTBEAT = 15
+# Tempo de espera sugerido ao navegador antes de reconectar (milissegundos)
+RETRY_MS = 3000
+# Validade do payload de uma versão no cache (segundos)
+TEMPO_PAYLOAD = 600
+# Tempo máximo de montagem de um payload antes de outra requisição assumir
+TEMPO_TRAVA = 5
+INTERVALO_ESPERA = 0.02
+
+_travas = {tv: threading.Lock() for tv in TVS}
+
+
+def _cache():
+    return caches["tv" if "tv" in settings.CACHES else "default"]
+
+
+def _chave_versao(tv: str) -> str:
+    return f"tv:versao:{tv}"
+
+
+def versao(tv: str):
+    """Marcador da última alteração da TV (None se nunca houve)."""
+    return _cache().get(_chave_versao(tv))
+
+
+def notificar(tv: str) -> None:
+    """Invalida o payload da TV e acorda as conexões SSE abertas."""
+    _cache().set(_chave_versao(tv), time.time_ns(), None)
+
+
+def _versao_atual(tv: str):
+    vista = versao(tv)
+    if vista is None:
+        # Cache vazio (primeiro acesso, reinício ou expurgo): inicia a versão
+        _cache().add(_chave_versao(tv), time.time_ns(), None)
+        vista = versao(tv)
+    return vista
+
+
+def obter_payload(
+    tv: str, montar_payload: Callable[[], Dict[str, Any]], vista=None
+) -> Dict[str, Any]:
+    """Payload da versão atual da TV, montando-o uma única vez por versão."""
+    cache = _cache()
+    vista = vista if vista is not None else _versao_atual(tv)
+    if vista is None:
+        # Backend sem armazenamento (ex.: DummyCache)
+        return montar_payload()
+
+    chave = f"tv:payload:{tv}:{vista}"
+    dados = cache.get(chave)
+    if dados is not None:
+        return dados
+
+    with _travas[tv]:
+        dados = cache.get(chave)
+        if dados is not None:
+            return dados
+
+        trava = f"tv:trava:{tv}:{vista}"
+        if cache.add(trava, 1, TEMPO_TRAVA):
+            try:
+                dados = montar_payload()
+                cache.set(chave, dados, TEMPO_PAYLOAD)
+            finally:
+                cache.delete(trava)
+            return dados
+
+        # Outro processo está montando este payload
+        prazo = time.monotonic() + TEMPO_TRAVA
+        while time.monotonic() < prazo:
+            time.sleep(INTERVALO_ESPERA)
+            dados = cache.get(chave)
+            if dados is not None:
+                return dados
+    return montar_payload()
+
+
+def evento_sse(dados: Dict[str, Any]) -> str:
+    return f"data: {json.dumps(dados, ensure_ascii=False)}\n\n"
+
+
+def transmitir(tv: str, montar_payload: Callable[[], Dict[str, Any]]) -> Iterator[str]:
+    """Gera o fluxo SSE da TV: o estado atual e, depois, cada alteração."""
+    duracao = getattr(settings, "TV_SSE_DURACAO", 300)
+    inicio = ultimo_envio = time.monotonic()
+
+    yield f"retry: {RETRY_MS}\n\n"
+    vista = _versao_atual(tv)
+    enviado = evento_sse(obter_payload(tv, montar_payload, vista))
+    yield enviado
+
+    while time.monotonic() - inicio < duracao:
+        time.sleep(INTERVALO_VERIFICACAO)
+        atual = versao(tv)
+        agora = time.monotonic()
+        if atual != vista:
+            vista = atual
+            evento = evento_sse(obter_payload(tv, montar_payload, vista))
+            # A invalidação após o commit repete a versão com o mesmo conteúdo
+            if evento != enviado:
+                enviado = evento
+                yield evento
+                ultimo_envio = agora
+        elif agora - ultimo_envio >= INTERVALO_HEARTBEAT:
+            yield ": ping\n\n"
+            ultimo_envio = agora
+
+
+def resposta_sse(
+    tv: str, montar_payload: Callable[[], Dict[str, Any]]
+) -> StreamingHttpResponse:
+    response = StreamingHttpResponse(
+        transmitir(tv, montar_payload), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    # Impede que o nginx acumule os eventos em buffer
+    response["X-Accel-Buffering"] = "no"
+    return response
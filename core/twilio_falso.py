@@ -0,0 +1,238 @@
+# core/twilio_falso.py
+"""
+Servidor HTTP local que imita a API de mensagens do Twilio.
+
+Aceita POST /2010-04-01/Accounts/<sid>/Messages.json e responde como o
+Twilio (201 com o recurso Message ou o erro). Usado nos testes (aponte
+settings.TWILIO_API_URL para ``servidor.url``) e, pelo comando
+``servidor_twilio_falso`` com NOTIFICACOES_BACKEND = "http-fake", em testes
+de carga ponta a ponta sem acesso à rede.
+
+Latência (fixa + variação uniforme) e taxas de erro (503 transitório, 429
+de limite de taxa) são configuráveis; ``semente`` torna os sorteios
+reprodutíveis.
+
+Mensagens enviadas com ``StatusCallback`` recebem, depois de
+``atraso_callback`` segundos, os callbacks "sent" e "delivered" (ou
+"undelivered", na fração ``taxa_nao_entregues``), assinados com o auth token
+da requisição como faz o Twilio. ``repeticoes_callback`` reenvia cada
+callback, simulando as repetições do Twilio.
+"""
+
+import base64
+import json
+import random
+import threading
+import time
+import urllib.request
+import uuid
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode
+
+from django.utils import timezone
+from twilio.request_validator import RequestValidator
+
+ERRO_LIMITE = {
+    "code": 20429,
+    "message": "Too Many Requests",
+    "more_info": "https://www.twilio.com/docs/errors/20429",
+    "status": 429,
+}
+ERRO_INDISPONIVEL = {
+    "code": 20503,
+    "message": "Service Unavailable",
+    "more_info": "https://www.twilio.com/docs/errors/20503",
+    "status": 503,
+}
+
+
+class ServidorTwilioFalso:
+    def __init__(
+        self,
+        latencia: float = 0.0,
+        falhar_sms: bool = False,
+        falhas_transitorias: int = 0,
+        variacao_latencia: float = 0.0,
+        taxa_erros: float = 0.0,
+        taxa_limite: float = 0.0,
+        host: str = "127.0.0.1",
+        porta: int = 0,
+        semente=None,
+        atraso_callback: float = 0.0,
+        taxa_nao_entregues: float = 0.0,
+        repeticoes_callback: int = 1,
+    ):
+        self.latencia = latencia
+        self.variacao_latencia = variacao_latencia
+        # Recusa mensagens sem o prefixo "whatsapp:" (testa o fallback)
+        self.falhar_sms = falhar_sms
+        self.falhar_whatsapp = False
+        # Primeiras requisições respondidas com 429 (limite de taxa)
+        self.falhas_transitorias = falhas_transitorias
+        # Fração das requisições respondidas com 503 e com 429
+        self.taxa_erros = taxa_erros
+        self.taxa_limite = taxa_limite
+        self.atraso_callback = atraso_callback
+        self.taxa_nao_entregues = taxa_nao_entregues
+        self.repeticoes_callback = repeticoes_callback
+        self.mensagens = []
+        self.erros = 0
+        # Callbacks de status entregues (2xx) e recusados/sem resposta
+        self.callbacks = 0
+        self.callbacks_falhos = 0
+        # Conexões TCP aceitas (mede o reaproveitamento por keep-alive)
+        self.conexoes = 0
+        self._trava = threading.Lock()
+        self._aleatorio = random.Random(semente)
+        self._servidor = ThreadingHTTPServer((host, porta), self._handler())
+        self._servidor.daemon_threads = True
+        self._thread = threading.Thread(target=self._servidor.serve_forever)
+
+    @property
+    def url(self) -> str:
+        host, porta = self._servidor.server_address[:2]
+        return f"http://{host}:{porta}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def servir(self) -> None:
+        """Atende requisições na thread atual até ser interrompido."""
+        try:
+            self._servidor.serve_forever()
+        finally:
+            self._servidor.server_close()
+
+    def _sortear(self):
+        with self._trava:
+            espera = self.latencia + self._aleatorio.uniform(0, self.variacao_latencia)
+            sorteio = self._aleatorio.random()
+            if self.falhas_transitorias > 0:
+                self.falhas_transitorias -= 1
+                erro = ERRO_LIMITE
+            elif sorteio < self.taxa_erros:
+                erro = ERRO_INDISPONIVEL
+            elif sorteio < self.taxa_erros + self.taxa_limite:
+                erro = ERRO_LIMITE
+            else:
+                erro = None
+            self.erros += erro is not None
+        return espera, erro
+
+    def _responder(self, dados, token=None):
+        espera, erro = self._sortear()
+        time.sleep(espera)
+        if erro is not None:
+            return erro["status"], erro
+
+        para = dados.get("To", "")
+        whatsapp = para.startswith("whatsapp:")
+        if (whatsapp and self.falhar_whatsapp) or (not whatsapp and self.falhar_sms):
+            return 400, {
+                "code": 21211,
+                "message": f"The 'To' number {para} is not a valid phone number.",
+                "more_info": "https://www.twilio.com/docs/errors/21211",
+                "status": 400,
+            }
+
+        mensagem = {
+            "sid": f"SM{uuid.uuid4().hex}",
+            "status": "queued",
+            "to": para,
+            "from": dados.get("From"),
+            "body": dados.get("Body"),
+            "direction": "outbound-api",
+            "date_created": format_datetime(timezone.now()),
+            "price": None,
+            "error_code": None,
+            "error_message": None,
+            "num_segments": "1",
+        }
+        with self._trava:
+            self.mensagens.append(mensagem)
+        if dados.get("StatusCallback"):
+            threading.Thread(
+                target=self._enviar_callbacks,
+                args=(dados["StatusCallback"], mensagem, token),
+                daemon=True,
+            ).start()
+        return 201, mensagem
+
+    def _enviar_callbacks(self, url, mensagem, token):
+        time.sleep(self.atraso_callback)
+        with self._trava:
+            entregue = self._aleatorio.random() >= self.taxa_nao_entregues
+        for status in ("sent", "delivered" if entregue else "undelivered"):
+            dados = {
+                "MessageSid": mensagem["sid"],
+                "MessageStatus": status,
+                "To": mensagem["to"],
+                "From": mensagem["from"] or "",
+            }
+            if status == "undelivered":
+                dados["ErrorCode"] = "30003"
+            cabecalhos = {"Content-Type": "application/x-www-form-urlencoded"}
+            if token:
+                cabecalhos["X-Twilio-Signature"] = RequestValidator(
+                    token
+                ).compute_signature(url, dados)
+            for _ in range(self.repeticoes_callback):
+                requisicao = urllib.request.Request(
+                    url, urlencode(dados).encode(), cabecalhos
+                )
+                try:
+                    urllib.request.urlopen(requisicao, timeout=5).close()
+                    sucesso = True
+                except OSError:
+                    sucesso = False
+                with self._trava:
+                    if sucesso:
+                        self.callbacks += 1
+                    else:
+                        self.callbacks_falhos += 1
+
+    def _handler(self):
+        servidor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Mantém a conexão aberta entre requisições, como a API real
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with servidor._trava:
+                    servidor.conexoes += 1
+
+            def do_POST(self):
+                tamanho = int(self.headers.get("Content-Length", 0))
+                corpo = parse_qs(self.rfile.read(tamanho).decode())
+                dados = {chave: valores[0] for chave, valores in corpo.items()}
+                if not self.path.endswith("/Messages.json"):
+                    status, resposta = 404, {"status": 404, "message": "Not found"}
+                else:
+                    status, resposta = servidor._responder(dados, self._token())
+                conteudo = json.dumps(resposta).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(conteudo)))
+                self.end_headers()
+                self.wfile.write(conteudo)
+
+            def _token(self):
+                # Auth token do Basic auth (account SID:auth token)
+                autorizacao = self.headers.get("Authorization", "")
+                if not autorizacao.startswith("Basic "):
+                    return None
+                credenciais = base64.b64decode(autorizacao[6:]).decode()
+                return credenciais.partition(":")[2] or None
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
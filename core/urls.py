@@ -13,4 +13,14 @@ urlpatterns = [
         name="login",
     ),
     path("logout/", views.logout_view, name="logout"),
+    path(
+        "notificacoes/<int:notificacao_id>/status/",
+        views.status_notificacao,
+        name="status_notificacao",
+    ),
+    path(
+        "notificacoes/status-twilio/",
+        views.status_entrega_twilio,
+        name="status_entrega_twilio",
+    ),
 ]
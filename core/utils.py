@@ -1,11 +1,59 @@
 # core/utils.py
 import logging
 import os
-from twilio.rest import Client
+import time
+
+from requests.exceptions import RequestException
 from django.conf import settings
 
+from core.disjuntor import CanalIndisponivel, disjuntores
+from core.provedores import provedor
+
 logger = logging.getLogger(__name__)
 
+# Respostas da API que indicam sobrecarga/indisponibilidade, não erro do pedido
+STATUS_TRANSITORIOS = {429, 500, 502, 503, 504}
+
+
+def erro_transitorio(erro: Exception) -> bool:
+    """
+    Indica se vale repetir o envio (limite de taxa, timeout, falha de rede ou
+    canal suspenso pelo disjuntor).
+    """
+    if isinstance(erro, (RequestException, CanalIndisponivel)):
+        return True
+    return getattr(erro, "status", None) in STATUS_TRANSITORIOS
+
+
+def _criar_mensagem(canal: str, **parametros):
+    """
+    Cria a mensagem pelo provedor configurado (core.provedores), passando
+    pelo disjuntor do canal. Falhas transitórias e respostas lentas contam
+    para abrir o disjuntor; erros do pedido (ex.: número inválido) mostram
+    que o provedor está respondendo.
+    """
+    disjuntor = disjuntores[canal]
+    if not disjuntor.permitir():
+        raise CanalIndisponivel(canal)
+    if settings.TWILIO_STATUS_CALLBACK_URL:
+        # O Twilio informa a entrega em core.views.status_entrega_twilio
+        parametros["status_callback"] = settings.TWILIO_STATUS_CALLBACK_URL
+    inicio = time.monotonic()
+    try:
+        message = provedor().criar(**parametros)
+    except Exception as e:
+        if erro_transitorio(e):
+            disjuntor.registrar_falha(str(e))
+        else:
+            disjuntor.registrar_sucesso()
+        raise
+    duracao = time.monotonic() - inicio
+    if duracao > settings.DISJUNTOR_LATENCIA:
+        disjuntor.registrar_falha(f"Resposta lenta ({duracao:.1f}s)")
+    else:
+        disjuntor.registrar_sucesso()
+    return message
+
 
 def enviar_whatsapp(
     numero_destino: str,
@@ -14,7 +62,7 @@ def enviar_whatsapp(
     content_variables: dict = None,
 ):
     """
-    Envia uma mensagem via WhatsApp usando a API do Twilio.
+    Envia uma mensagem via WhatsApp pelo provedor configurado (Twilio por padrão).
     Pode usar texto simples ou template aprovado.
 
     Args:
@@ -25,14 +73,8 @@ def enviar_whatsapp(
 
     Retorna um dicionário com status e detalhes.
     """
-    if (
-        not settings.TWILIO_ACCOUNT_SID
-        or not settings.TWILIO_AUTH_TOKEN
-        or not settings.TWILIO_WHATSAPP_NUMBER
-    ):
-        error_msg = (
-            "Credenciais Twilio não configuradas. Verifique as variáveis de ambiente."
-        )
+    error_msg = provedor().verificar("whatsapp")
+    if error_msg:
         logger.error(f"Erro: {error_msg}")
         return {"status": "error", "error": error_msg}
 
@@ -47,8 +89,6 @@ def enviar_whatsapp(
         }
 
     try:
-        client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
-
         # Preparar parâmetros da mensagem
         message_params = {
             "from_": f"whatsapp:{settings.TWILIO_WHATSAPP_NUMBER}",
@@ -66,7 +106,7 @@ def enviar_whatsapp(
 
                 message_params["content_variables"] = json.dumps(content_variables)
 
-        message = client.messages.create(**message_params)
+        message = _criar_mensagem("whatsapp", **message_params)
         logger.info(f"Mensagem enviada com SID: {message.sid}")
         return {
             "status": "success",
@@ -83,7 +123,7 @@ def enviar_whatsapp(
         }
     except Exception as e:
         logger.error(f"Erro ao enviar mensagem via WhatsApp: {e}")
-        return {"status": "error", "error": str(e)}
+        return {"status": "error", "error": str(e), "transitorio": erro_transitorio(e)}
 
 
 def enviar_sms_ou_whatsapp(
@@ -103,24 +143,21 @@ def enviar_sms_ou_whatsapp(
 
     Retorna um dicionário com status e detalhes.
     """
-    if not settings.TWILIO_ACCOUNT_SID or not settings.TWILIO_AUTH_TOKEN:
-        error_msg = (
-            "Credenciais Twilio não configuradas. Verifique as variáveis de ambiente."
-        )
+    error_msg = provedor().verificar("sms")
+    if error_msg:
         logger.error(f"Erro: {error_msg}")
         return {"status": "error", "error": error_msg}
 
     # Primeiro tentar SMS
     try:
-        client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
-
         # Usar o número SMS do Twilio (não WhatsApp)
         sms_number = os.environ.get(
             "TWILIO_SMS_NUMBER", "TWILIO_WHATSAPP_NUMBER"
         )  # Número verificado para SMS
 
-        message = client.messages.create(
-            from_=sms_number, body=mensagem, to=numero_destino
+        # Com o disjuntor do SMS aberto, vai direto para o fallback
+        message = _criar_mensagem(
+            "sms", from_=sms_number, body=mensagem, to=numero_destino
         )
 
         logger.info(f"SMS enviado com sucesso. SID: {message.sid}")
@@ -163,6 +200,8 @@ def enviar_sms_ou_whatsapp(
                     "error": f"SMS e WhatsApp falharam. SMS: {str(sms_error)}, WhatsApp: {whatsapp_result.get('error', 'Erro desconhecido')}",
                     "sms_error": str(sms_error),
                     "whatsapp_error": whatsapp_result.get("error"),
+                    "transitorio": erro_transitorio(sms_error)
+                    or whatsapp_result.get("transitorio", False),
                 }
 
         except Exception as whatsapp_error:
@@ -172,4 +211,6 @@ def enviar_sms_ou_whatsapp(
                 "error": f"SMS e WhatsApp falharam. SMS: {str(sms_error)}, WhatsApp: {str(whatsapp_error)}",
                 "sms_error": str(sms_error),
                 "whatsapp_error": str(whatsapp_error),
+                "transitorio": erro_transitorio(sms_error)
+                or erro_transitorio(whatsapp_error),
             }
@@ -1,13 +1,21 @@
 # core/views.py
 import logging
 
+from django.conf import settings
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.views import LoginView
-from django.shortcuts import redirect, render
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
+from django.shortcuts import get_object_or_404, redirect, render
 from django.utils import timezone
+from django.views.decorators.cache import never_cache
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from twilio.request_validator import RequestValidator
 
-from core.models import RegistroDeAcesso
+from core.entregas import Atualizacao, agrupador
+from core.models import Notificacao, RegistroDeAcesso
+from core.notificacoes import descrever
 
 from .forms import LoginForm
 
@@ -96,3 +104,40 @@ def logout_view(request):
     )
     logout(request)
     return redirect("login")  # Redireciona para a página de login
+
+
+@never_cache
+@login_required
+def status_notificacao(request, notificacao_id):
+    """Estado do envio de uma notificação, consultado pelos painéis."""
+    notificacao = get_object_or_404(Notificacao, id=notificacao_id)
+    return JsonResponse(descrever(notificacao))
+
+
+def _assinatura_twilio_valida(request) -> bool:
+    """Confere o X-Twilio-Signature, seja qual for o provedor das mensagens."""
+    if settings.TWILIO_CALLBACK_SEM_ASSINATURA:
+        # Opt-in explícito de desenvolvimento: o provedor não diz quem chama a URL
+        return True
+    if not settings.TWILIO_AUTH_TOKEN:
+        # Sem o token não há como conferir: recusa em vez de aceitar qualquer um
+        logger.error("Status callback do Twilio recusado: TWILIO_AUTH_TOKEN vazio.")
+        return False
+    # Atrás do nginx a URL vista pelo Django pode diferir da assinada
+    url = settings.TWILIO_STATUS_CALLBACK_URL or request.build_absolute_uri()
+    return RequestValidator(settings.TWILIO_AUTH_TOKEN).validate(
+        url, request.POST.dict(), request.headers.get("X-Twilio-Signature", "")
+    )
+
+
+@csrf_exempt
+@require_POST
+def status_entrega_twilio(request):
+    """Status callback do Twilio: enfileira a atualização e responde na hora."""
+    if not _assinatura_twilio_valida(request):
+        logger.warning("Status callback do Twilio com assinatura inválida.")
+        return HttpResponseForbidden()
+    atualizacao = Atualizacao.do_callback(request.POST)
+    if atualizacao is not None:
+        agrupador.adicionar(atualizacao)
+    return HttpResponse(status=204)
@@ -113,7 +113,10 @@ python manage.py collectstatic --noinput --clear
 echo "Iniciando servidor..."
 if [ "$DJANGO_ENV" = "production" ]; then
     echo "Modo produção: usando Gunicorn"
-    exec gunicorn sga.wsgi:application --bind 0.0.0.0:8000 --workers 3
+    # gthread: cada TV mantém uma conexão SSE aberta, que ocupa uma thread
+    # (e não um worker inteiro, como no worker sync)
+    exec gunicorn sga.wsgi:application --bind 0.0.0.0:8000 --workers 3 \
+        --worker-class gthread --threads "${GUNICORN_THREADS:-24}"
 else
     echo "Modo desenvolvimento: usando runserver"
     exec python manage.py runserver 0.0.0.0:8000
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class GuicheConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "guiche"
+
+    def ready(self):
+        import guiche.signals  # noqa: F401
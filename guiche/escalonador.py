@@ -0,0 +1,86 @@
+# guiche/escalonador.py
+"""
+Escalonador ponderado suave (smooth weighted round-robin) da fila do guichê.
+
+Em vez de expandir as proporções em uma lista ``[tipo] * qtd`` e girar um
+``cycle`` até esvaziar os grupos, cada tipo com peso ``w > 0`` avança em um
+relógio virtual próprio: o k-ésimo paciente do tipo começa em
+``inicio = max(fim_anterior, agora)``, termina em ``inicio + 1/w`` e é
+posicionado no meio desse intervalo (``inicio + 1/(2w)``). Ordenar pelas
+posições produz a mesma intercalação suave do SWRR (para 2:1, ``G E G G E G``;
+para 1:1, alternância estrita), mas:
+
+- cada paciente custa O(1), seja qual for a magnitude dos pesos;
+- a posição de um paciente não depende dos demais, o que permite mantê-la
+  persistida na fila e inserir novos pacientes incrementalmente;
+- tipos com peso 0 não travam a intercalação: ficam em um nível posterior,
+  atendidos por ordem de chegada quando não há pacientes dos demais tipos.
+"""
+
+import heapq
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# Níveis de prioridade: tipos com peso positivo antes dos tipos com peso 0
+NIVEL_PONDERADO = 0
+NIVEL_SEM_PESO = 1
+
+# Chave do estado reservada à fila de chegada dos tipos com peso 0
+CHAVE_SEM_PESO = "_sem_peso"
+
+
+class Escalonador:
+    """
+    Calcula a posição (nivel, posicao) de cada novo paciente.
+
+    ``estado`` guarda, por tipo, o fim virtual do último paciente posicionado
+    e pode ser persistido (é um dicionário de floats) para continuar a
+    intercalação depois.
+    """
+
+    def __init__(self, pesos: Dict[str, int], estado: Optional[Dict] = None):
+        self.pesos = {tipo: max(int(peso), 0) for tipo, peso in pesos.items()}
+        self.estado: Dict[str, float] = dict(estado or {})
+
+    def posicao(self, tipo: str, agora: float = 0.0) -> Tuple[int, float]:
+        peso = self.pesos.get(tipo, 0)
+        if peso <= 0:
+            chegada = self.estado.get(CHAVE_SEM_PESO, 0.0)
+            self.estado[CHAVE_SEM_PESO] = chegada + 1
+            return NIVEL_SEM_PESO, chegada
+
+        inicio = max(self.estado.get(tipo, 0.0), agora)
+        self.estado[tipo] = inicio + 1 / peso
+        return NIVEL_PONDERADO, inicio + 1 / (2 * peso)
+
+    def inicio(self, tipo: str, posicao: float) -> float:
+        """Início do intervalo virtual de um paciente do ``tipo`` em ``posicao``."""
+        return posicao - 1 / (2 * self.pesos[tipo])
+
+    def relogio(self) -> float:
+        """Maior fim virtual já atribuído a um tipo com peso positivo."""
+        return max(
+            (fim for tipo, fim in self.estado.items() if tipo != CHAVE_SEM_PESO),
+            default=0.0,
+        )
+
+
+def intercalar(
+    itens: Iterable[T], tipo_de: Callable[[T], str], pesos: Dict[str, int]
+) -> List[T]:
+    """
+    Intercala ``itens`` (em ordem de chegada) segundo ``pesos``.
+
+    Empates de posição são resolvidos pela ordem de chegada. Como as posições
+    de cada tipo são crescentes, a ordenação final é uma intercalação de no
+    máximo um fluxo por tipo: O(n log k) para n itens e k tipos.
+    """
+    escalonador = Escalonador(pesos)
+    fluxos: Dict[str, List[Tuple[int, float, int, T]]] = {}
+    for chegada, item in enumerate(itens):
+        tipo = tipo_de(item)
+        nivel, posicao = escalonador.posicao(tipo)
+        fluxos.setdefault(tipo, []).append((nivel, posicao, chegada, item))
+    ordenados = heapq.merge(*fluxos.values(), key=lambda chave: chave[:3])
+    return [item for _, _, _, item in ordenados]
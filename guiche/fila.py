@@ -0,0 +1,291 @@
+# guiche/fila.py
+"""
+Fila do painel do guichê mantida incrementalmente.
+
+Cada perfil de filtros (proporções por tipo de senha + período) tem, por dia,
+uma FilaGuiche persistida e compartilhada por todos os guichês com a mesma
+configuração. Cada paciente pendente ocupa uma posição fixa, calculada pelo
+escalonador ponderado (guiche.escalonador), de forma que:
+
+- criar um paciente apenas insere um item na(s) fila(s) correspondente(s);
+- marcar um paciente como atendido apenas remove seus itens;
+- renderizar o painel é a leitura dos primeiros N itens por posição;
+- chamar a próxima senha reserva atomicamente o primeiro paciente livre.
+"""
+
+import hashlib
+import json
+from typing import Dict, List, Optional
+
+from django.db import connection, transaction
+from django.db.models import Exists, Min, OuterRef, Subquery
+from django.utils import timezone
+
+from core.models import FilaGuiche, Guiche, ItemFilaGuiche, Paciente
+
+from .escalonador import NIVEL_PONDERADO, Escalonador
+
+# Faixas de horário (inclusivas) de cada período do painel
+PERIODOS = Paciente.HORAS_PERIODO
+
+# Quantidade de senhas exibidas no painel
+LIMITE_PAINEL = 50
+
+
+def normalizar_proporcoes(proporcoes) -> Dict[str, int]:
+    normalizadas = {}
+    for tipo, qtd in proporcoes.items():
+        try:
+            qtd = int(qtd) if qtd is not None else 1
+        except (ValueError, TypeError):
+            qtd = 1
+        normalizadas[tipo] = qtd
+    return normalizadas
+
+
+def filtrar_periodo(pacientes, periodo):
+    if periodo not in PERIODOS:
+        return pacientes
+    return pacientes.filter(periodo=periodo)
+
+
+def _chave(dia, proporcoes: Dict[str, int], periodo: str) -> str:
+    # Ordenadas: a ordem dos tipos vem da sessão/formulário e não muda a fila
+    perfil = json.dumps([dia.isoformat(), periodo, sorted(proporcoes.items())])
+    return hashlib.sha256(perfil.encode()).hexdigest()
+
+
+def _pertence(fila: FilaGuiche, paciente) -> bool:
+    if paciente.tipo_senha not in fila.proporcoes:
+        return False
+    return fila.periodo not in PERIODOS or paciente.periodo == fila.periodo
+
+
+def obter_fila(proporcoes, periodo: str, dia=None) -> FilaGuiche:
+    """Retorna a fila do perfil, montando-a a partir do banco na primeira vez no dia."""
+    dia = dia or timezone.localdate()
+    proporcoes = normalizar_proporcoes(proporcoes)
+    if periodo not in PERIODOS:
+        periodo = "all"
+    chave = _chave(dia, proporcoes, periodo)
+
+    fila = FilaGuiche.objects.filter(chave=chave).first()
+    if fila is not None:
+        return fila
+
+    with transaction.atomic():
+        # Filas de dias anteriores não recebem mais atualizações
+        FilaGuiche.objects.filter(dia__lt=dia).delete()
+        fila, criada = FilaGuiche.objects.get_or_create(
+            chave=chave,
+            defaults={"dia": dia, "periodo": periodo, "proporcoes": proporcoes},
+        )
+        if criada:
+            _montar(fila)
+            # Um paciente gravado com esta transação aberta não está na
+            # leitura da montagem nem é enfileirado pelo sinal (a fila ainda
+            # não era visível): confere de novo após o commit.
+            transaction.on_commit(lambda: _completar(fila))
+    return fila
+
+
+def _pacientes(fila: FilaGuiche):
+    return filtrar_periodo(
+        Paciente.objects.filter(
+            dia_atendimento=fila.dia,
+            tipo_senha__in=list(fila.proporcoes),
+            atendido=False,
+        ),
+        fila.periodo,
+    ).order_by("horario_geracao_senha", "id")
+
+
+def _montar(fila: FilaGuiche) -> None:
+    pacientes = _pacientes(fila)
+
+    escalonador = Escalonador(fila.proporcoes)
+    itens = []
+    # Mesma regra de _enfileirar, com os pacientes inseridos por ordem de
+    # chegada: a montagem dá a mesma ordem que as inserções incrementais.
+    cabeca = None
+    for paciente_id, tipo, senha in pacientes.values_list("id", "tipo_senha", "senha"):
+        nivel, posicao = escalonador.posicao(
+            tipo, agora=escalonador.relogio() if cabeca is None else cabeca
+        )
+        if nivel == NIVEL_PONDERADO:
+            inicio = escalonador.inicio(tipo, posicao)
+            cabeca = inicio if cabeca is None else min(cabeca, inicio)
+        itens.append(
+            ItemFilaGuiche(
+                fila=fila,
+                paciente_id=paciente_id,
+                senha=senha or "",
+                nivel=nivel,
+                posicao=posicao,
+            )
+        )
+    ItemFilaGuiche.objects.bulk_create(itens)
+    fila.estado_escalonador = escalonador.estado
+    fila.save(update_fields=["estado_escalonador"])
+
+
+def _completar(fila: FilaGuiche) -> None:
+    """Enfileira os pacientes do perfil que ficaram de fora da montagem."""
+    for paciente in _pacientes(fila).exclude(itemfilaguiche__fila=fila):
+        _enfileirar(fila, paciente)
+
+
+def _enfileirar(fila: FilaGuiche, paciente) -> None:
+    with transaction.atomic():
+        # Serializa inserções concorrentes no mesmo perfil
+        fila = FilaGuiche.objects.select_for_update().get(pk=fila.pk)
+        if fila.itens.filter(paciente=paciente).exists():
+            # Já enfileirado por outra chamada (sinal e _completar)
+            return
+        escalonador = Escalonador(fila.proporcoes, fila.estado_escalonador)
+        # Cabeça da fila: o início do intervalo virtual mais antigo entre os
+        # pacientes pendentes (o primeiro de cada tipo). Um tipo que ficou sem
+        # pacientes volta a partir dela, em vez de furar a fila com posições
+        # antigas.
+        primeiros = (
+            fila.itens.filter(nivel=NIVEL_PONDERADO)
+            .values_list("paciente__tipo_senha")
+            .annotate(menor=Min("posicao"))
+            .order_by()
+        )
+        cabeca = min(
+            (
+                escalonador.inicio(tipo, menor)
+                for tipo, menor in primeiros
+                if escalonador.pesos.get(tipo, 0) > 0
+            ),
+            default=escalonador.relogio(),
+        )
+        nivel, posicao = escalonador.posicao(paciente.tipo_senha, agora=cabeca)
+        ItemFilaGuiche.objects.create(
+            fila=fila,
+            paciente=paciente,
+            senha=paciente.senha,
+            nivel=nivel,
+            posicao=posicao,
+        )
+        fila.estado_escalonador = escalonador.estado
+        fila.save(update_fields=["estado_escalonador"])
+
+
+def sincronizar_paciente(paciente) -> None:
+    """Atualiza as filas do dia após a gravação de um paciente."""
+    if (
+        paciente.atendido
+        or not paciente.senha
+        or not paciente.tipo_senha
+        or paciente.dia_atendimento is None
+    ):
+        ItemFilaGuiche.objects.filter(paciente=paciente).delete()
+        return
+
+    filas = {
+        fila.id: fila
+        for fila in FilaGuiche.objects.filter(dia=paciente.dia_atendimento)
+        if _pertence(fila, paciente)
+    }
+    itens = {i.fila_id: i for i in ItemFilaGuiche.objects.filter(paciente=paciente)}
+
+    # Itens de filas que deixaram de corresponder, ou de uma senha anterior
+    # (recadastro), saem; o paciente reentra no fim da fila com a nova senha.
+    obsoletos = [
+        i.pk
+        for i in itens.values()
+        if i.fila_id not in filas or i.senha != paciente.senha
+    ]
+    if obsoletos:
+        ItemFilaGuiche.objects.filter(pk__in=obsoletos).delete()
+
+    for fila in filas.values():
+        item = itens.get(fila.id)
+        if item is None or item.pk in obsoletos:
+            _enfileirar(fila, paciente)
+
+
+def pacientes_da_fila(fila: FilaGuiche, limite: int = LIMITE_PAINEL) -> List[Paciente]:
+    itens = (
+        fila.itens.filter(paciente__atendido=False)
+        .select_related("paciente", "paciente__profissional_saude")
+        .order_by("nivel", "posicao", "id")[:limite]
+    )
+    return [item.paciente for item in itens]
+
+
+def _candidatos(proporcoes, periodo: str):
+    """Pacientes livres (não atendidos e não reservados) na ordem da política."""
+    reservados = Guiche.objects.filter(senha_atendida=OuterRef("pk"))
+    if proporcoes:
+        fila = obter_fila(proporcoes, periodo)
+        pacientes = Paciente.objects.filter(itemfilaguiche__fila=fila).order_by(
+            "itemfilaguiche__nivel", "itemfilaguiche__posicao", "itemfilaguiche__id"
+        )
+    else:
+        pacientes = filtrar_periodo(
+            Paciente.objects.filter(
+                dia_atendimento=timezone.localdate(),
+                senha__isnull=False,
+            ),
+            periodo,
+        ).order_by("horario_geracao_senha", "id")
+    return pacientes.filter(atendido=False).exclude(Exists(reservados))
+
+
+def reservar_proximo(guiche: Guiche, proporcoes, periodo: str) -> Optional[Paciente]:
+    """
+    Reserva para ``guiche`` a próxima senha livre segundo a política do guichê.
+
+    A reserva é o próprio ``Guiche.senha_atendida``: um paciente apontado por
+    algum guichê não é candidato para os demais. Dois guichês chamando ao mesmo
+    tempo nunca recebem o mesmo paciente:
+
+    - no PostgreSQL o candidato é travado com ``SELECT ... FOR UPDATE SKIP
+      LOCKED``, de forma que guichês concorrentes pulam a linha em disputa em
+      vez de esperar por ela. O filtro de reservados desse SELECT vale para o
+      snapshot do início do comando: um guichê que reservou o paciente e
+      liberou a trava (commit) depois disso não é visto. Por isso, com a trava
+      em mãos, a reserva é conferida de novo num comando novo (no READ
+      COMMITTED, ele vê os commits anteriores) e, se outro guichê já tem o
+      paciente, passa-se ao candidato seguinte;
+    - no SQLite, que serializa escritores, a escolha e a reserva são um único
+      ``UPDATE`` com subconsulta, atômico por construção.
+
+    Retorna o paciente reservado ou None se não há senha livre (nesse caso o
+    guichê mantém a reserva que já tinha).
+    """
+    candidatos = _candidatos(proporcoes, periodo)
+    with transaction.atomic():
+        if connection.features.has_select_for_update_skip_locked:
+            recusados: List[int] = []
+            while True:
+                paciente = (
+                    candidatos.exclude(pk__in=recusados)
+                    .select_for_update(skip_locked=True, of=("self",))
+                    .only("pk")
+                    .first()
+                )
+                if paciente is None:
+                    return None
+                if not Guiche.objects.filter(senha_atendida=paciente).exists():
+                    break
+                recusados.append(paciente.pk)
+            Guiche.objects.filter(pk=guiche.pk).update(
+                senha_atendida=paciente, em_atendimento=True
+            )
+        else:
+            reservados = (
+                Guiche.objects.filter(pk=guiche.pk)
+                .filter(Exists(candidatos))
+                .update(
+                    senha_atendida=Subquery(candidatos.values("pk")[:1]),
+                    em_atendimento=True,
+                )
+            )
+            if not reservados:
+                return None
+        guiche.refresh_from_db(fields=["senha_atendida", "em_atendimento"])
+    return guiche.senha_atendida
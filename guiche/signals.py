@@ -0,0 +1,10 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .fila import sincronizar_paciente
+
+
+@receiver(post_save, sender="core.Paciente")
+def atualizar_filas_guiche(sender, instance, **kwargs):
+    # Mantém as filas pré-calculadas do painel em dia a cada gravação
+    sincronizar_paciente(instance)
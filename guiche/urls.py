@@ -8,6 +8,7 @@ urlpatterns = [
     path("painel_guiche/", views.painel_guiche, name="painel_guiche"),
     path("selecionar_guiche/", views.selecionar_guiche, name="selecionar_guiche"),
     path("chamar/<int:paciente_id>/", views.chamar_senha, name="chamar_senha"),
+    path("chamar_proximo/", views.chamar_proximo, name="chamar_proximo"),
     path(
         "reanunciar/<int:paciente_id>/", views.reanunciar_senha, name="reanunciar_senha"
     ),
@@ -24,4 +25,6 @@ urlpatterns = [
     path("tv1/", views.tv1_view, name="tv1"),
     path("tv1/api/", views.tv1_api_view, name="tv1_api"),
     path("tv1/historico/api/", views.tv1_historico_api_view, name="tv1_historico_api"),
+    path("tv1/snapshot/", views.tv1_snapshot_view, name="tv1_snapshot"),
+    path("tv1/eventos/", views.tv1_eventos_view, name="tv1_eventos"),
 ]
@@ -1,40 +1,51 @@
 # guiche/views.py
-import datetime
 import logging
 import os
 import tempfile
-from collections import defaultdict, deque
-from itertools import cycle
 from typing import Any, Dict, List
 
 from django import forms
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.db.models import Max
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.utils import timezone
 from django.views.decorators.cache import never_cache
-from django.db.models import Q
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import condition, require_POST
 from gtts import gTTS
 
 from core.decorators import guiche_required
 from core.models import Chamada, Guiche, Paciente
-from core.utils import enviar_sms_ou_whatsapp  # Importe a nova função
+from core.notificacoes import descrever, enfileirar
+from core.tv import obter_payload, resposta_sse
 
+from .fila import filtrar_periodo, obter_fila, pacientes_da_fila, reservar_proximo
 from .forms import GuicheForm
 
 logger = logging.getLogger(__name__)
 
 
+def periodo_do_guiche(request) -> str:
+    """Período do painel ('all' | 'manha' | 'tarde').
+
+    Vem do parâmetro "period" da requisição (GET no painel, POST no
+    chamar_proximo) ou, sem ele, da sessão, onde o valor recebido fica
+    guardado para sobreviver a POST/redirect.
+    """
+    periodo = request.POST.get("period") or request.GET.get("period")
+    if periodo:
+        request.session["guiche_period"] = periodo
+        return periodo
+    return request.session.get("guiche_period", "all")
+
+
 @guiche_required
 @login_required
 def painel_guiche(request):
     senhas = []
-    # Persistir seleção de período na sessão para sobreviver a POST/redirect
-    period_from_get = request.GET.get("period")
-    if period_from_get is not None:
-        request.session["guiche_period"] = period_from_get
+    period_raw = periodo_do_guiche(request)
 
     if request.method == "POST":
         form = GuicheForm(request.POST)
@@ -75,102 +86,22 @@ def painel_guiche(request):
     else:  # GET
         form = GuicheForm()
 
-        # Period filter: 'all' | 'manha' | 'tarde'
-        # Prefer GET param, fallback to session, default to 'all'
-        period_raw = request.GET.get("period") or request.session.get(
-            "guiche_period", "all"
-        )
-
         # Recuperar seleções da sessão
         filtros_guiche = request.session.get("filtros_guiche")
         if filtros_guiche:
-            tipos_selecionados = filtros_guiche.get("tipos_selecionados", [])
             proporcoes = filtros_guiche.get("proporcoes", {})
 
-            # Buscar senhas do dia e somente dos tipos selecionados
-            pacientes = Paciente.objects.filter(
-                horario_geracao_senha__date=(
-                    timezone.now() - datetime.timedelta(hours=3)
-                ).date(),
-                tipo_senha__in=tipos_selecionados,
-                atendido=False,
-            ).order_by("horario_geracao_senha")
-
-            # Apply period filter if provided via GET
-            period_raw = request.GET.get("period", "all")
-            if period_raw in ("manha", "tarde"):
-                if period_raw == "manha":
-                    start_h, end_h = 7, 11
-                else:
-                    start_h, end_h = 12, 18
-
-                pacientes = pacientes.filter(
-                    Q(
-                        horario_agendamento__hour__gte=start_h,
-                        horario_agendamento__hour__lte=end_h,
-                    )
-                    | Q(
-                        horario_agendamento__isnull=True,
-                        horario_geracao_senha__hour__gte=start_h,
-                        horario_geracao_senha__hour__lte=end_h,
-                    )
-                )
-
-            # Agrupa por tipo
-            grupos: defaultdict[str, deque] = defaultdict(deque)
-            for paciente in pacientes:
-                prefixo = paciente.tipo_senha
-                if prefixo in proporcoes:
-                    grupos[prefixo].append(paciente)
-
-            # Monta fila com base nas proporções
-            ordem = []
-            for tipo, qtd in proporcoes.items():
-                try:
-                    qtd = (
-                        int(qtd) if qtd is not None else 1
-                    )  # Tenta converter para inteiro ou usa 1
-                except (ValueError, TypeError):
-                    qtd = 1  # Garante que qtd seja um inteiro, mesmo se a conversão falhar
-                ordem.extend([tipo] * qtd)
-
-            ciclo_ordem = cycle(ordem)
-
-            fila = []
-            while any(grupos.values()):
-                tipo = next(ciclo_ordem)
-                if grupos[tipo]:
-                    fila.append(grupos[tipo].popleft())
-
-            senhas = fila
+            # Fila pré-calculada do perfil (compartilhada entre guichês com a
+            # mesma configuração e mantida pelos signals de Paciente)
+            fila = obter_fila(proporcoes, period_raw)
+            senhas = pacientes_da_fila(fila)
         else:
             # Se não há filtros na sessão, mostrar todas as senhas do dia
             senhas = Paciente.objects.filter(
-                horario_geracao_senha__date=(
-                    timezone.now() - datetime.timedelta(hours=3)
-                ).date(),
+                dia_atendimento=timezone.localdate(),
                 atendido=False,
             ).order_by("horario_geracao_senha")
-
-            # Apply period filter for the no-session case
-            period_raw = request.GET.get("period", "all")
-            if period_raw in ("manha", "tarde"):
-                if period_raw == "manha":
-                    start_h, end_h = 7, 11
-                else:
-                    start_h, end_h = 12, 18
-
-                senhas = senhas.filter(
-                    Q(
-                        horario_agendamento__hour__gte=start_h,
-                        horario_agendamento__hour__lte=end_h,
-                    )
-                    | Q(
-                        horario_agendamento__isnull=True,
-                        horario_geracao_senha__hour__gte=start_h,
-                        horario_geracao_senha__hour__lte=end_h,
-                    )
-                )
+            senhas = filtrar_periodo(senhas, period_raw)
 
         # Buscar histórico: mostrar as últimas 10 chamadas (sem deduplicação),
         # igual ao comportamento do painel do profissional.
@@ -207,6 +138,11 @@ def chamar_senha(request, paciente_id):
     paciente = get_object_or_404(Paciente, id=paciente_id)
     guiche = get_guiche_do_usuario(request.user, request=request)
 
+    # Registra a reserva para que chamar_proximo não entregue o mesmo paciente
+    Guiche.objects.filter(pk=guiche.pk).update(
+        senha_atendida=paciente, em_atendimento=True
+    )
+
     # 1. Cria o registro da chamada e envia WhatsApp (através de realizar_acao_senha)
     response_chamada = realizar_acao_senha(
         request,
@@ -221,6 +157,35 @@ def chamar_senha(request, paciente_id):
     return response_chamada
 
 
+@require_POST
+@login_required
+@guiche_required
+def chamar_proximo(request):
+    """Escolhe e reserva a próxima senha da fila do guichê e a chama.
+
+    A escolha segue os filtros do guichê na sessão (proporções e período) e a
+    reserva é atômica (ver guiche.fila.reservar_proximo), então guichês
+    concorrentes nunca chamam a mesma senha.
+    """
+    guiche = get_guiche_do_usuario(request.user, request=request)
+    proporcoes = request.session.get("filtros_guiche", {}).get("proporcoes", {})
+    periodo = periodo_do_guiche(request)
+
+    paciente = reservar_proximo(guiche, proporcoes, periodo)
+    if paciente is None:
+        return JsonResponse({"status": "empty", "message": "Nenhuma senha na fila."})
+
+    response = realizar_acao_senha(
+        request,
+        paciente.senha,
+        guiche.numero,
+        paciente.nome_completo,
+        paciente.id,
+        "chamada",
+    )
+    return response
+
+
 @require_POST
 @login_required
 @guiche_required
@@ -298,29 +263,40 @@ def realizar_acao_senha(request, senha, guiche_numero, nome, paciente_id, acao):
     guiche_obj = Guiche.objects.get(numero=guiche_numero)
     paciente = Paciente.objects.get(id=paciente_id)
 
-    Chamada.objects.create(paciente=paciente, guiche=guiche_obj, acao=acao)
-
     # Preparar dados para a TV
-    data_for_tv = {"senha": senha, "nome_completo": nome, "guiche": guiche_numero}
+    data_for_tv = {
+        "senha": senha,
+        "nome_completo": nome,
+        "guiche": guiche_numero,
+        "paciente_id": paciente_id,
+    }
 
     # --- LÓGICA DE ENVIO DE SMS ---
+    # A mensagem vai para a caixa de saída na mesma transação da chamada e é
+    # enviada pelo worker processar_notificacoes (ver core.notificacoes)
     twilio_response = None
-    if acao in ["chamada", "reanuncio"] and paciente.telefone_celular:
-        numero_e164 = paciente.telefone_e164()
-        if numero_e164:
-            mensagem = (
-                f"Por favor, dirija-se ao Guichê {guiche_numero}. "
-                f"Chamado: {senha} - {nome}."
-            )
-            twilio_response = enviar_sms_ou_whatsapp(numero_e164, mensagem)
-        else:
-            twilio_response = {
-                "status": "error",
-                "error": f"Telefone inválido para o paciente {nome} (ID: {paciente_id}). SMS não enviado.",
-            }
+    notificacao = None
+    with transaction.atomic():
+        Chamada.objects.create(paciente=paciente, guiche=guiche_obj, acao=acao)
+
+        if acao in ["chamada", "reanuncio"] and paciente.telefone_celular:
+            numero_e164 = paciente.telefone_e164()
+            if numero_e164:
+                mensagem = (
+                    f"Por favor, dirija-se ao Guichê {guiche_numero}. "
+                    f"Chamado: {senha} - {nome}."
+                )
+                notificacao = enfileirar(numero_e164, mensagem, paciente=paciente)
+            else:
+                twilio_response = {
+                    "status": "error",
+                    "error": f"Telefone inválido para o paciente {nome} (ID: {paciente_id}). SMS não enviado.",
+                }
     # --- FIM DA LÓGICA DE ENVIO DE SMS ---
 
     response_data = {"status": "ok", "data": data_for_tv}
+    if notificacao:
+        response_data["notificacao"] = descrever(notificacao)
     if twilio_response:
         response_data["twilio"] = twilio_response
     return JsonResponse(response_data)
@@ -328,29 +304,18 @@ def realizar_acao_senha(request, senha, guiche_numero, nome, paciente_id, acao):
 
 @never_cache
 def tv1_view(request):
-    try:
-        # Obtém a última chamada de todos os guichês
-        ultima_chamada = Chamada.objects.filter(
-            acao__in=["chamada", "reanuncio"]
-        ).latest("data_hora")
-        senha_chamada = ultima_chamada.paciente
-        nome_completo = ultima_chamada.paciente.nome_completo
-        numero_guiche = ultima_chamada.guiche.numero  # Obtém o número do guichê
-        historico_chamadas = Chamada.objects.filter(acao="confirmado").order_by(
-            "-data_hora"
-        )[:5]
-    except Chamada.DoesNotExist:
-        senha_chamada = None
-        nome_completo = None
-        numero_guiche = None
-        historico_chamadas = []
-        ultima_chamada = None  # Define ultima_chamada como None
+    # Renderiza a partir do payload em cache, o mesmo das APIs e dos eventos
+    payload = payload_tv1()
+    ultima_chamada = payload["chamada"] if payload["chamada"]["id"] else None
+    senha_chamada = ultima_chamada["senha"] if ultima_chamada else None
+    nome_completo = ultima_chamada["nome_completo"] if ultima_chamada else None
+    numero_guiche = ultima_chamada["guiche"] if ultima_chamada else None
 
     context = {
         "senha_chamada": senha_chamada,
         "nome_completo": nome_completo,
         "numero_guiche": numero_guiche,  # Adiciona o número do guichê
-        "historico_senhas": historico_chamadas,
+        "historico_senhas": payload["historico"],
         "ultima_chamada": ultima_chamada,  # Passa a última chamada para o template
         "guiche_numero": numero_guiche,  # Garante que guiche_numero esteja no contexto
     }
@@ -383,63 +348,100 @@ def get_guiche_do_usuario(user, request=None):
     )
 
 
-@never_cache
-def tv1_api_view(request):
+def dados_chamada_tv1() -> Dict[str, Any]:
+    """Última chamada/reanúncio dos guichês, no formato da API da TV1."""
     try:
         # Obtém a última chamada de todos os guichês
-        ultima_chamada = Chamada.objects.filter(
-            acao__in=["chamada", "reanuncio"]
-        ).latest("data_hora")
-        senha = ultima_chamada.paciente.senha
-        nome_completo = ultima_chamada.paciente.nome_completo
-        numero_guiche = ultima_chamada.guiche.numero
-        chamada_id = ultima_chamada.id  # Adiciona o ID da chamada
-
-        data = {
-            "senha": senha,
-            "nome_completo": nome_completo,
-            "guiche": numero_guiche,
-            "id": chamada_id,  # Inclui o ID no JSON
+        ultima_chamada = (
+            Chamada.objects.filter(acao__in=["chamada", "reanuncio"])
+            .select_related("paciente", "guiche")
+            .latest("data_hora")
+        )
+        return {
+            "senha": ultima_chamada.paciente.senha,
+            "nome_completo": ultima_chamada.paciente.nome_completo,
+            "guiche": ultima_chamada.guiche.numero,
+            "id": ultima_chamada.id,  # Inclui o ID no JSON
         }
     except Chamada.DoesNotExist:
-        data = {
-            "senha": "",
-            "nome_completo": "",
-            "guiche": "",
-            "id": "",
-        }  # Garante que o ID também seja vazio
+        # Garante que o ID também seja vazio
+        return {"senha": "", "nome_completo": "", "guiche": "", "id": ""}
+
+
+def dados_historico_tv1() -> List[Dict[str, Any]]:
+    """Últimas 5 confirmações dos guichês, no formato da API da TV1."""
+    historico_chamadas = (
+        Chamada.objects.filter(acao="confirmado")
+        .select_related("paciente", "guiche")
+        .order_by("-data_hora")[:5]
+    )
+    return [
+        {
+            "id": chamada.id,
+            "paciente_nome": chamada.paciente.nome_completo,
+            "guiche_numero": chamada.guiche.numero,
+            "acao": chamada.acao,
+            "data_hora": chamada.data_hora.strftime("%H:%M:%S"),
+        }
+        for chamada in historico_chamadas
+    ]
+
+
+def montar_payload_tv1() -> Dict[str, Any]:
+    """Chamada atual + histórico da TV1, lidos do banco.
+
+    ``versao`` é o maior id de Chamada, usado como ETag do snapshot.
+    """
+    return {
+        "versao": Chamada.objects.aggregate(ultimo=Max("id"))["ultimo"] or 0,
+        "chamada": dados_chamada_tv1(),
+        "historico": dados_historico_tv1(),
+    }
 
-    return JsonResponse(data)
+
+def payload_tv1() -> Dict[str, Any]:
+    """Payload da TV1 a partir do cache (ver core.tv)."""
+    return obter_payload("tv1", montar_payload_tv1)
+
+
+@never_cache
+def tv1_api_view(request):
+    return JsonResponse(payload_tv1()["chamada"])
 
 
 def tv1_historico_api_view(request) -> JsonResponse:
     """API para obter apenas o histórico de chamadas da TV1"""
     try:
-        historico_chamadas = (
-            Chamada.objects.filter(acao="confirmado")
-            .select_related("paciente", "guiche")
-            .order_by("-data_hora")[:5]
-        )
-
-        historico_data: List[Dict[str, Any]] = []
-        for chamada in historico_chamadas:
-            historico_data.append(
-                {
-                    "id": chamada.id,
-                    "paciente_nome": chamada.paciente.nome_completo,
-                    "guiche_numero": chamada.guiche.numero,
-                    "acao": chamada.acao,
-                    "data_hora": chamada.data_hora.strftime("%H:%M:%S"),
-                }
-            )
-
-        data: Dict[str, Any] = {"historico": historico_data}
+        data: Dict[str, Any] = {"historico": payload_tv1()["historico"]}
     except Exception as e:
         data = {"historico": [], "error": str(e)}
 
     return JsonResponse(data)
 
 
+def etag_tv1(request) -> str:
+    """Versão da TV1: o maior id de Chamada, guardado no payload em cache."""
+    return f"tv1-{payload_tv1()['versao']}"
+
+
+@condition(etag_func=etag_tv1)
+def tv1_snapshot_view(request):
+    """Chamada atual + histórico da TV1, com ETag para GET condicional.
+
+    Com If-None-Match igual à versão atual a resposta é um 304 sem corpo; com
+    o cache quente nenhuma das duas respostas consulta o banco.
+    """
+    response = JsonResponse(payload_tv1())
+    # Permite guardar a resposta, mas obriga a revalidar a cada requisição
+    response["Cache-Control"] = "no-cache"
+    return response
+
+
+def tv1_eventos_view(request):
+    """Fluxo SSE da TV1: envia chamada atual + histórico a cada nova Chamada."""
+    return resposta_sse("tv1", montar_payload_tv1)
+
+
 class SelecionarGuicheForm(forms.Form):
     guiche = forms.ModelChoiceField(
         queryset=Guiche.objects.none(),
@@ -15,4 +15,6 @@ urlpatterns = [
     path("tv2/", views.tv2_view, name="tv2"),
     path("tv2/api/", views.tv2_api_view, name="tv2_api"),
     path("tv2/historico/api/", views.tv2_historico_api_view, name="tv2_historico_api"),
+    path("tv2/snapshot/", views.tv2_snapshot_view, name="tv2_snapshot"),
+    path("tv2/eventos/", views.tv2_eventos_view, name="tv2_eventos"),
 ]
@@ -2,16 +2,19 @@
 import logging
 from typing import Any, Dict, List, Optional
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.db.models import Max
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.views.decorators.cache import never_cache
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import condition, require_POST
 
 from core.decorators import profissional_saude_required
 from core.models import ChamadaProfissional, CustomUser, Paciente
+from core.notificacoes import descrever, enfileirar
+from core.tv import obter_payload, resposta_sse
 
 logger = logging.getLogger(__name__)
-from core.utils import enviar_whatsapp  # Importe a função de utilidade
 
 from .forms import SelecionarSalaForm
 
@@ -49,6 +52,7 @@ def painel_profissional(request):
 
 @require_POST
 @login_required
+@transaction.atomic
 def realizar_acao_profissional(request, paciente_id, acao):
     """
     View para lidar com as ações do profissional de saúde:
@@ -57,13 +61,14 @@ def realizar_acao_profissional(request, paciente_id, acao):
     paciente = get_object_or_404(Paciente, id=paciente_id)
     profissional_saude = request.user
     twilio_response: Optional[Dict[str, Any]] = None
+    notificacao = None
 
     if acao == "chamar":
         ChamadaProfissional.objects.create(
             paciente=paciente, profissional_saude=profissional_saude, acao="chamada"
         )
 
-        # Tenta enviar mensagem via WhatsApp
+        # Enfileira a mensagem via WhatsApp (enviada pelo processar_notificacoes)
         numero_celular_paciente = paciente.telefone_e164()
         if numero_celular_paciente:
             sala_display = (
@@ -76,7 +81,9 @@ def realizar_acao_profissional(request, paciente_id, acao):
                 f"O(a) Dr(a). {profissional_saude.first_name}, lhe aguarda. "
                 f"Por favor, dirija-se à {sala_display}."
             )
-            twilio_response = enviar_whatsapp(numero_celular_paciente, mensagem)
+            notificacao = enfileirar(
+                numero_celular_paciente, mensagem, "whatsapp", paciente
+            )
         else:
             logger.warning(
                 f"Telefone inválido ou ausente para o paciente {paciente.nome_completo} (ID: {paciente_id}). "
@@ -88,6 +95,8 @@ def realizar_acao_profissional(request, paciente_id, acao):
             }
 
         response_data = {"status": "success", "mensagem": "Senha chamada com sucesso."}
+        if notificacao:
+            response_data["notificacao"] = descrever(notificacao)  # type: ignore
         if twilio_response:
             response_data["twilio"] = twilio_response  # type: ignore
         return JsonResponse(response_data)
@@ -109,7 +118,9 @@ def realizar_acao_profissional(request, paciente_id, acao):
                 f"O(A) Dr(a). {profissional_saude.first_name} está chamando novamente. "
                 f"Por favor, dirija-se à {sala_display}."
             )
-            twilio_response = enviar_whatsapp(numero_celular_paciente, mensagem)
+            notificacao = enfileirar(
+                numero_celular_paciente, mensagem, "whatsapp", paciente
+            )
         else:
             logger.warning(
                 f"Telefone inválido ou ausente para o paciente {paciente.nome_completo} (ID: {paciente_id}). "
@@ -124,6 +135,8 @@ def realizar_acao_profissional(request, paciente_id, acao):
             "status": "success",
             "mensagem": "Senha reanunciada com sucesso.",
         }
+        if notificacao:
+            response_data["notificacao"] = descrever(notificacao)  # type: ignore
         if twilio_response:
             response_data["twilio"] = twilio_response  # type: ignore
         return JsonResponse(response_data)
@@ -146,6 +159,12 @@ def realizar_acao_profissional(request, paciente_id, acao):
             profissional_encaminhar = get_object_or_404(
                 CustomUser, id=profissional_encaminhar_id
             )
+            # Registro do encaminhamento (dashboard e jornada do paciente)
+            ChamadaProfissional.objects.create(
+                paciente=paciente,
+                profissional_saude=profissional_saude,
+                acao="encaminha",
+            )
             paciente.profissional_saude = profissional_encaminhar
             paciente.atendido = True  # Para aparecer na lista do outro profissional
             paciente.save()
@@ -174,65 +193,42 @@ def tv2_view(request):
     """
     View para exibir informações na TV2.
     """
-    try:
-        ultima_chamada = ChamadaProfissional.objects.filter(
-            acao__in=["chamada", "reanuncio"]
-        ).latest("data_hora")
-        senha_chamada = ultima_chamada.paciente
-        nome_completo = ultima_chamada.paciente.nome_completo
-        # Busca o número da sala do profissional que fez a chamada
-        sala_profissional = ultima_chamada.profissional_saude.sala
-
-        # Pega as 5 confirmações mais recentes
-        historico_chamadas = ChamadaProfissional.objects.filter(
-            acao="confirmado"
-        ).order_by("-data_hora")[:5]
-    except ChamadaProfissional.DoesNotExist:
-        senha_chamada = None
-        nome_completo = None
-        sala_profissional = None
-        historico_chamadas = []
+    # Renderiza a partir do payload em cache, o mesmo das APIs e dos eventos
+    payload = payload_tv2()
+    ultima_chamada = payload["chamada"] if payload["chamada"]["id"] else None
 
     context = {
-        "senha_chamada": senha_chamada,
-        "nome_completo": nome_completo,
-        "sala_profissional": sala_profissional,
-        "historico_senhas": historico_chamadas,
-        "ultima_chamada": (
-            ultima_chamada if senha_chamada else None
-        ),  # Passa a última chamada para o template
+        "senha_chamada": ultima_chamada["senha"] if ultima_chamada else None,
+        "nome_completo": ultima_chamada["nome_completo"] if ultima_chamada else None,
+        "sala_profissional": (
+            ultima_chamada["sala_profissional"] if ultima_chamada else None
+        ),
+        "historico_senhas": payload["historico"],
+        "ultima_chamada": ultima_chamada,  # Passa a última chamada para o template
     }
     return render(request, "profissional_saude/tv2.html", context)
 
 
-def tv2_api_view(request):
-    """
-    API para fornecer dados atualizados para a TV2.
-    """
+def dados_chamada_tv2() -> Dict[str, Any]:
+    """Última chamada/reanúncio dos profissionais, no formato da API da TV2."""
     try:
         # Obtenha a última chamada feita por um profissional de saúde
-        ultima_chamada = ChamadaProfissional.objects.filter(
-            acao__in=["chamada", "reanuncio"]
-        ).latest("data_hora")
-        senha = ultima_chamada.paciente.senha  # Pega a senha
-        nome_completo = ultima_chamada.paciente.nome_completo
-        # Busca o número da sala do profissional que fez a chamada
-        sala_profissional = ultima_chamada.profissional_saude.sala
-        profissional_nome = (
-            ultima_chamada.profissional_saude.get_full_name()
-            or ultima_chamada.profissional_saude.username
+        ultima_chamada = (
+            ChamadaProfissional.objects.filter(acao__in=["chamada", "reanuncio"])
+            .select_related("paciente", "profissional_saude")
+            .latest("data_hora")
         )
-        chamada_id = ultima_chamada.id
-
-        data = {
-            "senha": senha,  # Envia a senha
-            "nome_completo": nome_completo,
-            "sala_profissional": sala_profissional,
-            "profissional_nome": profissional_nome,
-            "id": chamada_id,
+        profissional = ultima_chamada.profissional_saude
+        return {
+            "senha": ultima_chamada.paciente.senha,  # Envia a senha
+            "nome_completo": ultima_chamada.paciente.nome_completo,
+            # Número da sala do profissional que fez a chamada
+            "sala_profissional": profissional.sala,
+            "profissional_nome": profissional.get_full_name() or profissional.username,
+            "id": ultima_chamada.id,
         }
     except ChamadaProfissional.DoesNotExist:
-        data = {
+        return {
             "senha": "",
             "nome_completo": "",
             "sala_profissional": "",
@@ -240,38 +236,80 @@ def tv2_api_view(request):
             "id": "",
         }
 
-    return JsonResponse(data)
+
+def dados_historico_tv2() -> List[Dict[str, Any]]:
+    """Últimas 5 confirmações dos profissionais, no formato da API da TV2."""
+    historico_chamadas = (
+        ChamadaProfissional.objects.filter(acao="confirmado")
+        .select_related("paciente", "profissional_saude")
+        .order_by("-data_hora")[:5]
+    )
+    return [
+        {
+            "id": chamada.id,
+            "paciente_nome": chamada.paciente.nome_completo,
+            "paciente_senha": chamada.paciente.senha,
+            "sala_profissional": chamada.profissional_saude.sala,
+            "profissional_nome": chamada.profissional_saude.first_name,
+            "data_hora": chamada.data_hora.strftime("%H:%M:%S"),
+        }
+        for chamada in historico_chamadas
+    ]
+
+
+def montar_payload_tv2() -> Dict[str, Any]:
+    """Chamada atual + histórico da TV2, lidos do banco.
+
+    ``versao`` é o maior id de ChamadaProfissional, usado como ETag do snapshot.
+    """
+    ultimo = ChamadaProfissional.objects.aggregate(ultimo=Max("id"))["ultimo"]
+    return {
+        "versao": ultimo or 0,
+        "chamada": dados_chamada_tv2(),
+        "historico": dados_historico_tv2(),
+    }
+
+
+def payload_tv2() -> Dict[str, Any]:
+    """Payload da TV2 a partir do cache (ver core.tv)."""
+    return obter_payload("tv2", montar_payload_tv2)
+
+
+def tv2_api_view(request):
+    """
+    API para fornecer dados atualizados para a TV2.
+    """
+    return JsonResponse(payload_tv2()["chamada"])
 
 
 def tv2_historico_api_view(request) -> JsonResponse:
     """API para obter apenas o histórico de confirmações da TV2"""
     try:
-        # Obtém as últimas 5 confirmações
-        historico_chamadas = (
-            ChamadaProfissional.objects.filter(acao="confirmado")
-            .select_related("paciente", "profissional_saude")
-            .order_by("-data_hora")[:5]
-        )
-
-        historico_data: List[Dict[str, Any]] = []
-        for chamada in historico_chamadas:
-            historico_data.append(
-                {
-                    "id": chamada.id,
-                    "paciente_nome": chamada.paciente.nome_completo,
-                    "paciente_senha": chamada.paciente.senha,
-                    "sala_profissional": chamada.profissional_saude.sala,
-                    "data_hora": chamada.data_hora.strftime("%H:%M:%S"),
-                }
-            )
-
-        data: Dict[str, Any] = {"historico": historico_data}
+        data: Dict[str, Any] = {"historico": payload_tv2()["historico"]}
     except Exception as e:
         data = {"historico": [], "error": str(e)}
 
     return JsonResponse(data)
 
 
+def etag_tv2(request) -> str:
+    """Versão da TV2: o maior id de ChamadaProfissional, guardado no payload."""
+    return f"tv2-{payload_tv2()['versao']}"
+
+
+@condition(etag_func=etag_tv2)
+def tv2_snapshot_view(request):
+    """Chamada atual + histórico da TV2, com ETag para GET condicional."""
+    response = JsonResponse(payload_tv2())
+    response["Cache-Control"] = "no-cache"
+    return response
+
+
+def tv2_eventos_view(request):
+    """Fluxo SSE da TV2: envia chamada atual + histórico a cada nova chamada."""
+    return resposta_sse("tv2", montar_payload_tv2)
+
+
 @login_required
 @profissional_saude_required
 def selecionar_sala(request):
@@ -11,10 +11,12 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
 import os
+import tempfile
 from pathlib import Path
 
 import dj_database_url
 from decouple import config
+from django.core.exceptions import ImproperlyConfigured
 
 from dotenv import load_dotenv
 
@@ -104,6 +106,107 @@ DATABASE_URL = os.environ.get("DATABASE_URL") or config("DATABASE_URL")
 
 DATABASES = {"default": dj_database_url.parse(DATABASE_URL)}
 
+# Cache
+# O alias "tv" guarda os marcadores de versão e os payloads das TVs (core.tv)
+# e o alias "notificacoes", o estado dos disjuntores do Twilio (core.disjuntor).
+# O alias "presenca" guarda o último sinal de atividade de cada usuário
+# (core.presenca).
+# TV_CACHE_BACKEND escolhe o armazenamento de todos eles:
+#   locmem - memória do processo (um único worker)
+#   file   - diretório local, compartilhado pelos workers do mesmo host
+#   shared - Redis em TV_CACHE_URL, compartilhado entre hosts (requer o
+#            pacote redis)
+TV_CACHE_BACKEND = os.environ.get("TV_CACHE_BACKEND", "file")
+
+_TV_CACHES = {
+    "locmem": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "tv",
+    },
+    "file": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.environ.get(
+            "TV_CACHE_DIR", os.path.join(tempfile.gettempdir(), "sga_tv_cache")
+        ),
+    },
+    "shared": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ.get("TV_CACHE_URL", "redis://127.0.0.1:6379/1"),
+    },
+}
+
+_NOTIFICACOES_CACHES = {
+    "locmem": {**_TV_CACHES["locmem"], "LOCATION": "notificacoes"},
+    "file": {
+        **_TV_CACHES["file"],
+        "LOCATION": os.environ.get(
+            "NOTIFICACOES_CACHE_DIR",
+            os.path.join(tempfile.gettempdir(), "sga_notificacoes_cache"),
+        ),
+    },
+    "shared": {**_TV_CACHES["shared"], "KEY_PREFIX": "notificacoes"},
+}
+
+_PRESENCA_CACHES = {
+    "locmem": {**_TV_CACHES["locmem"], "LOCATION": "presenca"},
+    "file": {
+        **_TV_CACHES["file"],
+        "LOCATION": os.environ.get(
+            "PRESENCA_CACHE_DIR",
+            os.path.join(tempfile.gettempdir(), "sga_presenca_cache"),
+        ),
+    },
+    "shared": {**_TV_CACHES["shared"], "KEY_PREFIX": "presenca"},
+}
+
+_DASHBOARD_CACHES = {
+    "locmem": {**_TV_CACHES["locmem"], "LOCATION": "dashboard"},
+    "file": {
+        **_TV_CACHES["file"],
+        "LOCATION": os.environ.get(
+            "DASHBOARD_CACHE_DIR",
+            os.path.join(tempfile.gettempdir(), "sga_dashboard_cache"),
+        ),
+    },
+    "shared": {**_TV_CACHES["shared"], "KEY_PREFIX": "dashboard"},
+}
+
+if TV_CACHE_BACKEND not in _TV_CACHES:
+    raise ImproperlyConfigured(
+        f"TV_CACHE_BACKEND inválido: {TV_CACHE_BACKEND!r} "
+        f"(use {', '.join(_TV_CACHES)})."
+    )
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "tv": _TV_CACHES[TV_CACHE_BACKEND],
+    "notificacoes": _NOTIFICACOES_CACHES[TV_CACHE_BACKEND],
+    "dashboard": _DASHBOARD_CACHES[TV_CACHE_BACKEND],
+    "presenca": _PRESENCA_CACHES[TV_CACHE_BACKEND],
+}
+
+# Validade (segundos) dos resultados do dashboard em cache
+# (administrador.cache_dashboard): curta para "Hoje"; nos períodos maiores o
+# resultado vale até um novo evento ser gravado
+DASHBOARD_CACHE_HOJE = int(os.environ.get("DASHBOARD_CACHE_HOJE", 30))
+DASHBOARD_CACHE_PERIODO = int(os.environ.get("DASHBOARD_CACHE_PERIODO", 900))
+
+# Arquivo de meses fechados (core.arquivo, comando arquivar_historico): meses
+# mantidos nas tabelas quentes (o atual e os anteriores) e linhas movidas por
+# transação
+ARQUIVO_MESES_ATIVOS = int(os.environ.get("ARQUIVO_MESES_ATIVOS", 2))
+ARQUIVO_LOTE = int(os.environ.get("ARQUIVO_LOTE", 5000))
+
+# Intervalo mínimo (segundos) entre gravações da presença de um usuário no
+# banco (core.presenca); os sinais intermediários ficam só no cache
+PRESENCA_GRAVACAO = int(os.environ.get("PRESENCA_GRAVACAO", 60))
+
+# Duração máxima (segundos) de cada conexão SSE das TVs antes de o navegador
+# reconectar
+TV_SSE_DURACAO = int(os.environ.get("TV_SSE_DURACAO", 300))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -184,3 +287,52 @@ TWILIO_AUTH_TOKEN = os.environ.get("TWILIO_AUTH_TOKEN")  # <<-- Use o NOME DA VA
 TWILIO_WHATSAPP_NUMBER = os.environ.get(
     "TWILIO_WHATSAPP_NUMBER"
 )  # <<-- Use o NOME DA VARIAVEL
+# Endereço alternativo da API (ex.: servidor falso local para testes)
+TWILIO_API_URL = os.environ.get("TWILIO_API_URL")
+# Timeouts (segundos) e conexões keep-alive do cliente Twilio (core.utils)
+TWILIO_TIMEOUT_CONEXAO = float(os.environ.get("TWILIO_TIMEOUT_CONEXAO", 3.05))
+TWILIO_TIMEOUT_LEITURA = float(os.environ.get("TWILIO_TIMEOUT_LEITURA", 10))
+TWILIO_POOL_CONEXOES = int(os.environ.get("TWILIO_POOL_CONEXOES", 10))
+# URL pública do status callback (core.views.status_entrega_twilio), ex.:
+# https://sga.exemplo.org/notificacoes/status-twilio/. Sem ela o Twilio não
+# informa a entrega das mensagens
+TWILIO_STATUS_CALLBACK_URL = os.environ.get("TWILIO_STATUS_CALLBACK_URL")
+# Aceita status callbacks sem X-Twilio-Signature (apenas desenvolvimento local,
+# nunca em produção). Use 1 para ativar
+TWILIO_CALLBACK_SEM_ASSINATURA = os.environ.get("TWILIO_CALLBACK_SEM_ASSINATURA") == "1"
+# Provedor das mensagens (core.provedores): twilio, http-fake (servidor falso
+# local do comando servidor_twilio_falso), console ou file
+NOTIFICACOES_BACKEND = os.environ.get("NOTIFICACOES_BACKEND", "twilio")
+# Arquivo do provedor "file" (uma linha JSON por mensagem)
+NOTIFICACOES_ARQUIVO = os.environ.get(
+    "NOTIFICACOES_ARQUIVO",
+    os.path.join(tempfile.gettempdir(), "sga_notificacoes.jsonl"),
+)
+
+# Caixa de saída de notificações (core.notificacoes)
+# Envios simultâneos de cada worker processar_notificacoes
+NOTIFICACOES_WORKERS = int(os.environ.get("NOTIFICACOES_WORKERS", 8))
+# Notificações reservadas por lote
+NOTIFICACOES_LOTE = int(os.environ.get("NOTIFICACOES_LOTE", 50))
+# Balde de fichas por canal (core.despacho), por worker: mensagens por segundo
+# e rajada máxima
+NOTIFICACOES_TAXA_SMS = float(os.environ.get("NOTIFICACOES_TAXA_SMS", 1))
+NOTIFICACOES_RAJADA_SMS = int(os.environ.get("NOTIFICACOES_RAJADA_SMS", 5))
+NOTIFICACOES_TAXA_WHATSAPP = float(os.environ.get("NOTIFICACOES_TAXA_WHATSAPP", 10))
+NOTIFICACOES_RAJADA_WHATSAPP = int(os.environ.get("NOTIFICACOES_RAJADA_WHATSAPP", 20))
+# Repetição de erros transitórios: tentativas e backoff exponencial (segundos)
+NOTIFICACOES_MAX_TENTATIVAS = int(os.environ.get("NOTIFICACOES_MAX_TENTATIVAS", 5))
+NOTIFICACOES_BACKOFF_BASE = float(os.environ.get("NOTIFICACOES_BACKOFF_BASE", 2))
+NOTIFICACOES_BACKOFF_MAX = float(os.environ.get("NOTIFICACOES_BACKOFF_MAX", 300))
+# Mensagem idêntica para o mesmo número dentro da janela (segundos) é ignorada
+NOTIFICACOES_JANELA_DEDUPE = int(os.environ.get("NOTIFICACOES_JANELA_DEDUPE", 120))
+# Disjuntor por canal (core.disjuntor): falhas transitórias seguidas ou
+# respostas mais lentas que DISJUNTOR_LATENCIA (segundos) que suspendem o canal
+# por DISJUNTOR_ESPERA segundos antes da sonda; 0 falhas desliga
+DISJUNTOR_FALHAS = int(os.environ.get("DISJUNTOR_FALHAS", 5))
+DISJUNTOR_LATENCIA = float(os.environ.get("DISJUNTOR_LATENCIA", 5))
+DISJUNTOR_ESPERA = float(os.environ.get("DISJUNTOR_ESPERA", 30))
+# Status de entrega (core.entregas): atualizações gravadas por lote e intervalo
+# (segundos) entre as gravações; 0 grava a cada callback
+STATUS_ENTREGA_LOTE = int(os.environ.get("STATUS_ENTREGA_LOTE", 200))
+STATUS_ENTREGA_INTERVALO = float(os.environ.get("STATUS_ENTREGA_INTERVALO", 0.5))
@@ -41,6 +41,30 @@ else:
 
 # print("USANDO BANCO:", DATABASES["default"]["ENGINE"])
 
+TV_CACHE_BACKEND = "locmem"
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "tv": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "tv",
+    },
+    "notificacoes": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "notificacoes",
+    },
+    "dashboard": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "dashboard",
+    },
+    "presenca": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "presenca",
+    },
+}
+
+TV_SSE_DURACAO = 2
+STATUS_ENTREGA_INTERVALO = 0
+
 PASSWORD_HASHERS = [
     "django.contrib.auth.hashers.MD5PasswordHasher",
 ]
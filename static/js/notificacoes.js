@@ -0,0 +1,77 @@
+// static/js/notificacoes.js
+// Acompanha o envio das notificações (SMS/WhatsApp) disparadas pelos painéis.
+// O envio é feito fora da requisição (processar_notificacoes); as URLs de
+// status ficam no sessionStorage para sobreviver ao recarregamento da página.
+(function() {
+    const CHAVE = 'notificacoesPendentes';
+    const INTERVALO_CONSULTA = 2000; // 2 segundos
+    const MAX_CONSULTAS = 30;
+
+    function pendentes() {
+        try {
+            return JSON.parse(sessionStorage.getItem(CHAVE)) || [];
+        } catch (e) {
+            return [];
+        }
+    }
+
+    function salvar(urls) {
+        sessionStorage.setItem(CHAVE, JSON.stringify(urls));
+    }
+
+    function remover(url) {
+        salvar(pendentes().filter(function(u) { return u !== url; }));
+    }
+
+    function exibir(dados) {
+        const alvo = document.getElementById('status-notificacao');
+        if (!alvo) return;
+        const enviada = dados.status === 'enviada' || dados.status === 'ignorada';
+        let texto = 'Mensagem enviada ao paciente.';
+        if (dados.status === 'ignorada') {
+            texto = 'Mensagem já enviada ao paciente há pouco; não foi repetida.';
+        } else if (!enviada) {
+            texto = 'Falha ao enviar a mensagem ao paciente.';
+        }
+        if (!enviada && dados.resultado && dados.resultado.error) {
+            texto += ' ' + dados.resultado.error;
+        }
+        alvo.textContent = texto;
+        alvo.className = 'mb-4 rounded-md px-4 py-2 text-sm ' +
+            (enviada ? 'bg-green-100 text-green-800' : 'bg-red-100 text-red-800');
+        alvo.hidden = false;
+    }
+
+    function consultar(url, consulta) {
+        fetch(url, { credentials: 'same-origin' })
+            .then(function(response) { return response.json(); })
+            .then(function(dados) {
+                if (dados.status === 'pendente' || dados.status === 'enviando') {
+                    if (consulta < MAX_CONSULTAS) {
+                        setTimeout(function() { consultar(url, consulta + 1); }, INTERVALO_CONSULTA);
+                    } else {
+                        remover(url);
+                    }
+                    return;
+                }
+                remover(url);
+                exibir(dados);
+            })
+            .catch(function(error) {
+                console.log('Erro ao consultar notificação:', error);
+                remover(url);
+            });
+    }
+
+    // Chamado pelos painéis com o campo "notificacao" da resposta da ação
+    window.acompanharNotificacao = function(notificacao) {
+        if (!notificacao || !notificacao.status_url) return;
+        const urls = pendentes();
+        urls.push(notificacao.status_url);
+        salvar(urls);
+    };
+
+    document.addEventListener('DOMContentLoaded', function() {
+        pendentes().forEach(function(url) { consultar(url, 0); });
+    });
+})();
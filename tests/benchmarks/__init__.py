@@ -0,0 +1,11 @@
+"""
+Benchmarks de desempenho do SGA.
+
+Não fazem parte da suíte padrão (os arquivos não seguem o padrão ``test*.py``)
+e devem ser executados explicitamente, por exemplo:
+
+    python manage.py test tests.benchmarks.bench_senhas --settings=sga.tests.settings_test
+
+Com as variáveis POSTGRES_* definidas o benchmark roda contra PostgreSQL,
+que é o cenário de produção; sem elas, usa SQLite.
+"""
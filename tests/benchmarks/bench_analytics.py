@@ -0,0 +1,68 @@
+import datetime
+import random
+import time
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from core import analytics
+
+# Um ano de atendimentos: 300 pacientes por dia útil
+DURACOES = 250 * 300
+REPETICOES = 20
+
+
+class AnalyticsBenchmark(SimpleTestCase):
+    """
+    Distribuições de um ano de tempos (DURACOES durações em minutos, como
+    devolvidas pelo banco com analytics.Minutos): conversão para vetor,
+    remoção de outliers, percentis e histograma. Compara com o laço em
+    Python que o dashboard usava sobre as durações em timedelta.
+    """
+
+    def setUp(self):
+        aleatorio = random.Random(1)
+        self.minutos = [aleatorio.lognormvariate(2.5, 0.6) for _ in range(DURACOES)]
+        # Alguns pacientes chamados só no dia seguinte
+        for i in range(0, DURACOES, 1000):
+            self.minutos[i] = 20 * 60.0
+        self.duracoes = [datetime.timedelta(minutes=m) for m in self.minutos]
+
+    def _medir(self, funcao):
+        inicio = time.perf_counter()
+        for _ in range(REPETICOES):
+            resultado = funcao()
+        return resultado, (time.perf_counter() - inicio) / REPETICOES * 1000
+
+    def test_um_ano(self):
+        print(f"\033[95m⏱  Benchmark: distribuições de {DURACOES} durações\033[0m")
+
+        def laco():
+            tempos = []
+            for duracao in self.duracoes:
+                minutos = duracao.total_seconds() / 60
+                if 0 < minutos < 480:
+                    tempos.append(minutos)
+            return round(sum(tempos) / len(tempos), 1)
+
+        def vetorizado():
+            return analytics.distribuicao(analytics.vetor(self.minutos))
+
+        valores = analytics.vetor(self.minutos)
+        media_laco, duracao_laco = self._medir(laco)
+        _, duracao_conversao = self._medir(lambda: analytics.vetor(self.minutos))
+        _, duracao_calculo = self._medir(lambda: analytics.distribuicao(valores))
+        dados, duracao_total = self._medir(vetorizado)
+
+        print(f"   laço em Python (só a média): {duracao_laco:.1f} ms")
+        print(
+            f"   NumPy: {duracao_total:.1f} ms (conversão {duracao_conversao:.1f} ms, "
+            f"percentis e histograma {duracao_calculo:.1f} ms)"
+        )
+        print(
+            f"   média {dados['media']} (laço: {media_laco}), p50 {dados['p50']}, "
+            f"p95 {dados['p95']}, p99 {dados['p99']}, {dados['aparados']} descartadas"
+        )
+        self.assertEqual(dados["aparados"], len(range(0, DURACOES, 1000)))
+        self.assertTrue(np.isclose(dados["media"], media_laco, atol=0.5))
+        self.assertLess(duracao_total, 50)
@@ -0,0 +1,80 @@
+import threading
+import time
+from collections import Counter
+
+from django.db import OperationalError, connection, connections
+from django.test import TransactionTestCase
+
+from core.models import Guiche, Paciente
+from guiche.fila import obter_fila, reservar_proximo
+
+TOTAL_PACIENTES = 600
+GUICHES = 6
+PROPORCOES = {"G": 2, "E": 1}
+
+
+class ChamarProximoBenchmark(TransactionTestCase):
+    """
+    GUICHES guichês chamam a próxima senha em paralelo até esvaziar a fila e
+    verificam que nenhum paciente é chamado por dois guichês.
+    """
+
+    def _atender(self, guiche, chamados, erros):
+        try:
+            while True:
+                try:
+                    paciente = reservar_proximo(guiche, PROPORCOES, "all")
+                except OperationalError:
+                    # SQLite serializa escritores; a reserva é atômica, então
+                    # repetir é seguro.
+                    time.sleep(0.001)
+                    continue
+                if paciente is None:
+                    return
+                chamados.append(paciente.pk)
+                while True:
+                    try:
+                        paciente.atendido = True
+                        paciente.save()
+                        break
+                    except OperationalError:
+                        time.sleep(0.001)
+        except Exception as exc:  # pragma: no cover - reportado no assert
+            erros.append(exc)
+        finally:
+            connections.close_all()
+
+    def test_guiches_concorrentes(self):
+        for i in range(TOTAL_PACIENTES):
+            Paciente.objects.create(
+                nome_completo=f"Paciente {i}", tipo_senha="GE"[i % 2]
+            )
+        obter_fila(PROPORCOES, "all")
+        guiches = [Guiche.objects.create(numero=n) for n in range(1, GUICHES + 1)]
+        print(
+            f"\033[95m⏱  Benchmark: {TOTAL_PACIENTES} senhas, {GUICHES} guichês, "
+            f"banco {connection.vendor}\033[0m"
+        )
+
+        chamados: list = []
+        erros: list = []
+        workers = [
+            threading.Thread(target=self._atender, args=(g, chamados, erros))
+            for g in guiches
+        ]
+        inicio = time.perf_counter()
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        duracao = time.perf_counter() - inicio
+
+        self.assertEqual(erros, [])
+        repetidos = [pk for pk, n in Counter(chamados).items() if n > 1]
+        print(
+            f"   Chamadas: {len(chamados)} em {duracao:.2f}s "
+            f"({len(chamados) / duracao:.0f}/s)"
+        )
+        print(f"   Pacientes chamados duas vezes: {len(repetidos)}")
+        self.assertEqual(repetidos, [])
+        self.assertEqual(len(chamados), TOTAL_PACIENTES)
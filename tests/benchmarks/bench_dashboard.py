@@ -0,0 +1,108 @@
+import time
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from administrador.dashboard import Periodo, profissionais
+from core.models import (
+    CustomUser,
+    Guiche,
+    ResumoGuicheHora,
+    ResumoProfissionalHora,
+)
+from core.resumos import truncar_hora
+
+FUNCIONARIOS = 200
+DIAS = 30
+REPETICOES = 20
+
+
+class ProfissionaisDashboardBenchmark(TestCase):
+    """
+    Bloco "por profissional" do dashboard com FUNCIONARIOS funcionários
+    (metade profissionais de saúde, metade guichistas), um terço deles sem
+    nenhuma confirmação no período. Verifica que o número de consultas é o
+    mesmo com 10 e com FUNCIONARIOS funcionários e mede o tempo do cálculo.
+    """
+
+    def _criar(self, quantidade, inicio=0):
+        agora = truncar_hora(timezone.now())
+        resumos_guiches = []
+        resumos_profissionais = []
+        for i in range(inicio, inicio + quantidade):
+            funcao = "profissional_saude" if i % 2 else "guiche"
+            usuario = CustomUser.objects.create_user(
+                cpf=f"{i:011d}",
+                username=f"{i:011d}",
+                first_name=f"F{i}",
+                funcao=funcao,
+            )
+            if funcao == "guiche":
+                guiche = Guiche.objects.create(numero=i, funcionario=usuario)
+            if i % 3 == 0:
+                continue
+            for dia in range(DIAS):
+                hora = agora - timezone.timedelta(days=dia)
+                if funcao == "guiche":
+                    resumos_guiches.append(
+                        ResumoGuicheHora(
+                            hora=hora,
+                            tipo_senha="G",
+                            guiche=guiche,
+                            acao="confirmado",
+                            total=i % 7 + 1,
+                        )
+                    )
+                else:
+                    resumos_profissionais.append(
+                        ResumoProfissionalHora(
+                            hora=hora,
+                            tipo_senha="G",
+                            profissional_saude=usuario,
+                            acao="confirmado",
+                            total=i % 7 + 1,
+                        )
+                    )
+        ResumoGuicheHora.objects.bulk_create(resumos_guiches)
+        ResumoProfissionalHora.objects.bulk_create(resumos_profissionais)
+
+    def _medir(self, periodo, filtro):
+        with CaptureQueriesContext(connection) as consultas:
+            dados = profissionais(periodo, filtro)
+        inicio = time.perf_counter()
+        for _ in range(REPETICOES):
+            profissionais(periodo, filtro)
+        duracao = (time.perf_counter() - inicio) / REPETICOES * 1000
+        return dados, len(consultas), duracao
+
+    def test_consultas_fixas(self):
+        periodo = Periodo(DIAS, timezone.localdate())
+        print(
+            f"\033[95m⏱  Benchmark: bloco por profissional, {FUNCIONARIOS} "
+            f"funcionários, {DIAS} dias de resumos, banco {connection.vendor}\033[0m"
+        )
+
+        self._criar(10)
+        poucos = {
+            filtro: self._medir(periodo, filtro)
+            for filtro in ("profissional_saude", "guiche")
+        }
+        self._criar(FUNCIONARIOS - 10, inicio=10)
+        muitos = {
+            filtro: self._medir(periodo, filtro)
+            for filtro in ("profissional_saude", "guiche")
+        }
+
+        for filtro, (dados, consultas, duracao) in muitos.items():
+            print(
+                f"   {filtro}: {len(dados['labels'])} funcionários, "
+                f"{consultas} consulta(s) (com 10: {poucos[filtro][1]}), "
+                f"{duracao:.1f} ms"
+            )
+            self.assertEqual(len(dados["labels"]), FUNCIONARIOS // 2)
+            self.assertIn(0, dados["data"])
+            self.assertEqual(dados["data"], sorted(dados["data"], reverse=True))
+            self.assertEqual(consultas, poucos[filtro][1])
+            self.assertEqual(consultas, 1)
@@ -0,0 +1,112 @@
+import random
+import time
+from itertools import cycle
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.models import Paciente
+from guiche.escalonador import intercalar
+from guiche.fila import obter_fila, pacientes_da_fila
+
+TOTAL_SENHAS = 10_000
+
+
+def _intercalar_ciclo(itens, tipo_de, pesos):
+    """Algoritmo anterior (cycle sobre [tipo] * qtd), só para comparação."""
+    grupos = {}
+    for item in itens:
+        grupos.setdefault(tipo_de(item), []).append(item)
+    ordem = [t for t, qtd in pesos.items() for _ in range(qtd)]
+    resultado = []
+    for tipo in cycle(ordem):
+        if not any(grupos.values()):
+            break
+        if grupos.get(tipo):
+            resultado.append(grupos[tipo].pop(0))
+    return resultado
+
+
+class EscalonadorBenchmark(SimpleTestCase):
+    """Intercalação em memória de TOTAL_SENHAS senhas para pesos variados."""
+
+    def _itens(self, tipos):
+        rnd = random.Random(0)
+        return [(rnd.choice(tipos), i) for i in range(TOTAL_SENHAS)]
+
+    def _medir(self, funcao, itens, pesos):
+        inicio = time.perf_counter()
+        funcao(itens, lambda item: item[0], pesos)
+        return (time.perf_counter() - inicio) * 1000
+
+    def test_intercalacao(self):
+        print(f"\033[95m⏱  Benchmark: intercalação de {TOTAL_SENHAS} senhas\033[0m")
+        cenarios = [
+            ("1:1", {"G": 1, "E": 1}, True),
+            ("5:2:1", {"E": 5, "P": 2, "G": 1}, True),
+            ("1000:1", {"E": 1000, "G": 1}, False),
+            ("1000000:1", {"E": 1_000_000, "G": 1}, False),
+            ("2:0", {"G": 2, "E": 0}, False),
+            ("0:0", {"G": 0, "E": 0}, False),
+        ]
+        tempos = []
+        for nome, pesos, comparar in cenarios:
+            itens = self._itens(list(pesos))
+            novo = self._medir(intercalar, itens, pesos)
+            tempos.append(novo)
+            linha = f"   {nome:>10}: {novo:8.2f} ms"
+            if comparar:
+                antigo = self._medir(_intercalar_ciclo, itens, pesos)
+                linha += f" (cycle anterior: {antigo:8.2f} ms)"
+            print(linha)
+        # O custo não depende da magnitude dos pesos
+        self.assertLess(max(tempos), min(tempos) * 5 + 50)
+
+
+class FilaPersistidaBenchmark(TestCase):
+    """Montagem e leitura da fila persistida com TOTAL_SENHAS pacientes."""
+
+    def test_fila_com_10k_senhas(self):
+        agora = timezone.now()
+        rnd = random.Random(0)
+        pacientes = [
+            Paciente(
+                nome_completo=f"Benchmark {i}",
+                tipo_senha=rnd.choice("GEP"),
+                senha=f"B{i:05d}",
+                horario_geracao_senha=agora,
+            )
+            for i in range(TOTAL_SENHAS)
+        ]
+        # bulk_create não dispara os signals de pre_save
+        for paciente in pacientes:
+            paciente.atualizar_dia_e_periodo()
+        Paciente.objects.bulk_create(pacientes)
+        print(
+            f"\033[95m⏱  Benchmark: fila persistida com {TOTAL_SENHAS} senhas, "
+            f"banco {connection.vendor}\033[0m"
+        )
+        proporcoes = {"E": 5, "P": 2, "G": 1}
+
+        inicio = time.perf_counter()
+        fila = obter_fila(proporcoes, "all")
+        print(f"   Montagem inicial: {(time.perf_counter() - inicio) * 1000:.1f} ms")
+        self.assertEqual(fila.itens.count(), TOTAL_SENHAS)
+
+        inicio = time.perf_counter()
+        with CaptureQueriesContext(connection) as consultas:
+            pacientes = pacientes_da_fila(fila)
+        print(
+            f"   Leitura do painel: {(time.perf_counter() - inicio) * 1000:.1f} ms, "
+            f"{len(consultas)} consulta(s)"
+        )
+        self.assertEqual(len(pacientes), 50)
+
+        inicio = time.perf_counter()
+        Paciente.objects.create(nome_completo="Novo", tipo_senha="G")
+        print(
+            f"   Inserção incremental: {(time.perf_counter() - inicio) * 1000:.1f} ms"
+        )
+        self.assertEqual(fila.itens.count(), TOTAL_SENHAS + 1)
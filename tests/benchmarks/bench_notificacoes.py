@@ -0,0 +1,73 @@
+import time
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from core.despacho import despachante
+from core.models import Notificacao
+from core.notificacoes import drenar, enfileirar
+from core.provedores import gateway_twilio_falso
+from core.twilio_falso import ServidorTwilioFalso
+
+NOTIFICACOES = 500
+LATENCIA = 0.02
+VARIACAO_LATENCIA = 0.03
+TAXA_ERROS = 0.02
+
+
+@override_settings(
+    NOTIFICACOES_BACKEND="http-fake",
+    NOTIFICACOES_TAXA_SMS=0,
+    NOTIFICACOES_TAXA_WHATSAPP=0,
+    NOTIFICACOES_BACKOFF_BASE=0,
+    DISJUNTOR_FALHAS=0,
+)
+class VazaoNotificacoesBenchmark(TestCase):
+    """
+    Teste de carga ponta a ponta, sem rede: NOTIFICACOES notificações na caixa
+    de saída drenadas pelo worker com o provedor http-fake contra o servidor
+    falso local (latência e erros 503 sorteados). Compara 1 e 8 envios
+    simultâneos.
+    """
+
+    def _drenar(self, workers):
+        Notificacao.objects.all().delete()
+        for i in range(NOTIFICACOES):
+            enfileirar(f"+55119{i:08d}", "Dirija-se ao Guichê 1")
+        despachante.reiniciar()
+        inicio = time.perf_counter()
+        # Os 503 voltam à fila sem backoff e são repetidos até entregar
+        while Notificacao.objects.filter(status="pendente").exists():
+            drenar(workers=workers)
+        return time.perf_counter() - inicio
+
+    def test_vazao(self):
+        caches["notificacoes"].clear()
+        with ServidorTwilioFalso(
+            latencia=LATENCIA,
+            variacao_latencia=VARIACAO_LATENCIA,
+            taxa_erros=TAXA_ERROS,
+            semente=1,
+        ) as servidor, override_settings(TWILIO_API_URL=servidor.url):
+            print(
+                f"\033[95m⏱  Benchmark: {NOTIFICACOES} notificações, latência "
+                f"{LATENCIA * 1000:.0f}-{(LATENCIA + VARIACAO_LATENCIA) * 1000:.0f} ms, "
+                f"{TAXA_ERROS:.0%} de erros 503\033[0m"
+            )
+            duracoes = {workers: self._drenar(workers) for workers in (1, 8)}
+            gateway_twilio_falso.fechar()
+
+        for workers, duracao in duracoes.items():
+            print(
+                f"   {workers} envio(s) simultâneo(s): {duracao:.2f} s, "
+                f"{NOTIFICACOES / duracao:.0f} notificações/s"
+            )
+        print(
+            f"   Servidor: {len(servidor.mensagens)} mensagens, "
+            f"{servidor.erros} erros simulados, {servidor.conexoes} conexões"
+        )
+
+        self.assertEqual(
+            Notificacao.objects.filter(status="enviada").count(), NOTIFICACOES
+        )
+        self.assertLess(duracoes[8], duracoes[1])
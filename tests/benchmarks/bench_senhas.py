@@ -0,0 +1,89 @@
+import statistics
+import threading
+import time
+from collections import Counter
+
+from django.db import OperationalError, connection, connections
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from core.models import Paciente
+
+TOTAL_SENHAS = 3000
+THREADS = 8
+TAMANHO_LOTE = 500
+
+
+class ConcorrenciaSenhasBenchmark(TransactionTestCase):
+    """
+    Emite TOTAL_SENHAS senhas do mesmo tipo a partir de THREADS recepções
+    simultâneas e verifica que não há duplicatas e que a latência por senha
+    não cresce à medida que o dia acumula senhas.
+    """
+
+    def _emitir(self, quantidade, latencias, senhas, erros):
+        try:
+            for _ in range(quantidade):
+                inicio = time.perf_counter()
+                while True:
+                    try:
+                        paciente = Paciente.objects.create(
+                            nome_completo="Benchmark", tipo_senha="G"
+                        )
+                        break
+                    except OperationalError:
+                        # SQLite serializa escritores; o upsert é atômico,
+                        # então repetir é seguro.
+                        time.sleep(0.001)
+                latencias.append((time.perf_counter() - inicio) * 1000)
+                senhas.append(paciente.senha)
+        except Exception as exc:  # pragma: no cover - reportado no assert
+            erros.append(exc)
+        finally:
+            connections.close_all()
+
+    def test_emissao_concorrente(self):
+        threads = THREADS
+        print(
+            f"\033[95m⏱  Benchmark: {TOTAL_SENHAS} senhas, {threads} thread(s), "
+            f"banco {connection.vendor}\033[0m"
+        )
+        latencias: list = []
+        senhas: list = []
+        erros: list = []
+        por_thread = TOTAL_SENHAS // threads
+        workers = [
+            threading.Thread(
+                target=self._emitir, args=(por_thread, latencias, senhas, erros)
+            )
+            for _ in range(threads)
+        ]
+        inicio = time.perf_counter()
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        duracao = time.perf_counter() - inicio
+
+        self.assertEqual(erros, [])
+        duplicadas = [s for s, n in Counter(senhas).items() if n > 1]
+        print(f"   Senhas emitidas: {len(senhas)} em {duracao:.2f}s")
+        print(f"   Duplicadas: {len(duplicadas)}")
+        self.assertEqual(duplicadas, [])
+        self.assertEqual(
+            Paciente.objects.filter(dia_senha=timezone.localdate()).count(),
+            len(senhas),
+        )
+
+        medianas = []
+        for i in range(0, len(latencias), TAMANHO_LOTE):
+            lote = latencias[i : i + TAMANHO_LOTE]
+            medianas.append(statistics.median(lote))
+            print(
+                f"   Senhas {i + 1:>5}-{i + len(lote):>5}: "
+                f"mediana {medianas[-1]:.3f} ms, p95 "
+                f"{sorted(lote)[int(len(lote) * 0.95) - 1]:.3f} ms"
+            )
+        # Latência plana: o último lote não pode ser muito mais lento que o
+        # primeiro (a implementação antiga crescia linearmente com o dia).
+        self.assertLess(medianas[-1], medianas[0] * 3 + 1)
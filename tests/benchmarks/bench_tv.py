@@ -0,0 +1,105 @@
+import json
+import statistics
+import threading
+import time
+
+from django.core.cache import caches
+from django.db import connection, connections
+from django.test import RequestFactory, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Chamada, Guiche, Paciente
+from guiche.views import tv1_api_view, tv1_eventos_view, tv1_historico_api_view
+
+TVS = 30
+CHAMADAS = 10
+INTERVALO_CHAMADAS = 1.0
+INTERVALO_POLLING = 5.0
+
+
+class TvSseBenchmark(TransactionTestCase):
+    """
+    TVS TVs conectadas ao fluxo SSE da TV1 enquanto os guichês fazem CHAMADAS
+    chamadas. Mede a taxa de consultas ao banco e a latência entre a criação
+    da Chamada e a chegada do evento, comparando com o polling de 5 segundos.
+    """
+
+    def _tv(self, recebidos, consultas, erros):
+        contador = [0]
+
+        def contar(execute, sql, params, many, context):
+            contador[0] += 1
+            return execute(sql, params, many, context)
+
+        try:
+            request = RequestFactory().get("/guiche/tv1/eventos/")
+            with connection.execute_wrapper(contar):
+                response = tv1_eventos_view(request)
+                for evento in response.streaming_content:
+                    if evento.startswith(b"data: "):
+                        dados = json.loads(evento[len(b"data: ") :])
+                        recebidos.append((dados["chamada"]["id"], time.perf_counter()))
+                response.close()
+            consultas.append(contador[0])
+        except Exception as exc:  # pragma: no cover - reportado no assert
+            erros.append(exc)
+        finally:
+            connections.close_all()
+
+    def test_30_tvs(self):
+        caches["tv"].clear()
+        guiche = Guiche.objects.create(numero=1)
+        paciente = Paciente.objects.create(nome_completo="Benchmark", tipo_senha="G")
+        duracao = CHAMADAS * INTERVALO_CHAMADAS + 2
+        print(
+            f"\033[95m⏱  Benchmark: {TVS} TVs, {CHAMADAS} chamadas em "
+            f"{duracao:.0f}s, banco {connection.vendor}\033[0m"
+        )
+
+        recebidos: list = []
+        consultas: list = []
+        erros: list = []
+        criadas = {}
+        with override_settings(TV_SSE_DURACAO=duracao):
+            tvs = [
+                threading.Thread(target=self._tv, args=(recebidos, consultas, erros))
+                for _ in range(TVS)
+            ]
+            for tv in tvs:
+                tv.start()
+            time.sleep(1)
+            for _ in range(CHAMADAS):
+                chamada = Chamada.objects.create(
+                    paciente=paciente, guiche=guiche, acao="chamada"
+                )
+                criadas[chamada.id] = time.perf_counter()
+                time.sleep(INTERVALO_CHAMADAS)
+            for tv in tvs:
+                tv.join()
+
+        self.assertEqual(erros, [])
+        latencias = [
+            (chegada - criadas[cid]) * 1000
+            for cid, chegada in recebidos
+            if cid in criadas
+        ]
+        self.assertEqual(len(latencias), TVS * CHAMADAS)
+        consultas_min = sum(consultas) / duracao * 60
+        print(
+            f"   SSE: {consultas_min:.0f} consultas/min, latência mediana "
+            f"{statistics.median(latencias):.0f} ms, máxima {max(latencias):.0f} ms"
+        )
+
+        # Polling anterior: 2 requisições por TV a cada 5 segundos
+        request = RequestFactory().get("/")
+        with CaptureQueriesContext(connection) as por_ciclo:
+            tv1_api_view(request)
+            tv1_historico_api_view(request)
+        polling_min = TVS * len(por_ciclo) * 60 / INTERVALO_POLLING
+        print(
+            f"   Polling 5s: {polling_min:.0f} consultas/min, latência média "
+            f"{INTERVALO_POLLING / 2 * 1000:.0f} ms, máxima "
+            f"{INTERVALO_POLLING * 1000:.0f} ms"
+        )
+        self.assertLess(consultas_min, polling_min)
+        self.assertLess(max(latencias), INTERVALO_POLLING * 1000)
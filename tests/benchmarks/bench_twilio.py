@@ -0,0 +1,76 @@
+import statistics
+import time
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+from twilio.rest import Client
+
+from core.provedores import GatewayTwilio, _HttpClientGateway
+from core.twilio_falso import ServidorTwilioFalso
+from core.utils import enviar_whatsapp
+
+MENSAGENS = 200
+TWILIO_TESTE = {
+    "TWILIO_ACCOUNT_SID": "AC00000000000000000000000000000000",
+    "TWILIO_AUTH_TOKEN": "token",
+    "TWILIO_WHATSAPP_NUMBER": "+15550000000",
+}
+
+
+@override_settings(**TWILIO_TESTE)
+class GatewayTwilioBenchmark(SimpleTestCase):
+    """
+    MENSAGENS envios de WhatsApp contra o servidor falso local, comparando o
+    gateway (um cliente com conexões keep-alive) com o comportamento anterior
+    (um twilio.rest.Client novo por mensagem).
+    """
+
+    def _medir(self, enviar):
+        latencias = []
+        for i in range(MENSAGENS):
+            inicio = time.perf_counter()
+            enviar(f"+55119123{i:05d}")
+            latencias.append((time.perf_counter() - inicio) * 1000)
+        return latencias
+
+    def test_latencia_por_mensagem(self):
+        with ServidorTwilioFalso() as servidor, override_settings(
+            TWILIO_API_URL=servidor.url
+        ):
+            print(
+                f"\033[95m⏱  Benchmark: {MENSAGENS} mensagens por cliente, "
+                f"servidor falso em {servidor.url}\033[0m"
+            )
+
+            def cliente_por_mensagem(numero):
+                # Comportamento anterior: cliente e sessão HTTP novos a cada envio
+                http_client = _HttpClientGateway(servidor.url, 3.05, 10, 1)
+                cliente = Client("AC0", "token", http_client=http_client)
+                cliente.messages.create(
+                    from_="whatsapp:+15550000000", body="Teste", to=f"whatsapp:{numero}"
+                )
+                http_client.session.close()
+
+            antes = self._medir(cliente_por_mensagem)
+            conexoes_antes = servidor.conexoes
+
+            gateway = GatewayTwilio()
+            with patch("core.provedores.ProvedorTwilio.gateway", gateway):
+                depois = self._medir(lambda numero: enviar_whatsapp(numero, "Teste"))
+            gateway.fechar()
+            conexoes_depois = servidor.conexoes - conexoes_antes
+
+        self.assertEqual(len(servidor.mensagens), 2 * MENSAGENS)
+        for nome, latencias, conexoes in (
+            ("Client por mensagem", antes, conexoes_antes),
+            ("Gateway", depois, conexoes_depois),
+        ):
+            print(
+                f"   {nome}: mediana {statistics.median(latencias):.2f} ms, "
+                f"p95 {statistics.quantiles(latencias, n=20)[-1]:.2f} ms, "
+                f"{conexoes} conexões"
+            )
+
+        self.assertEqual(conexoes_antes, MENSAGENS)
+        self.assertEqual(conexoes_depois, 1)
+        self.assertLess(statistics.median(depois), statistics.median(antes))
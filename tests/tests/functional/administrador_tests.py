@@ -1,6 +1,20 @@
-from django.test import TestCase, Client
+import csv
+import datetime
+import gzip
+import io
+import os
+import tempfile
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
-from core.models import CustomUser
+from django.utils import timezone
+from administrador.dashboard import BLOCOS
+from core import jornadas
+from core.models import Chamada, ChamadaProfissional, CustomUser, Guiche, Paciente
 
 
 class AdministradorViewsTest(TestCase):
@@ -347,3 +361,371 @@ class AdministradorViewsTest(TestCase):
         resp = self.client.post(url, data)
         self.assertEqual(resp.status_code, 200)
         self.assertContains(resp, "Erro ao atualizar o funcionário")
+
+
+class DashboardConsultasTest(TestCase):
+    """Tempos do dashboard calculados com número fixo de consultas."""
+
+    def setUp(self):
+        self.admin = CustomUser.objects.create_user(
+            cpf="11122233344",
+            username="11122233344",
+            password="adminpass",
+            funcao="administrador",
+        )
+        guichista = CustomUser.objects.create_user(
+            cpf="22233344455", username="22233344455", funcao="guiche"
+        )
+        self.profissional = CustomUser.objects.create_user(
+            cpf="33344455566", username="33344455566", funcao="profissional_saude"
+        )
+        self.guiche = Guiche.objects.create(numero=1, funcionario=guichista)
+        self.client.force_login(self.admin)
+        self.inicio = timezone.now() - datetime.timedelta(hours=3)
+        self.pacientes = 0
+        caches["dashboard"].clear()
+
+    def _paciente(self):
+        """Espera 10 min, guichê 5 min (chamado duas vezes) e consulta 20 min."""
+        self.pacientes += 1
+        gerada = self.inicio + datetime.timedelta(minutes=self.pacientes)
+        paciente = Paciente.objects.create(
+            nome_completo=f"Paciente {self.pacientes}",
+            tipo_senha="G",
+            senha=f"G{self.pacientes:03d}",
+        )
+        Paciente.objects.filter(id=paciente.id).update(horario_geracao_senha=gerada)
+        for acao, minutos in (("chamada", 10), ("chamada", 12), ("confirmado", 15)):
+            chamada = Chamada.objects.create(
+                paciente=paciente, guiche=self.guiche, acao=acao
+            )
+            Chamada.objects.filter(id=chamada.id).update(
+                data_hora=gerada + datetime.timedelta(minutes=minutos)
+            )
+        for acao, minutos in (("chamada", 30), ("confirmado", 50)):
+            chamada = ChamadaProfissional.objects.create(
+                paciente=paciente, profissional_saude=self.profissional, acao=acao
+            )
+            ChamadaProfissional.objects.filter(id=chamada.id).update(
+                data_hora=gerada + datetime.timedelta(minutes=minutos)
+            )
+        # Horários alterados sem save(): refaz a jornada com a senha antiga
+        paciente.jornadas.all().delete()
+        jornadas.reconstruir(pacientes=[paciente.id])
+
+    def _tempos(self):
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(
+                reverse("administrador:dashboard_bloco", args=["tempos"])
+            )
+        self.assertEqual(response.status_code, 200)
+        return response.json()["dados"], len(consultas)
+
+    def test_tempos_medios(self):
+        for _ in range(3):
+            self._paciente()
+
+        tempos, _ = self._tempos()
+
+        self.assertEqual(tempos["tempo_medio_espera"], 10.0)
+        self.assertEqual(tempos["tempo_medio_guiche"], 5.0)
+        self.assertEqual(tempos["tempo_medio_consulta"], 20.0)
+        consulta = tempos["distribuicoes"]["consulta"]
+        self.assertEqual(consulta["n"], 3)
+        self.assertEqual(consulta["p50"], 20.0)
+        self.assertEqual(consulta["p99"], 20.0)
+        self.assertEqual(sum(consulta["histograma"]["contagens"]), 3)
+
+    def test_espera_fora_do_periodo_de_hoje(self):
+        """Testa que a espera de hoje só conta pacientes chamados hoje."""
+        self.inicio = timezone.now() - datetime.timedelta(days=3)
+        self._paciente()
+
+        tempos, _ = self._tempos()
+
+        self.assertEqual(tempos["distribuicoes"]["espera"]["n"], 1)
+        self.assertEqual(tempos["distribuicoes"]["espera_hoje"]["n"], 0)
+        self.assertEqual(tempos["tempo_medio_espera_hoje"], 0)
+
+    def test_consultas_nao_crescem_com_os_dados(self):
+        """Testa que o número de consultas não depende do número de chamadas."""
+        for _ in range(2):
+            self._paciente()
+        _, poucas = self._tempos()
+
+        for _ in range(20):
+            self._paciente()
+        _, muitas = self._tempos()
+
+        self.assertEqual(poucas, muitas)
+
+
+class DashboardCacheTest(TestCase):
+    """Testes para o cache dos blocos do dashboard."""
+
+    def setUp(self):
+        admin = CustomUser.objects.create_user(
+            cpf="11122233344",
+            username="11122233344",
+            password="adminpass",
+            funcao="administrador",
+        )
+        self.guiche = Guiche.objects.create(numero=1)
+        self.paciente = Paciente.objects.create(
+            nome_completo="Paciente", tipo_senha="G"
+        )
+        self.client.force_login(admin)
+        caches["dashboard"].clear()
+
+    def _bloco(self, bloco="visao-geral", **parametros):
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(
+                reverse("administrador:dashboard_bloco", args=[bloco]), parametros
+            )
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(consultas)
+
+    def test_acerto_ate_novo_evento(self):
+        primeira, consultas_calculo = self._bloco()
+        segunda, consultas_cache = self._bloco()
+
+        self.assertFalse(primeira["do_cache"])
+        self.assertTrue(segunda["do_cache"])
+        self.assertEqual(segunda["calculado_em"], primeira["calculado_em"])
+        self.assertEqual(segunda["dados"], primeira["dados"])
+        self.assertLess(consultas_cache, consultas_calculo)
+
+        Chamada.objects.create(
+            paciente=self.paciente, guiche=self.guiche, acao="chamada"
+        )
+        terceira, _ = self._bloco()
+        self.assertFalse(terceira["do_cache"])
+
+        response = self.client.get(reverse("administrador:status_cache_dashboard"))
+        self.assertEqual(
+            response.json(), {"acertos": 1, "falhas": 2, "taxa_acerto": 33.3}
+        )
+
+    def test_chave_por_bloco_periodo_e_filtro(self):
+        self._bloco("profissionais", period=7)
+        self.assertFalse(self._bloco("tempos", period=7)[0]["do_cache"])
+        self.assertFalse(self._bloco("profissionais", period=30)[0]["do_cache"])
+        self.assertFalse(
+            self._bloco("profissionais", period=7, prof_filter="guiche")[0]["do_cache"]
+        )
+        self.assertTrue(
+            self._bloco("profissionais", period=7, prof_filter="invalido")[0][
+                "do_cache"
+            ]
+        )
+        # Só o bloco por profissional depende do filtro
+        self.assertTrue(
+            self._bloco("tempos", period=7, prof_filter="guiche")[0]["do_cache"]
+        )
+
+    @override_settings(DASHBOARD_CACHE_HOJE=0)
+    def test_hoje_expira(self):
+        """Testa que "Hoje" expira mesmo sem eventos novos."""
+        self._bloco(period=1)
+        self.assertFalse(self._bloco(period=1)[0]["do_cache"])
+
+
+class DashboardBlocosTest(TestCase):
+    """Testes para a página do dashboard e os endpoints dos blocos."""
+
+    def setUp(self):
+        self.admin = CustomUser.objects.create_user(
+            cpf="11122233344",
+            username="11122233344",
+            password="adminpass",
+            funcao="administrador",
+        )
+        caches["dashboard"].clear()
+
+    def test_pagina_nao_calcula_blocos(self):
+        self.client.force_login(self.admin)
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(
+                reverse("administrador:dashboard"), {"prof_filter": "guiche"}
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(
+            any("core_chamada" in c["sql"] for c in consultas.captured_queries)
+        )
+        self.assertEqual(response.context["prof_filter"], "guiche")
+        self.assertContains(response, "blocos-dashboard")
+
+    def test_todos_os_blocos(self):
+        self.client.force_login(self.admin)
+        for bloco in BLOCOS:
+            for period in (1, 30):
+                response = self.client.get(
+                    reverse("administrador:dashboard_bloco", args=[bloco]),
+                    {"period": period},
+                )
+                self.assertEqual(response.status_code, 200, bloco)
+                self.assertEqual(response.json()["bloco"], bloco)
+
+    def test_profissionais_inclui_quem_nao_atendeu(self):
+        self.client.force_login(self.admin)
+        guichistas = [
+            CustomUser.objects.create_user(
+                cpf=f"2223334445{i}",
+                username=f"2223334445{i}",
+                first_name=nome,
+                funcao="guiche",
+            )
+            for i, nome in enumerate(("Bia", "Caio"))
+        ]
+        guiche = Guiche.objects.create(numero=1, funcionario=guichistas[1])
+        for _ in range(2):
+            paciente = Paciente.objects.create(nome_completo="P", tipo_senha="G")
+            Chamada.objects.create(paciente=paciente, guiche=guiche, acao="confirmado")
+
+        response = self.client.get(
+            reverse("administrador:dashboard_bloco", args=["profissionais"]),
+            {"prof_filter": "guiche"},
+        )
+
+        self.assertEqual(
+            response.json()["dados"], {"labels": ["Caio", "Bia"], "data": [2, 0]}
+        )
+
+    def test_bloco_desconhecido(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(
+            reverse("administrador:dashboard_bloco", args=["inexistente"])
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_bloco_exige_administrador(self):
+        response = self.client.get(
+            reverse("administrador:dashboard_bloco", args=["visao-geral"])
+        )
+        self.assertEqual(response.status_code, 302)
+
+
+class ExportacaoTest(TestCase):
+    """Testes para a exportação em CSV (view exportar e comando exportar_csv)."""
+
+    def setUp(self):
+        self.admin = CustomUser.objects.create_user(
+            cpf="11122233344",
+            username="11122233344",
+            password="adminpass",
+            funcao="administrador",
+        )
+        guichista = CustomUser.objects.create_user(
+            cpf="22233344455", username="22233344455", funcao="guiche"
+        )
+        guiche = Guiche.objects.create(numero=3, funcionario=guichista)
+        self.paciente = Paciente.objects.create(
+            nome_completo="Ana Souza",
+            tipo_senha="G",
+            senha="G001",
+            telefone_celular="(11) 91234-5678",
+        )
+        self.hoje = Chamada.objects.create(
+            paciente=self.paciente, guiche=guiche, acao="chamada"
+        )
+        antiga = Chamada.objects.create(
+            paciente=self.paciente, guiche=guiche, acao="confirmado"
+        )
+        Chamada.objects.filter(id=antiga.id).update(
+            data_hora=timezone.now() - datetime.timedelta(days=60)
+        )
+        self.client.force_login(self.admin)
+
+    def _linhas(self, conteudo: bytes):
+        return list(csv.reader(io.StringIO(conteudo.decode("utf-8-sig"))))
+
+    def test_exporta_chamadas_do_periodo(self):
+        response = self.client.get(reverse("administrador:exportar", args=["chamadas"]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        self.assertIn("attachment;", response["Content-Disposition"])
+        linhas = self._linhas(b"".join(response.streaming_content))
+        self.assertEqual(
+            linhas[0],
+            ["id", "data_hora", "acao", "paciente_id", "senha", "tipo_senha", "guiche"],
+        )
+        # Só a chamada dos últimos 30 dias
+        self.assertEqual(len(linhas), 2)
+        self.assertEqual(linhas[1][0], str(self.hoje.id))
+        self.assertEqual(linhas[1][4:], ["G001", "G", "3"])
+
+    def test_intervalo_de_datas(self):
+        inicio = timezone.localdate() - datetime.timedelta(days=90)
+        fim = timezone.localdate() - datetime.timedelta(days=1)
+        response = self.client.get(
+            reverse("administrador:exportar", args=["chamadas"]),
+            {"inicio": inicio.isoformat(), "fim": fim.isoformat()},
+        )
+        linhas = self._linhas(b"".join(response.streaming_content))
+        self.assertEqual([linha[2] for linha in linhas[1:]], ["confirmado"])
+
+    def test_gzip(self):
+        response = self.client.get(
+            reverse("administrador:exportar", args=["pacientes"]), {"gzip": "1"}
+        )
+
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertIn(".csv.gz", response["Content-Disposition"])
+        linhas = self._linhas(gzip.decompress(b"".join(response.streaming_content)))
+        self.assertEqual(len(linhas), 2)
+        self.assertEqual(linhas[1][2], "G001")
+        # Dados pessoais ficam de fora
+        self.assertNotIn("Ana Souza", linhas[1])
+        self.assertNotIn("(11) 91234-5678", linhas[1])
+
+    def test_cabecalho_sai_antes_da_consulta(self):
+        response = self.client.get(
+            reverse("administrador:exportar", args=["chamadas-profissionais"])
+        )
+        with CaptureQueriesContext(connection) as consultas:
+            primeiro = next(iter(response.streaming_content))
+        self.assertTrue(primeiro.decode("utf-8-sig").startswith("id,data_hora"))
+        self.assertEqual(len(consultas), 0)
+
+    def test_parametros_invalidos(self):
+        url = reverse("administrador:exportar", args=["chamadas"])
+        self.assertEqual(self.client.get(url, {"inicio": "ontem"}).status_code, 400)
+        self.assertEqual(
+            self.client.get(
+                url, {"inicio": "2026-02-01", "fim": "2026-01-01"}
+            ).status_code,
+            400,
+        )
+        self.assertEqual(
+            self.client.get(
+                reverse("administrador:exportar", args=["usuarios"])
+            ).status_code,
+            404,
+        )
+
+    def test_exige_administrador(self):
+        self.client.logout()
+        response = self.client.get(reverse("administrador:exportar", args=["chamadas"]))
+        self.assertEqual(response.status_code, 302)
+
+    def test_comando(self):
+        saida = io.StringIO()
+        call_command("exportar_csv", "chamadas", stdout=saida)
+        self.assertEqual(len(self._linhas(saida.getvalue().encode())), 2)
+
+        with tempfile.TemporaryDirectory() as pasta:
+            arquivo = os.path.join(pasta, "chamadas.csv.gz")
+            call_command(
+                "exportar_csv",
+                "chamadas",
+                "--inicio",
+                (timezone.localdate() - datetime.timedelta(days=90)).isoformat(),
+                "--gzip",
+                "--saida",
+                arquivo,
+                stderr=io.StringIO(),
+            )
+            with gzip.open(arquivo) as comprimido:
+                self.assertEqual(len(self._linhas(comprimido.read())), 3)
@@ -1,14 +1,16 @@
+from django.core.cache import caches
 from django.test import TestCase, Client
 from django.urls import reverse
 from django.utils import timezone
 from unittest.mock import patch, MagicMock
 import datetime
 
-from core.models import CustomUser, Paciente, Guiche, Chamada
+from core.models import CustomUser, Paciente, Guiche, Chamada, Notificacao
 
 
 class GuicheViewsTest(TestCase):
     def setUp(self):
+        caches["tv"].clear()
         self.client = Client()
 
         # Criar usuários de teste
@@ -164,17 +166,9 @@ class GuicheViewsTest(TestCase):
         # Verificar se o guichê foi salvo na sessão
         self.assertEqual(self.client.session.get("guiche_id"), self.guiche.id)
 
-    @patch("guiche.views.enviar_sms_ou_whatsapp")
+    @patch("core.utils.enviar_sms_ou_whatsapp")
     def test_chamar_senha(self, mock_enviar_sms_ou_whatsapp):
-        """Testa chamada de senha com envio de WhatsApp"""
-        # Configurar mock para retornar resposta válida
-        mock_enviar_sms_ou_whatsapp.return_value = {
-            "status": "success",
-            "sid": "SM123456789",
-            "to": "+5511999999999",
-            "message_status": "sent",
-        }
-
+        """Testa chamada de senha com a mensagem enfileirada na caixa de saída"""
         self.client.login(cpf="11122233344", password="guichepass")
 
         # Simular guichê na sessão
@@ -193,11 +187,19 @@ class GuicheViewsTest(TestCase):
         ).exists()
         self.assertTrue(chamada)
 
-        # Verificar se WhatsApp foi chamado (pode ser chamado 2 vezes devido à implementação)
-        self.assertGreaterEqual(mock_enviar_sms_ou_whatsapp.call_count, 1)
+        # A mensagem fica pendente para o worker; nada é enviado na requisição
+        mock_enviar_sms_ou_whatsapp.assert_not_called()
+        notificacao = Notificacao.objects.get(paciente=self.paciente1)
+        self.assertEqual(notificacao.status, "pendente")
+        self.assertEqual(notificacao.canal, "sms_ou_whatsapp")
+        self.assertIn("Guichê 1", notificacao.mensagem)
+        dados = response.json()["notificacao"]
+        self.assertEqual(dados["id"], notificacao.id)
+        self.assertEqual(
+            dados["status_url"], reverse("status_notificacao", args=[notificacao.id])
+        )
 
-    @patch("guiche.views.enviar_sms_ou_whatsapp")
-    def test_chamar_senha_sem_telefone(self, mock_enviar_sms_ou_whatsapp):
+    def test_chamar_senha_sem_telefone(self):
         """Testa chamada de senha sem telefone (não deve enviar WhatsApp)"""
         self.client.login(cpf="11122233344", password="guichepass")
 
@@ -212,8 +214,84 @@ class GuicheViewsTest(TestCase):
         )
         self.assertEqual(response.status_code, 200)
 
-        # Verificar se WhatsApp NÃO foi chamado
-        mock_enviar_sms_ou_whatsapp.assert_not_called()
+        # Verificar que nenhuma mensagem foi enfileirada
+        self.assertFalse(Notificacao.objects.exists())
+        self.assertNotIn("notificacao", response.json())
+
+    def test_chamar_proximo(self):
+        """Testa que guichês diferentes recebem senhas diferentes da fila"""
+        outro_user = CustomUser.objects.create_user(
+            cpf="33344455566",
+            username="33344455566",
+            password="guichepass",
+            funcao="guiche",
+        )
+        outro_guiche = Guiche.objects.create(numero=2, funcionario=outro_user)
+        outro_client = Client()
+        outro_client.force_login(outro_user)
+
+        self.client.login(cpf="11122233344", password="guichepass")
+        for client, guiche in (
+            (self.client, self.guiche),
+            (outro_client, outro_guiche),
+        ):
+            session = client.session
+            session["guiche_id"] = guiche.id
+            session["filtros_guiche"] = {
+                "tipos_selecionados": ["G", "E"],
+                "proporcoes": {"G": 1, "E": 1},
+            }
+            session.save()
+
+        response = self.client.post(reverse("guiche:chamar_proximo"))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["status"], "ok")
+        self.assertEqual(data["data"]["paciente_id"], self.paciente1.id)
+
+        response = outro_client.post(reverse("guiche:chamar_proximo"))
+        self.assertEqual(response.json()["data"]["paciente_id"], self.paciente2.id)
+
+        # Fila esgotada: os dois pacientes estão reservados
+        response = self.client.post(reverse("guiche:chamar_proximo"))
+        self.assertEqual(response.json()["status"], "empty")
+
+        self.guiche.refresh_from_db()
+        self.assertEqual(self.guiche.senha_atendida, self.paciente1)
+        self.assertTrue(
+            Chamada.objects.filter(
+                paciente=self.paciente2, guiche=outro_guiche, acao="chamada"
+            ).exists()
+        )
+
+    def test_periodo_guardado_na_sessao(self):
+        """Testa que painel e chamar_proximo usam o mesmo período da sessão"""
+        Paciente.objects.filter(pk=self.paciente1.pk).update(periodo="manha")
+        Paciente.objects.filter(pk=self.paciente2.pk).update(periodo="tarde")
+        self.client.login(cpf="11122233344", password="guichepass")
+        session = self.client.session
+        session["guiche_id"] = self.guiche.id
+        session["filtros_guiche"] = {
+            "tipos_selecionados": ["G", "E"],
+            "proporcoes": {"G": 1, "E": 1},
+        }
+        session.save()
+
+        self.client.get(reverse("guiche:painel_guiche"), {"period": "tarde"})
+
+        # Sem o parâmetro, o painel segue o período guardado
+        response = self.client.get(reverse("guiche:painel_guiche"))
+        self.assertEqual(response.context["selected_period"], "tarde")
+        self.assertEqual(list(response.context["senhas"]), [self.paciente2])
+
+        response = self.client.post(reverse("guiche:chamar_proximo"))
+        self.assertEqual(response.json()["data"]["paciente_id"], self.paciente2.id)
+
+    def test_chamar_proximo_apenas_post(self):
+        """Testa que chamar_proximo não aceita GET"""
+        self.client.login(cpf="11122233344", password="guichepass")
+        response = self.client.get(reverse("guiche:chamar_proximo"))
+        self.assertEqual(response.status_code, 405)
 
     def test_reanunciar_senha(self):
         """Testa reanúncio de senha"""
@@ -285,7 +363,7 @@ class GuicheViewsTest(TestCase):
 
         response = self.client.get(reverse("guiche:tv1"))
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.context["senha_chamada"], self.paciente1)
+        self.assertEqual(response.context["senha_chamada"], self.paciente1.senha)
         self.assertEqual(
             response.context["nome_completo"], self.paciente1.nome_completo
         )
@@ -367,14 +445,14 @@ class GuicheViewsTest(TestCase):
         self.assertEqual(response.status_code, 200)
 
         # Verificar se a fila foi organizada corretamente
-        # Com proporção 2:1, deve alternar: G, G, E, G, G, E, etc.
+        # Com proporção 2:1 intercalada de forma suave: G, E, G, G, E, etc.
         senhas = response.context["senhas"]
         self.assertEqual(len(senhas), 5)  # 3G + 2E = 5 pacientes
 
         # Verificar ordem: deve começar com G (mais frequente)
         self.assertEqual(senhas[0].tipo_senha, "G")
-        self.assertEqual(senhas[1].tipo_senha, "G")
-        self.assertEqual(senhas[2].tipo_senha, "E")
+        self.assertEqual(senhas[1].tipo_senha, "E")
+        self.assertEqual(senhas[2].tipo_senha, "G")
 
     def test_get_guiche_do_usuario_sem_guiche(self):
         """Testa erro quando usuário não tem guichê associado"""
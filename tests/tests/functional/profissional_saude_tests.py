@@ -3,11 +3,12 @@ from datetime import datetime, timedelta
 from unittest.mock import patch, MagicMock
 
 from django.contrib.auth import get_user_model
+from django.core.cache import caches
 from django.test import TestCase, Client
 from django.urls import reverse
 from django.utils import timezone
 
-from core.models import ChamadaProfissional, Paciente
+from core.models import ChamadaProfissional, Notificacao, Paciente
 
 
 class ProfissionalSaudeTests(TestCase):
@@ -17,6 +18,7 @@ class ProfissionalSaudeTests(TestCase):
 
     def setUp(self):
         """Configura dados de teste."""
+        caches["tv"].clear()
         self.client = Client()
 
         # Criar usuários de teste
@@ -115,11 +117,9 @@ class ProfissionalSaudeTests(TestCase):
         # Administrador deve ser redirecionado (não tem permissão)
         self.assertEqual(response.status_code, 302)
 
-    @patch("profissional_saude.views.enviar_whatsapp")
+    @patch("core.utils.enviar_whatsapp")
     def test_realizar_acao_chamar_success(self, mock_whatsapp):
         """Testa ação 'chamar' com sucesso."""
-        mock_whatsapp.return_value = True
-
         self.client.login(cpf="12345678901", password="testpass123")
 
         # Verificar estado inicial
@@ -144,15 +144,19 @@ class ProfissionalSaudeTests(TestCase):
         self.assertEqual(chamada.profissional_saude, self.profissional1)
         self.assertEqual(chamada.acao, "chamada")
 
-        # Verificar que WhatsApp foi chamado
-        mock_whatsapp.assert_called_once()
-        args = mock_whatsapp.call_args[0]
-        self.assertEqual(args[0], "+5511999999999")  # telefone_e164 format
-        self.assertIn("Dr(a). João", args[1])
-        self.assertIn("Sala 101", args[1])
+        # Verificar que o WhatsApp foi enfileirado, e não enviado na requisição
+        mock_whatsapp.assert_not_called()
+        notificacao = Notificacao.objects.get(paciente=self.paciente1)
+        self.assertEqual(notificacao.canal, "whatsapp")
+        self.assertEqual(notificacao.status, "pendente")
+        self.assertEqual(
+            notificacao.numero_destino, "+5511999999999"
+        )  # telefone_e164 format
+        self.assertIn("Dr(a). João", notificacao.mensagem)
+        self.assertIn("Sala 101", notificacao.mensagem)
+        self.assertEqual(data["notificacao"]["id"], notificacao.id)
 
-    @patch("profissional_saude.views.enviar_whatsapp")
-    def test_realizar_acao_chamar_without_phone(self, mock_whatsapp):
+    def test_realizar_acao_chamar_without_phone(self):
         """Testa ação 'chamar' sem telefone do paciente."""
         # Criar paciente sem telefone
         paciente_sem_telefone = Paciente.objects.create(
@@ -181,8 +185,8 @@ class ProfissionalSaudeTests(TestCase):
         mock_warning.assert_called_once()
         self.assertIn("Telefone inválido ou ausente", mock_warning.call_args[0][0])
 
-        # WhatsApp não deve ser chamado
-        mock_whatsapp.assert_not_called()
+        # Nenhum WhatsApp deve ser enfileirado
+        self.assertFalse(Notificacao.objects.exists())
 
     def test_realizar_acao_reanunciar_success(self):
         """Testa ação 'reanunciar' com sucesso."""
@@ -255,6 +259,16 @@ class ProfissionalSaudeTests(TestCase):
         self.assertEqual(self.paciente1.profissional_saude, self.profissional2)
         self.assertTrue(self.paciente1.atendido)  # Deve permanecer atendido
 
+        # Encaminhamento registrado pelo profissional que encaminhou
+        self.assertTrue(
+            ChamadaProfissional.objects.filter(
+                paciente=self.paciente1,
+                profissional_saude__cpf="12345678901",
+                acao="encaminha",
+            ).exists()
+        )
+        self.assertEqual(self.paciente1.jornadas.get().encaminhamentos, 1)
+
     def test_realizar_acao_encaminhar_without_profissional(self):
         """Testa ação 'encaminhar' sem selecionar profissional."""
         self.client.login(cpf="12345678901", password="testpass123")
@@ -341,7 +355,7 @@ class ProfissionalSaudeTests(TestCase):
 
         # Verificar contexto - chamada2 deve ser a mais recente
         self.assertEqual(
-            response.context["senha_chamada"], self.paciente2
+            response.context["senha_chamada"], self.paciente2.senha
         )  # Última chamada
         self.assertEqual(
             response.context["nome_completo"], self.paciente2.nome_completo
@@ -1,3 +1,4 @@
 ﻿from . import tests_integracao_autorizacao
+from . import tests_integracao_notificacoes
 from . import tests_integracao_whatsapp
 from . import tests_integration
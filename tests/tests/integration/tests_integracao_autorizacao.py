@@ -3,6 +3,7 @@ Testes de integração para autorização e validação do sistema SGA-ILSL.
 Testa fluxos complexos, autorização de acesso e validação de dados.
 """
 
+from django.core.cache import caches
 from django.test import Client, TransactionTestCase
 from django.urls import reverse
 from django.utils import timezone
@@ -21,9 +22,11 @@ class AutorizacaoValidacaoIntegracaoTest(TransactionTestCase):
 
     def setUp(self):
         """Configura dados iniciais para os testes."""
+        caches["tv"].clear()
         print("\033[93m🔗 Teste de integração: Autorização e Validação\033[0m")
         # Mock WhatsApp to avoid real API calls
-        self.mock_whatsapp = patch("core.utils.enviar_whatsapp").start()
+        self.patch_whatsapp = patch("core.utils.enviar_whatsapp")
+        self.mock_whatsapp = self.patch_whatsapp.start()
         self.mock_whatsapp.return_value = True
 
         self.admin_user = User.objects.create_user(
@@ -62,7 +65,7 @@ class AutorizacaoValidacaoIntegracaoTest(TransactionTestCase):
 
     def tearDown(self):
         """Limpa mocks após os testes."""
-        self.mock_whatsapp.stop()
+        self.patch_whatsapp.stop()
 
     def criar_usuario_direto(self, user_type, cpf=None):
         """Método auxiliar para criar usuário diretamente no banco."""
@@ -0,0 +1,293 @@
+"""
+Testes de integração da caixa de saída de notificações (core.notificacoes)
+contra um servidor local que imita a API do Twilio.
+"""
+
+import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import Client, LiveServerTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.despacho import despachante
+from core.entregas import Agrupador, agrupador
+from core.models import CustomUser, Guiche, Notificacao, Paciente, StatusEntrega
+from core.notificacoes import drenar, enfileirar
+from core.provedores import gateway_twilio
+from core.utils import enviar_sms_ou_whatsapp
+from core.twilio_falso import ServidorTwilioFalso
+
+TWILIO_TESTE = {
+    "TWILIO_ACCOUNT_SID": "AC00000000000000000000000000000000",
+    "TWILIO_AUTH_TOKEN": "token",
+    "TWILIO_WHATSAPP_NUMBER": "+15550000000",
+}
+
+
+@override_settings(**TWILIO_TESTE)
+class CaixaDeSaidaTest(TestCase):
+    def setUp(self):
+        despachante.reiniciar()
+        caches["notificacoes"].clear()
+        self.usuario = CustomUser.objects.create_user(
+            cpf="22222222222",
+            username="22222222222",
+            password="guiche123",
+            funcao="guiche",
+        )
+        self.guiche = Guiche.objects.create(numero=4, funcionario=self.usuario)
+        self.paciente = Paciente.objects.create(
+            nome_completo="Ana Souza",
+            tipo_senha="G",
+            senha="G001",
+            telefone_celular="(11) 91234-5678",
+        )
+        self.client = Client()
+        self.client.force_login(self.usuario)
+        session = self.client.session
+        session["guiche_id"] = self.guiche.id
+        session.save()
+
+    def _servidor(self, **kwargs):
+        servidor = self.enterContext(ServidorTwilioFalso(**kwargs))
+        self.enterContext(override_settings(TWILIO_API_URL=servidor.url))
+        return servidor
+
+    def test_chamada_enviada_pelo_worker(self):
+        """Testa que a chamada só enfileira e o worker envia o SMS."""
+        servidor = self._servidor()
+        response = self.client.post(
+            reverse("guiche:chamar_senha", args=[self.paciente.id])
+        )
+        status_url = response.json()["notificacao"]["status_url"]
+        self.assertEqual(servidor.mensagens, [])
+        self.assertEqual(self.client.get(status_url).json()["status"], "pendente")
+
+        self.assertEqual(drenar(), 1)
+
+        self.assertEqual(len(servidor.mensagens), 1)
+        self.assertEqual(servidor.mensagens[0]["to"], "+5511912345678")
+        self.assertIn("Guichê 4", servidor.mensagens[0]["body"])
+        dados = self.client.get(status_url).json()
+        self.assertEqual(dados["status"], "enviada")
+        self.assertEqual(dados["resultado"]["sid"], servidor.mensagens[0]["sid"])
+        self.assertEqual(dados["resultado"]["message_type"], "sms")
+
+    def test_fallback_whatsapp(self):
+        """Testa o fallback para WhatsApp quando o SMS é recusado."""
+        servidor = self._servidor(falhar_sms=True)
+        notificacao = enfileirar("+5511912345678", "Olá", paciente=self.paciente)
+
+        drenar()
+
+        notificacao.refresh_from_db()
+        self.assertEqual(notificacao.status, "enviada")
+        self.assertTrue(notificacao.resultado["fallback_used"])
+        self.assertEqual(servidor.mensagens[0]["to"], "whatsapp:+5511912345678")
+
+    def test_falha_nos_dois_canais(self):
+        """Testa que a notificação termina em erro quando nada é entregue."""
+        servidor = self._servidor(falhar_sms=True)
+        servidor.falhar_whatsapp = True
+        notificacao = enfileirar("+5511912345678", "Olá")
+
+        drenar()
+
+        notificacao.refresh_from_db()
+        self.assertEqual(notificacao.status, "erro")
+        self.assertEqual(notificacao.tentativas, 1)
+        self.assertIn("SMS e WhatsApp falharam", notificacao.resultado["error"])
+
+    def test_envios_em_paralelo(self):
+        """Testa que o worker envia o lote concorrentemente."""
+        servidor = self._servidor(latencia=0.2)
+        for i in range(10):
+            enfileirar(f"+55119123456{i:02d}", "Olá", canal="whatsapp")
+
+        inicio = time.monotonic()
+        drenar(workers=10)
+        duracao = time.monotonic() - inicio
+
+        self.assertEqual(len(servidor.mensagens), 10)
+        self.assertFalse(Notificacao.objects.exclude(status="enviada").exists())
+        # Em série seriam 10 x 0,2 s
+        self.assertLess(duracao, 1.0)
+
+    def test_cliente_compartilhado_entre_threads(self):
+        """Testa que cada envio concorrente recebe a resposta da própria mensagem."""
+        servidor = self._servidor()
+        cliente = gateway_twilio.cliente()
+
+        def enviar(i):
+            return cliente.messages.create(
+                from_="+15550000000", to=f"+5511912345{i:03d}", body=f"Olá {i}"
+            )
+
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            enviadas = list(executor.map(enviar, range(100)))
+
+        sids = {mensagem["body"]: mensagem["sid"] for mensagem in servidor.mensagens}
+        self.assertEqual(len(sids), 100)
+        for i, mensagem in enumerate(enviadas):
+            self.assertEqual(mensagem.body, f"Olá {i}")
+            self.assertEqual(mensagem.sid, sids[f"Olá {i}"])
+        # A resposta não fica guardada no cliente compartilhado
+        self.assertIsNone(
+            getattr(cliente.http_client, "_test_only_last_response", None)
+        )
+
+    def test_comando_processar_notificacoes(self):
+        """Testa o comando de gerenciamento em modo de execução única."""
+        servidor = self._servidor()
+        enfileirar("+5511912345678", "Olá", canal="whatsapp")
+
+        call_command("processar_notificacoes", "--uma-vez", stdout=StringIO())
+
+        self.assertEqual(len(servidor.mensagens), 1)
+        self.assertFalse(Notificacao.objects.filter(status="pendente").exists())
+
+    def test_repeticao_apos_limite_de_taxa(self):
+        """Testa que um 429 devolve a notificação à fila com backoff."""
+        servidor = self._servidor(falhas_transitorias=1)
+        notificacao = enfileirar("+5511912345678", "Olá", canal="whatsapp")
+
+        drenar()
+
+        notificacao.refresh_from_db()
+        self.assertEqual(notificacao.status, "pendente")
+        self.assertEqual(notificacao.tentativas, 1)
+        self.assertTrue(notificacao.resultado["transitorio"])
+        self.assertEqual(servidor.mensagens, [])
+
+        # Vencido o backoff, a próxima drenagem entrega a mensagem
+        Notificacao.objects.filter(id=notificacao.id).update(
+            proxima_tentativa=timezone.now() - datetime.timedelta(seconds=1)
+        )
+        drenar()
+
+        notificacao.refresh_from_db()
+        self.assertEqual(notificacao.status, "enviada")
+        self.assertEqual(notificacao.tentativas, 2)
+        self.assertEqual(len(servidor.mensagens), 1)
+        metricas = despachante.metricas.resumo()
+        self.assertEqual(metricas["repeticoes"], 1)
+        self.assertEqual(metricas["enviadas"], 1)
+        self.assertEqual(metricas["fila"], 0)
+
+    def test_desiste_apos_max_tentativas(self):
+        """Testa que o erro transitório vira erro ao esgotar as tentativas."""
+        # Pela pilha de limpeza, como em _servidor: desfeito na ordem inversa
+        self.enterContext(override_settings(NOTIFICACOES_MAX_TENTATIVAS=1))
+        self._servidor(falhas_transitorias=1)
+        notificacao = enfileirar("+5511912345678", "Olá", canal="whatsapp")
+
+        drenar()
+
+        notificacao.refresh_from_db()
+        self.assertEqual(notificacao.status, "erro")
+
+    def test_reanuncios_repetidos_ignorados(self):
+        """Testa que reanúncios em sequência geram uma única mensagem."""
+        servidor = self._servidor()
+        self.client.post(reverse("guiche:chamar_senha", args=[self.paciente.id]))
+        for _ in range(3):
+            self.client.post(
+                reverse("guiche:reanunciar_senha", args=[self.paciente.id])
+            )
+
+        drenar()
+
+        self.assertEqual(len(servidor.mensagens), 1)
+        self.assertEqual(Notificacao.objects.filter(status="ignorada").count(), 3)
+        self.assertEqual(despachante.metricas.resumo()["ignoradas"], 3)
+
+    def test_disjuntor_pula_canal_lento(self):
+        """Testa que canais lentos são suspensos e pulados sem requisição."""
+        self.enterContext(
+            override_settings(DISJUNTOR_FALHAS=1, DISJUNTOR_LATENCIA=0.05)
+        )
+        servidor = self._servidor(latencia=0.1)
+
+        # SMS lento: entregue, mas abre o disjuntor do SMS
+        self.assertEqual(
+            enviar_sms_ou_whatsapp("+5511912345678", "Olá")["message_type"], "sms"
+        )
+        # SMS pulado direto para o WhatsApp (lento, abre o disjuntor do WhatsApp)
+        resultado = enviar_sms_ou_whatsapp("+5511912345678", "Olá")
+        self.assertTrue(resultado["fallback_used"])
+        self.assertIn("suspenso pelo disjuntor", resultado["original_error"])
+
+        # Os dois canais suspensos: erro transitório imediato, sem requisição
+        inicio = time.monotonic()
+        resultado = enviar_sms_ou_whatsapp("+5511912345678", "Olá")
+        self.assertLess(time.monotonic() - inicio, 0.05)
+        self.assertEqual(resultado["status"], "error")
+        self.assertTrue(resultado["transitorio"])
+        self.assertEqual(len(servidor.mensagens), 2)
+
+        admin = CustomUser.objects.create_user(
+            cpf="33333333333",
+            username="33333333333",
+            password="admin123",
+            funcao="administrador",
+        )
+        self.client.force_login(admin)
+        status = self.client.get(reverse("administrador:status_notificacoes")).json()
+        self.assertEqual(status["disjuntores"]["sms"]["estado"], "aberto")
+        self.assertEqual(status["disjuntores"]["whatsapp"]["estado"], "aberto")
+        self.assertEqual(status["fila"]["pendente"], 0)
+
+
+@override_settings(
+    STATUS_ENTREGA_INTERVALO=60, STATUS_ENTREGA_LOTE=1000, **TWILIO_TESTE
+)
+class StatusCallbackTest(LiveServerTestCase):
+    """
+    Callbacks de entrega do servidor falso até a tabela StatusEntrega. As
+    gravações ficam no agrupador e o lote é aplicado pelo teste, já que o
+    banco em memória não aceita escritas concorrentes das threads do servidor.
+    """
+
+    def _aguardar(self, servidor, callbacks, limite=5.0):
+        fim = time.monotonic() + limite
+        while servidor.callbacks + servidor.callbacks_falhos < callbacks:
+            self.assertLess(time.monotonic(), fim, "callbacks não chegaram")
+            time.sleep(0.02)
+
+    def test_entregas_registradas(self):
+        """Testa que os callbacks assinados e repetidos viram um status por SID."""
+        caches["notificacoes"].clear()
+        despachante.reiniciar()
+        self.enterContext(patch.object(Agrupador, "_iniciar"))
+        servidor = self.enterContext(
+            ServidorTwilioFalso(
+                taxa_nao_entregues=0.5, repeticoes_callback=2, semente=3
+            )
+        )
+        self.enterContext(
+            override_settings(
+                TWILIO_API_URL=servidor.url,
+                TWILIO_STATUS_CALLBACK_URL=self.live_server_url
+                + reverse("status_entrega_twilio"),
+            )
+        )
+        for i in range(6):
+            enfileirar(f"+55119123456{i:02d}", "Olá", canal="whatsapp")
+
+        drenar()
+        # sent + delivered/undelivered, cada um enviado duas vezes
+        self._aguardar(servidor, 6 * 2 * 2)
+        self.assertEqual(servidor.callbacks_falhos, 0)
+        self.assertFalse(StatusEntrega.objects.exists())
+
+        self.assertEqual(agrupador.aplicar(), 6)
+
+        status = dict(StatusEntrega.objects.values_list("sid", "status"))
+        self.assertEqual(set(status), {m["sid"] for m in servidor.mensagens})
+        self.assertTrue(set(status.values()) <= {"delivered", "undelivered"})
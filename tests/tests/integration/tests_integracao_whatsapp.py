@@ -22,7 +22,8 @@ class WhatsAppIntegracaoTest(TransactionTestCase):
     def setUp(self):
         """Configura dados iniciais para os testes."""
         # Mock WhatsApp to avoid real API calls
-        self.mock_whatsapp = patch("core.utils.enviar_whatsapp").start()
+        self.patch_whatsapp = patch("core.utils.enviar_whatsapp")
+        self.mock_whatsapp = self.patch_whatsapp.start()
         self.mock_whatsapp.return_value = True
 
         self.admin_user = User.objects.create_user(
@@ -61,7 +62,7 @@ class WhatsAppIntegracaoTest(TransactionTestCase):
 
     def tearDown(self):
         """Limpa mocks após os testes."""
-        self.mock_whatsapp.stop()
+        self.patch_whatsapp.stop()
 
     def criar_usuario_direto(self, user_type, cpf=None):
         """Método auxiliar para criar usuário diretamente no banco."""
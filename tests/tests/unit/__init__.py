@@ -1,9 +1,22 @@
-﻿from . import tests_forms_funcionario
+﻿from . import tests_analytics
+from . import tests_arquivo
+from . import tests_despacho
+from . import tests_disjuntor
+from . import tests_entregas
+from . import tests_escalonador
+from . import tests_fila_guiche
+from . import tests_forms_funcionario
 from . import tests_forms_paciente
+from . import tests_jornadas
 from . import tests_models_atendimento
 from . import tests_models_chamada
+from . import tests_models_contador_senha
 from . import tests_models_customuser
 from . import tests_models_guiche
 from . import tests_models_paciente
 from . import tests_models_registro
+from . import tests_presenca
+from . import tests_provedores
+from . import tests_resumos
+from . import tests_tv
 from . import tests_utils
@@ -0,0 +1,74 @@
+import numpy as np
+from django.test import SimpleTestCase
+
+from core import analytics
+
+
+class AnalyticsTest(SimpleTestCase):
+    """Testes para as distribuições de tempos (core.analytics)."""
+
+    def test_vetor_converte_nulos(self):
+        valores = analytics.vetor([5.0, 1.5, None])
+        self.assertEqual(valores[:2].tolist(), [5.0, 1.5])
+        self.assertTrue(np.isnan(valores[2]))
+
+    def test_vetor_vazio(self):
+        self.assertEqual(analytics.vetor([]).size, 0)
+
+    def test_aparar_descarta_invalidos(self):
+        mantidos, aparados = analytics.aparar(np.array([-3.0, 0.0, np.nan, 4.0]))
+        self.assertEqual(mantidos.tolist(), [4.0])
+        self.assertEqual(aparados, 3)
+
+    def test_aparar_descarta_outliers(self):
+        """Testa que a cerca acompanha a escala dos dados, sem limite fixo."""
+        curtos = np.array([5.0] * 10 + [6.0] * 10 + [300.0])
+        mantidos, aparados = analytics.aparar(curtos)
+        self.assertEqual(aparados, 1)
+        self.assertNotIn(300.0, mantidos)
+
+        # Consultas longas (acima dos antigos 480 min) são mantidas
+        longos = np.linspace(400, 600, 50)
+        mantidos, aparados = analytics.aparar(longos)
+        self.assertEqual(aparados, 0)
+
+    def test_aparar_mantem_cauda_longa(self):
+        """Testa que esperas longas legítimas (cauda à direita) ficam."""
+        esperas = np.exp(np.random.default_rng(1).normal(2.5, 0.6, 5000))
+        _, aparados = analytics.aparar(np.append(esperas, 20 * 60))
+        self.assertEqual(aparados, 1)
+
+    def test_aparar_poucos_valores(self):
+        """Testa que amostras pequenas só perdem os inválidos."""
+        mantidos, aparados = analytics.aparar(np.array([5.0, 6.0, 300.0]))
+        self.assertEqual(mantidos.tolist(), [5.0, 6.0, 300.0])
+        self.assertEqual(aparados, 0)
+
+    def test_histograma(self):
+        hist = analytics.histograma(np.array([0.5, 3.0, 4.0, 12.0, 24.0]))
+        self.assertEqual(
+            hist["limites"], [0, 2, 4, 6, 8, 10, 12, 14, 16, 18, 20, 22, 24]
+        )
+        self.assertEqual(hist["contagens"], [1, 1, 1, 0, 0, 0, 1, 0, 0, 0, 0, 1])
+        self.assertEqual(sum(hist["contagens"]), 5)
+
+    def test_histograma_vazio(self):
+        self.assertEqual(
+            analytics.histograma(np.array([])), {"limites": [], "contagens": []}
+        )
+
+    def test_distribuicao(self):
+        dados = analytics.distribuicao(np.arange(1.0, 101.0))
+        self.assertEqual(dados["n"], 100)
+        self.assertEqual(dados["aparados"], 0)
+        self.assertEqual(dados["media"], 50.5)
+        self.assertEqual(dados["p50"], 50.5)
+        self.assertEqual(dados["p90"], 90.1)
+        self.assertEqual(dados["p99"], 99.0)
+        self.assertEqual(sum(dados["histograma"]["contagens"]), 100)
+
+    def test_distribuicao_vazia(self):
+        dados = analytics.distribuicao(np.array([]))
+        self.assertEqual(dados["n"], 0)
+        self.assertEqual(dados["media"], 0)
+        self.assertEqual(dados["p95"], 0)
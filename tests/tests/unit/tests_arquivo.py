@@ -0,0 +1,197 @@
+import datetime
+import io
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core import arquivo, exportacao
+from core.models import (
+    Chamada,
+    ChamadaArquivo,
+    ChamadaHistorico,
+    ChamadaProfissional,
+    ChamadaProfissionalArquivo,
+    CustomUser,
+    Guiche,
+    Paciente,
+    RegistroDeAcesso,
+    RegistroDeAcessoArquivo,
+    ResumoGuicheHora,
+    ResumoProfissionalHora,
+)
+from core.resumos import reconstruir
+
+
+class ArquivoTest(TestCase):
+    """Testes para o arquivo dos meses fechados (core.arquivo)."""
+
+    def setUp(self):
+        self.admin = CustomUser.objects.create_user(
+            cpf="11122233344",
+            username="11122233344",
+            password="adminpass",
+            funcao="administrador",
+        )
+        guichista = CustomUser.objects.create_user(
+            cpf="22233344455", username="22233344455", funcao="guiche"
+        )
+        self.profissional = CustomUser.objects.create_user(
+            cpf="33344455566", username="33344455566", funcao="profissional_saude"
+        )
+        self.guiche = Guiche.objects.create(numero=1, funcionario=guichista)
+        self.corte = arquivo.corte(2)
+        self.antigo = self.corte - datetime.timedelta(days=3)
+
+    def _chamadas(self, quantidade, data_hora=None):
+        """Cria ``quantidade`` chamadas (e chamadas de profissional)."""
+        for _ in range(quantidade):
+            paciente = Paciente.objects.create(nome_completo="Paciente", tipo_senha="G")
+            chamada = Chamada.objects.create(
+                paciente=paciente, guiche=self.guiche, acao="chamada"
+            )
+            chamada_profissional = ChamadaProfissional.objects.create(
+                paciente=paciente, profissional_saude=self.profissional, acao="chamada"
+            )
+            if data_hora:
+                # Sem sinais: os resumos ficam no balde da criação
+                for objeto in (chamada, chamada_profissional):
+                    type(objeto).objects.filter(pk=objeto.pk).update(
+                        data_hora=data_hora
+                    )
+
+    def test_corte(self):
+        corte = timezone.localtime(self.corte)
+        hoje = timezone.localdate()
+        self.assertEqual((corte.day, corte.hour, corte.minute), (1, 0, 0))
+        self.assertEqual(
+            (hoje.year * 12 + hoje.month) - (corte.year * 12 + corte.month), 1
+        )
+        self.assertEqual(arquivo.corte(1).date(), hoje.replace(day=1))
+
+    def test_arquivar_move_com_os_mesmos_ids(self):
+        self._chamadas(3, self.antigo)
+        self._chamadas(2)
+        RegistroDeAcesso.objects.create(
+            usuario=self.admin, tipo_de_acesso="login", data_hora=self.antigo
+        )
+        antigas = set(
+            Chamada.objects.filter(data_hora__lt=self.corte).values_list(
+                "id", flat=True
+            )
+        )
+        resumos = sorted(ResumoGuicheHora.objects.values_list("hora", "total"))
+
+        totais = arquivo.arquivar(self.corte)
+
+        self.assertEqual(
+            totais,
+            {"Chamada": 3, "ChamadaProfissional": 3, "RegistroDeAcesso": 1},
+        )
+        self.assertEqual(Chamada.objects.count(), 2)
+        self.assertEqual(ChamadaProfissional.objects.count(), 2)
+        self.assertFalse(RegistroDeAcesso.objects.exists())
+        self.assertEqual(
+            set(ChamadaArquivo.objects.values_list("id", flat=True)), antigas
+        )
+        self.assertEqual(ChamadaProfissionalArquivo.objects.count(), 3)
+        self.assertEqual(RegistroDeAcessoArquivo.objects.count(), 1)
+        # Mover não é excluir: os resumos continuam os mesmos
+        self.assertEqual(
+            sorted(ResumoGuicheHora.objects.values_list("hora", "total")), resumos
+        )
+        self.assertEqual(ChamadaHistorico.objects.count(), 5)
+
+        # Nada mais a mover
+        self.assertEqual(
+            arquivo.arquivar(self.corte),
+            {"Chamada": 0, "ChamadaProfissional": 0, "RegistroDeAcesso": 0},
+        )
+
+    def test_lotes(self):
+        self._chamadas(5, self.antigo)
+        lotes = []
+
+        arquivo.arquivar(
+            self.corte,
+            lote=2,
+            modelos=[Chamada],
+            progresso=lambda modelo, movidas: lotes.append(movidas),
+        )
+
+        self.assertEqual(lotes, [2, 2, 1])
+        self.assertEqual(ChamadaArquivo.objects.count(), 5)
+        self.assertFalse(Chamada.objects.exists())
+        self.assertEqual(ChamadaProfissional.objects.count(), 5)
+
+    def test_fonte(self):
+        self.assertIs(arquivo.fonte(Chamada, None), Chamada)
+        self._chamadas(1, self.antigo)
+        arquivo.arquivar(self.corte)
+
+        self.assertIs(arquivo.fonte(Chamada, self.corte), Chamada)
+        self.assertIs(arquivo.fonte(Chamada, self.antigo), ChamadaHistorico)
+        self.assertIs(arquivo.fonte(Chamada, None), ChamadaHistorico)
+
+    def test_leituras_alcancam_o_arquivo(self):
+        self._chamadas(2, self.antigo)
+        self._chamadas(1)
+        Chamada.objects.filter(data_hora__lt=self.corte).update(acao="reanuncio")
+        arquivo.arquivar(self.corte)
+
+        linhas = list(
+            exportacao.linhas(
+                "chamadas",
+                timezone.localdate(self.antigo),
+                timezone.localdate(),
+            )
+        )
+        self.assertEqual(len(linhas), 3)
+        self.assertEqual(
+            len(
+                list(
+                    exportacao.linhas(
+                        "chamadas-profissionais",
+                        timezone.localdate(self.antigo),
+                        timezone.localdate(self.antigo),
+                    )
+                )
+            ),
+            2,
+        )
+
+        self.client.force_login(self.admin)
+        caches["dashboard"].clear()
+        response = self.client.get(
+            reverse("administrador:dashboard_bloco", args=["reanuncios"]),
+            {"period": 90},
+        )
+        pacientes = response.json()["dados"]["pacientes"]
+        self.assertEqual(sum(paciente["total"] for paciente in pacientes), 2)
+
+    def test_reconstruir_resumos_com_arquivo(self):
+        self._chamadas(2, self.antigo)
+        arquivo.arquivar(self.corte)
+
+        reconstruir(self.antigo - datetime.timedelta(days=1))
+
+        self.assertEqual(
+            ResumoGuicheHora.objects.filter(hora__lt=self.corte).get().total, 2
+        )
+        self.assertEqual(
+            ResumoProfissionalHora.objects.filter(hora__lt=self.corte).get().total, 2
+        )
+
+    def test_comando(self):
+        self._chamadas(2, self.antigo)
+        saida = io.StringIO()
+
+        call_command(
+            "arquivar_historico", "--meses-ativos", "2", "--lote", "1", stdout=saida
+        )
+
+        self.assertIn("Chamada: 1 linha(s) movida(s)", saida.getvalue())
+        self.assertIn("Chamada 2, ChamadaProfissional 2", saida.getvalue())
+        self.assertEqual(ChamadaArquivo.objects.count(), 2)
@@ -0,0 +1,131 @@
+import datetime
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from core.despacho import BaldeDeFichas, Despachante
+from core.models import Notificacao
+
+
+class RelogioFalso:
+    def __init__(self):
+        self.agora = 0.0
+        self.esperas = []
+
+    def __call__(self):
+        return self.agora
+
+    def dormir(self, segundos):
+        self.esperas.append(segundos)
+        self.agora += segundos
+
+
+class BaldeDeFichasTest(SimpleTestCase):
+    """Testes para o balde de fichas por canal."""
+
+    def test_rajada_e_taxa(self):
+        """Testa que a rajada passa direto e o excesso espera pela taxa."""
+        relogio = RelogioFalso()
+        balde = BaldeDeFichas(2, 3, relogio=relogio, dormir=relogio.dormir)
+
+        esperas = [balde.retirar() for _ in range(5)]
+
+        self.assertEqual(esperas, [0.0, 0.0, 0.0, 0.5, 0.5])
+        self.assertEqual(relogio.agora, 1.0)
+
+    def test_reposicao_limitada_a_capacidade(self):
+        """Testa que um canal ocioso não acumula mais que a rajada."""
+        relogio = RelogioFalso()
+        balde = BaldeDeFichas(1, 2, relogio=relogio, dormir=relogio.dormir)
+        relogio.agora = 100.0
+
+        esperas = [balde.retirar() for _ in range(3)]
+
+        self.assertEqual(esperas, [0.0, 0.0, 1.0])
+
+    def test_debito_atrasa_proximos(self):
+        """Testa que o débito do fallback consome a ficha sem esperar."""
+        relogio = RelogioFalso()
+        balde = BaldeDeFichas(1, 1, relogio=relogio, dormir=relogio.dormir)
+
+        balde.debitar()
+        balde.debitar()
+
+        self.assertEqual(relogio.esperas, [])
+        self.assertEqual(balde.retirar(), 2.0)
+
+    def test_taxa_zero_desliga(self):
+        balde = BaldeDeFichas(0, 0)
+        self.assertEqual([balde.retirar() for _ in range(10)], [0.0] * 10)
+
+
+@override_settings(NOTIFICACOES_BACKOFF_BASE=2, NOTIFICACOES_BACKOFF_MAX=30)
+class AtrasoTest(SimpleTestCase):
+    """Testes para o backoff exponencial com jitter."""
+
+    def test_teto_exponencial(self):
+        with patch("core.despacho.random.uniform", side_effect=lambda a, b: b):
+            tetos = [Despachante.atraso(n).total_seconds() for n in range(1, 7)]
+        self.assertEqual(tetos, [2, 4, 8, 16, 30, 30])
+
+    def test_jitter(self):
+        atrasos = {Despachante.atraso(3).total_seconds() for _ in range(20)}
+        self.assertGreater(len(atrasos), 1)
+        self.assertTrue(all(0 <= atraso <= 8 for atraso in atrasos))
+
+
+@override_settings(NOTIFICACOES_JANELA_DEDUPE=120)
+class DedupeTest(TestCase):
+    """Testes para o descarte de mensagens repetidas."""
+
+    def _notificacao(self, mensagem="Dirija-se ao Guichê 1", **campos):
+        return Notificacao.objects.create(
+            canal="sms_ou_whatsapp",
+            numero_destino="+5511912345678",
+            mensagem=mensagem,
+            **campos,
+        )
+
+    def test_repetida_no_lote(self):
+        """Testa que só a primeira de mensagens iguais no lote é enviada."""
+        primeira = self._notificacao()
+        repetida = self._notificacao()
+        outra = self._notificacao(mensagem="Dirija-se à Sala 3")
+
+        self.assertEqual(
+            Despachante.duplicadas([repetida, outra, primeira]), {repetida.id}
+        )
+
+    def test_enviada_dentro_da_janela(self):
+        """Testa que uma mensagem enviada há pouco não é repetida."""
+        self._notificacao(status="enviada", atualizada_em=timezone.now())
+        nova = self._notificacao()
+        self.assertEqual(Despachante.duplicadas([nova]), {nova.id})
+
+    def test_lotes_sobrepostos_de_dois_workers(self):
+        """Testa que, de cópias em envio por dois workers, só uma é enviada."""
+        lote_a = [self._notificacao(mensagem="Dirija-se à Sala 3", status="enviando")]
+        lote_b = [self._notificacao(mensagem="Dirija-se à Sala 4", status="enviando")]
+        copia_b = self._notificacao(status="enviando")
+        copia_a = self._notificacao(status="enviando")
+        lote_a.append(copia_a)
+        lote_b.append(copia_b)
+
+        self.assertEqual(Despachante.duplicadas(lote_a), {copia_a.id})
+        self.assertEqual(Despachante.duplicadas(lote_b), set())
+
+    def test_fora_da_janela_ou_com_erro(self):
+        """Testa que envios antigos ou com erro não bloqueiam a mensagem."""
+        self._notificacao(
+            status="enviada",
+            atualizada_em=timezone.now() - datetime.timedelta(minutes=5),
+        )
+        self._notificacao(status="erro", atualizada_em=timezone.now())
+        nova = self._notificacao()
+        self.assertEqual(Despachante.duplicadas([nova]), set())
+
+    @override_settings(NOTIFICACOES_JANELA_DEDUPE=0)
+    def test_janela_zero_desliga(self):
+        lote = [self._notificacao(), self._notificacao()]
+        self.assertEqual(Despachante.duplicadas(lote), set())
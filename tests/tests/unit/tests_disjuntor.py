@@ -0,0 +1,87 @@
+from unittest.mock import patch
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from core.disjuntor import Disjuntor
+
+
+@override_settings(DISJUNTOR_FALHAS=3, DISJUNTOR_ESPERA=30)
+class DisjuntorTest(SimpleTestCase):
+    """Testes para os estados do disjuntor por canal."""
+
+    def setUp(self):
+        caches["notificacoes"].clear()
+        self.agora = 1000.0
+        relogio = patch("core.disjuntor.time.time", side_effect=lambda: self.agora)
+        relogio.start()
+        self.addCleanup(relogio.stop)
+        self.disjuntor = Disjuntor("sms")
+
+    def _falhar(self, vezes):
+        for _ in range(vezes):
+            self.disjuntor.registrar_falha("HTTP 503")
+
+    def test_abre_apos_falhas_seguidas(self):
+        """Testa que o canal é suspenso após DISJUNTOR_FALHAS falhas seguidas."""
+        self._falhar(2)
+        self.assertTrue(self.disjuntor.permitir())
+        self.assertEqual(self.disjuntor.estado()["falhas_consecutivas"], 2)
+
+        self._falhar(1)
+
+        self.assertFalse(self.disjuntor.permitir())
+        estado = self.disjuntor.estado()
+        self.assertEqual(estado["estado"], "aberto")
+        self.assertEqual(estado["motivo"], "HTTP 503")
+        self.assertEqual(estado["sonda_em_segundos"], 30)
+
+    def test_sucesso_zera_contagem(self):
+        self._falhar(2)
+        self.disjuntor.registrar_sucesso()
+        self._falhar(2)
+        self.assertTrue(self.disjuntor.permitir())
+
+    def test_meio_aberto_uma_sonda_por_vez(self):
+        """Testa que, passada a espera, só uma sonda passa e o sucesso fecha."""
+        self._falhar(3)
+        self.agora += 31
+
+        self.assertEqual(self.disjuntor.estado()["estado"], "meio_aberto")
+        self.assertTrue(self.disjuntor.permitir())
+        self.assertFalse(Disjuntor("sms").permitir())
+
+        self.disjuntor.registrar_sucesso()
+
+        self.assertEqual(self.disjuntor.estado()["estado"], "fechado")
+        self.assertTrue(self.disjuntor.permitir())
+
+    def test_sonda_com_falha_reabre(self):
+        self._falhar(3)
+        self.agora += 31
+        self.assertTrue(self.disjuntor.permitir())
+
+        self._falhar(1)
+
+        self.assertFalse(self.disjuntor.permitir())
+        self.agora += 31
+        self.assertTrue(self.disjuntor.permitir())
+
+    def test_falhas_durante_espera_nao_prolongam(self):
+        self._falhar(3)
+        self.agora += 20
+        self._falhar(5)
+        self.agora += 11
+        self.assertTrue(self.disjuntor.permitir())
+
+    def test_estado_compartilhado_entre_instancias(self):
+        """Testa que o estado vem do cache, não da instância (outros workers)."""
+        self._falhar(3)
+        self.assertFalse(Disjuntor("sms").permitir())
+        self.assertTrue(Disjuntor("whatsapp").permitir())
+
+    @override_settings(DISJUNTOR_FALHAS=0)
+    def test_desligado(self):
+        self._falhar(10)
+        self.assertTrue(self.disjuntor.permitir())
+        self.assertEqual(self.disjuntor.estado()["estado"], "fechado")
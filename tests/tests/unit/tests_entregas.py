@@ -0,0 +1,182 @@
+import datetime
+from unittest.mock import patch
+
+from django.db.models import QuerySet
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from twilio.request_validator import RequestValidator
+
+from core.entregas import Agrupador, Atualizacao, aplicar_lote, taxas_por_canal
+from core.models import Notificacao, StatusEntrega
+from core.notificacoes import descrever
+
+SID = "SM" + "a" * 32
+URL_CALLBACK = "https://sga.exemplo.org/notificacoes/status-twilio/"
+
+
+class AplicarLoteTest(TestCase):
+    """Testes para a gravação idempotente dos status de entrega."""
+
+    def _status(self, sid=SID):
+        return StatusEntrega.objects.get(sid=sid).status
+
+    def test_repeticoes_e_fora_de_ordem(self):
+        """Testa que repetições e callbacks atrasados não fazem o status voltar."""
+        aplicar_lote([Atualizacao(SID, "sms", "sent")])
+        self.assertEqual(aplicar_lote([Atualizacao(SID, "sms", "delivered")]), 1)
+        self.assertEqual(aplicar_lote([Atualizacao(SID, "sms", "delivered")]), 0)
+        self.assertEqual(aplicar_lote([Atualizacao(SID, "sms", "sent")]), 0)
+        self.assertEqual(self._status(), "delivered")
+
+    def test_lote_junta_por_sid(self):
+        outro = "SM" + "b" * 32
+        aplicados = aplicar_lote(
+            [
+                Atualizacao(SID, "sms", "queued"),
+                Atualizacao(outro, "whatsapp", "read"),
+                Atualizacao(SID, "sms", "undelivered", 30003),
+                Atualizacao(SID, "sms", "sent"),
+            ]
+        )
+
+        self.assertEqual(aplicados, 2)
+        self.assertEqual(self._status(), "undelivered")
+        self.assertEqual(StatusEntrega.objects.get(sid=SID).codigo_erro, 30003)
+        self.assertEqual(self._status(outro), "read")
+
+    def test_sid_criado_por_outro_processo(self):
+        """Testa que o status não se perde se outro processo criar o SID antes."""
+        outro = "SM" + "b" * 32
+        bulk_create = QuerySet.bulk_create
+
+        def concorrente(queryset, objetos, **kwargs):
+            # Outro processo grava os SIDs entre a leitura e o INSERT
+            StatusEntrega.objects.create(sid=SID, canal="sms", status="sent")
+            StatusEntrega.objects.create(sid=outro, canal="sms", status="read")
+            return bulk_create(queryset, objetos, **kwargs)
+
+        with patch.object(QuerySet, "bulk_create", autospec=True) as mock:
+            mock.side_effect = concorrente
+            aplicados = aplicar_lote(
+                [
+                    Atualizacao(SID, "sms", "delivered"),
+                    Atualizacao(outro, "sms", "delivered"),
+                ]
+            )
+
+        self.assertEqual(aplicados, 1)
+        self.assertEqual(self._status(), "delivered")
+        self.assertEqual(self._status(outro), "read")
+
+    def test_agrupador_grava_em_lote(self):
+        agrupador = Agrupador()
+        with override_settings(
+            STATUS_ENTREGA_INTERVALO=60, STATUS_ENTREGA_LOTE=3
+        ), patch.object(Agrupador, "_iniciar"):
+            agrupador.adicionar(Atualizacao(SID, "sms", "sent"))
+            agrupador.adicionar(Atualizacao(SID, "sms", "delivered"))
+            self.assertFalse(StatusEntrega.objects.exists())
+
+            agrupador.aplicar()
+            self.assertEqual(self._status(), "delivered")
+
+            # Lote cheio grava sem esperar o intervalo
+            for letra in "cde":
+                agrupador.adicionar(Atualizacao("SM" + letra * 32, "sms", "sent"))
+        self.assertEqual(StatusEntrega.objects.count(), 4)
+
+    def test_taxas_por_canal(self):
+        aplicar_lote(
+            [
+                Atualizacao("SM" + "a" * 32, "sms", "delivered"),
+                Atualizacao("SM" + "b" * 32, "sms", "delivered"),
+                Atualizacao("SM" + "c" * 32, "sms", "delivered"),
+                Atualizacao("SM" + "d" * 32, "sms", "failed"),
+                Atualizacao("SM" + "e" * 32, "sms", "sent"),
+                Atualizacao("SM" + "f" * 32, "whatsapp", "read"),
+            ]
+        )
+        taxas = taxas_por_canal(timezone.now() - datetime.timedelta(days=1))
+
+        self.assertEqual(
+            taxas["sms"],
+            {"total": 5, "entregues": 3, "nao_entregues": 1, "taxa_entrega": 75.0},
+        )
+        self.assertEqual(taxas["whatsapp"]["taxa_entrega"], 100.0)
+
+    def test_descrever_inclui_entrega(self):
+        notificacao = Notificacao.objects.create(
+            canal="sms_ou_whatsapp",
+            numero_destino="+5511912345678",
+            mensagem="Olá",
+            status="enviada",
+            resultado={"status": "success", "sid": SID},
+        )
+        self.assertIsNone(descrever(notificacao)["entrega"])
+        aplicar_lote([Atualizacao(SID, "sms", "delivered")])
+        self.assertEqual(descrever(notificacao)["entrega"], "delivered")
+
+
+@override_settings(
+    NOTIFICACOES_BACKEND="twilio",
+    TWILIO_AUTH_TOKEN="token",
+    TWILIO_STATUS_CALLBACK_URL=URL_CALLBACK,
+)
+class StatusCallbackViewTest(TestCase):
+    """Testes para o endpoint de status callback do Twilio."""
+
+    def _post(self, dados, assinatura=None):
+        if assinatura is None:
+            assinatura = RequestValidator("token").compute_signature(
+                URL_CALLBACK, dados
+            )
+        return self.client.post(
+            reverse("status_entrega_twilio"),
+            dados,
+            HTTP_X_TWILIO_SIGNATURE=assinatura,
+        )
+
+    def test_callback_assinado(self):
+        response = self._post(
+            {"MessageSid": SID, "MessageStatus": "delivered", "To": "whatsapp:+55"}
+        )
+
+        self.assertEqual(response.status_code, 204)
+        entrega = StatusEntrega.objects.get(sid=SID)
+        self.assertEqual((entrega.canal, entrega.status), ("whatsapp", "delivered"))
+
+    def test_assinatura_invalida(self):
+        response = self._post(
+            {"MessageSid": SID, "MessageStatus": "delivered"}, assinatura="x"
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(StatusEntrega.objects.exists())
+
+    @override_settings(TWILIO_AUTH_TOKEN="")
+    def test_sem_token_recusado(self):
+        with self.assertLogs("core.views", "ERROR"):
+            response = self._post({"MessageSid": SID, "MessageStatus": "delivered"})
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(StatusEntrega.objects.exists())
+
+    @override_settings(NOTIFICACOES_BACKEND="console")
+    def test_assinatura_exigida_com_outro_provedor(self):
+        response = self._post(
+            {"MessageSid": SID, "MessageStatus": "delivered"}, assinatura="x"
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(StatusEntrega.objects.exists())
+
+    @override_settings(TWILIO_CALLBACK_SEM_ASSINATURA=True, TWILIO_AUTH_TOKEN="")
+    def test_sem_assinatura_quando_liberado(self):
+        response = self._post(
+            {"MessageSid": SID, "MessageStatus": "delivered"}, assinatura=""
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertTrue(StatusEntrega.objects.filter(sid=SID).exists())
+
+    def test_status_desconhecido_ignorado(self):
+        response = self._post({"MessageSid": SID, "MessageStatus": "perdido"})
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(StatusEntrega.objects.exists())
@@ -0,0 +1,106 @@
+import random
+from collections import Counter
+
+from django.test import SimpleTestCase
+
+from guiche.escalonador import Escalonador, intercalar
+
+TIPOS = ["E", "C", "P", "G", "D", "A", "NH", "H", "U"]
+
+
+def _tipo(item):
+    return item[0]
+
+
+class EscalonadorPropriedadesTest(SimpleTestCase):
+    """Testes de propriedades do escalonador com entradas aleatórias."""
+
+    CASOS = 300
+
+    def _caso(self, rnd):
+        tipos = rnd.sample(TIPOS, rnd.randint(1, len(TIPOS)))
+        pesos = {t: rnd.choice([0, 1, 1, 2, 3, 5, 10, 1000]) for t in tipos}
+        itens = [(rnd.choice(tipos), i) for i in range(rnd.randint(0, 200))]
+        return pesos, itens
+
+    def test_permutacao_e_fifo_por_tipo(self):
+        """Cada item aparece uma vez e a ordem de chegada é mantida por tipo."""
+        rnd = random.Random(1)
+        for _ in range(self.CASOS):
+            pesos, itens = self._caso(rnd)
+            fila = intercalar(itens, _tipo, pesos)
+            self.assertEqual(sorted(fila), sorted(itens))
+            for tipo in pesos:
+                self.assertEqual(
+                    [i for i in fila if i[0] == tipo],
+                    [i for i in itens if i[0] == tipo],
+                )
+
+    def test_peso_zero_apos_ponderados_por_chegada(self):
+        """Tipos com peso 0 vêm depois de todos os demais, por ordem de chegada."""
+        rnd = random.Random(2)
+        for _ in range(self.CASOS):
+            pesos, itens = self._caso(rnd)
+            fila = intercalar(itens, _tipo, pesos)
+            sem_peso = [i for i in itens if pesos[i[0]] == 0]
+            self.assertEqual(fila[len(fila) - len(sem_peso) :], sem_peso)
+
+    def test_proporcoes_em_todo_prefixo(self):
+        """Enquanto todos os tipos têm itens, cada prefixo segue as proporções."""
+        rnd = random.Random(3)
+        for _ in range(self.CASOS):
+            tipos = rnd.sample(TIPOS, rnd.randint(2, 5))
+            pesos = {t: rnd.randint(1, 7) for t in tipos}
+            # Itens suficientes para nenhum tipo se esgotar no prefixo medido
+            itens = [(t, i) for t in tipos for i in range(pesos[t] * 20)]
+            rnd.shuffle(itens)
+            fila = intercalar(itens, _tipo, pesos)
+            total = sum(pesos.values())
+            limite = 1.5 + len(pesos) / 2
+            contagem: Counter = Counter()
+            for n, item in enumerate(fila[: total * 10], start=1):
+                contagem[item[0]] += 1
+                for tipo, peso in pesos.items():
+                    self.assertLessEqual(abs(contagem[tipo] - n * peso / total), limite)
+
+    def test_suavidade(self):
+        """Pesos iguais alternam; 2:1 não agrupa os tipos em blocos."""
+        itens = [("G", i) for i in range(4)] + [("E", i) for i in range(4)]
+        fila = intercalar(itens, _tipo, {"G": 1, "E": 1})
+        self.assertEqual([t for t, _ in fila], ["G", "E"] * 4)
+
+        itens = [("G", i) for i in range(4)] + [("E", i) for i in range(2)]
+        fila = intercalar(itens, _tipo, {"G": 2, "E": 1})
+        self.assertEqual([t for t, _ in fila], ["G", "E", "G", "G", "E", "G"])
+
+    def test_todos_os_pesos_zero(self):
+        """Sem pesos positivos a fila é a ordem de chegada."""
+        itens = [("G", 0), ("E", 1), ("G", 2)]
+        self.assertEqual(intercalar(itens, _tipo, {"G": 0, "E": 0}), itens)
+
+    def test_tipo_ausente_dos_pesos(self):
+        """Um tipo sem peso configurado é tratado como peso 0."""
+        itens = [("X", 0), ("G", 1)]
+        self.assertEqual(intercalar(itens, _tipo, {"G": 1}), [("G", 1), ("X", 0)])
+
+    def test_incremental_igual_ao_lote(self):
+        """Posicionar item a item com estado persistido equivale ao lote."""
+        rnd = random.Random(4)
+        for _ in range(50):
+            pesos, itens = self._caso(rnd)
+            estado: dict = {}
+            chaves = []
+            for chegada, item in enumerate(itens):
+                escalonador = Escalonador(pesos, estado)
+                chaves.append((*escalonador.posicao(item[0]), chegada, item))
+                estado = escalonador.estado
+            incremental = [c[3] for c in sorted(chaves, key=lambda c: c[:3])]
+            self.assertEqual(incremental, intercalar(itens, _tipo, pesos))
+
+    def test_agora_evita_furar_fila(self):
+        """Um tipo que volta depois de ocioso começa a partir de `agora`."""
+        escalonador = Escalonador({"G": 1, "E": 1})
+        for _ in range(10):
+            escalonador.posicao("G")
+        _, posicao = escalonador.posicao("E", agora=8.5)
+        self.assertGreater(posicao, 8.5)
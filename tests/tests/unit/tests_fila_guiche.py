@@ -0,0 +1,225 @@
+import datetime
+import unittest
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import CustomUser, FilaGuiche, Guiche, ItemFilaGuiche, Paciente
+from guiche.fila import obter_fila, pacientes_da_fila, reservar_proximo
+
+
+class FilaGuicheTest(TestCase):
+    """Testes para a fila pré-calculada do painel do guichê."""
+
+    def _criar(self, tipo, quantidade=1, **extra):
+        return [
+            Paciente.objects.create(
+                nome_completo=f"Paciente {tipo}", tipo_senha=tipo, **extra
+            )
+            for _ in range(quantidade)
+        ]
+
+    def _tipos(self, fila):
+        return [p.tipo_senha for p in pacientes_da_fila(fila)]
+
+    def test_montagem_respeita_proporcoes(self):
+        """Testa que a fila montada intercala os tipos pelas proporções."""
+        self._criar("G", 4)
+        self._criar("E", 3)
+        fila = obter_fila({"G": 2, "E": 1}, "all")
+        self.assertEqual(self._tipos(fila), ["G", "E", "G", "G", "E", "G", "E"])
+
+    def test_mesmo_perfil_compartilha_fila(self):
+        """Testa que guichês com a mesma configuração compartilham a fila."""
+        fila1 = obter_fila({"G": 2, "E": 1}, "all")
+        fila2 = obter_fila({"G": "2", "E": 1}, "all")
+        fila3 = obter_fila({"G": 1, "E": 1}, "all")
+        fila4 = obter_fila({"E": 1, "G": 2}, "all")
+        self.assertEqual(fila1.pk, fila2.pk)
+        self.assertEqual(fila1.pk, fila4.pk)
+        self.assertNotEqual(fila1.pk, fila3.pk)
+
+    def test_paciente_novo_entra_incrementalmente(self):
+        """Testa que um novo paciente é inserido sem remontar a fila."""
+        self._criar("G", 2)
+        fila = obter_fila({"G": 2, "E": 1}, "all")
+        self._criar("E")
+        self._criar("G")
+        self.assertEqual(self._tipos(fila), ["G", "E", "G", "G"])
+        self.assertEqual(FilaGuiche.objects.count(), 1)
+
+    def test_remontar_igual_ao_incremental(self):
+        """Testa que remontar a fila dá a mesma ordem das inserções incrementais."""
+        self._criar("G", 2)
+        self._criar("P")
+        proporcoes = {"G": 3, "E": 2, "P": 1}
+        fila = obter_fila(proporcoes, "all")
+        for tipo in ("E", "G", "G", "P", "E", "E", "G", "P"):
+            self._criar(tipo)
+        incremental = pacientes_da_fila(fila)
+
+        FilaGuiche.objects.all().delete()
+        self.assertEqual(pacientes_da_fila(obter_fila(proporcoes, "all")), incremental)
+
+    def test_paciente_gravado_durante_a_montagem(self):
+        """Testa que um paciente fora da leitura da montagem entra após o commit."""
+        g1 = self._criar("G")[0]
+        with self.captureOnCommitCallbacks() as callbacks:
+            fila = obter_fila({"G": 1}, "all")
+        # Gravado sem passar pelo sinal, como com a fila ainda invisível
+        g2 = Paciente.objects.bulk_create(
+            [
+                Paciente(
+                    nome_completo="Paciente G",
+                    tipo_senha="G",
+                    senha="G999",
+                    dia_atendimento=timezone.localdate(),
+                )
+            ]
+        )[0]
+        self.assertEqual(pacientes_da_fila(fila), [g1])
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(pacientes_da_fila(fila), [g1, g2])
+
+    def test_paciente_atendido_sai_da_fila(self):
+        """Testa que marcar como atendido remove o paciente da fila."""
+        g1, g2 = self._criar("G", 2)
+        fila = obter_fila({"G": 1}, "all")
+        g1.atendido = True
+        g1.save()
+        self.assertEqual(pacientes_da_fila(fila), [g2])
+        self.assertFalse(ItemFilaGuiche.objects.filter(paciente=g1).exists())
+
+    def test_tipo_retardatario_nao_fura_fila(self):
+        """Testa que um tipo que chega tarde entra a partir da cabeça da fila."""
+        gs = self._criar("G", 6)
+        fila = obter_fila({"G": 1, "E": 1}, "all")
+        for paciente in gs[:4]:
+            paciente.atendido = True
+            paciente.save()
+        e1 = self._criar("E")[0]
+        self.assertEqual(pacientes_da_fila(fila), [gs[4], e1, gs[5]])
+
+    def test_recadastro_volta_para_o_fim(self):
+        """Testa que um paciente com nova senha reentra no fim da fila."""
+        g1, g2 = self._criar("G", 2)
+        fila = obter_fila({"G": 1}, "all")
+        g1.senha = None
+        g1.save()
+        self.assertEqual(pacientes_da_fila(fila), [g2, g1])
+
+    def test_tipo_com_proporcao_zero_fica_no_fim(self):
+        """Testa que tipos com proporção 0 são atendidos depois dos demais."""
+        e1 = self._criar("E")[0]
+        g1 = self._criar("G")[0]
+        fila = obter_fila({"G": 1, "E": 0}, "all")
+        g2 = self._criar("G")[0]
+        self.assertEqual(pacientes_da_fila(fila), [g1, g2, e1])
+
+    def test_periodo_da_fila(self):
+        """Testa que a fila por período só contém pacientes do período."""
+        hoje = timezone.localdate()
+        manha = timezone.make_aware(
+            datetime.datetime.combine(hoje, datetime.time(9, 0))
+        )
+        tarde = timezone.make_aware(
+            datetime.datetime.combine(hoje, datetime.time(14, 0))
+        )
+        p_manha = self._criar("G", horario_agendamento=manha)[0]
+        self._criar("G", horario_agendamento=tarde)
+        fila = obter_fila({"G": 1}, "manha")
+        self.assertEqual(pacientes_da_fila(fila), [p_manha])
+
+    def test_painel_custo_independe_do_tamanho_da_fila(self):
+        """Testa que renderizar o painel não cresce com o número de pacientes."""
+        guiche_user = CustomUser.objects.create_user(
+            cpf="11122233344",
+            username="11122233344",
+            password="guichepass",
+            funcao="guiche",
+        )
+        client = Client()
+        client.force_login(guiche_user)
+        session = client.session
+        session["filtros_guiche"] = {
+            "tipos_selecionados": ["G", "E"],
+            "proporcoes": {"G": 2, "E": 1},
+        }
+        session.save()
+
+        self._criar("G", 3)
+        client.get(reverse("guiche:painel_guiche"))
+        with CaptureQueriesContext(connection) as poucos:
+            client.get(reverse("guiche:painel_guiche"))
+
+        self._criar("G", 30)
+        self._criar("E", 30)
+        with CaptureQueriesContext(connection) as muitos:
+            response = client.get(reverse("guiche:painel_guiche"))
+
+        self.assertEqual(len(poucos), len(muitos))
+        self.assertEqual(len(response.context["senhas"]), 50)
+
+
+class ReservarProximoTest(TestCase):
+    """Testes para a reserva atômica da próxima senha."""
+
+    def setUp(self):
+        self.guiche1 = Guiche.objects.create(numero=1)
+        self.guiche2 = Guiche.objects.create(numero=2)
+
+    def _criar(self, tipo):
+        return Paciente.objects.create(
+            nome_completo=f"Paciente {tipo}", tipo_senha=tipo
+        )
+
+    def test_segue_a_politica_do_guiche(self):
+        """Testa que a reserva segue as proporções e pula pacientes reservados."""
+        g1, g2, e1 = self._criar("G"), self._criar("G"), self._criar("E")
+        proporcoes = {"G": 1, "E": 1}
+        self.assertEqual(reservar_proximo(self.guiche1, proporcoes, "all"), g1)
+        self.assertEqual(reservar_proximo(self.guiche2, proporcoes, "all"), e1)
+        # O guichê 1 passa para o próximo livre, liberando o anterior
+        self.assertEqual(reservar_proximo(self.guiche1, proporcoes, "all"), g2)
+        self.guiche1.refresh_from_db()
+        self.assertTrue(self.guiche1.em_atendimento)
+        self.assertEqual(self.guiche1.senha_atendida, g2)
+
+    def test_sem_filtros_ordem_de_chegada(self):
+        """Testa que sem proporções a reserva segue a ordem de emissão."""
+        e1, g1 = self._criar("E"), self._criar("G")
+        self.assertEqual(reservar_proximo(self.guiche1, {}, "all"), e1)
+        self.assertEqual(reservar_proximo(self.guiche2, {}, "all"), g1)
+
+    def test_fila_vazia_mantem_reserva(self):
+        """Testa que sem senhas livres o guichê mantém a reserva atual."""
+        g1, e1 = self._criar("G"), self._criar("E")
+        e1.atendido = True
+        e1.save()
+        self.assertEqual(reservar_proximo(self.guiche1, {"G": 1, "E": 1}, "all"), g1)
+        self.assertIsNone(reservar_proximo(self.guiche2, {"G": 1, "E": 1}, "all"))
+        self.assertIsNone(reservar_proximo(self.guiche1, {"G": 1, "E": 1}, "all"))
+        self.guiche1.refresh_from_db()
+        self.assertEqual(self.guiche1.senha_atendida, g1)
+
+    @unittest.skipUnless(
+        connection.features.has_select_for_update_skip_locked,
+        "SELECT ... FOR UPDATE SKIP LOCKED (PostgreSQL)",
+    )
+    def test_reserva_conferida_apos_a_trava(self):
+        """Testa que um candidato já reservado é recusado depois da trava."""
+        g1, g2 = self._criar("G"), self._criar("G")
+        Guiche.objects.filter(pk=self.guiche2.pk).update(senha_atendida=g1)
+
+        # Candidatos lidos antes do commit do outro guichê (snapshot antigo)
+        def desatualizados(proporcoes, periodo):
+            return Paciente.objects.filter(atendido=False).order_by("id")
+
+        with patch("guiche.fila._candidatos", desatualizados):
+            self.assertEqual(reservar_proximo(self.guiche1, {"G": 1}, "all"), g2)
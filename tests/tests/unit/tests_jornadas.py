@@ -0,0 +1,151 @@
+import datetime
+import io
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from core.jornadas import reconstruir
+from core.models import (
+    Chamada,
+    ChamadaProfissional,
+    CustomUser,
+    Guiche,
+    JornadaPaciente,
+    Paciente,
+)
+
+CAMPOS = (
+    "paciente",
+    "gerada",
+    "tipo_senha",
+    "primeira_chamada_guiche",
+    "confirmado_guiche",
+    "desistencia_guiche",
+    "primeira_chamada_profissional",
+    "confirmado_profissional",
+    "encaminhamentos",
+)
+
+
+class JornadasTest(TestCase):
+    """Testes para as jornadas dos pacientes mantidas pelos sinais."""
+
+    def setUp(self):
+        guichista = CustomUser.objects.create_user(
+            cpf="22233344455", username="22233344455", funcao="guiche"
+        )
+        self.profissional = CustomUser.objects.create_user(
+            cpf="33344455566", username="33344455566", funcao="profissional_saude"
+        )
+        self.guiche = Guiche.objects.create(numero=1, funcionario=guichista)
+        self.paciente = Paciente.objects.create(
+            nome_completo="Paciente", tipo_senha="G"
+        )
+
+    def _guiche(self, acao, paciente=None):
+        return Chamada.objects.create(
+            paciente=paciente or self.paciente, guiche=self.guiche, acao=acao
+        )
+
+    def _profissional(self, acao, paciente=None):
+        return ChamadaProfissional.objects.create(
+            paciente=paciente or self.paciente,
+            profissional_saude=self.profissional,
+            acao=acao,
+        )
+
+    def test_cadastro_abre_jornada(self):
+        jornada = JornadaPaciente.objects.get()
+        self.assertEqual(jornada.paciente, self.paciente)
+        self.assertEqual(jornada.gerada, self.paciente.horario_geracao_senha)
+        self.assertEqual(jornada.tipo_senha, "G")
+        self.assertIsNone(jornada.primeira_chamada_guiche)
+
+        # Gravações que não mudam a senha não abrem outra jornada
+        self.paciente.atendido = True
+        self.paciente.save()
+        Paciente.objects.only("pk").get(pk=self.paciente.pk).save()
+        self.assertEqual(JornadaPaciente.objects.count(), 1)
+
+    def test_etapas(self):
+        primeira = self._guiche("chamada")
+        self._guiche("chamada")
+        self._guiche("reanuncio")
+        confirmado = self._guiche("confirmado")
+        chamada_profissional = self._profissional("chamada")
+        self._profissional("encaminha")
+        self._profissional("encaminha")
+        consulta = self._profissional("confirmado")
+
+        jornada = JornadaPaciente.objects.get()
+        self.assertEqual(jornada.primeira_chamada_guiche, primeira.data_hora)
+        self.assertEqual(jornada.confirmado_guiche, confirmado.data_hora)
+        self.assertIsNone(jornada.desistencia_guiche)
+        self.assertEqual(
+            jornada.primeira_chamada_profissional, chamada_profissional.data_hora
+        )
+        self.assertEqual(jornada.confirmado_profissional, consulta.data_hora)
+        self.assertEqual(jornada.encaminhamentos, 2)
+
+    def test_recadastro_abre_nova_visita(self):
+        self._guiche("chamada")
+        self._guiche("desistencia")
+        anterior = JornadaPaciente.objects.get()
+
+        paciente = Paciente.objects.get(pk=self.paciente.pk)
+        paciente.senha = None
+        paciente.tipo_senha = "P"
+        paciente.horario_geracao_senha = timezone.now() + datetime.timedelta(seconds=1)
+        paciente.save()
+        chamada = self._guiche("chamada", paciente)
+
+        self.assertEqual(JornadaPaciente.objects.count(), 2)
+        anterior.refresh_from_db()
+        self.assertIsNotNone(anterior.desistencia_guiche)
+        atual = JornadaPaciente.objects.get(gerada=paciente.horario_geracao_senha)
+        self.assertEqual(atual.tipo_senha, "P")
+        self.assertEqual(atual.primeira_chamada_guiche, chamada.data_hora)
+        self.assertIsNone(atual.desistencia_guiche)
+
+    def test_reconstruir_igual_ao_incremental(self):
+        outro = Paciente.objects.create(nome_completo="Outro")
+        for paciente in (self.paciente, outro):
+            for acao in ("chamada", "chamada", "confirmado"):
+                self._guiche(acao, paciente)
+        for acao in ("chamada", "encaminha", "confirmado"):
+            self._profissional(acao)
+        incremental = sorted(JornadaPaciente.objects.values_list(*CAMPOS))
+
+        JornadaPaciente.objects.all().delete()
+        call_command("reconstruir_jornadas", "--dias", "1", stdout=io.StringIO())
+
+        self.assertEqual(
+            sorted(JornadaPaciente.objects.values_list(*CAMPOS)), incremental
+        )
+
+    def test_reconstruir_ignora_eventos_de_outra_visita(self):
+        self._guiche("chamada")
+        gerada = timezone.now() + datetime.timedelta(minutes=1)
+        Paciente.objects.filter(pk=self.paciente.pk).update(
+            horario_geracao_senha=gerada
+        )
+
+        self.assertEqual(reconstruir(pacientes=[self.paciente.pk]), 1)
+
+        atual = JornadaPaciente.objects.get(gerada=gerada)
+        self.assertIsNone(atual.primeira_chamada_guiche)
+        self.assertEqual(JornadaPaciente.objects.count(), 2)
+
+    def test_exclusao_recalcula_apos_commit(self):
+        self._guiche("chamada")
+        confirmado = self._guiche("confirmado")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            confirmado.delete()
+
+        self.assertIsNone(JornadaPaciente.objects.get().confirmado_guiche)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.paciente.delete()
+        self.assertFalse(JornadaPaciente.objects.exists())
@@ -0,0 +1,90 @@
+import datetime
+
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import ContadorSenha, Paciente
+
+
+class ContadorSenhaModelTest(TestCase):
+    """Testes para o contador atômico de senhas por dia e tipo."""
+
+    def setUp(self):
+        self.hoje = timezone.localdate()
+
+    def test_proximo_numero_sequencial(self):
+        """Testa que o contador incrementa a partir de 1."""
+        numeros = [ContadorSenha.proximo_numero(self.hoje, "G") for _ in range(3)]
+        self.assertEqual(numeros, [1, 2, 3])
+        contador = ContadorSenha.objects.get(dia=self.hoje, tipo_senha="G")
+        self.assertEqual(contador.ultimo_numero, 3)
+
+    def test_contadores_independentes_por_tipo_e_dia(self):
+        """Testa que cada (dia, tipo) tem sua própria numeração."""
+        ontem = self.hoje - datetime.timedelta(days=1)
+        ContadorSenha.proximo_numero(self.hoje, "G")
+        ContadorSenha.proximo_numero(self.hoje, "G")
+        self.assertEqual(ContadorSenha.proximo_numero(self.hoje, "E"), 1)
+        self.assertEqual(ContadorSenha.proximo_numero(ontem, "G"), 1)
+        self.assertEqual(ContadorSenha.proximo_numero(self.hoje, "G"), 3)
+
+    def test_proximo_numero_uma_consulta(self):
+        """Testa que o incremento custa uma única consulta mesmo com o dia cheio."""
+        for _ in range(50):
+            ContadorSenha.proximo_numero(self.hoje, "G")
+        with self.assertNumQueries(1):
+            numero = ContadorSenha.proximo_numero(self.hoje, "G")
+        self.assertEqual(numero, 51)
+
+    def test_str_method(self):
+        """Testa método __str__."""
+        ContadorSenha.proximo_numero(self.hoje, "C")
+        contador = ContadorSenha.objects.get(dia=self.hoje, tipo_senha="C")
+        self.assertIn("C", str(contador))
+        self.assertIn("1", str(contador))
+
+
+class GerarSenhaPacienteTest(TestCase):
+    """Testes para a geração de senha via signal usando o contador."""
+
+    def test_senhas_sequenciais_por_tipo(self):
+        """Testa que pacientes recebem senhas sequenciais do seu tipo."""
+        p1 = Paciente.objects.create(nome_completo="Um", tipo_senha="G")
+        p2 = Paciente.objects.create(nome_completo="Dois", tipo_senha="G")
+        p3 = Paciente.objects.create(nome_completo="Três", tipo_senha="NH")
+        self.assertEqual(p1.senha, "G001")
+        self.assertEqual(p2.senha, "G002")
+        self.assertEqual(p3.senha, "NH001")
+        self.assertEqual(p1.dia_senha, timezone.localdate())
+
+    def test_numero_nao_reaproveitado_apos_exclusao(self):
+        """Testa que excluir um paciente não faz a senha ser reemitida."""
+        p1 = Paciente.objects.create(nome_completo="Um", tipo_senha="E")
+        p1.delete()
+        p2 = Paciente.objects.create(nome_completo="Dois", tipo_senha="E")
+        self.assertEqual(p2.senha, "E002")
+
+    def test_recadastro_recebe_nova_senha(self):
+        """Testa que limpar a senha de um paciente gera um novo número."""
+        p1 = Paciente.objects.create(nome_completo="Um", tipo_senha="G")
+        p1.senha = None
+        p1.save()
+        self.assertEqual(p1.senha, "G002")
+
+    def test_senha_manual_preservada(self):
+        """Testa que senhas informadas manualmente não passam pelo contador."""
+        p1 = Paciente.objects.create(nome_completo="Um", tipo_senha="G", senha="G001")
+        self.assertIsNone(p1.dia_senha)
+        self.assertFalse(ContadorSenha.objects.exists())
+
+    def test_senha_unica_por_dia(self):
+        """Testa a restrição de unicidade de (dia, senha)."""
+        p1 = Paciente.objects.create(nome_completo="Um", tipo_senha="G")
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Paciente.objects.create(
+                nome_completo="Dois",
+                tipo_senha="G",
+                senha=p1.senha,
+                dia_senha=p1.dia_senha,
+            )
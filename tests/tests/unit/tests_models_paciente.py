@@ -1,3 +1,6 @@
+import datetime
+from zoneinfo import ZoneInfo
+
 from django.test import TestCase
 from django.utils import timezone
 
@@ -163,6 +166,32 @@ class PacienteModelTest(TestCase):
         self.assertGreaterEqual(paciente.horario_geracao_senha, before)
         self.assertLessEqual(paciente.horario_geracao_senha, after)
 
+    def test_dia_e_periodo_derivados_no_fuso_local(self):
+        """Testa que dia_atendimento e periodo seguem America/Sao_Paulo."""
+        paciente = Paciente.objects.create(**self.paciente_data)
+        self.assertEqual(paciente.dia_atendimento, timezone.localdate())
+
+        # 01:30 UTC do dia 2 ainda é 22:30 do dia 1 em São Paulo
+        paciente.horario_geracao_senha = datetime.datetime(
+            2025, 3, 2, 1, 30, tzinfo=datetime.timezone.utc
+        )
+        paciente.save()
+        self.assertEqual(paciente.dia_atendimento, datetime.date(2025, 3, 1))
+        self.assertIsNone(paciente.periodo)
+
+        # O agendamento, quando existe, define o período
+        paciente.horario_agendamento = datetime.datetime(
+            2025, 3, 1, 9, 0, tzinfo=ZoneInfo("America/Sao_Paulo")
+        )
+        paciente.save()
+        self.assertEqual(paciente.periodo, "manha")
+        paciente.horario_agendamento = datetime.datetime(
+            2025, 3, 1, 14, 0, tzinfo=ZoneInfo("America/Sao_Paulo")
+        )
+        paciente.save()
+        paciente.refresh_from_db()
+        self.assertEqual(paciente.periodo, "tarde")
+
     def test_atendido_default_false(self):
         """Testa que atendido tem default False."""
         paciente = Paciente.objects.create(**self.paciente_data)
@@ -0,0 +1,180 @@
+import datetime
+
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core import presenca
+from core.models import CustomUser, Presenca, RegistroDeAcesso, SessaoUsuario
+
+
+class PresencaTest(TestCase):
+    """Testes para a presença dos usuários (core.presenca)."""
+
+    def setUp(self):
+        caches["presenca"].clear()
+        self.admin = CustomUser.objects.create_user(
+            cpf="11122233344",
+            username="11122233344",
+            password="adminpass",
+            funcao="administrador",
+        )
+        self.guichista = CustomUser.objects.create_user(
+            cpf="22233344455",
+            username="22233344455",
+            password="guichepass",
+            funcao="guiche",
+        )
+
+    def test_sinais_gravados_no_banco_uma_vez_por_intervalo(self):
+        agora = timezone.now()
+        presenca.registrar(self.guichista.pk, agora)
+        self.assertEqual(Presenca.objects.get().visto_em, agora)
+
+        depois = agora + datetime.timedelta(seconds=30)
+        with CaptureQueriesContext(connection) as consultas:
+            presenca.registrar(self.guichista.pk, depois)
+        self.assertEqual(len(consultas), 0)
+        self.assertEqual(
+            presenca.vistos([self.guichista.pk]), {self.guichista.pk: depois}
+        )
+
+        # Passado o intervalo (aqui, a chave do intervalo expirada), um upsert
+        caches["presenca"].delete(f"presenca:{self.guichista.pk}:gravada")
+        presenca.registrar(self.guichista.pk, depois)
+        self.assertEqual(Presenca.objects.get().visto_em, depois)
+
+    def test_banco_quando_o_cache_nao_tem(self):
+        agora = timezone.now()
+        presenca.registrar(self.guichista.pk, agora)
+        caches["presenca"].clear()
+
+        self.assertEqual(
+            presenca.vistos([self.guichista.pk, self.admin.pk]),
+            {self.guichista.pk: agora},
+        )
+
+    def test_encerrar(self):
+        presenca.registrar(self.guichista.pk)
+        presenca.encerrar(self.guichista.pk)
+
+        self.assertEqual(presenca.vistos([self.guichista.pk]), {})
+        self.assertFalse(Presenca.objects.exists())
+
+    def _sessao(self, usuario, expira_em=None):
+        return SessaoUsuario.objects.create(
+            chave=f"sessao{usuario.pk}",
+            usuario=usuario,
+            expira_em=expira_em or timezone.now() + datetime.timedelta(days=1),
+        )
+
+    def test_situacao(self):
+        agora = timezone.now()
+        usuarios = []
+        for minutos in (0, 3, 6):
+            usuario = CustomUser.objects.create_user(
+                cpf=f"4445556667{minutos}", username=f"4445556667{minutos}"
+            )
+            self._sessao(usuario)
+            Presenca.objects.create(
+                usuario=usuario, visto_em=agora - datetime.timedelta(minutes=minutos)
+            )
+            usuarios.append(usuario.pk)
+        # Sinal recente, mas com a sessão expirada
+        self._sessao(self.guichista, agora - datetime.timedelta(seconds=1))
+        Presenca.objects.create(usuario=self.guichista, visto_em=agora)
+
+        with CaptureQueriesContext(connection) as consultas:
+            situacoes = {
+                usuario.pk: usuario.situacao
+                for usuario in presenca.anotar_situacao(CustomUser.objects.all(), agora)
+            }
+
+        self.assertEqual(len(consultas), 1)
+        self.assertEqual(
+            [situacoes[pk] for pk in usuarios], ["ativo", "inativo", "offline"]
+        )
+        self.assertEqual(situacoes[self.guichista.pk], "offline")
+        self.assertEqual(situacoes[self.admin.pk], "offline")
+
+    def test_situacao_usa_o_sinal_do_cache(self):
+        agora = timezone.now()
+        self._sessao(self.guichista)
+        presenca.registrar(self.guichista.pk, agora - datetime.timedelta(minutes=4))
+        # Sinal recente, ainda não gravado no banco (mesmo intervalo)
+        presenca.registrar(self.guichista.pk, agora)
+
+        def situacao():
+            usuarios = presenca.anotar_situacao(
+                CustomUser.objects.filter(pk=self.guichista.pk), agora
+            )
+            return usuarios[0].situacao
+
+        self.assertEqual(situacao(), "ativo")
+        # Sem o cache, vale a presença gravada
+        caches["presenca"].clear()
+        self.assertEqual(situacao(), "inativo")
+
+    def test_indice_de_sessoes(self):
+        self._sessao(self.guichista, timezone.now() - datetime.timedelta(days=1))
+        self.client.login(cpf="22233344455", password="guichepass")
+        chave = self.client.session.session_key
+
+        # Login: a sessão nova entra e a expirada sai
+        self.assertEqual(
+            list(SessaoUsuario.objects.values_list("chave", "usuario")),
+            [(chave, self.guichista.pk)],
+        )
+
+        self.client.get(reverse("logout"))
+        self.assertFalse(SessaoUsuario.objects.exists())
+
+    def test_registrar_atividade_nao_grava_registro_de_acesso(self):
+        self.client.login(cpf="22233344455", password="guichepass")
+        logins = RegistroDeAcesso.objects.count()
+
+        for _ in range(3):
+            response = self.client.post(reverse("administrador:registrar_atividade"))
+            self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(RegistroDeAcesso.objects.count(), logins)
+        self.assertIn(self.guichista.pk, presenca.vistos([self.guichista.pk]))
+
+    def test_listar_funcionarios(self):
+        outro = CustomUser.objects.create_user(
+            cpf="33344455566", username="33344455566", funcao="recepcionista"
+        )
+        agora = timezone.now()
+        for usuario, minutos in ((self.guichista, 3), (outro, 10)):
+            self._sessao(usuario)
+            presenca.registrar(usuario.pk, agora - datetime.timedelta(minutes=minutos))
+        self.client.login(cpf="11122233344", password="adminpass")
+
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(reverse("administrador:listar_funcionarios"))
+
+        # Só a sessão da própria requisição é lida, sem varrer a tabela
+        self.assertEqual(
+            [
+                consulta["sql"]
+                for consulta in consultas.captured_queries
+                if "django_session" in consulta["sql"]
+                and '"session_key" = ' not in consulta["sql"]
+            ],
+            [],
+        )
+
+        self.assertEqual(
+            response.context["usuarios_online_ativos_ids"], [self.admin.pk]
+        )
+        self.assertEqual(
+            response.context["usuarios_online_inativos_ids"], [self.guichista.pk]
+        )
+        self.assertEqual(response.context["usuarios_offline_ids"], [outro.pk])
+
+        # Logout: offline na hora
+        self.client.get(reverse("logout"))
+        self.assertEqual(presenca.vistos([self.admin.pk]), {})
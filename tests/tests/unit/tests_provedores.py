@@ -0,0 +1,86 @@
+import json
+import os
+import tempfile
+
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, override_settings
+
+from core.provedores import gateway_twilio_falso, provedor
+from core.twilio_falso import ServidorTwilioFalso
+from core.utils import enviar_sms_ou_whatsapp, enviar_whatsapp
+
+SEM_CREDENCIAIS = {
+    "TWILIO_ACCOUNT_SID": None,
+    "TWILIO_AUTH_TOKEN": None,
+    "TWILIO_WHATSAPP_NUMBER": None,
+}
+
+
+@override_settings(**SEM_CREDENCIAIS)
+class ProvedoresTest(SimpleTestCase):
+    """Testes para os provedores de envio selecionáveis nas configurações."""
+
+    def setUp(self):
+        caches["notificacoes"].clear()
+
+    @override_settings(NOTIFICACOES_BACKEND="console")
+    def test_console_sem_credenciais(self):
+        with self.assertLogs("core.provedores", "INFO") as logs:
+            resultado = enviar_sms_ou_whatsapp("+5511912345678", "Olá")
+
+        self.assertEqual(resultado["status"], "success")
+        self.assertEqual(resultado["message_type"], "sms")
+        self.assertTrue(resultado["sid"].startswith("SM"))
+        self.assertIn("+5511912345678: Olá", logs.output[0])
+
+    def test_arquivo(self):
+        with tempfile.TemporaryDirectory() as diretorio:
+            arquivo = os.path.join(diretorio, "mensagens.jsonl")
+            with override_settings(
+                NOTIFICACOES_BACKEND="file", NOTIFICACOES_ARQUIVO=arquivo
+            ):
+                enviar_whatsapp("+5511912345678", "Primeira")
+                enviar_sms_ou_whatsapp("+5511912345678", "Segunda")
+            with open(arquivo) as f:
+                linhas = [json.loads(linha) for linha in f]
+
+        self.assertEqual(
+            [(m["to"], m["body"]) for m in linhas],
+            [
+                ("whatsapp:+5511912345678", "Primeira"),
+                ("+5511912345678", "Segunda"),
+            ],
+        )
+
+    def test_http_fake(self):
+        """Testa o envio ao servidor falso sem credenciais reais."""
+        with ServidorTwilioFalso() as servidor, override_settings(
+            NOTIFICACOES_BACKEND="http-fake", TWILIO_API_URL=servidor.url
+        ):
+            resultado = enviar_whatsapp("+5511912345678", "Olá")
+            gateway_twilio_falso.fechar()
+
+        self.assertEqual(resultado["status"], "success")
+        self.assertEqual(servidor.mensagens[0]["to"], "whatsapp:+5511912345678")
+
+    def test_http_fake_taxa_de_erros(self):
+        """Testa que os erros sorteados pelo servidor falso são transitórios."""
+        with ServidorTwilioFalso(taxa_erros=1.0) as servidor, override_settings(
+            NOTIFICACOES_BACKEND="http-fake", TWILIO_API_URL=servidor.url
+        ):
+            resultado = enviar_whatsapp("+5511912345678", "Olá")
+            gateway_twilio_falso.fechar()
+
+        self.assertEqual(resultado["status"], "error")
+        self.assertTrue(resultado["transitorio"])
+        self.assertEqual(servidor.erros, 1)
+
+    def test_twilio_exige_credenciais(self):
+        resultado = enviar_whatsapp("+5511912345678", "Olá")
+        self.assertIn("Credenciais Twilio não configuradas", resultado["error"])
+
+    @override_settings(NOTIFICACOES_BACKEND="pombo")
+    def test_backend_invalido(self):
+        with self.assertRaises(ImproperlyConfigured):
+            provedor()
@@ -0,0 +1,210 @@
+import datetime
+import io
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import (
+    Chamada,
+    ChamadaProfissional,
+    CustomUser,
+    Guiche,
+    Paciente,
+    ResumoGuicheHora,
+    ResumoPacientesHora,
+    ResumoProfissionalHora,
+)
+from core.resumos import reconstruir, truncar_hora
+
+
+class ResumosTest(TestCase):
+    """Testes para os resumos por hora mantidos pelos sinais."""
+
+    def setUp(self):
+        self.guichista = CustomUser.objects.create_user(
+            cpf="22233344455", username="22233344455", funcao="guiche"
+        )
+        self.profissional = CustomUser.objects.create_user(
+            cpf="33344455566", username="33344455566", funcao="profissional_saude"
+        )
+        self.guiche = Guiche.objects.create(numero=1, funcionario=self.guichista)
+
+    def _paciente(self, tipo_senha="G", **campos):
+        return Paciente.objects.create(
+            nome_completo="Paciente", tipo_senha=tipo_senha, **campos
+        )
+
+    def _resumo(self, paciente):
+        return ResumoPacientesHora.objects.get(
+            hora=truncar_hora(paciente.horario_geracao_senha),
+            tipo_senha=paciente.tipo_senha,
+        )
+
+    def test_paciente_novo_e_atendido(self):
+        paciente = self._paciente()
+        self._paciente()
+        resumo = self._resumo(paciente)
+        self.assertEqual((resumo.pacientes, resumo.atendidos), (2, 0))
+
+        paciente.atendido = True
+        paciente.save()
+        paciente.save()
+        resumo.refresh_from_db()
+        self.assertEqual((resumo.pacientes, resumo.atendidos), (2, 1))
+
+        # Carregado pela metade: o estado anterior vem do banco
+        parcial = Paciente.objects.only("pk").get(pk=paciente.pk)
+        parcial.atendido = False
+        parcial.save(update_fields=["atendido"])
+        resumo.refresh_from_db()
+        self.assertEqual((resumo.pacientes, resumo.atendidos), (2, 0))
+
+    def test_recadastro_move_de_balde(self):
+        paciente = self._paciente()
+        antes = self._resumo(paciente)
+
+        paciente = Paciente.objects.get(pk=paciente.pk)
+        paciente.tipo_senha = "P"
+        paciente.horario_geracao_senha += datetime.timedelta(hours=2)
+        paciente.save()
+
+        antes.refresh_from_db()
+        self.assertEqual(antes.pacientes, 0)
+        self.assertEqual(self._resumo(paciente).pacientes, 1)
+
+    def test_exclusao_subtrai(self):
+        paciente = self._paciente()
+        Chamada.objects.create(paciente=paciente, guiche=self.guiche, acao="chamada")
+        ChamadaProfissional.objects.create(
+            paciente=paciente, profissional_saude=self.profissional, acao="chamada"
+        )
+
+        Paciente.objects.get(pk=paciente.pk).delete()
+
+        self.assertEqual(self._resumo(paciente).pacientes, 0)
+        self.assertEqual(ResumoGuicheHora.objects.get().total, 0)
+        self.assertEqual(ResumoProfissionalHora.objects.get().total, 0)
+
+    def test_chamadas_por_acao(self):
+        paciente = self._paciente(tipo_senha="P")
+        for acao in ("chamada", "reanuncio", "reanuncio", "confirmado"):
+            Chamada.objects.create(paciente=paciente, guiche=self.guiche, acao=acao)
+        ChamadaProfissional.objects.create(
+            paciente=paciente, profissional_saude=self.profissional, acao="encaminha"
+        )
+
+        self.assertEqual(
+            dict(ResumoGuicheHora.objects.values_list("acao", "total")),
+            {"chamada": 1, "reanuncio": 2, "confirmado": 1},
+        )
+        resumo = ResumoProfissionalHora.objects.get()
+        self.assertEqual(
+            (resumo.tipo_senha, resumo.profissional_saude, resumo.acao, resumo.total),
+            ("P", self.profissional, "encaminha", 1),
+        )
+
+    def test_reconstruir_igual_ao_incremental(self):
+        """Testa que a reconstrução chega aos mesmos baldes dos sinais."""
+        for indice, tipo_senha in enumerate(("G", "G", "P", None)):
+            paciente = self._paciente(tipo_senha=tipo_senha, atendido=indice % 2 == 0)
+            Chamada.objects.create(
+                paciente=paciente, guiche=self.guiche, acao="confirmado"
+            )
+            ChamadaProfissional.objects.create(
+                paciente=paciente, profissional_saude=self.profissional, acao="chamada"
+            )
+        campos = {
+            ResumoPacientesHora: ("hora", "tipo_senha", "pacientes", "atendidos"),
+            ResumoGuicheHora: ("hora", "tipo_senha", "guiche", "acao", "total"),
+            ResumoProfissionalHora: (
+                "hora",
+                "tipo_senha",
+                "profissional_saude",
+                "acao",
+                "total",
+            ),
+        }
+        incremental = {
+            modelo: sorted(modelo.objects.values_list(*nomes))
+            for modelo, nomes in campos.items()
+        }
+
+        for modelo in campos:
+            modelo.objects.all().delete()
+        call_command("reconstruir_resumos", "--dias", "1", stdout=io.StringIO())
+
+        for modelo, nomes in campos.items():
+            self.assertEqual(
+                sorted(modelo.objects.values_list(*nomes)), incremental[modelo]
+            )
+
+    def test_reconstruir_periodo_preserva_o_resto(self):
+        paciente = self._paciente()
+        antigo = timezone.now() - datetime.timedelta(days=10)
+        ResumoPacientesHora.objects.create(
+            hora=truncar_hora(antigo), tipo_senha="G", pacientes=7
+        )
+        ResumoPacientesHora.objects.filter(tipo_senha="G").exclude(
+            hora=truncar_hora(antigo)
+        ).update(pacientes=99)
+
+        reconstruir(timezone.now() - datetime.timedelta(days=1))
+
+        self.assertEqual(self._resumo(paciente).pacientes, 1)
+        self.assertEqual(
+            ResumoPacientesHora.objects.get(hora=truncar_hora(antigo)).pacientes, 7
+        )
+
+
+class DashboardResumosTest(TestCase):
+    """Testes para os blocos do dashboard lidos dos resumos."""
+
+    def setUp(self):
+        admin = CustomUser.objects.create_user(
+            cpf="11122233344",
+            username="11122233344",
+            password="adminpass",
+            funcao="administrador",
+        )
+        guichista = CustomUser.objects.create_user(
+            cpf="22233344455", username="22233344455", funcao="guiche"
+        )
+        self.profissional = CustomUser.objects.create_user(
+            cpf="33344455566",
+            username="33344455566",
+            first_name="Ana",
+            funcao="profissional_saude",
+        )
+        self.guiche = Guiche.objects.create(numero=1, funcionario=guichista)
+        self.client.force_login(admin)
+        caches["dashboard"].clear()
+
+    def test_contagens(self):
+        for tipo_senha, atendido in (("G", True), ("G", False), ("P", True)):
+            paciente = Paciente.objects.create(
+                nome_completo="Paciente", tipo_senha=tipo_senha, atendido=atendido
+            )
+            for acao in ("chamada", "reanuncio", "confirmado"):
+                Chamada.objects.create(paciente=paciente, guiche=self.guiche, acao=acao)
+            ChamadaProfissional.objects.create(
+                paciente=paciente,
+                profissional_saude=self.profissional,
+                acao="confirmado",
+            )
+
+        def bloco(nome):
+            response = self.client.get(
+                reverse("administrador:dashboard_bloco", args=[nome]), {"period": 1}
+            )
+            return response.json()["dados"]
+
+        visao_geral = bloco("visao-geral")
+        self.assertEqual(visao_geral["total_pacientes"], 3)
+        self.assertEqual(visao_geral["total_atendidos"], 2)
+        self.assertEqual(visao_geral["total_aguardando"], 1)
+        self.assertEqual(bloco("volume-tipo")["data"], [2, 1])
+        self.assertEqual(bloco("qualidade")["taxa_reanuncio"], 33.3)
+        self.assertEqual(bloco("profissionais"), {"labels": ["Ana"], "data": [3]})
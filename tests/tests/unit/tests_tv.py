@@ -0,0 +1,289 @@
+import json
+import threading
+import time
+from unittest.mock import patch
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.models import Chamada, ChamadaProfissional, CustomUser, Guiche, Paciente
+from core.tv import notificar, obter_payload, transmitir, versao
+
+
+def _dados(evento):
+    evento = evento.decode() if isinstance(evento, bytes) else evento
+    assert evento.startswith("data: "), evento
+    return json.loads(evento[len("data: ") :])
+
+
+class TransmitirTest(TestCase):
+    """Testes para o fluxo SSE genérico das TVs."""
+
+    def setUp(self):
+        caches["tv"].clear()
+
+    def test_envia_estado_inicial_e_alteracoes(self):
+        """Testa que o payload é montado na conexão e a cada notificação."""
+        montagens = []
+
+        def montar():
+            montagens.append(1)
+            return {"n": len(montagens)}
+
+        fluxo = transmitir("tv1", montar)
+        self.assertTrue(next(fluxo).startswith("retry:"))
+        self.assertEqual(_dados(next(fluxo)), {"n": 1})
+
+        notificar("tv1")
+        self.assertEqual(_dados(next(fluxo)), {"n": 2})
+        self.assertEqual(len(montagens), 2)
+
+    def test_payload_compartilhado_entre_conexoes(self):
+        """Testa que conexões simultâneas montam o payload uma vez por versão."""
+        montagens = []
+        notificar("tv1")
+        fluxos = [
+            transmitir("tv1", lambda: montagens.append(1) or {}) for _ in range(5)
+        ]
+        for fluxo in fluxos:
+            next(fluxo)
+            next(fluxo)
+        self.assertEqual(len(montagens), 1)
+
+    @override_settings(TV_SSE_DURACAO=1)
+    def test_sem_alteracoes_nao_consulta(self):
+        """Testa que sem notificações o payload não é remontado."""
+        montar = []
+        fluxo = transmitir("tv2", lambda: montar.append(1) or {})
+        inicio = time.monotonic()
+        eventos = list(fluxo)
+        self.assertEqual(len(montar), 1)
+        self.assertEqual(len(eventos), 2)
+        # A conexão termina sozinha para o navegador reconectar
+        self.assertLess(time.monotonic() - inicio, 3)
+
+    @override_settings(TV_SSE_DURACAO=1)
+    @patch("core.tv.INTERVALO_HEARTBEAT", 0.4)
+    def test_heartbeat_em_conexao_ociosa(self):
+        """Testa que conexões ociosas recebem comentários de keep-alive."""
+        eventos = list(transmitir("tv1", dict))
+        self.assertIn(": ping\n\n", eventos)
+
+
+class ObterPayloadTest(TestCase):
+    """Testes para o cache dos payloads das TVs."""
+
+    def setUp(self):
+        caches["tv"].clear()
+
+    def test_monta_uma_vez_por_versao(self):
+        """Testa que o payload só é remontado após uma notificação."""
+        montagens = []
+
+        def montar():
+            montagens.append(1)
+            return {"n": len(montagens)}
+
+        self.assertEqual(obter_payload("tv1", montar), {"n": 1})
+        self.assertEqual(obter_payload("tv1", montar), {"n": 1})
+        notificar("tv1")
+        self.assertEqual(obter_payload("tv1", montar), {"n": 2})
+        # A versão da outra TV não é afetada
+        self.assertEqual(obter_payload("tv2", montar), {"n": 3})
+        self.assertEqual(obter_payload("tv2", montar), {"n": 3})
+
+    def test_falhas_simultaneas_coalescidas(self):
+        """Testa que requisições simultâneas montam o payload uma única vez."""
+        montagens = []
+        resultados = []
+
+        def montar():
+            montagens.append(1)
+            time.sleep(0.1)
+            return {"ok": True}
+
+        threads = [
+            threading.Thread(
+                target=lambda: resultados.append(obter_payload("tv2", montar))
+            )
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(montagens), 1)
+        self.assertEqual(resultados, [{"ok": True}] * 8)
+
+
+class ViewsTvCacheTest(TestCase):
+    """Testes para as páginas e APIs das TVs servidas pelo cache."""
+
+    def setUp(self):
+        caches["tv"].clear()
+        self.paciente = Paciente.objects.create(nome_completo="Ana", tipo_senha="G")
+        self.guiche = Guiche.objects.create(numero=3)
+        self.profissional = CustomUser.objects.create_user(
+            cpf="11122233344",
+            username="11122233344",
+            password="testpass",
+            funcao="profissional_saude",
+            sala=7,
+            first_name="Bia",
+        )
+
+    def test_tv1_sem_consultas_com_cache_quente(self):
+        """Testa que a TV1 não consulta o banco enquanto não há Chamada nova."""
+        Chamada.objects.create(
+            paciente=self.paciente, guiche=self.guiche, acao="chamada"
+        )
+        self.client.get(reverse("guiche:tv1"))
+
+        with self.assertNumQueries(0):
+            pagina = self.client.get(reverse("guiche:tv1"))
+            api = self.client.get(reverse("guiche:tv1_api"))
+            historico = self.client.get(reverse("guiche:tv1_historico_api"))
+        self.assertContains(pagina, "Ana - Guichê 3")
+        self.assertEqual(api.json()["guiche"], 3)
+        self.assertEqual(historico.json()["historico"], [])
+
+        Chamada.objects.create(
+            paciente=self.paciente, guiche=self.guiche, acao="confirmado"
+        )
+        historico = self.client.get(reverse("guiche:tv1_historico_api"))
+        self.assertEqual(len(historico.json()["historico"]), 1)
+
+    def test_tv2_sem_consultas_com_cache_quente(self):
+        """Testa que a TV2 não consulta o banco enquanto não há chamada nova."""
+        ChamadaProfissional.objects.create(
+            paciente=self.paciente,
+            profissional_saude=self.profissional,
+            acao="confirmado",
+        )
+        self.client.get(reverse("profissional_saude:tv2_api"))
+
+        with self.assertNumQueries(0):
+            pagina = self.client.get(reverse("profissional_saude:tv2"))
+            api = self.client.get(reverse("profissional_saude:tv2_api"))
+        self.assertContains(pagina, "Profissional: Bia")
+        self.assertEqual(api.json()["id"], "")
+
+        chamada = ChamadaProfissional.objects.create(
+            paciente=self.paciente,
+            profissional_saude=self.profissional,
+            acao="chamada",
+        )
+        api = self.client.get(reverse("profissional_saude:tv2_api"))
+        self.assertEqual(api.json()["id"], chamada.id)
+        self.assertEqual(str(api.json()["sala_profissional"]), "7")
+
+
+class EventosTvTest(TestCase):
+    """Testes para os endpoints SSE da TV1 e da TV2."""
+
+    def setUp(self):
+        caches["tv"].clear()
+        self.paciente = Paciente.objects.create(nome_completo="Ana", tipo_senha="G")
+        self.guiche = Guiche.objects.create(numero=3)
+        self.profissional = CustomUser.objects.create_user(
+            cpf="11122233344",
+            username="11122233344",
+            password="testpass",
+            funcao="profissional_saude",
+            sala=7,
+        )
+
+    def _abrir(self, nome_url):
+        response = self.client.get(reverse(nome_url))
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertEqual(response["X-Accel-Buffering"], "no")
+        self.addCleanup(response.close)
+        fluxo = iter(response.streaming_content)
+        next(fluxo)  # retry
+        return fluxo
+
+    def test_tv1_recebe_nova_chamada(self):
+        """Testa que a TV1 recebe chamada atual + histórico ao criar uma Chamada."""
+        fluxo = self._abrir("guiche:tv1_eventos")
+        inicial = _dados(next(fluxo))
+        self.assertEqual(inicial["chamada"]["id"], "")
+        self.assertEqual(inicial["historico"], [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            chamada = Chamada.objects.create(
+                paciente=self.paciente, guiche=self.guiche, acao="chamada"
+            )
+        evento = _dados(next(fluxo))
+        self.assertEqual(evento["chamada"]["id"], chamada.id)
+        self.assertEqual(evento["chamada"]["guiche"], 3)
+        self.assertEqual(evento["chamada"]["senha"], self.paciente.senha)
+
+    def test_tv2_recebe_nova_chamada(self):
+        """Testa que a TV2 recebe a chamada do profissional com a sala."""
+        fluxo = self._abrir("profissional_saude:tv2_eventos")
+        next(fluxo)
+        with self.captureOnCommitCallbacks(execute=True):
+            ChamadaProfissional.objects.create(
+                paciente=self.paciente,
+                profissional_saude=self.profissional,
+                acao="confirmado",
+            )
+        evento = _dados(next(fluxo))
+        self.assertEqual(str(evento["historico"][0]["sala_profissional"]), "7")
+
+    def test_notifica_somente_a_tv_da_chamada(self):
+        """Testa que uma Chamada de guichê não acorda as conexões da TV2."""
+        antes = versao("tv2")
+        with self.captureOnCommitCallbacks(execute=True):
+            Chamada.objects.create(
+                paciente=self.paciente, guiche=self.guiche, acao="chamada"
+            )
+        self.assertEqual(versao("tv2"), antes)
+        self.assertIsNotNone(versao("tv1"))
+
+
+class SnapshotTvTest(TestCase):
+    """Testes para os snapshots com ETag da TV1 e da TV2."""
+
+    def setUp(self):
+        caches["tv"].clear()
+        self.paciente = Paciente.objects.create(nome_completo="Ana", tipo_senha="G")
+        self.guiche = Guiche.objects.create(numero=3)
+
+    def test_tv1_snapshot_e_304(self):
+        """Testa que o snapshot só é reenviado quando há chamada nova."""
+        url = reverse("guiche:tv1_snapshot")
+        Chamada.objects.create(
+            paciente=self.paciente, guiche=self.guiche, acao="chamada"
+        )
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["chamada"]["guiche"], 3)
+        self.assertIn("historico", response.json())
+        etag = response["ETag"]
+
+        # Tela inalterada: payload em cache e corpo vazio
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+        Chamada.objects.create(
+            paciente=self.paciente, guiche=self.guiche, acao="confirmado"
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(len(response.json()["historico"]), 1)
+
+    def test_tv2_snapshot_e_304(self):
+        """Testa o GET condicional do snapshot da TV2."""
+        url = reverse("profissional_saude:tv2_snapshot")
+        response = self.client.get(url)
+        self.assertEqual(response.json()["chamada"]["id"], "")
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
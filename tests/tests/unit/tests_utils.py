@@ -1,23 +1,28 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.http import HttpRequest, HttpResponse
 from django.urls import reverse
-from unittest.mock import patch
+from unittest.mock import ANY, patch
 from core.models import CustomUser
 
 
+@override_settings(
+    TWILIO_ACCOUNT_SID="test_sid",
+    TWILIO_AUTH_TOKEN="test_token",
+    TWILIO_WHATSAPP_NUMBER="+1234567890",
+)
 class UtilsTest(TestCase):
     """Testes para funções utilitárias em core.utils."""
 
-    @patch("core.utils.Client")
+    def setUp(self):
+        from core.provedores import gateway_twilio
+
+        # Cada teste recebe um cliente novo (e o mock de Client em vigor)
+        gateway_twilio.fechar()
+
+    @patch("core.provedores.Client")
     def test_enviar_whatsapp_sucesso(self, mock_client):
         """Testa envio bem-sucedido de WhatsApp."""
         from core.utils import enviar_whatsapp
-        from django.conf import settings
-
-        # Mock das configurações
-        settings.TWILIO_ACCOUNT_SID = "test_sid"
-        settings.TWILIO_AUTH_TOKEN = "test_token"
-        settings.TWILIO_WHATSAPP_NUMBER = "+1234567890"
 
         # Mock do cliente e mensagem
         mock_message = mock_client.return_value.messages.create.return_value
@@ -26,38 +31,27 @@ class UtilsTest(TestCase):
         resultado = enviar_whatsapp("+5511999999999", "Teste mensagem")
 
         self.assertTrue(resultado)
-        mock_client.assert_called_once_with("test_sid", "test_token")
+        mock_client.assert_called_once_with("test_sid", "test_token", http_client=ANY)
         mock_client.return_value.messages.create.assert_called_once_with(
             from_="whatsapp:+1234567890",
             body="Teste mensagem",
             to="whatsapp:+5511999999999",
         )
 
+    @override_settings(TWILIO_ACCOUNT_SID=None)
     def test_enviar_whatsapp_credenciais_ausentes(self):
         """Testa falha quando credenciais Twilio não estão configuradas."""
         from core.utils import enviar_whatsapp
-        from django.conf import settings
-
-        # Simular credenciais ausentes
-        settings.TWILIO_ACCOUNT_SID = None
-        settings.TWILIO_AUTH_TOKEN = "test_token"
-        settings.TWILIO_WHATSAPP_NUMBER = "+1234567890"
 
         resultado = enviar_whatsapp("+5511999999999", "Teste mensagem")
 
         self.assertEqual(resultado["status"], "error")
         self.assertIn("Credenciais Twilio não configuradas", resultado["error"])
 
-    @patch("core.utils.Client")
+    @patch("core.provedores.Client")
     def test_enviar_whatsapp_erro_api(self, mock_client):
         """Testa falha na API do Twilio."""
         from core.utils import enviar_whatsapp
-        from django.conf import settings
-
-        # Mock das configurações
-        settings.TWILIO_ACCOUNT_SID = "test_sid"
-        settings.TWILIO_AUTH_TOKEN = "test_token"
-        settings.TWILIO_WHATSAPP_NUMBER = "+1234567890"
 
         # Mock do cliente para lançar exceção
         mock_client.return_value.messages.create.side_effect = Exception("Erro na API")
@@ -66,7 +60,26 @@ class UtilsTest(TestCase):
 
         self.assertEqual(resultado["status"], "error")
         self.assertEqual(resultado["error"], "Erro na API")
-        mock_client.assert_called_once_with("test_sid", "test_token")
+        mock_client.assert_called_once_with("test_sid", "test_token", http_client=ANY)
+
+    @patch("core.provedores.Client")
+    def test_cliente_reutilizado_entre_envios(self, mock_client):
+        """Testa que o gateway cria um único cliente Twilio por processo."""
+        from core.utils import enviar_sms_ou_whatsapp, enviar_whatsapp
+
+        enviar_whatsapp("+5511999999999", "Primeira")
+        enviar_sms_ou_whatsapp("+5511999999999", "Segunda")
+        enviar_whatsapp("+5511999999999", "Terceira")
+
+        mock_client.assert_called_once()
+        self.assertEqual(mock_client.return_value.messages.create.call_count, 3)
+        http_client = mock_client.call_args.kwargs["http_client"]
+        self.assertEqual(http_client.timeout, (3.05, 10.0))
+
+        # Credenciais novas exigem um cliente novo
+        with override_settings(TWILIO_AUTH_TOKEN="outro_token"):
+            enviar_whatsapp("+5511999999999", "Quarta")
+        self.assertEqual(mock_client.call_count, 2)
 
 
 class DecoratorTest(TestCase):